@@ -1,4 +1,6 @@
 from django.contrib import admin
+from judge import bundle_store
+from .forms import TestsOcultosFormMixin
 from .models import (Torneo, MentorDistrito, Reto, CasoDePrueba, ParticipacionTributo, 
                      RankingDistrito, AyudaMentor, PresupuestoMentor)
 
@@ -50,14 +52,22 @@ class CasoDePruebaInline(admin.TabularInline):
     fields = ['nombre', 'entrada', 'salida_esperada', 'is_visible', 'es_ejemplo', 'puntos', 'orden']
 
 
+class RetoAdminForm(TestsOcultosFormMixin):
+    class Meta:
+        model = Reto
+        exclude = ['paquete_tests']
+
+
 @admin.register(Reto)
 class RetoAdmin(admin.ModelAdmin):
+    form = RetoAdminForm
     list_display = ['titulo', 'torneo', 'dificultad', 'tipo', 'puntos_base', 'tiene_validacion_automatica', 'fecha_publicacion', 'is_activo']
     list_filter = ['dificultad', 'tipo', 'is_activo', 'tiene_validacion_automatica', 'torneo']
     search_fields = ['titulo', 'descripcion']
     date_hierarchy = 'fecha_publicacion'
-    readonly_fields = ['fecha_creacion', 'fecha_actualizacion']
+    readonly_fields = ['fecha_creacion', 'fecha_actualizacion', 'huella_tests']
     inlines = [CasoDePruebaInline]
+    actions = ['compilar_casos_de_prueba']
     
     fieldsets = (
         ('Información Básica', {
@@ -76,7 +86,7 @@ class RetoAdmin(admin.ModelAdmin):
             'fields': ('is_activo', 'is_visible', 'archivo_datos')
         }),
         ('⚙️ Sistema de Juez Automático', {
-            'fields': ('tiene_validacion_automatica', 'lenguajes_permitidos', 'tests_ocultos', 'limite_tiempo', 'limite_memoria'),
+            'fields': ('tiene_validacion_automatica', 'lenguajes_permitidos', 'tests_ocultos', 'huella_tests', 'limite_tiempo', 'limite_memoria', 'limite_salida', 'fail_fast', 'checker', 'checker_config'),
             'description': '⚠️ IMPORTANTE: Los tests_ocultos NUNCA serán visibles para tributos. Solo para evaluación automática.',
             'classes': ('wide',)
         }),
@@ -85,6 +95,24 @@ class RetoAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def huella_tests(self, obj):
+        """Huella del paquete de tests ocultos"""
+        return obj.paquete_tests_id or '-'
+    huella_tests.short_description = 'Paquete de Tests'
+    
+    @admin.action(description='Compilar los casos de prueba en los tests ocultos (los reemplaza)')
+    def compilar_casos_de_prueba(self, request, queryset):
+        count = 0
+        for reto in queryset:
+            tests = bundle_store.compile_casos_de_prueba(reto.casos_prueba.order_by('orden'))
+            if not tests:
+                continue
+            lenguajes = [l.strip().lower() for l in reto.lenguajes_permitidos.split(',')]
+            reto.tests_ocultos = bundle_store.for_languages(tests, lenguajes)
+            reto.save()
+            count += 1
+        self.message_user(request, f'{count} retos con los casos de prueba compilados')
 
 
 @admin.register(CasoDePrueba)
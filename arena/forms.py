@@ -31,7 +31,41 @@ class TorneoForm(forms.ModelForm):
         }
 
 
-class RetoForm(forms.ModelForm):
+class TestsOcultosFormMixin(forms.ModelForm):
+    """
+    Edición de los tests ocultos del reto como JSON; al guardar se crea el
+    paquete de tests (Reto.tests_ocultos no es un campo del modelo)
+    """
+    tests_ocultos = forms.JSONField(
+        required=False,
+        label='Tests Ocultos',
+        widget=forms.Textarea(attrs={
+            'class': 'form-control font-monospace',
+            'rows': 12,
+            'placeholder': '{"python": [{"name": "Test 1", "function_call": {"name": "funcion", "args": [2, 3]}, "expected": "5"}]}',
+            'style': 'font-family: monospace; font-size: 13px;'
+        }),
+        help_text='Tests ocultos en formato JSON por lenguaje. NUNCA serán visibles para tributos.'
+    )
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['tests_ocultos'].initial = self.instance.tests_ocultos
+    
+    def clean_tests_ocultos(self):
+        tests = self.cleaned_data.get('tests_ocultos') or {}
+        if not isinstance(tests, dict):
+            raise forms.ValidationError('Los tests ocultos deben ser un objeto JSON por lenguaje')
+        return tests
+    
+    def save(self, commit=True):
+        if 'tests_ocultos' in self.changed_data or not self.instance.pk:
+            self.instance.tests_ocultos = self.cleaned_data.get('tests_ocultos') or {}
+        return super().save(commit=commit)
+
+
+class RetoForm(TestsOcultosFormMixin):
     """Formulario para crear y editar retos"""
     
     class Meta:
@@ -43,7 +77,8 @@ class RetoForm(forms.ModelForm):
             'fecha_publicacion', 'fecha_limite',
             'is_activo', 'is_visible',
             'tiene_validacion_automatica', 'lenguajes_permitidos',
-            'tests_ocultos', 'limite_tiempo', 'limite_memoria',
+            'tests_ocultos', 'limite_tiempo', 'limite_memoria', 'limite_salida', 'fail_fast',
+            'checker', 'checker_config',
             'archivo_datos'
         ]
         widgets = {
@@ -62,12 +97,6 @@ class RetoForm(forms.ModelForm):
             'is_visible': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'tiene_validacion_automatica': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'lenguajes_permitidos': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'python,javascript,java'}),
-            'tests_ocultos': forms.Textarea(attrs={
-                'class': 'form-control font-monospace',
-                'rows': 12,
-                'placeholder': '{"python": [{"name": "Test 1", "function_call": {"name": "funcion", "args": [2, 3]}, "expected": "5"}]}',
-                'style': 'font-family: monospace; font-size: 13px;'
-            }),
             'limite_tiempo': forms.NumberInput(attrs={
                 'class': 'form-control',
                 'placeholder': '5.0',
@@ -79,12 +108,28 @@ class RetoForm(forms.ModelForm):
                 'placeholder': '256',
                 'min': '64'
             }),
+            'limite_salida': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'placeholder': '16',
+                'min': '1'
+            }),
+            'fail_fast': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+            'checker': forms.Select(attrs={'class': 'form-control'}),
+            'checker_config': forms.Textarea(attrs={
+                'class': 'form-control font-monospace',
+                'rows': 2,
+                'placeholder': '{"epsilon_abs": 1e-6, "epsilon_rel": 1e-6}',
+                'style': 'font-family: monospace; font-size: 13px;'
+            }),
             'archivo_datos': forms.FileInput(attrs={'class': 'form-control'}),
         }
         help_texts = {
-            'tests_ocultos': 'Tests ocultos en formato JSON por lenguaje. NUNCA serán visibles para tributos.',
             'limite_tiempo': 'Tiempo máximo de ejecución en segundos (ej: 5.0)',
             'limite_memoria': 'Memoria máxima en MB (ej: 256)',
+            'limite_salida': 'Salida máxima en MB (ej: 16); si se excede el veredicto es OLE',
+            'fail_fast': 'Detener la evaluación en el primer test oculto que falla',
+            'checker': 'Cómo se compara la salida de cada test (un test puede indicar otro en su campo "checker")',
+            'checker_config': 'Opciones del checker en JSON (tolerancias del flotante, programa del checker externo)',
         }
 
 
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arena', '0004_reto_limite_memoria_reto_limite_tiempo_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reto',
+            name='fail_fast',
+            field=models.BooleanField(default=False, help_text='La evaluación se corta en el primer test oculto que falla (los puntos cuentan solo los tests pasados hasta ahí)', verbose_name='Detener en el Primer Fallo'),
+        ),
+    ]
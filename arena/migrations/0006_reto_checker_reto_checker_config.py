@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arena', '0005_reto_fail_fast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reto',
+            name='checker',
+            field=models.CharField(choices=[('exacto', 'Exacto'), ('tokens', 'Tokens (ignora espacios)'), ('flotante', 'Flotante con tolerancia'), ('lineas_desordenadas', 'Líneas en cualquier orden'), ('programa', 'Programa externo')], default='exacto', help_text='Cómo se compara la salida de cada test con la esperada', max_length=25, verbose_name='Checker'),
+        ),
+        migrations.AddField(
+            model_name='reto',
+            name='checker_config',
+            field=models.JSONField(blank=True, default=dict, help_text='Ej: {"epsilon_abs": 1e-6, "epsilon_rel": 1e-6} o {"programa": "mi_checker"}', verbose_name='Opciones del Checker'),
+        ),
+    ]
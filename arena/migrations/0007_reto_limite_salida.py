@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:32
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arena', '0006_reto_checker_reto_checker_config'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reto',
+            name='limite_salida',
+            field=models.IntegerField(default=16, help_text='Salida máxima (stdout + stderr) de la ejecución; si se excede el veredicto es OLE', validators=[django.core.validators.MinValueValidator(1)], verbose_name='Límite de Salida (MB)'),
+        ),
+    ]
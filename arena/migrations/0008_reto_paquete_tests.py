@@ -0,0 +1,54 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:09
+
+import hashlib
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mover_tests_a_paquetes(apps, schema_editor):
+    """Guarda los tests ocultos de cada reto en un paquete (ver judge/bundle_store.py)"""
+    Reto = apps.get_model('arena', 'Reto')
+    PaqueteTests = apps.get_model('judge', 'PaqueteTests')
+    for reto in Reto.objects.only('pk', 'tests_ocultos').iterator():
+        if not reto.tests_ocultos:
+            continue
+        canonical = json.dumps(
+            reto.tests_ocultos, sort_keys=True, separators=(',', ':'), ensure_ascii=False
+        ).encode('utf-8')
+        huella = hashlib.sha256(canonical).hexdigest()
+        PaqueteTests.objects.get_or_create(
+            huella=huella,
+            defaults={'contenido': zlib.compress(canonical), 'tamano': len(canonical)}
+        )
+        Reto.objects.filter(pk=reto.pk).update(paquete_tests_id=huella)
+
+
+def restaurar_tests_ocultos(apps, schema_editor):
+    Reto = apps.get_model('arena', 'Reto')
+    for reto in Reto.objects.exclude(paquete_tests=None).select_related('paquete_tests').iterator():
+        tests = json.loads(zlib.decompress(bytes(reto.paquete_tests.contenido)).decode('utf-8'))
+        Reto.objects.filter(pk=reto.pk).update(tests_ocultos=tests)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arena', '0007_reto_limite_salida'),
+        ('judge', '0010_paquetetests'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reto',
+            name='paquete_tests',
+            field=models.ForeignKey(blank=True, help_text='Huella (SHA-256) del paquete con los tests ocultos por lenguaje', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='retos', to='judge.paquetetests', verbose_name='Paquete de Tests'),
+        ),
+        migrations.RunPython(mover_tests_a_paquetes, restaurar_tests_ocultos),
+        migrations.RemoveField(
+            model_name='reto',
+            name='tests_ocultos',
+        ),
+    ]
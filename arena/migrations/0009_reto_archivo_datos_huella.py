@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arena', '0008_reto_paquete_tests'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reto',
+            name='archivo_datos_huella',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 del archivo de datos (se calcula al subirlo; ver judge/data_cache.py)', max_length=64, verbose_name='Huella del Archivo de Datos'),
+        ),
+        migrations.AlterField(
+            model_name='reto',
+            name='archivo_datos',
+            field=models.FileField(blank=True, help_text='Archivos de datos de prueba (el juez los monta de solo lectura en /data)', null=True, upload_to='retos/datos/'),
+        ),
+    ]
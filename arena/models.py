@@ -1,7 +1,10 @@
+import copy
+
 from django.db import models
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from capitol.models import Personaje, TributoInfo
+from judge.checkers import CHECKER_CHOICES, DEFAULT_CHECKER
 
 
 class Torneo(models.Model):
@@ -155,11 +158,16 @@ class Reto(models.Model):
     )
     
     # Configuración del juez automático
-    tests_ocultos = models.JSONField(
-        default=dict,
+    # Los tests ocultos viven en un paquete inmutable direccionado por su
+    # huella (ver judge/bundle_store.py); el reto solo guarda la referencia
+    paquete_tests = models.ForeignKey(
+        'judge.PaqueteTests',
+        on_delete=models.PROTECT,
+        null=True,
         blank=True,
-        verbose_name='Tests Ocultos',
-        help_text='Tests por lenguaje. Formato: {"python": [...], "java": [...], "javascript": [...]}'
+        related_name='retos',
+        verbose_name='Paquete de Tests',
+        help_text='Huella (SHA-256) del paquete con los tests ocultos por lenguaje'
     )
     limite_tiempo = models.FloatField(
         default=5.0,
@@ -173,6 +181,30 @@ class Reto(models.Model):
         verbose_name='Límite de Memoria (MB)',
         help_text='Memoria máxima permitida para la ejecución'
     )
+    limite_salida = models.IntegerField(
+        default=16,
+        validators=[MinValueValidator(1)],
+        verbose_name='Límite de Salida (MB)',
+        help_text='Salida máxima (stdout + stderr) de la ejecución; si se excede el veredicto es OLE'
+    )
+    fail_fast = models.BooleanField(
+        default=False,
+        verbose_name='Detener en el Primer Fallo',
+        help_text='La evaluación se corta en el primer test oculto que falla (los puntos cuentan solo los tests pasados hasta ahí)'
+    )
+    checker = models.CharField(
+        max_length=25,
+        choices=CHECKER_CHOICES,
+        default=DEFAULT_CHECKER,
+        verbose_name='Checker',
+        help_text='Cómo se compara la salida de cada test con la esperada'
+    )
+    checker_config = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Opciones del Checker',
+        help_text='Ej: {"epsilon_abs": 1e-6, "epsilon_rel": 1e-6} o {"programa": "mi_checker"}'
+    )
     
     # Meta información
     creado_por = models.ForeignKey(Personaje, on_delete=models.SET_NULL, null=True, related_name='retos_creados')
@@ -180,7 +212,17 @@ class Reto(models.Model):
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     
     # Archivos adjuntos
-    archivo_datos = models.FileField(upload_to='retos/datos/', blank=True, null=True, help_text='Archivos de datos de prueba')
+    archivo_datos = models.FileField(upload_to='retos/datos/', blank=True, null=True, help_text='Archivos de datos de prueba (el juez los monta de solo lectura en /data)')
+    archivo_datos_huella = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        verbose_name='Huella del Archivo de Datos',
+        help_text='SHA-256 del archivo de datos (se calcula al subirlo; ver judge/data_cache.py)'
+    )
+    
+    # Tests asignados que aún no se guardaron en un paquete
+    _tests_ocultos_nuevos = None
     
     class Meta:
         verbose_name = 'Reto'
@@ -190,6 +232,45 @@ class Reto(models.Model):
     def __str__(self):
         return f"{self.titulo} ({self.torneo.nombre})"
     
+    @property
+    def tests_ocultos(self):
+        """
+        Tests por lenguaje. Formato: {"python": [...], "java": [...], "javascript": [...]}
+        Se leen del paquete; asignar un dict nuevo crea (al guardar) otro paquete
+        """
+        if self._tests_ocultos_nuevos is not None:
+            return self._tests_ocultos_nuevos
+        from judge import bundle_store
+        return copy.deepcopy(bundle_store.load(self.paquete_tests_id))
+    
+    @tests_ocultos.setter
+    def tests_ocultos(self, tests):
+        self._tests_ocultos_nuevos = tests or {}
+    
+    def get_tests(self, lenguaje):
+        """Tests ocultos de un lenguaje para el juez (compartidos: no modificar)"""
+        if self._tests_ocultos_nuevos is not None:
+            return self._tests_ocultos_nuevos.get(lenguaje, [])
+        from judge import bundle_store
+        return bundle_store.tests_for(self.paquete_tests_id, lenguaje)
+    
+    def save(self, *args, **kwargs):
+        # Huella del archivo de datos: se calcula al subir uno nuevo
+        if not self.archivo_datos:
+            self.archivo_datos_huella = ''
+        elif not self.archivo_datos._committed:
+            from judge.data_cache import file_checksum
+            self.archivo_datos_huella = file_checksum(self.archivo_datos)
+        if kwargs.get('update_fields') is not None and 'archivo_datos' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'archivo_datos_huella'}
+        if self._tests_ocultos_nuevos is not None:
+            from judge import bundle_store
+            self.paquete_tests_id = bundle_store.store(self._tests_ocultos_nuevos)
+            self._tests_ocultos_nuevos = None
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'paquete_tests'}
+        super().save(*args, **kwargs)
+    
     @property
     def esta_disponible(self):
         """Verifica si el reto está disponible para resolverse"""
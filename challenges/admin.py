@@ -76,4 +76,8 @@ class TestCaseAdmin(admin.ModelAdmin):
             'fields': ('custom_time_limit', 'custom_memory_limit'),
             'classes': ('collapse',)
         }),
+        ('Comparación de Salida', {
+            'fields': ('checker', 'checker_config'),
+            'classes': ('collapse',)
+        }),
     )
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testcase',
+            name='checker',
+            field=models.CharField(blank=True, choices=[('exacto', 'Exacto'), ('tokens', 'Tokens (ignora espacios)'), ('flotante', 'Flotante con tolerancia'), ('lineas_desordenadas', 'Líneas en cualquier orden'), ('programa', 'Programa externo')], default='', help_text='Cómo se compara la salida (vacío: comparación exacta)', max_length=25, verbose_name='Checker'),
+        ),
+        migrations.AddField(
+            model_name='testcase',
+            name='checker_config',
+            field=models.JSONField(blank=True, default=dict, help_text='Ej: {"epsilon_abs": 1e-6} para el checker flotante', verbose_name='Opciones del Checker'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from django.utils.text import slugify
 
+from judge.checkers import CHECKER_CHOICES, checker_spec
+
 
 class Challenge(models.Model):
     """
@@ -146,6 +148,15 @@ class Challenge(models.Model):
     def visible_test_cases(self):
         """Retorna el número de casos de prueba visibles"""
         return self.test_cases.filter(is_visible=True).count()
+    
+    def compile_test_bundle(self):
+        """
+        Compila los casos de prueba en un paquete de tests del juez (el mismo
+        formato que Reto.tests_ocultos) y retorna su huella
+        """
+        from judge import bundle_store
+        tests = bundle_store.compile_test_cases(self.test_cases.order_by('order', 'id'))
+        return bundle_store.store(bundle_store.for_languages(tests, self.allowed_languages))
 
 
 class TestCase(models.Model):
@@ -220,6 +231,20 @@ class TestCase(models.Model):
         verbose_name='Límite de Memoria Personalizado (MB)',
         help_text='Si se especifica, sobrescribe el límite del challenge'
     )
+    checker = models.CharField(
+        max_length=25,
+        choices=CHECKER_CHOICES,
+        blank=True,
+        default='',
+        verbose_name='Checker',
+        help_text='Cómo se compara la salida (vacío: comparación exacta)'
+    )
+    checker_config = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Opciones del Checker',
+        help_text='Ej: {"epsilon_abs": 1e-6} para el checker flotante'
+    )
     
     class Meta:
         verbose_name = 'Caso de Prueba'
@@ -240,3 +265,8 @@ class TestCase(models.Model):
     def memory_limit(self):
         """Retorna el límite de memoria efectivo (custom o del challenge)"""
         return self.custom_memory_limit or self.challenge.memory_limit
+    
+    @property
+    def checker_spec(self):
+        """Retorna la especificación del checker del caso (para el juez)"""
+        return checker_spec(self.checker, self.checker_config)
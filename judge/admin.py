@@ -1,5 +1,21 @@
 from django.contrib import admin
+from django.template.response import TemplateResponse
+from django.utils.html import format_html, format_html_join
 from .models import Submission, TestCaseResult
+from .timing import segments, summarize_timelines
+from .worker import rejudge_submissions
+
+# Color de cada tramo de la cronología (el tramo termina en la marca)
+COLORES_TRAMOS = {
+    'tomada': '#B0B0B0',      # Gris: espera en cola
+    'compilada': '#8E44AD',   # Violeta
+    'sandbox': '#E67E22',     # Naranja
+    'codigo': '#F1C40F',      # Amarillo
+    'ejecutada': '#2E86C1',   # Azul
+    'logs': '#17A589',        # Verde azulado
+    'analizada': '#28B463',   # Verde
+    'guardada': '#566573',    # Gris oscuro
+}
 
 
 class TestCaseResultInline(admin.TabularInline):
@@ -15,27 +31,91 @@ class TestCaseResultInline(admin.TabularInline):
 
 @admin.register(Submission)
 class SubmissionAdmin(admin.ModelAdmin):
-    list_display = ['id', 'tributo', 'reto', 'lenguaje', 'veredicto', 'puntos_obtenidos', 'porcentaje_exito', 'fecha_envio']
-    list_filter = ['veredicto', 'lenguaje', 'fecha_envio']
+    list_display = ['id', 'tributo', 'reto', 'lenguaje', 'veredicto', 'puntos_obtenidos', 'porcentaje_exito', 'prioridad', 'fecha_envio']
+    list_filter = ['veredicto', 'lenguaje', 'prioridad', 'fecha_envio']
     search_fields = ['tributo__personaje__first_name', 'tributo__personaje__last_name', 'reto__titulo']
-    readonly_fields = ['fecha_envio', 'fecha_evaluacion', 'stdout', 'stderr', 'detalles_ejecucion', 'porcentaje_exito']
+    readonly_fields = ['fecha_envio', 'fecha_evaluacion', 'stdout', 'stderr', 'detalles_ejecucion', 'porcentaje_exito', 'fecha_encolado', 'reclamada_por', 'fecha_reclamo', 'cronologia']
     inlines = [TestCaseResultInline]
+    actions = ['reevaluar', 'reevaluar_como_prueba', 'percentiles_etapas']
     
     fieldsets = (
         ('Información General', {
             'fields': ('tributo', 'reto', 'lenguaje', 'codigo')
         }),
         ('Resultados', {
-            'fields': ('veredicto', 'puntos_obtenidos', 'casos_pasados', 'casos_totales', 'porcentaje_exito', 'tiempo_ejecucion', 'memoria_usada')
+            'fields': ('veredicto', 'puntos_obtenidos', 'casos_pasados', 'casos_totales', 'porcentaje_exito', 'tiempo_ejecucion', 'tiempo_cpu', 'memoria_usada')
         }),
         ('Detalles de Ejecución', {
             'fields': ('stdout', 'stderr', 'detalles_ejecucion'),
             'classes': ('collapse',)
         }),
+        ('Cola de Evaluación', {
+            'fields': ('prioridad', 'fecha_encolado', 'reclamada_por', 'fecha_reclamo'),
+            'classes': ('collapse',)
+        }),
+        ('Cronología', {
+            'fields': ('cronologia',)
+        }),
         ('Fechas', {
             'fields': ('fecha_envio', 'fecha_evaluacion')
         })
     )
+    
+    @admin.action(description='Re-evaluar (detrás de los envíos del concurso)')
+    def reevaluar(self, request, queryset):
+        count = rejudge_submissions(queryset.values_list('id', flat=True))
+        self.message_user(request, f'{count} submissions encoladas para re-evaluación')
+    
+    @admin.action(description='Re-evaluar como prueba de administración (menor prioridad)')
+    def reevaluar_como_prueba(self, request, queryset):
+        count = rejudge_submissions(
+            queryset.values_list('id', flat=True),
+            prioridad=Submission.PRIORIDAD_ADMIN
+        )
+        self.message_user(request, f'{count} submissions encoladas como prueba')
+    
+    @admin.action(description='Ver percentiles de cada etapa')
+    def percentiles_etapas(self, request, queryset):
+        """Percentiles de la duración de cada tramo de la cronología"""
+        cronologias = [m for m in queryset.values_list('marcas_tiempo', flat=True) if m]
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Percentiles de las etapas de evaluación',
+            'opts': self.model._meta,
+            'cantidad': len(cronologias),
+            'resumen': summarize_timelines(cronologias),
+        }
+        return TemplateResponse(request, 'admin/judge/submission/percentiles_etapas.html', context)
+    
+    @admin.display(description='Cronología')
+    def cronologia(self, obj):
+        """Cascada de los tramos de la evaluación (milisegundos desde el encolado)"""
+        tramos = segments(obj.marcas_tiempo or {})
+        if not tramos:
+            return '-'
+        total = max(tramos[-1][2], 1)
+        filas = format_html_join(
+            '',
+            '<tr><td>{}</td><td style="width: 420px;"><div style="margin-left: {}%; width: {}%; '
+            'min-width: 2px; height: 12px; background-color: {};"></div></td>'
+            '<td style="text-align: right;">{} ms</td></tr>',
+            (
+                (
+                    nombre,
+                    f'{100 * inicio / total:.2f}',
+                    f'{100 * (fin - inicio) / total:.2f}',
+                    COLORES_TRAMOS.get(nombre, '#000000'),
+                    fin - inicio
+                )
+                for nombre, inicio, fin in tramos
+            )
+        )
+        return format_html(
+            '<table>{}<tr><td><strong>Total</strong></td><td></td>'
+            '<td style="text-align: right;"><strong>{} ms</strong></td></tr></table>',
+            filas,
+            tramos[-1][2]
+        )
 
 
 @admin.register(TestCaseResult)
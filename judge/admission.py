@@ -0,0 +1,229 @@
+"""
+Control de admisión del juez
+Evita sobrecargar el host cuando llega una ráfaga de submissions:
+- Slots de sandbox: cantidad máxima de sandboxes ejecutándose a la vez entre
+  todos los procesos evaluadores; el resto espera su turno antes de arrancar
+  (el tiempo de espera no cuenta para el límite de tiempo)
+- Cola acotada: si hay demasiadas submissions pendientes se rechazan las
+  nuevas con HTTP 429 y Retry-After
+- Límite por tributo: token bucket sobre el envío de soluciones
+Los slots, los contadores de rechazos y los buckets viven en el caché de
+Django; con varios procesos web debe ser un caché compartido (Redis,
+Memcached).
+"""
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Submission
+
+MOTIVO_COLA_LLENA = 'cola_llena'
+MOTIVO_LIMITE_TRIBUTO = 'limite_tributo'
+
+CACHE_PREFIX = 'judge:admission:'
+
+
+class SandboxSlots:
+    """
+    Semáforo de sandboxes compartido por los procesos del juez
+
+    Cada slot es una entrada del caché de Django que se toma con `cache.add`
+    (atómico en Redis y Memcached) y se borra al terminar; la de un proceso
+    que murió vence a los `ttl` segundos. Los hilos del proceso que esperan
+    se despiertan al liberarse un slot local y sondean los de otros procesos.
+    `en_espera` y `pico` son del proceso; `en_uso` es global.
+    """
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, capacity: int, ttl: int = 600):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._condition = threading.Condition()
+        self._in_use = 0
+        self._waiting = 0
+        self._peak = 0
+
+    @contextmanager
+    def slot(self):
+        """Ocupa un slot mientras dura el bloque (espera si no hay libres)"""
+        token = uuid.uuid4().hex
+        with self._condition:
+            self._waiting += 1
+        try:
+            while True:
+                key = self._try_acquire(token)
+                if key is not None:
+                    break
+                with self._condition:
+                    self._condition.wait(self.POLL_INTERVAL)
+        finally:
+            with self._condition:
+                self._waiting -= 1
+        with self._condition:
+            self._in_use += 1
+            self._peak = max(self._peak, self._in_use)
+        try:
+            yield
+        finally:
+            if cache.get(key) == token:
+                cache.delete(key)
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+
+    def _try_acquire(self, token: str) -> Optional[str]:
+        """Toma el primer slot libre; retorna su clave o None si no hay"""
+        for key in self._keys():
+            if cache.add(key, token, timeout=self.ttl):
+                return key
+        return None
+
+    def _keys(self):
+        return [f'{CACHE_PREFIX}slot:{index}' for index in range(self.capacity)]
+
+    def stats(self) -> Dict[str, Any]:
+        in_use = len(cache.get_many(self._keys()))
+        with self._condition:
+            return {
+                'capacidad': self.capacity,
+                'en_uso': in_use,
+                'en_espera': self._waiting,
+                'pico': self._peak,
+                'utilizacion': round(in_use / self.capacity, 2) if self.capacity else 0
+            }
+
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def get_sandbox_slots() -> SandboxSlots:
+    """Retorna los slots de sandbox del proceso (se crean la primera vez)"""
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = SandboxSlots(
+                getattr(settings, 'JUDGE_MAX_SANDBOXES', 4),
+                getattr(settings, 'JUDGE_SANDBOX_SLOT_TTL', 600)
+            )
+        return _slots
+
+
+def check_queue() -> Optional[Dict[str, Any]]:
+    """
+    Verifica que la cola de submissions pendientes tiene lugar
+    Retorna el rechazo (motivo, error, retry_after) o None si se admite
+    """
+    max_pending = getattr(settings, 'JUDGE_QUEUE_MAX_PENDING', 200)
+    if max_pending <= 0:
+        return None
+    if Submission.objects.filter(veredicto='PE').count() < max_pending:
+        return None
+    return _reject(
+        MOTIVO_COLA_LLENA,
+        'El juez está saturado, intenta nuevamente en unos segundos',
+        getattr(settings, 'JUDGE_QUEUE_RETRY_AFTER', 15)
+    )
+
+
+# Segundos tras los que vence el candado de un bucket (el de un proceso que
+# murió mientras lo tenía)
+BUCKET_LOCK_TTL = 5
+
+
+@contextmanager
+def _bucket_lock(key: str):
+    """
+    Candado entre procesos sobre el bucket: una entrada del caché tomada con
+    `cache.add`, como los slots de sandbox
+    """
+    token = uuid.uuid4().hex
+    while not cache.add(key, token, timeout=BUCKET_LOCK_TTL):
+        time.sleep(SandboxSlots.POLL_INTERVAL)
+    try:
+        yield
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+def check_rate_limit(tributo_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Consume un token del bucket del tributo
+    El bucket admite ráfagas de JUDGE_RATE_LIMIT_BURST envíos y se recarga a
+    JUDGE_RATE_LIMIT_PER_MINUTE tokens por minuto. La lectura y la escritura
+    del bucket van bajo un candado del caché para que los procesos web no
+    gasten el mismo token. Retorna el rechazo o None
+    """
+    burst = getattr(settings, 'JUDGE_RATE_LIMIT_BURST', 5)
+    rate = getattr(settings, 'JUDGE_RATE_LIMIT_PER_MINUTE', 6) / 60
+    if burst <= 0 or rate <= 0:
+        return None
+
+    key = f'{CACHE_PREFIX}tokens:{tributo_id}'
+    with _bucket_lock(f'{key}:lock'):
+        now = time.time()
+        tokens, updated = cache.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens < 1:
+            return _reject(
+                MOTIVO_LIMITE_TRIBUTO,
+                'Demasiados envíos seguidos, espera antes de enviar otra solución',
+                (1 - tokens) / rate
+            )
+        # El bucket lleno equivale a no tener entrada: expira al recargarse
+        cache.set(key, (tokens - 1, now), timeout=int(burst / rate) + 1)
+    return None
+
+
+def _reject(motivo: str, error: str, retry_after: float) -> Dict[str, Any]:
+    """Registra el rechazo y arma su descripción"""
+    key = f'{CACHE_PREFIX}rechazadas:{motivo}'
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # La entrada expiró entre add e incr
+        cache.set(key, 1, timeout=None)
+    return {
+        'motivo': motivo,
+        'error': error,
+        'retry_after': max(1, int(retry_after + 0.999))
+    }
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Estado de la admisión para el panel de vigilantes: profundidad de la
+    cola, rechazos por motivo y uso de los slots de sandbox
+
+    Con JUDGE_DISPATCH='daemon' los slots se consultan al daemon (None si
+    no responde).
+    """
+    rechazadas = {
+        motivo: cache.get(f'{CACHE_PREFIX}rechazadas:{motivo}', 0)
+        for motivo in (MOTIVO_COLA_LLENA, MOTIVO_LIMITE_TRIBUTO)
+    }
+
+    if getattr(settings, 'JUDGE_DISPATCH', 'thread') == 'daemon':
+        from .daemon import send_command
+        try:
+            slots = send_command({'cmd': 'health'}).get('slots')
+        except (OSError, ValueError):
+            slots = None
+    else:
+        slots = get_sandbox_slots().stats()
+
+    return {
+        'cola': Submission.objects.filter(veredicto='PE').count(),
+        'cola_maxima': getattr(settings, 'JUDGE_QUEUE_MAX_PENDING', 200),
+        'rechazadas': rechazadas,
+        'rechazadas_total': sum(rechazadas.values()),
+        'slots': slots
+    }
@@ -1,7 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save
 
 
 class JudgeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'judge'
     verbose_name = 'Sistema de Juez Automático'
+
+    def ready(self):
+        from .data_cache import on_torneo_saved
+
+        # Descarga anticipada de los archivos de datos al iniciar un torneo
+        post_save.connect(on_torneo_saved, sender='arena.Torneo', dispatch_uid='judge_prefetch_datos')
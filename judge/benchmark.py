@@ -0,0 +1,277 @@
+"""
+Benchmark de carga del juez
+Genera submissions sintéticas (AC, WA, TLE, MLE, RE y CE en Python,
+JavaScript y Java), las envía a JudgeRunner con una tasa y una concurrencia
+configurables y reporta throughput y latencias p50/p95/p99 por lenguaje, por
+tipo de submission y por etapa, incluido el arranque del sandbox. El reporte
+es JSON para comparar corridas entre commits.
+Sin Docker se usa BenchmarkExecutor, un ejecutor simulado que reproduce el
+veredicto esperado de cada submission.
+Ejecutar: python manage.py judge_benchmark
+"""
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .runner import JudgeRunner
+from .simulated_executor import SimulatedExecutor
+from .timing import ETAPA_ARRANQUE, summarize
+
+LANGUAGES = ('python', 'javascript', 'java')
+KINDS = ('AC', 'WA', 'TLE', 'MLE', 'RE', 'CE')
+
+# Tests del reto del benchmark: suma de dos números
+TESTS = [
+    {'name': f'Test {i + 1}', 'function_call': {'name': 'suma', 'args': [a, b]}, 'expected': str(a + b)}
+    for i, (a, b) in enumerate([(2, 3), (10, 20), (-5, 5), (1000000, 2000000)])
+]
+
+# Una solución por lenguaje y tipo; cada una produce ese veredicto
+SOLUTIONS = {
+    'python': {
+        'AC': 'def suma(a, b):\n    return a + b\n',
+        'WA': 'def suma(a, b):\n    return a - b\n',
+        'TLE': 'def suma(a, b):\n    while True:\n        pass\n',
+        'MLE': (
+            'def suma(a, b):\n'
+            '    data = []\n'
+            '    while True:\n'
+            '        data.append(bytearray(b"x") * (1 << 24))\n'
+        ),
+        'RE': 'def suma(a, b):\n    return a // (a - a)\n',
+        'CE': 'def suma(a, b)\n    return a + b\n',
+    },
+    'javascript': {
+        'AC': 'function suma(a, b) {\n    return a + b;\n}\n',
+        'WA': 'function suma(a, b) {\n    return a - b;\n}\n',
+        'TLE': 'function suma(a, b) {\n    while (true) {}\n}\n',
+        'MLE': (
+            'function suma(a, b) {\n'
+            '    const data = [];\n'
+            '    while (true) data.push(Buffer.alloc(1 << 24, 1));\n'
+            '}\n'
+        ),
+        'RE': 'function suma(a, b) {\n    throw new Error("fallo");\n}\n',
+        'CE': 'function suma(a, b) {\n    return a + ;\n}\n',
+    },
+    'java': {
+        'AC': 'public class Solution {\n    public static int suma(int a, int b) {\n        return a + b;\n    }\n}\n',
+        'WA': 'public class Solution {\n    public static int suma(int a, int b) {\n        return a - b;\n    }\n}\n',
+        'TLE': 'public class Solution {\n    public static int suma(int a, int b) {\n        while (true) {}\n    }\n}\n',
+        'MLE': (
+            'import java.util.*;\n'
+            'public class Solution {\n'
+            '    public static int suma(int a, int b) {\n'
+            '        List<long[]> data = new ArrayList<>();\n'
+            '        while (true) data.add(new long[1 << 21]);\n'
+            '    }\n'
+            '}\n'
+        ),
+        'RE': 'public class Solution {\n    public static int suma(int a, int b) {\n        return a / (a - a);\n    }\n}\n',
+        'CE': 'public class Solution {\n    public static int suma(int a, int b) {\n        return a + ;\n    }\n}\n',
+    },
+}
+
+# Resultado simulado de cada test según el tipo de submission
+SIMULATED_OUTCOMES = {
+    'AC': {},
+    'WA': {'passed': False, 'actual': 'respuesta incorrecta'},
+    'TLE': {'passed': False, 'error': 'Tiempo límite excedido', 'error_type': 'TimeLimitExceeded'},
+    'MLE': {'passed': False, 'error': 'Memoria agotada', 'error_type': 'MemoryError'},
+    'RE': {'passed': False, 'error': 'División por cero', 'error_type': 'ZeroDivisionError'},
+}
+
+
+class BenchmarkExecutor(SimulatedExecutor):
+    """
+    Ejecutor simulado que reconoce las soluciones del benchmark y produce su
+    veredicto (CE sin ejecutar, como la compilación fallida de Java)
+    """
+
+    def __init__(self, **kwargs):
+        self.kinds = {
+            code: kind
+            for solutions in SOLUTIONS.values()
+            for kind, code in solutions.items()
+        }
+        super().__init__(outcome=self._outcome, **kwargs)
+
+    def _outcome(self, code: str, test: Dict[str, Any]) -> Dict[str, Any]:
+        return SIMULATED_OUTCOMES.get(self.kinds.get(code, 'AC'), {})
+
+    def execute(self, code: str, language: str, *args, **kwargs) -> Dict[str, Any]:
+        if self.kinds.get(code) == 'CE':
+            return {
+                'success': False,
+                'stdout': '',
+                'stderr': 'SyntaxError: código inválido',
+                'exit_code': 1,
+                'tiempo_ejecucion': 0,
+                'error': 'Error de compilación',
+                'veredicto': 'CE'
+            }
+        return super().execute(code, language, *args, **kwargs)
+
+
+def generate_submissions(
+    count: int,
+    languages: Sequence[str] = LANGUAGES,
+    kinds: Sequence[str] = KINDS,
+    seed: int = 0
+) -> List[Dict[str, str]]:
+    """
+    Mezcla de submissions: todas las combinaciones de lenguaje y tipo por
+    igual, en un orden aleatorio reproducible (`seed`)
+    """
+    combinations = [(language, kind) for language in languages for kind in kinds]
+    rng = random.Random(seed)
+    submissions = []
+    while len(submissions) < count:
+        rng.shuffle(combinations)
+        submissions.extend(
+            {'language': language, 'kind': kind, 'code': SOLUTIONS[language][kind]}
+            for language, kind in combinations[:count - len(submissions)]
+        )
+    return submissions
+
+
+def run_benchmark(
+    runner: JudgeRunner,
+    submissions: List[Dict[str, str]],
+    rate: float = 0.0,
+    concurrency: int = 4,
+    time_limit: float = 1.0,
+    memory_limit: int = 128
+) -> Dict[str, Any]:
+    """
+    Envía las submissions al runner y retorna el reporte
+
+    Con `rate` > 0 las submissions llegan a esa tasa (por segundo) sin
+    esperar a las anteriores (carga abierta); con 0, todas de entrada. Como
+    mucho `concurrency` se evalúan a la vez. La latencia se mide desde la
+    llegada de la submission, por lo que incluye la espera en cola.
+    """
+    results = []
+    lock = threading.Lock()
+
+    def evaluate(submission: Dict[str, str], arrival: float):
+        resultado = runner.evaluate_submission(
+            user_code=submission['code'],
+            language=submission['language'],
+            tests=TESTS,
+            time_limit=time_limit,
+            memory_limit=memory_limit
+        )
+        with lock:
+            results.append({
+                'language': submission['language'],
+                'kind': submission['kind'],
+                'veredicto': resultado.get('veredicto'),
+                'latencia': time.perf_counter() - arrival,
+                'etapas': resultado.get('etapas', {}),
+            })
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for i, submission in enumerate(submissions):
+            if rate > 0:
+                delay = start + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(evaluate, submission, time.perf_counter())
+    duration = time.perf_counter() - start
+
+    return build_report(results, duration, {
+        'submissions': len(submissions),
+        'rate': rate,
+        'concurrency': concurrency,
+        'time_limit': time_limit,
+        'memory_limit': memory_limit,
+        'executor': f'{type(runner.executor).__module__}.{type(runner.executor).__name__}',
+    })
+
+
+def build_report(
+    results: List[Dict[str, Any]],
+    duration: float,
+    config: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Throughput, percentiles de latencia y veredictos obtenidos"""
+    by_language = defaultdict(list)
+    by_kind = defaultdict(list)
+    by_stage = defaultdict(list)
+    verdicts = Counter()
+    for result in results:
+        by_language[result['language']].append(result['latencia'])
+        by_kind[result['kind']].append(result['latencia'])
+        for stage, seconds in result['etapas'].items():
+            by_stage[stage].append(seconds)
+        verdicts[f"{result['kind']}->{result['veredicto']}"] += 1
+
+    return {
+        'fecha': datetime.now(timezone.utc).isoformat(),
+        'commit': _git_commit(),
+        'config': config,
+        'duracion': duration,
+        'throughput': len(results) / duration if duration > 0 else None,
+        'latencia': summarize(r['latencia'] for r in results),
+        'por_lenguaje': {language: summarize(v) for language, v in sorted(by_language.items())},
+        'por_tipo': {kind: summarize(v) for kind, v in sorted(by_kind.items())},
+        'etapas': {stage: summarize(v) for stage, v in sorted(by_stage.items())},
+        'arranque_sandbox': summarize(by_stage.get(ETAPA_ARRANQUE, [])),
+        'veredictos': dict(sorted(verdicts.items())),
+        'veredictos_inesperados': sum(
+            1 for r in results if r['veredicto'] != r['kind']
+        ),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    """Commit actual del repositorio (para comparar corridas)"""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Resumen legible del reporte (latencias en milisegundos)"""
+    def row(name: str, summary: Dict[str, Any]) -> str:
+        if not summary['n']:
+            return f'  {name:<18} sin datos'
+        p50, p95, p99 = (summary[k] * 1000 for k in ('p50', 'p95', 'p99'))
+        return f'  {name:<18} n={summary["n"]:<5} p50={p50:8.1f}  p95={p95:8.1f}  p99={p99:8.1f}'
+
+    throughput = report['throughput'] or 0
+    lines = [
+        f"Executor: {report['config']['executor']}",
+        f"Submissions: {report['latencia']['n']} en {report['duracion']:.2f} s "
+        f"({throughput:.2f}/s)",
+        'Latencia (ms):',
+        row('total', report['latencia']),
+    ]
+    for title, key in (('Por lenguaje', 'por_lenguaje'), ('Por tipo', 'por_tipo'), ('Por etapa', 'etapas')):
+        lines.append(f'{title}:')
+        lines.extend(row(name, summary) for name, summary in report[key].items())
+    lines.append(f"Veredictos inesperados: {report['veredictos_inesperados']}")
+    return '\n'.join(lines)
+
+
+def write_report(report: Dict[str, Any], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write('\n')
@@ -0,0 +1,159 @@
+"""
+Paquetes de tests direccionados por contenido
+Los tests ocultos de un reto ({lenguaje: [tests]}) se guardan una sola vez
+como JSON canónico comprimido en PaqueteTests, con el SHA-256 del JSON como
+clave; el reto guarda solo esa huella (Reto.paquete_tests). Así listar o
+consultar retos no trae los tests, y el juez decodifica cada paquete una vez
+por proceso: los paquetes son inmutables, por lo que el caché LRU nunca
+queda desactualizado.
+Los casos de prueba del modelo (CasoDePrueba de arena y TestCase de
+challenges) se compilan al mismo formato de test que los tests ocultos.
+"""
+import hashlib
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from .models import PaqueteTests
+from . import metrics
+
+# Lenguajes que evalúa el juez
+LENGUAJES = ('python', 'java', 'javascript')
+
+Tests = Dict[str, List[Dict[str, Any]]]
+
+
+def encode(tests: Tests) -> Tuple[str, bytes, int]:
+    """
+    Codifica los tests: retorna (huella, contenido comprimido, tamaño)
+    El JSON es canónico (claves ordenadas, sin espacios) para que los
+    mismos tests produzcan siempre la misma huella
+    """
+    canonical = json.dumps(
+        tests, sort_keys=True, separators=(',', ':'), ensure_ascii=False
+    ).encode('utf-8')
+    return hashlib.sha256(canonical).hexdigest(), zlib.compress(canonical), len(canonical)
+
+
+def decode(contenido: bytes) -> Tests:
+    return json.loads(zlib.decompress(bytes(contenido)).decode('utf-8'))
+
+
+class BundleCache:
+    """Paquetes decodificados, con desalojo del menos usado recientemente"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._bundles: 'OrderedDict[str, Tests]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, huella: str) -> Optional[Tests]:
+        with self._lock:
+            tests = self._bundles.get(huella)
+            if tests is not None:
+                self._bundles.move_to_end(huella)
+            return tests
+
+    def put(self, huella: str, tests: Tests):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._bundles[huella] = tests
+            self._bundles.move_to_end(huella)
+            while len(self._bundles) > self.max_size:
+                self._bundles.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._bundles.clear()
+
+    def __len__(self) -> int:
+        return len(self._bundles)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> BundleCache:
+    """Retorna el caché de paquetes del proceso (se crea la primera vez)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = BundleCache(getattr(settings, 'JUDGE_TEST_BUNDLE_CACHE_SIZE', 64))
+        return _cache
+
+
+def store(tests: Optional[Tests]) -> Optional[str]:
+    """
+    Guarda los tests como paquete (si no existe ya) y retorna su huella
+    Sin tests retorna None
+    """
+    if not tests:
+        return None
+    huella, contenido, tamano = encode(tests)
+    PaqueteTests.objects.get_or_create(
+        huella=huella, defaults={'contenido': contenido, 'tamano': tamano}
+    )
+    return huella
+
+
+def load(huella: Optional[str]) -> Tests:
+    """
+    Tests de un paquete, desde el caché o la BD
+    El resultado es compartido entre llamadas: no debe modificarse
+    """
+    if not huella:
+        return {}
+    cache = get_cache()
+    tests = cache.get(huella)
+    metrics.observe_cache(metrics.CACHE_PAQUETES_TESTS, tests is not None)
+    if tests is None:
+        contenido = PaqueteTests.objects.filter(huella=huella).values_list(
+            'contenido', flat=True
+        ).first()
+        if contenido is None:
+            return {}
+        tests = decode(contenido)
+        cache.put(huella, tests)
+    return tests
+
+
+def tests_for(huella: Optional[str], lenguaje: str) -> List[Dict[str, Any]]:
+    """Tests de un lenguaje del paquete (compartidos: no modificar)"""
+    return load(huella).get(lenguaje, [])
+
+
+def for_languages(tests: List[Dict[str, Any]], lenguajes: Iterable[str]) -> Tests:
+    """Los mismos tests para cada lenguaje del juez en `lenguajes`"""
+    return {lenguaje: tests for lenguaje in lenguajes if lenguaje in LENGUAJES and tests}
+
+
+def compile_casos_de_prueba(casos: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Tests de entrada/salida a partir de CasoDePrueba (arena), en su orden"""
+    return [
+        {'name': caso.nombre, 'input': caso.entrada, 'expected': caso.salida_esperada}
+        for caso in casos
+    ]
+
+
+def compile_test_cases(test_cases: Sequence[Any]) -> List[Dict[str, Any]]:
+    """
+    Tests de entrada/salida a partir de TestCase (challenges), en su orden;
+    el checker del caso, si tiene, viaja en el test
+    """
+    tests = []
+    for i, test_case in enumerate(test_cases):
+        test = {
+            'name': test_case.name or f'Test {i + 1}',
+            'input': test_case.input_data,
+            'expected': test_case.expected_output
+        }
+        if test_case.checker:
+            test['checker'] = test_case.checker_spec
+        tests.append(test)
+    return tests
@@ -0,0 +1,328 @@
+"""
+Checkers de salida del juez
+Comparan en el host la salida de cada test (que el harness reporta en
+`actual`) con la salida esperada, que ya no viaja al sandbox. Recorren ambas
+salidas en streaming (tokens o líneas de a uno) sin copiarlas completas, y las
+salidas esperadas en archivo (`expected_file`) se leen con mmap.
+
+Checkers disponibles (campo `checker` del Reto, del TestCase o de cada test):
+- exacto: igualdad exacta, ignorando espacios al inicio y al final
+- tokens: misma secuencia de tokens, sin importar los espacios entre ellos
+- flotante: como tokens, pero los números se comparan con tolerancia
+  absoluta/relativa (epsilon_abs, epsilon_rel)
+- lineas_desordenadas: mismas líneas en cualquier orden
+- programa: un programa de JUDGE_CHECKERS_DIR decide; recibe las rutas de
+  entrada, salida esperada y salida obtenida, y acepta con código de salida 0
+"""
+import hashlib
+import math
+import mmap
+import os
+import re
+import subprocess
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from itertools import zip_longest
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+from django.conf import settings
+
+CHECKER_CHOICES = [
+    ('exacto', 'Exacto'),
+    ('tokens', 'Tokens (ignora espacios)'),
+    ('flotante', 'Flotante con tolerancia'),
+    ('lineas_desordenadas', 'Líneas en cualquier orden'),
+    ('programa', 'Programa externo'),
+]
+
+DEFAULT_CHECKER = 'exacto'
+
+# Tipo de error de un test cuyo checker no pudo ejecutarse (error del sistema)
+ERROR_CHECKER = 'CheckerError'
+
+# Tipo de error de un registro sin salida ni error: cuenta como respuesta
+# incorrecta (el host no confía en un `passed` que venga del sandbox)
+ERROR_SIN_SALIDA = 'WrongAnswer'
+
+# Tamaño de los bloques al comparar salidas completas
+CHUNK_SIZE = 1024 * 1024
+
+# Largo máximo de los tokens citados en los mensajes
+MAX_PREVIEW = 50
+
+TOKEN_RE = re.compile(rb'\S+')
+LINE_RE = re.compile(rb'[^\r\n]+')
+WHITESPACE = b' \t\r\n\x0b\x0c'
+
+Source = Union[str, bytes, Path]
+
+
+class CheckerError(Exception):
+    """El checker no pudo decidir (configuración inválida, programa caído)"""
+
+
+@contextmanager
+def open_source(source: Source) -> Iterator[Union[bytes, mmap.mmap]]:
+    """
+    Buffer de bytes de una salida: los textos se codifican y los archivos
+    se mapean en memoria (no se cargan)
+    """
+    if isinstance(source, Path):
+        with open(source, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b''
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield buffer
+    elif isinstance(source, bytes):
+        yield source
+    else:
+        yield str(source).encode('utf-8')
+
+
+def _preview(value: bytes) -> str:
+    text = value[:MAX_PREVIEW].decode('utf-8', errors='replace')
+    return text + '…' if len(value) > MAX_PREVIEW else text
+
+
+class BaseChecker:
+    """
+    Interfaz de los checkers
+    `check` retorna (aceptado, mensaje); el mensaje explica el rechazo
+    """
+
+    def __init__(self, **options):
+        self.options = options
+
+    def check(self, expected: Source, actual: Source, input_data: str = '') -> Tuple[bool, str]:
+        with open_source(expected) as expected_buffer, open_source(actual) as actual_buffer:
+            return self.compare(expected_buffer, actual_buffer)
+
+    def compare(self, expected, actual) -> Tuple[bool, str]:
+        raise NotImplementedError
+
+
+class ExactChecker(BaseChecker):
+    """Igualdad exacta, ignorando espacios al inicio y al final"""
+
+    def compare(self, expected, actual) -> Tuple[bool, str]:
+        e_start, e_end = self._strip_bounds(expected)
+        a_start, a_end = self._strip_bounds(actual)
+        if e_end - e_start != a_end - a_start:
+            return False, 'La salida no coincide con la esperada'
+        for offset in range(0, e_end - e_start, CHUNK_SIZE):
+            size = min(CHUNK_SIZE, e_end - e_start - offset)
+            expected_chunk = expected[e_start + offset:e_start + offset + size]
+            if expected_chunk != actual[a_start + offset:a_start + offset + size]:
+                return False, 'La salida no coincide con la esperada'
+        return True, ''
+
+    @staticmethod
+    def _strip_bounds(buffer) -> Tuple[int, int]:
+        """Posiciones del contenido sin los espacios de los extremos"""
+        first = re.search(rb'\S', buffer)
+        if first is None:
+            return 0, 0
+        end = len(buffer)
+        while buffer[end - 1] in WHITESPACE:
+            end -= 1
+        return first.start(), end
+
+
+class TokenChecker(BaseChecker):
+    """Misma secuencia de tokens separados por cualquier espacio"""
+
+    def compare(self, expected, actual) -> Tuple[bool, str]:
+        pairs = zip_longest(TOKEN_RE.finditer(expected), TOKEN_RE.finditer(actual))
+        for i, (e, a) in enumerate(pairs, start=1):
+            if e is None:
+                return False, f'Sobran tokens desde el token {i}: {_preview(a.group())}'
+            if a is None:
+                return False, f'Faltan tokens desde el token {i}: se esperaba {_preview(e.group())}'
+            if not self.tokens_match(e.group(), a.group()):
+                return False, f'Token {i}: se esperaba {_preview(e.group())}, se obtuvo {_preview(a.group())}'
+        return True, ''
+
+    def tokens_match(self, expected: bytes, actual: bytes) -> bool:
+        return expected == actual
+
+
+class FloatChecker(TokenChecker):
+    """Tokens; los números se aceptan dentro de la tolerancia"""
+
+    def __init__(self, epsilon_abs: float = 1e-6, epsilon_rel: float = 1e-6, **options):
+        super().__init__(**options)
+        self.epsilon_abs = float(epsilon_abs)
+        self.epsilon_rel = float(epsilon_rel)
+
+    def tokens_match(self, expected: bytes, actual: bytes) -> bool:
+        if expected == actual:
+            return True
+        try:
+            e = float(expected)
+            a = float(actual)
+        except ValueError:
+            return False
+        if math.isnan(e) or math.isnan(a):
+            return math.isnan(e) and math.isnan(a)
+        return math.isclose(a, e, rel_tol=self.epsilon_rel, abs_tol=self.epsilon_abs)
+
+
+class UnorderedLinesChecker(BaseChecker):
+    """
+    Mismas líneas (sin espacios en los extremos, sin las vacías) en
+    cualquier orden. Se guarda solo un hash por línea distinta
+    """
+
+    def compare(self, expected, actual) -> Tuple[bool, str]:
+        balance = Counter()
+        for line in LINE_RE.finditer(expected):
+            content = line.group().strip()
+            if content:
+                balance[hashlib.sha1(content).digest()] += 1
+        for line in LINE_RE.finditer(actual):
+            content = line.group().strip()
+            if not content:
+                continue
+            digest = hashlib.sha1(content).digest()
+            if balance[digest] <= 0:
+                return False, f'Línea inesperada: {_preview(content)}'
+            balance[digest] -= 1
+        missing = sum(count for count in balance.values() if count > 0)
+        if missing:
+            return False, f'Faltan {missing} líneas de la salida esperada'
+        return True, ''
+
+
+class ProgramChecker(BaseChecker):
+    """
+    Programa externo que decide si la salida es correcta
+    Solo se ejecutan programas de JUDGE_CHECKERS_DIR (se configuran por
+    nombre, nunca con una ruta o comando arbitrario). Se invoca como
+    `programa entrada esperada obtenida` (rutas de archivos); código de
+    salida 0 acepta y la primera línea de su stdout es el mensaje
+    """
+
+    def __init__(self, programa: str = '', timeout: Optional[float] = None, **options):
+        super().__init__(**options)
+        if not programa:
+            raise CheckerError('El checker "programa" requiere la opción "programa"')
+        base = Path(getattr(settings, 'JUDGE_CHECKERS_DIR', '')).resolve()
+        path = (base / programa).resolve()
+        if base not in path.parents or not os.access(path, os.X_OK):
+            raise CheckerError(f'Programa checker no encontrado o no ejecutable: {programa}')
+        self.command = [str(path)]
+        self.timeout = timeout or getattr(settings, 'JUDGE_CHECKER_TIMEOUT', 10)
+
+    def check(self, expected: Source, actual: Source, input_data: str = '') -> Tuple[bool, str]:
+        with tempfile.TemporaryDirectory(prefix='unpa-judge-checker-') as tmpdir:
+            paths = [
+                self._materialize(tmpdir, 'input.txt', input_data),
+                self._materialize(tmpdir, 'expected.txt', expected),
+                self._materialize(tmpdir, 'actual.txt', actual),
+            ]
+            try:
+                result = subprocess.run(
+                    self.command + paths,
+                    cwd=tmpdir,
+                    stdin=subprocess.DEVNULL,
+                    capture_output=True,
+                    timeout=self.timeout
+                )
+            except subprocess.TimeoutExpired:
+                raise CheckerError('El checker excedió su tiempo límite')
+            except OSError as e:
+                raise CheckerError(f'No se pudo ejecutar el checker: {e}')
+
+        lines = result.stdout.decode('utf-8', errors='replace').strip().splitlines()
+        return result.returncode == 0, (lines[0][:200] if lines else '')
+
+    @staticmethod
+    def _materialize(tmpdir: str, name: str, source: Source) -> str:
+        """Ruta de la salida para el programa (los archivos se pasan tal cual)"""
+        if isinstance(source, Path):
+            return str(source)
+        path = os.path.join(tmpdir, name)
+        with open(path, 'wb') as f:
+            f.write(source if isinstance(source, bytes) else str(source).encode('utf-8'))
+        return path
+
+
+CHECKERS = {
+    'exacto': ExactChecker,
+    'tokens': TokenChecker,
+    'flotante': FloatChecker,
+    'lineas_desordenadas': UnorderedLinesChecker,
+    'programa': ProgramChecker,
+}
+
+
+def get_checker(spec: Union[str, Dict[str, Any], None]) -> BaseChecker:
+    """
+    Crea el checker de una especificación: un nombre ('tokens') o un dict
+    con el nombre en 'tipo' y sus opciones ({'tipo': 'flotante', 'epsilon_abs': 1e-9})
+    """
+    if not spec:
+        spec = DEFAULT_CHECKER
+    if isinstance(spec, str):
+        spec = {'tipo': spec}
+    options = dict(spec)
+    tipo = options.pop('tipo', DEFAULT_CHECKER) or DEFAULT_CHECKER
+    if tipo not in CHECKERS:
+        raise CheckerError(f'Checker desconocido: {tipo}')
+    try:
+        return CHECKERS[tipo](**options)
+    except TypeError as e:
+        raise CheckerError(f'Opciones inválidas para el checker {tipo}: {e}')
+
+
+def checker_spec(tipo: str, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Especificación a partir de los campos checker/checker_config de un modelo"""
+    return {**(config or {}), 'tipo': tipo or DEFAULT_CHECKER}
+
+
+def expected_source(test: Dict[str, Any]) -> Source:
+    """
+    Salida esperada de un test: `expected` o, para salidas grandes,
+    `expected_file` (ruta relativa a JUDGE_EXPECTED_OUTPUTS_DIR)
+    """
+    if 'expected_file' not in test:
+        return str(test.get('expected', ''))
+    base = Path(getattr(settings, 'JUDGE_EXPECTED_OUTPUTS_DIR', '')).resolve()
+    path = (base / test['expected_file']).resolve()
+    if base not in path.parents or not path.is_file():
+        raise CheckerError(f'Archivo de salida esperada inválido: {test["expected_file"]}')
+    return path
+
+
+def check_record(record: Dict[str, Any], test: Dict[str, Any], default_spec=None):
+    """
+    Decide en el host si el test pasó y completa el registro del harness
+    (passed, expected y el mensaje del checker). Los tests con error de
+    ejecución no se comparan y los registros sin `actual` fallan: el
+    `passed` que reporta el sandbox nunca se toma como válido
+    """
+    if 'error_type' in record:
+        record['passed'] = False
+        return
+    if 'actual' not in record:
+        record.update(
+            passed=False,
+            error_type=ERROR_SIN_SALIDA,
+            checker='El test no reportó su salida'
+        )
+        return
+    try:
+        expected = expected_source(test)
+        passed, mensaje = get_checker(test.get('checker') or default_spec).check(
+            expected, record['actual'], str(test.get('input', ''))
+        )
+    except CheckerError as e:
+        record.update(passed=False, error=str(e), error_type=ERROR_CHECKER)
+        return
+    record['passed'] = passed
+    record['expected'] = expected.strip() if isinstance(expected, str) else f'<{expected.name}>'
+    if mensaje:
+        record['checker'] = mensaje
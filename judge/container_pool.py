@@ -0,0 +1,302 @@
+"""
+Pool de contenedores Docker pre-iniciados para el juez
+Evita pagar el costo de crear/iniciar/destruir un contenedor por cada submission:
+los contenedores quedan corriendo y las soluciones se ejecutan mediante `exec`
+"""
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .container_reaper import ContainerReaper, container_labels
+
+# Plantillas del juez, montadas en /judge en los contenedores con zygote
+TEMPLATES_DIR = Path(__file__).parent / 'templates'
+
+# Directorio (tmpfs, solo root) con el FIFO de control del zygote
+ZYGOTE_RUN_DIR = '/run/judge'
+
+# Proceso principal de los contenedores de los lenguajes con zygote
+ZYGOTE_COMMANDS = {
+    'python': ['python', '/judge/python_zygote.py'],
+    'javascript': ['node', '/judge/js_zygote.js'],
+}
+
+
+class PooledContainer:
+    """
+    Contenedor pre-iniciado asignado a un lenguaje
+    """
+
+    def __init__(self, container, language: str, workdir: str, mem_limit: str, zygote: bool = False):
+        self.container = container
+        self.language = language
+        self.workdir = workdir  # Directorio del host montado en /code
+        self.mem_limit = mem_limit
+        self.zygote = zygote  # Las ejecuciones se piden al zygote del contenedor
+        self.uses = 0
+        self.last_used = time.monotonic()
+
+    def clear_workdir(self):
+        """Elimina el código de la ejecución anterior"""
+        for entry in os.listdir(self.workdir):
+            path = os.path.join(self.workdir, entry)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+
+class ContainerPool:
+    """
+    Pool de contenedores por lenguaje
+
+    Cada contenedor se crea sin red, con límites de CPU/memoria/procesos,
+    sistema de archivos de solo lectura y /tmp en tmpfs. Tras cada ejecución
+    se resetea (se matan los procesos y se vacía /tmp); si el reseteo falla,
+    la ejecución terminó de forma anómala o se alcanzó `max_reuse`, el
+    contenedor se descarta y se reemplaza por uno nuevo.
+
+    Los contenedores de los lenguajes de `zygote` corren como proceso
+    principal un zygote (templates/python_zygote.py hace fork de un hijo por
+    ejecución; templates/js_zygote.js mantiene un proceso de Node
+    precalentado); el reseteo no lo mata porque es el PID 1 del contenedor.
+
+    Con `reaper`, los contenedores descartados se eliminan en segundo plano
+    (ver container_reaper.py) y no demoran la liberación.
+
+    Cada contenedor tiene su propio directorio de trabajo, montado en /code
+    una sola vez al crearlo y reutilizado en cada ejecución; con `code_dir`
+    en un tmpfs del host (/dev/shm) entregar el código no toca el disco.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        client,
+        images: Dict[str, str],
+        size: int = 2,
+        max_reuse: int = 50,
+        idle_ttl: float = 300.0,
+        cpu_quota: int = 100000,
+        cpu_period: int = 100000,
+        default_memory: int = 256,
+        zygote: Iterable[str] = (),
+        volumes: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None,
+        reaper: Optional[ContainerReaper] = None,
+        code_dir: Optional[str] = None
+    ):
+        self.client = client
+        self.images = images
+        self.size = size
+        self.max_reuse = max_reuse
+        self.idle_ttl = idle_ttl
+        self.cpu_quota = cpu_quota
+        self.cpu_period = cpu_period
+        self.default_memory = default_memory
+        self.zygote = set(zygote)  # Lenguajes que se ejecutan desde su zygote
+        self.volumes = volumes or {}  # Montajes adicionales por lenguaje
+        self.reaper = reaper
+        self.code_dir = code_dir  # Donde se crean los directorios de trabajo
+
+        self._lock = threading.Lock()
+        self._idle = {language: deque() for language in images}
+        self._total = {language: 0 for language in images}
+
+    @classmethod
+    def shared(cls, client, images: Dict[str, str], **kwargs) -> 'ContainerPool':
+        """
+        Retorna el pool compartido por todo el proceso (se crea la primera vez)
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(client, images, **kwargs)
+                atexit.register(cls._shared.shutdown)
+            return cls._shared
+
+    def warm_up(self, languages=None):
+        """
+        Pre-inicia contenedores hasta completar `size` por lenguaje
+        Útil para llamar al comenzar un torneo
+        """
+        for language in languages or self.images:
+            while True:
+                with self._lock:
+                    if self._total[language] >= self.size:
+                        break
+                    self._total[language] += 1
+                try:
+                    slot = self._create(language, f"{self.default_memory}m")
+                except Exception:
+                    with self._lock:
+                        self._total[language] -= 1
+                    raise
+                with self._lock:
+                    self._idle[language].append(slot)
+
+    def acquire(self, language: str, memory_limit: int) -> Optional[PooledContainer]:
+        """
+        Obtiene un contenedor libre para el lenguaje
+
+        Retorna None si el pool está lleno y no hay contenedores libres;
+        en ese caso el llamador debe usar un contenedor efímero.
+        """
+        if language not in self.images:
+            return None
+
+        self._evict_idle()
+        mem_limit = f"{memory_limit}m"
+
+        with self._lock:
+            slot = self._idle[language].popleft() if self._idle[language] else None
+            if slot is None:
+                if self._total[language] >= self.size:
+                    return None
+                self._total[language] += 1
+
+        if slot is None:
+            try:
+                return self._create(language, mem_limit)
+            except Exception:
+                with self._lock:
+                    self._total[language] -= 1
+                return None
+
+        # Ajustar el límite de memoria al del reto si difiere
+        if slot.mem_limit != mem_limit:
+            try:
+                slot.container.update(mem_limit=mem_limit, memswap_limit=mem_limit)
+                slot.mem_limit = mem_limit
+            except Exception:
+                self._destroy(slot)
+                return self.acquire(language, memory_limit)
+
+        return slot
+
+    def release(self, slot: PooledContainer, dirty: bool = False):
+        """
+        Devuelve un contenedor al pool, reseteándolo o reciclándolo
+        """
+        slot.uses += 1
+        slot.last_used = time.monotonic()
+
+        if not dirty and slot.uses < self.max_reuse:
+            dirty = not self._reset(slot)
+        else:
+            dirty = True
+
+        if dirty:
+            self._destroy(slot)
+            return
+
+        with self._lock:
+            self._idle[slot.language].append(slot)
+
+    def shutdown(self):
+        """Destruye todos los contenedores libres del pool"""
+        with self._lock:
+            slots = [slot for idle in self._idle.values() for slot in idle]
+            for idle in self._idle.values():
+                idle.clear()
+        for slot in slots:
+            self._destroy(slot)
+
+    def reconnect(self, client):
+        """
+        Usa un nuevo cliente de Docker (tras reconectarse al daemon)
+        Los contenedores libres pertenecían a la conexión anterior y se descartan
+        """
+        self.client = client
+        self.shutdown()
+
+    def _create(self, language: str, mem_limit: str) -> PooledContainer:
+        """Crea e inicia un contenedor en espera"""
+        workdir = tempfile.mkdtemp(prefix='unpa-judge-', dir=self.code_dir)
+        os.chmod(workdir, 0o755)
+        zygote = language in self.zygote and language in ZYGOTE_COMMANDS
+        command = ['sleep', 'infinity']
+        volumes = {
+            workdir: {'bind': '/code', 'mode': 'ro'},  # Solo lectura
+            **self.volumes.get(language, {})
+        }
+        tmpfs = {'/tmp': 'rw,size=64m'}
+        if zygote:
+            command = ZYGOTE_COMMANDS[language]
+            volumes[str(TEMPLATES_DIR)] = {'bind': '/judge', 'mode': 'ro'}
+            tmpfs[ZYGOTE_RUN_DIR] = 'rw,size=1m,mode=0700'
+        try:
+            container = self.client.containers.run(
+                image=self.images[language],
+                command=command,
+                volumes=volumes,
+                working_dir='/code',
+                network_disabled=True,  # Sin acceso a red
+                mem_limit=mem_limit,
+                memswap_limit=mem_limit,  # Sin swap
+                cpu_quota=self.cpu_quota,
+                cpu_period=self.cpu_period,
+                pids_limit=50,  # Límite de procesos
+                read_only=True,
+                tmpfs=tmpfs,
+                labels=container_labels('pool'),
+                detach=True
+            )
+        except Exception:
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
+        return PooledContainer(container, language, workdir, mem_limit, zygote=zygote)
+
+    def _reset(self, slot: PooledContainer) -> bool:
+        """
+        Deja el contenedor limpio para la siguiente ejecución
+        Retorna False si el contenedor quedó en un estado no confiable
+        """
+        try:
+            slot.clear_workdir()
+            # kill -1 no alcanza al PID 1 (el zygote); se borran los FIFOs de
+            # la ejecución pero no el de control
+            result = slot.container.exec_run(
+                ['sh', '-c', 'kill -9 -1 2>/dev/null; rm -rf /tmp/* /tmp/.[!.]* '
+                 f'{ZYGOTE_RUN_DIR}/*.* 2>/dev/null; true']
+            )
+            if result.exit_code != 0:
+                return False
+            slot.container.reload()
+            return slot.container.status == 'running'
+        except Exception:
+            return False
+
+    def _destroy(self, slot: PooledContainer):
+        """Elimina el contenedor y su directorio de trabajo"""
+        with self._lock:
+            self._total[slot.language] -= 1
+        remove_workdir = partial(shutil.rmtree, slot.workdir, ignore_errors=True)
+        if self.reaper is not None:
+            self.reaper.reap(slot.container, cleanup=remove_workdir)
+            return
+        try:
+            slot.container.remove(force=True)
+        except Exception:
+            pass
+        remove_workdir()
+
+    def _evict_idle(self):
+        """Descarta contenedores que superaron el tiempo máximo sin uso"""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for idle in self._idle.values():
+                for slot in list(idle):
+                    if now - slot.last_used > self.idle_ttl:
+                        idle.remove(slot)
+                        expired.append(slot)
+        for slot in expired:
+            self._destroy(slot)
@@ -0,0 +1,195 @@
+"""
+Limpieza de los contenedores del juez
+Los contenedores se eliminan en segundo plano: el veredicto se retorna apenas
+se leyeron los resultados, sin esperar a que Docker mate y borre el
+contenedor. Todos los contenedores del juez llevan etiquetas (instancia del
+juez, rol y submission), con las que un barrido periódico encuentra los que
+quedaron huérfanos tras una caída del proceso
+"""
+import atexit
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+# Etiquetas de los contenedores del juez
+LABEL = 'unpa.judge'
+INSTANCE_LABEL = 'unpa.judge.instance'
+HOST_LABEL = 'unpa.judge.host'
+PID_LABEL = 'unpa.judge.pid'
+ROLE_LABEL = 'unpa.judge.role'
+CREATED_LABEL = 'unpa.judge.created'
+SUBMISSION_LABEL = 'unpa.judge.submission'
+
+# Roles de larga duración: los contenedores del pool y el servicio de
+# compilación Java viven mientras viva su proceso
+LONG_LIVED_ROLES = ('pool', 'service')
+
+# Instancia del juez: una por proceso
+HOSTNAME = socket.gethostname()
+INSTANCE_ID = f'{HOSTNAME}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+
+
+def container_labels(role: str, submission_id: Optional[Any] = None) -> Dict[str, str]:
+    """Etiquetas de un contenedor nuevo del juez"""
+    labels = {
+        LABEL: 'true',
+        INSTANCE_LABEL: INSTANCE_ID,
+        HOST_LABEL: HOSTNAME,
+        PID_LABEL: str(os.getpid()),
+        ROLE_LABEL: role,
+        CREATED_LABEL: str(int(time.time())),
+    }
+    if submission_id is not None:
+        labels[SUBMISSION_LABEL] = str(submission_id)
+    return labels
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Existe, pero es de otro usuario
+    return True
+
+
+def is_orphan(labels: Dict[str, str], max_age: float, now: Optional[float] = None) -> bool:
+    """
+    Decide si un contenedor del juez quedó huérfano:
+    - su proceso (de este host) ya no existe, o
+    - es de corta duración (ejecución, compilación) y superó `max_age`
+      segundos: ninguna ejecución dura tanto
+    """
+    now = time.time() if now is None else now
+    if labels.get(INSTANCE_LABEL) != INSTANCE_ID and labels.get(HOST_LABEL) == HOSTNAME:
+        try:
+            if not _process_alive(int(labels.get(PID_LABEL, ''))):
+                return True
+        except ValueError:
+            pass
+    if labels.get(ROLE_LABEL) in LONG_LIVED_ROLES:
+        return False
+    try:
+        return now - int(labels.get(CREATED_LABEL, '')) > max_age
+    except ValueError:
+        return False
+
+
+class ContainerReaper:
+    """
+    Elimina contenedores en un hilo de fondo
+
+    `reap` encola el contenedor y retorna enseguida; el hilo lo mata y lo
+    borra (`remove(force=True)`) y luego ejecuta la limpieza asociada (p. ej.
+    borrar su directorio de trabajo). Entre pedidos, cada `sweep_interval`
+    segundos, barre los contenedores huérfanos (ver `is_orphan`); el primer
+    barrido se hace al iniciar, para limpiar lo que dejó un proceso caído.
+    Al terminar el proceso se eliminan los contenedores pendientes.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, client, sweep_interval: float = 300.0, max_age: float = 1800.0):
+        self.client = client
+        self.sweep_interval = sweep_interval
+        self.max_age = max_age
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, client, **kwargs) -> 'ContainerReaper':
+        """
+        Retorna el reaper compartido por todo el proceso (se crea e inicia
+        la primera vez)
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(client, **kwargs)
+                cls._shared.start()
+                atexit.register(cls._shared.close)
+            return cls._shared
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name='judge-reaper', daemon=True
+                )
+                self._thread.start()
+
+    def close(self, timeout: float = 30.0):
+        """Elimina los contenedores pendientes y detiene el hilo"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def reconnect(self, client):
+        """Usa un nuevo cliente de Docker (tras reconectarse al daemon)"""
+        self.client = client
+
+    def reap(self, container, cleanup: Optional[Callable[[], Any]] = None):
+        """Encola el contenedor para eliminarlo en segundo plano"""
+        if self._thread is None:
+            self._remove(container, cleanup)
+            return
+        self._queue.put((container, cleanup))
+
+    def pending(self) -> int:
+        """Contenedores encolados que aún no se eliminaron"""
+        return self._queue.qsize()
+
+    def sweep(self) -> int:
+        """
+        Elimina los contenedores huérfanos del juez (filtrados por etiqueta)
+        Retorna la cantidad eliminada
+        """
+        try:
+            containers = self.client.containers.list(all=True, filters={'label': LABEL})
+        except Exception:
+            return 0
+
+        removed = 0
+        now = time.time()
+        for container in containers:
+            if is_orphan(container.labels or {}, self.max_age, now):
+                if self._remove(container):
+                    removed += 1
+        return removed
+
+    def _loop(self):
+        next_sweep = time.monotonic() if self.sweep_interval > 0 else None
+        while True:
+            timeout = None if next_sweep is None else max(0.0, next_sweep - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self.sweep()
+                next_sweep = time.monotonic() + self.sweep_interval
+                continue
+            if item is None:
+                return
+            self._remove(*item)
+
+    @staticmethod
+    def _remove(container, cleanup: Optional[Callable[[], Any]] = None) -> bool:
+        removed = True
+        try:
+            container.remove(force=True)
+        except Exception:
+            removed = False
+        if cleanup is not None:
+            try:
+                cleanup()
+            except Exception:
+                pass
+        return removed
@@ -0,0 +1,329 @@
+"""
+Daemon del juez automático
+Proceso de larga duración (`python manage.py judge_daemon`) que mantiene el
+runner, el cliente de Docker, el pool de contenedores y las plantillas en
+memoria, por lo que evaluar una submission no tiene costo de preparación.
+
+Los trabajos se toman de la cola en la BD (submissions pendientes sin
+reclamar); la aplicación web avisa por un socket Unix local para que el daemon
+no espere al siguiente sondeo. El mismo socket responde el estado de salud.
+
+Protocolo del socket: una línea JSON por pedido y una por respuesta
+    {"cmd": "judge", "submission_id": 42}  ->  {"ok": true}
+    {"cmd": "health"}                       ->  {"ok": true, "status": "ok", ...}
+    {"cmd": "metrics"}                      ->  {"ok": true, "metrics": [...]}
+    {"cmd": "prefetch", "torneo_id": 3}     ->  {"ok": true}
+"""
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import data_cache, metrics
+from .admission import get_sandbox_slots
+from .worker import claim_next, get_runner, judge_submission, release_stale_claims, worker_identity
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = '/tmp/unpa-judge.sock'
+
+# Tiempo máximo de espera de las conexiones al socket (segundos)
+SOCKET_TIMEOUT = 2.0
+
+
+def get_socket_path() -> str:
+    return getattr(settings, 'JUDGE_DAEMON_SOCKET', DEFAULT_SOCKET_PATH)
+
+
+def send_command(command: Dict[str, Any], socket_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Envía un pedido al daemon y retorna su respuesta
+    Lanza OSError si el daemon no está escuchando
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(SOCKET_TIMEOUT)
+        sock.connect(socket_path or get_socket_path())
+        sock.sendall((json.dumps(command) + '\n').encode('utf-8'))
+        with sock.makefile('r', encoding='utf-8') as reader:
+            line = reader.readline()
+    if not line:
+        raise OSError('El daemon cerró la conexión sin responder')
+    return json.loads(line)
+
+
+def notify_daemon(submission_id: int) -> bool:
+    """
+    Avisa al daemon que hay una submission nueva en la cola
+    Si no responde no se pierde nada: la toma en el siguiente sondeo
+    """
+    try:
+        return send_command({'cmd': 'judge', 'submission_id': submission_id}).get('ok', False)
+    except (OSError, ValueError):
+        logger.warning('No se pudo avisar al daemon del juez (submission #%s)', submission_id)
+        return False
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    """Atiende un pedido JSON por conexión"""
+
+    def handle(self):
+        self.connection.settimeout(SOCKET_TIMEOUT)
+        try:
+            command = json.loads(self.rfile.readline() or b'{}')
+            response = self.server.daemon.handle_command(command)
+        except (OSError, ValueError) as e:
+            response = {'ok': False, 'error': str(e)}
+        try:
+            self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+        except OSError:
+            pass
+
+
+class _CommandServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, daemon: 'JudgeDaemon'):
+        self.daemon = daemon
+        super().__init__(socket_path, _CommandHandler)
+
+
+class JudgeDaemon:
+    """
+    Servicio de evaluación de larga duración
+
+    Mientras haya workers libres reclama submissions pendientes de la BD y
+    las evalúa con el runner compartido del proceso. Periódicamente verifica
+    el backend (reconectándose a Docker si hace falta) y devuelve a la cola
+    las submissions de workers caídos.
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        health_interval: Optional[float] = None
+    ):
+        self.socket_path = socket_path or get_socket_path()
+        self.workers = workers or getattr(settings, 'JUDGE_WORKERS', 4)
+        self.poll_interval = poll_interval or getattr(settings, 'JUDGE_DAEMON_POLL_INTERVAL', 2.0)
+        self.health_interval = health_interval or getattr(settings, 'JUDGE_DAEMON_HEALTH_INTERVAL', 10.0)
+        self.worker_id = worker_identity()
+
+        self.runner = None
+        self.backend_ok = False
+        self.started_at = time.time()
+        self.evaluadas = 0
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix='judge-daemon'
+        )
+        self._lock = threading.Lock()
+        self._active = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._server = None
+
+    # Ciclo principal
+
+    def serve_forever(self):
+        """Atiende el socket y la cola hasta recibir SIGTERM/SIGINT"""
+        self._prepare_runner()
+        self._prefetch_data()
+        self._start_server()
+        self._install_signal_handlers()
+        logger.info(
+            'Daemon del juez %s escuchando en %s (%s workers)',
+            self.worker_id, self.socket_path, self.workers
+        )
+
+        last_health = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                if time.monotonic() - last_health >= self.health_interval:
+                    self.check_health()
+                    last_health = time.monotonic()
+                # Sin backend las submissions quedan en la cola hasta que vuelva
+                if self.backend_ok:
+                    self.dispatch_pending()
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        """Deja de reclamar trabajos; el ciclo principal termina los en curso"""
+        self._stop.set()
+        self._wake.set()
+
+    def shutdown(self):
+        """Espera las evaluaciones en curso y cierra el socket"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._remove_socket()
+        self._executor.shutdown(wait=True)
+        logger.info('Daemon del juez %s detenido', self.worker_id)
+
+    def dispatch_pending(self) -> int:
+        """
+        Reclama submissions pendientes mientras haya workers libres
+        Retorna la cantidad de submissions despachadas
+        """
+        dispatched = 0
+        while not self._stop.is_set():
+            with self._lock:
+                if self._active >= self.workers:
+                    break
+                self._active += 1
+            try:
+                submission_id = claim_next(self.worker_id)
+            except Exception:
+                submission_id = None
+                logger.exception('Error leyendo la cola de submissions')
+            if submission_id is None:
+                with self._lock:
+                    self._active -= 1
+                break
+            self._executor.submit(self._run, submission_id)
+            dispatched += 1
+        return dispatched
+
+    def _run(self, submission_id: int):
+        close_old_connections()
+        try:
+            judge_submission(submission_id)
+            with self._lock:
+                self.evaluadas += 1
+        except Exception:
+            logger.exception('Error evaluando submission #%s', submission_id)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self._active -= 1
+            # Un worker quedó libre: revisar la cola sin esperar el sondeo
+            self._wake.set()
+
+    # Salud
+
+    def check_health(self) -> bool:
+        """
+        Verifica el backend de ejecución (reconectando si hace falta) y
+        libera las submissions reclamadas por workers caídos
+        """
+        close_old_connections()
+        try:
+            released = release_stale_claims()
+            if released:
+                logger.warning('%s submissions abandonadas devueltas a la cola', released)
+        except Exception:
+            logger.exception('Error liberando submissions abandonadas')
+
+        if self.runner is None:
+            self._prepare_runner()
+        else:
+            backend_ok = self.runner.executor.check_health()
+            if backend_ok and not self.backend_ok:
+                logger.info('Backend de ejecución disponible nuevamente')
+            elif not backend_ok:
+                logger.error('Backend de ejecución no disponible')
+            self.backend_ok = backend_ok
+        return self.backend_ok
+
+    def health(self) -> Dict[str, Any]:
+        """Estado del daemon para el probe de salud"""
+        with self._lock:
+            active = self._active
+            evaluadas = self.evaluadas
+        return {
+            'ok': True,
+            'status': 'ok' if self.backend_ok else 'degraded',
+            'worker_id': self.worker_id,
+            'executor': type(self.runner.executor).__name__ if self.runner else None,
+            'backend_ok': self.backend_ok,
+            'activos': active,
+            'capacidad': self.workers,
+            'evaluadas': evaluadas,
+            'slots': get_sandbox_slots().stats(),
+            'uptime': round(time.time() - self.started_at, 1)
+        }
+
+    def handle_command(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """Responde un pedido recibido por el socket (los mal formados con un error)"""
+        if not isinstance(command, dict):
+            return {'ok': False, 'error': 'El pedido debe ser un objeto JSON'}
+        cmd = command.get('cmd')
+        if cmd == 'judge':
+            # La submission ya está en la cola: solo hay que despertar al ciclo
+            self._wake.set()
+            return {'ok': True}
+        if cmd == 'health':
+            return self.health()
+        if cmd == 'metrics':
+            return {'ok': True, 'metrics': metrics.evaluator_families()}
+        if cmd == 'prefetch':
+            # Un torneo pasó a en curso: descargar sus archivos de datos
+            try:
+                torneo_id = int(command['torneo_id'])
+            except (KeyError, TypeError, ValueError):
+                return {'ok': False, 'error': 'prefetch requiere un torneo_id entero'}
+            data_cache.start_prefetch(torneo_id)
+            return {'ok': True}
+        return {'ok': False, 'error': f'Comando desconocido: {cmd}'}
+
+    # Preparación
+
+    def _prepare_runner(self):
+        """
+        Crea el runner compartido y precalienta el backend
+        Si el backend no está disponible se reintenta en el próximo chequeo
+        """
+        try:
+            self.runner = get_runner()
+            self.runner.executor.warm_up()
+            self.backend_ok = True
+        except Exception:
+            self.backend_ok = False
+            logger.exception('No se pudo preparar el backend de ejecución')
+
+    def _prefetch_data(self):
+        """Descarga los archivos de datos de los torneos que ya están en curso"""
+        try:
+            for torneo_id in data_cache.running_torneos():
+                data_cache.start_prefetch(torneo_id)
+        except Exception:
+            logger.exception('No se pudieron descargar los archivos de datos')
+
+    def _start_server(self):
+        self._remove_socket()
+        self._server = _CommandServer(self.socket_path, self)
+        os.chmod(self.socket_path, 0o660)
+        thread = threading.Thread(
+            target=self._server.serve_forever,
+            name='judge-daemon-socket',
+            daemon=True
+        )
+        thread.start()
+
+    def _remove_socket(self):
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    def _install_signal_handlers(self):
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: self.stop())
@@ -0,0 +1,328 @@
+"""
+Caché local (del nodo) de los archivos de datos de los retos
+Reto.archivo_datos se descarga una sola vez por nodo del almacenamiento a
+JUDGE_DATA_CACHE_DIR/<sha256>/<nombre>, se verifica contra la huella
+calculada al subirlo y se monta de solo lectura en DATA_MOUNT en cada
+sandbox de ese reto, en lugar de copiarlo por submission. Las entradas se
+desalojan por tamaño total (la menos usada recientemente primero), salvo
+las que algún proceso del nodo tiene en uso, y se pueden descargar por
+adelantado al iniciar un torneo.
+"""
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Ruta de los archivos de datos dentro del sandbox (JUDGE_DATA_DIR en el entorno)
+DATA_MOUNT = '/data'
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Prefijo de las descargas en curso (no son entradas del caché)
+TMP_PREFIX = '.descarga-'
+
+# Sufijo del archivo de bloqueo de cada entrada (<sha256>.lock, junto a ella)
+LOCK_SUFFIX = '.lock'
+
+
+class DataFileError(Exception):
+    """El archivo descargado no coincide con su huella"""
+
+
+def file_checksum(fileobj) -> str:
+    """SHA-256 de un archivo de Django (se lee de a fragmentos)"""
+    digest = hashlib.sha256()
+    for chunk in fileobj.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DataFileCache:
+    """
+    Directorio de archivos de datos direccionados por su SHA-256
+
+    `lease` retorna el directorio (del host) con el archivo del reto,
+    descargándolo si hace falta, y lo protege del desalojo mientras se usa.
+    La descarga se escribe en un directorio temporal y se mueve a su lugar
+    con un rename atómico, por lo que varios procesos del nodo pueden
+    compartir el caché. Cada uso toma un flock compartido sobre el archivo
+    de bloqueo de la entrada antes de comprobar que existe, y el desalojo
+    solo elimina las entradas cuyo flock exclusivo obtiene sin esperar, así
+    que una entrada en uso en cualquier proceso del nodo no se elimina.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def entry_path(self, huella: str) -> str:
+        return os.path.join(self.root, huella)
+
+    @contextmanager
+    def lease(self, reto) -> Iterator[Optional[str]]:
+        """Directorio con el archivo de datos del reto (None si no tiene)"""
+        if not reto.archivo_datos:
+            yield None
+            return
+        path, lock = self._acquire(reto)
+        try:
+            yield path
+        finally:
+            os.close(lock)
+
+    def ensure(self, reto, verify: bool = False) -> Optional[str]:
+        """
+        Deja el archivo de datos del reto en el caché y retorna su directorio
+        Con `verify` se vuelve a calcular la huella de una entrada existente
+        (y se descarga otra vez si no coincide)
+        """
+        if not reto.archivo_datos:
+            return None
+        path, lock = self._acquire(reto, verify)
+        os.close(lock)
+        return path
+
+    def _acquire(self, reto, verify: bool = False) -> Tuple[str, int]:
+        """
+        Deja la entrada del reto en el caché y retorna su directorio junto
+        con el flock compartido que la protege del desalojo (el descriptor
+        se cierra al terminar de usarla)
+        """
+        fetched = False
+        if not reto.archivo_datos_huella:
+            # Archivo subido antes de que se calculara la huella: la descarga la calcula
+            metrics.observe_cache(metrics.CACHE_DATOS, False)
+            self._fetch(reto)
+            fetched = True
+        huella = reto.archivo_datos_huella
+        path = self.entry_path(huella)
+        lock = self._lock_entry(path)
+        try:
+            if os.path.isdir(path):
+                if fetched or not verify or self._verify(path, huella):
+                    os.utime(path)  # Uso reciente (orden del desalojo)
+                    if fetched:
+                        self.evict(keep=path)
+                    else:
+                        metrics.observe_cache(metrics.CACHE_DATOS, True)
+                    return path, lock
+                logger.warning('Archivo de datos dañado en el caché: %s', path)
+                shutil.rmtree(path, ignore_errors=True)
+            metrics.observe_cache(metrics.CACHE_DATOS, False)
+            self._fetch(reto)
+            self.evict(keep=path)
+            return path, lock
+        except BaseException:
+            os.close(lock)
+            raise
+
+    def _lock_entry(self, path: str, exclusive: bool = False) -> Optional[int]:
+        """
+        Toma el flock de la entrada: compartido (espera al desalojo en
+        curso) o exclusivo sin esperar (None si la entrada está en uso)
+        Retorna el descriptor del archivo de bloqueo
+        """
+        os.makedirs(self.root, exist_ok=True)
+        lock_path = path + LOCK_SUFFIX
+        while True:
+            lock = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB if exclusive else fcntl.LOCK_SH)
+            except BlockingIOError:
+                os.close(lock)
+                return None
+            try:
+                current = os.stat(lock_path).st_ino == os.fstat(lock).st_ino
+            except FileNotFoundError:
+                current = False
+            if current:
+                return lock
+            # El desalojo borró el archivo de bloqueo mientras se esperaba
+            os.close(lock)
+
+    def _fetch(self, reto) -> str:
+        """Descarga el archivo del almacenamiento verificando su huella"""
+        os.makedirs(self.root, exist_ok=True)
+        name = os.path.basename(reto.archivo_datos.name)
+        tmpdir = tempfile.mkdtemp(prefix=TMP_PREFIX, dir=self.root)
+        try:
+            digest = hashlib.sha256()
+            with reto.archivo_datos.open('rb') as source, open(os.path.join(tmpdir, name), 'wb') as target:
+                for chunk in source.chunks():
+                    digest.update(chunk)
+                    target.write(chunk)
+            huella = digest.hexdigest()
+            if reto.archivo_datos_huella and huella != reto.archivo_datos_huella:
+                raise DataFileError(
+                    f'El archivo de datos del reto #{reto.pk} no coincide con su huella'
+                )
+            if not reto.archivo_datos_huella:
+                # Archivo subido antes de que se calculara la huella
+                type(reto).objects.filter(pk=reto.pk).update(archivo_datos_huella=huella)
+                reto.archivo_datos_huella = huella
+            os.chmod(os.path.join(tmpdir, name), 0o444)
+            os.chmod(tmpdir, 0o755)
+
+            path = self.entry_path(huella)
+            try:
+                os.rename(tmpdir, path)
+            except OSError:
+                # Otro proceso del nodo la descargó primero
+                if not os.path.isdir(path):
+                    raise
+            return path
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def _verify(self, path: str, huella: str) -> bool:
+        digest = hashlib.sha256()
+        for name in os.listdir(path):
+            with open(os.path.join(path, name), 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        return digest.hexdigest() == huella
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """Entradas del caché: (último uso, bytes, ruta)"""
+        entries = []
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            path = os.path.join(self.root, name)
+            if name.startswith(TMP_PREFIX) or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+                entries.append((os.stat(path).st_mtime, size, path))
+            except FileNotFoundError:
+                continue  # Desalojada por otro proceso
+        return entries
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Elimina las entradas menos usadas hasta quedar dentro de max_bytes
+        (nunca `keep` ni las que algún proceso del nodo tiene en uso)
+        Retorna la cantidad eliminada
+        """
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            lock = self._lock_entry(path, exclusive=True)
+            if lock is None:
+                continue
+            try:
+                shutil.rmtree(path, ignore_errors=True)
+                os.unlink(path + LOCK_SUFFIX)
+            finally:
+                os.close(lock)
+            total -= size
+            removed += 1
+        return removed
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_data_cache() -> DataFileCache:
+    """Retorna el caché de archivos de datos del proceso (se crea la primera vez)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DataFileCache(
+                getattr(settings, 'JUDGE_DATA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'unpa-judge-data')),
+                getattr(settings, 'JUDGE_DATA_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+            )
+        return _cache
+
+
+def prefetch_torneo(torneo_id: int, verify: bool = False) -> int:
+    """
+    Descarga al caché los archivos de datos de los retos del torneo
+    Retorna la cantidad de archivos listos
+    """
+    from arena.models import Reto
+    cache = get_data_cache()
+    ready = 0
+    retos = Reto.objects.filter(torneo_id=torneo_id, tiene_validacion_automatica=True).exclude(
+        archivo_datos=''
+    ).only('id', 'archivo_datos', 'archivo_datos_huella')
+    for reto in retos:
+        try:
+            if cache.ensure(reto, verify=verify):
+                ready += 1
+        except (OSError, DataFileError):
+            logger.exception('No se pudo descargar el archivo de datos del reto #%s', reto.pk)
+    return ready
+
+
+def running_torneos() -> List[int]:
+    """Torneos en curso (sus archivos de datos se descargan al arrancar el daemon)"""
+    from arena.models import Torneo
+    return list(Torneo.objects.filter(estado='en_curso').values_list('id', flat=True))
+
+
+def start_prefetch(torneo_id: int):
+    """Descarga los archivos de datos del torneo en un hilo de este proceso"""
+    threading.Thread(
+        target=_prefetch_in_background, args=(torneo_id,), name='judge-prefetch', daemon=True
+    ).start()
+
+
+def request_prefetch(torneo_id: int):
+    """
+    Pide la descarga anticipada a quien evalúa según JUDGE_DISPATCH: el
+    daemon del juez ('daemon') o un hilo de este proceso ('thread')
+    """
+    if getattr(settings, 'JUDGE_DISPATCH', 'thread') == 'daemon':
+        from .daemon import send_command
+        try:
+            send_command({'cmd': 'prefetch', 'torneo_id': torneo_id})
+        except (OSError, ValueError):
+            logger.warning('No se pudo pedir al daemon la descarga de datos (torneo #%s)', torneo_id)
+        return
+    start_prefetch(torneo_id)
+
+
+def _prefetch_in_background(torneo_id: int):
+    close_old_connections()
+    try:
+        start = time.monotonic()
+        ready = prefetch_torneo(torneo_id)
+        logger.info(
+            'Archivos de datos del torneo #%s listos: %s (%.1f s)',
+            torneo_id, ready, time.monotonic() - start
+        )
+    except Exception:
+        logger.exception('Error descargando los archivos de datos del torneo #%s', torneo_id)
+    finally:
+        close_old_connections()
+
+
+def on_torneo_saved(sender, instance, **kwargs):
+    """
+    Señal post_save de Torneo: al quedar en curso se descargan los archivos
+    de datos de sus retos (no hace nada con los que ya están en el caché)
+    """
+    if instance.estado == 'en_curso':
+        transaction.on_commit(lambda: request_prefetch(instance.pk))
@@ -3,14 +3,64 @@ Módulo para ejecutar código en contenedores Docker aislados
 Garantiza seguridad mediante aislamiento, límites de recursos y sin acceso a red
 """
 import docker
+import json
 import tempfile
-import os
+import threading
 import time
+import uuid
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Union
+from django.conf import settings
 
+from .container_pool import TEMPLATES_DIR, ContainerPool, PooledContainer, ZYGOTE_RUN_DIR
+from .container_reaper import ContainerReaper, container_labels
+from .data_cache import DATA_MOUNT
+from .executors import BaseExecutor, OutputStream, STATS_PREFIX, get_code_dir
+from .java_cache import JavaCompileCache
+from .timing import (
+    ETAPA_ARRANQUE, ETAPA_COMPILACION, MARCA_CODIGO, MARCA_COMPILADA, MARCA_EJECUTADA,
+    MARCA_LOGS, MARCA_SANDBOX
+)
 
-class DockerExecutor:
+# Imprime en stderr los contadores del cgroup del contenedor: CPU (cpu.stat),
+# eventos de memoria (memory.events, incluye oom_kill) y pico de memoria. El
+# salto de línea inicial separa la muestra de un stderr que no terminó en uno
+CGROUP_STATS = (
+    'printf \'\\n%s\\n\' "' + STATS_PREFIX
+    + '$(cat /sys/fs/cgroup/cpu.stat /sys/fs/cgroup/memory.events 2>/dev/null | tr \'\\n\' \' \')'
+    + 'peak $(cat /sys/fs/cgroup/memory.peak 2>/dev/null || echo 0)" >&2'
+)
+
+# Cliente de los zygotes (ver templates/python_zygote.py): lee los FIFOs de la
+# ejecución, envía el pedido y espera el código de salida. Si el zygote no
+# está listo o no responde, ejecuta el comando del lenguaje como siempre. La
+# lectura de los FIFOs también tiene límite: un proceso que escapó del zygote
+# no puede retenerlos abiertos y colgar el `exec`.
+# Argumentos: directorio del zygote, id, pedido JSON, timeout, límite de la
+# lectura de los FIFOs y comando
+ZYGOTE_CLIENT = (
+    'run="$1"; d="$1/$2"; req="$3"; t="$4"; w="$5"; shift 5; code=; '
+    + CGROUP_STATS + '; '
+    'if [ -p "$run/ctl" ] && mkfifo "$d.out" "$d.err" 2>/dev/null; then '
+    'timeout -s KILL "$w" cat "$d.out" & o=$!; timeout -s KILL "$w" cat "$d.err" >&2 & e=$!; '
+    'if printf "%s\n" "$req" | timeout 2 tee "$run/ctl" >/dev/null; then '
+    'wait $o $e; i=0; '
+    'while [ ! -e "$d.code" ] && [ $i -lt 400 ]; do sleep 0.005; i=$((i+1)); done; '
+    'code=$(cat "$d.code" 2>/dev/null || echo 125); '
+    'else kill $o $e 2>/dev/null; fi; '
+    'rm -f "$d".*; '
+    'fi; '
+    'if [ -z "$code" ]; then timeout -s KILL "$t" "$@"; code=$?; fi; '
+    + CGROUP_STATS + '; exit $code'
+)
+
+
+# Segundos que el cliente sigue leyendo los FIFOs después del timeout del
+# zygote (la salida que quedó en tránsito)
+ZYGOTE_DRAIN_MARGIN = 1.0
+
+
+class DockerExecutor(BaseExecutor):
     """
     Ejecutor de código en Docker con restricciones de seguridad
     """
@@ -23,49 +73,147 @@ class DockerExecutor:
     }
     
     # Comandos de ejecución por lenguaje
+    # (Java se compila antes, fuera del sandbox, y el comando lo arma
+    # JavaCompileCache según haya archivo CDS del harness)
     COMMANDS = {
-        'python': ['python', '/code/solution.py'],
-        'java': [
-            'sh', '-c',
-            'cd /code && javac Solution.java __JudgeRunner.java && java __JudgeRunner'
-        ],
-        'javascript': ['node', '/code/solution.js']
+        'python': ['python', '/code/__judge__.py'],
+        'java': ['java', '-cp', JavaCompileCache.CLASSPATH, '__JudgeRunner'],
+        'javascript': ['node', '/code/__judge__.js']
     }
     
-    # Extensiones de archivo
-    EXTENSIONS = {
-        'python': '.py',
-        'java': '.java',
-        'javascript': '.js'
-    }
+    # Límites de CPU (1 core)
+    CPU_PERIOD = 100000  # 100ms
+    CPU_QUOTA = 100000
     
     def __init__(self):
-        """Inicializa el cliente de Docker"""
+        """Inicializa el cliente de Docker y el pool de contenedores"""
+        self.client = self._connect()
+        
+        # Archivos de cada ejecución en memoria (tmpfs del host) si se puede
+        self.code_dir = get_code_dir()
+        
+        # Elimina los contenedores en segundo plano y barre los huérfanos
+        self.reaper = ContainerReaper.shared(
+            self.client,
+            sweep_interval=getattr(settings, 'JUDGE_SWEEP_INTERVAL', 300),
+            max_age=getattr(settings, 'JUDGE_SWEEP_MAX_AGE', 1800)
+        )
+        
+        self.java_cache = JavaCompileCache(
+            self.client,
+            self.IMAGES['java'],
+            getattr(settings, 'JUDGE_CACHE_DIR', Path(tempfile.gettempdir()) / 'unpa-judge-cache'),
+            compile_memory=getattr(settings, 'JUDGE_JAVA_COMPILE_MEMORY', 512),
+            compile_timeout=getattr(settings, 'JUDGE_JAVA_COMPILE_TIMEOUT', 30),
+            service=getattr(settings, 'JUDGE_JAVA_COMPILE_SERVICE', True),
+            cds=getattr(settings, 'JUDGE_JAVA_CDS', True),
+            max_bytes=getattr(settings, 'JUDGE_JAVA_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+        )
+        
+        self.pool = None
+        if getattr(settings, 'JUDGE_POOL_ENABLED', True):
+            self.pool = ContainerPool.shared(
+                self.client,
+                self.IMAGES,
+                size=getattr(settings, 'JUDGE_POOL_SIZE', 2),
+                max_reuse=getattr(settings, 'JUDGE_POOL_MAX_REUSE', 50),
+                idle_ttl=getattr(settings, 'JUDGE_POOL_IDLE_TTL', 300),
+                cpu_quota=self.CPU_QUOTA,
+                cpu_period=self.CPU_PERIOD,
+                zygote=[
+                    language for language, enabled in (
+                        ('python', getattr(settings, 'JUDGE_PYTHON_ZYGOTE', True)),
+                        ('javascript', getattr(settings, 'JUDGE_JS_ZYGOTE', True)),
+                    ) if enabled
+                ],
+                volumes={'java': self.java_cache.volumes()},
+                reaper=self.reaper,
+                code_dir=self.code_dir
+            )
+    
+    @staticmethod
+    def _connect():
+        """Crea un cliente de Docker y verifica que el daemon responde"""
         try:
-            self.client = docker.from_env()
+            client = docker.from_env()
             # Verificar que Docker está disponible
-            self.client.ping()
+            client.ping()
         except Exception as e:
             raise RuntimeError(f"No se pudo conectar a Docker: {e}")
+        return client
+    
+    def warm_up(self):
+        """
+        Pre-inicia los contenedores del pool, el servicio de compilación
+        Java y el archivo CDS del harness
+        """
+        if self.pool is not None:
+            self.pool.warm_up()
+        self.java_cache.warm_up(
+            (TEMPLATES_DIR / 'java.java').read_text(encoding='utf-8')
+        )
+    
+    def check_health(self) -> bool:
+        """
+        Verifica la conexión con Docker y se reconecta si se perdió
+        (p. ej. si el daemon se reinició). Los contenedores del pool no
+        sobreviven al reinicio, por lo que se descartan los libres.
+        """
+        try:
+            self.client.ping()
+            return True
+        except Exception:
+            pass
+        
+        try:
+            client = self._connect()
+        except RuntimeError:
+            return False
+        
+        self.client = client
+        self.reaper.reconnect(client)
+        self.java_cache.reconnect(client)
+        if self.pool is not None:
+            self.pool.reconnect(client)
+        return True
     
     def execute(
         self,
         code: str,
         language: str,
         time_limit: float = 5.0,
-        memory_limit: int = 256
+        memory_limit: int = 256,
+        files: Optional[Dict[str, str]] = None,
+        env: Optional[Dict[str, str]] = None,
+        on_test: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        output_limit: Optional[int] = None,
+        submission_id: Optional[int] = None,
+        data_dir: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Ejecuta código en un contenedor Docker aislado
         
         Args:
-            code: Código fuente a ejecutar (ya combinado con tests)
+            code: Código fuente de la solución
             language: Lenguaje de programación ('python', 'java', 'javascript')
             time_limit: Límite de tiempo en segundos
             memory_limit: Límite de memoria en MB
+            files: Archivos adicionales a copiar junto al código (harness,
+                tests) {nombre: contenido}
+            env: Variables de entorno del proceso evaluado
+            on_test: Callback invocado con cada resultado de test a medida
+                que el harness lo emite; si retorna True se detiene la ejecución
+            output_limit: Límite de salida (stdout + stderr) en MB; si se
+                excede se mata el contenedor con veredicto OLE
+            submission_id: Submission evaluada (etiqueta del contenedor)
+            data_dir: Directorio del host con el archivo de datos del reto,
+                montado de solo lectura en /data
         
         Returns:
-            Dict con stdout, stderr, exit_code, tiempo_ejecucion, error
+            Dict con stdout, stderr, exit_code, tiempo_ejecucion, error,
+            tests (resultados por test recibidos), detenido, etapas
+            (arranque del contenedor y compilación, en segundos) y marcas
+            (instantes de la cronología, ver timing.py)
         """
         if language not in self.IMAGES:
             return {
@@ -74,19 +222,97 @@ class DockerExecutor:
                 'veredicto': 'SE'
             }
         
-        # Crear directorio temporal para el código
-        with tempfile.TemporaryDirectory() as tmpdir:
+        files = dict(files or {})
+        files[self._get_filename(language)] = code
+        
+        # Java: compilar (o tomar del caché) fuera del sandbox de ejecución
+        compile_cache_hit = None
+        command = None
+        etapas = {}
+        marcas = {}
+        if language == 'java':
+            compile_start = time.perf_counter()
+            build = self.java_cache.prepare(
+                solution_source=files.pop('Solution.java'),
+                harness_source=files.pop('__JudgeRunner.java', '')
+            )
+            etapas[ETAPA_COMPILACION] = time.perf_counter() - compile_start
+            marcas[MARCA_COMPILADA] = time.monotonic()
+            compile_cache_hit = build['cache_hit']
+            if build['veredicto'] != 'OK':
+                return {
+                    'success': False,
+                    'stdout': '',
+                    'stderr': build['stderr'],
+                    'exit_code': 1,
+                    'tiempo_ejecucion': 0,
+                    'error': 'Error de compilación' if build['veredicto'] == 'CE' else build['stderr'],
+                    'veredicto': build['veredicto'],
+                    'compilacion_cacheada': compile_cache_hit,
+                    'etapas': etapas,
+                    'marcas': marcas
+                }
+            files.update(build['files'])
+            command = build['command']
+        
+        result = self._execute_files(
+            files, language, time_limit, memory_limit, env=env,
+            stream=self._open_stream(on_test, output_limit),
+            command=command,
+            submission_id=submission_id,
+            data_dir=data_dir
+        )
+        if compile_cache_hit is not None:
+            result['compilacion_cacheada'] = compile_cache_hit
+        result['etapas'] = {**etapas, **result.get('etapas', {})}
+        result['marcas'] = {**marcas, **result.get('marcas', {})}
+        return result
+    
+    def _execute_files(
+        self,
+        files: Dict[str, Union[str, bytes]],
+        language: str,
+        time_limit: float,
+        memory_limit: int,
+        env: Optional[Dict[str, str]] = None,
+        stream: Optional[OutputStream] = None,
+        command: Optional[List[str]] = None,
+        submission_id: Optional[int] = None,
+        data_dir: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Copia los archivos al sandbox y ejecuta el comando del lenguaje
+        (o `command`, si se indica)
+        """
+        stream = stream or OutputStream()
+        
+        # Usar un contenedor pre-iniciado si hay uno disponible (los montajes
+        # se fijan al crear el contenedor: con archivo de datos no se usa)
+        if self.pool is not None and data_dir is None:
+            acquire_start = time.perf_counter()
+            slot = self.pool.acquire(language, memory_limit)
+            if slot is not None:
+                return self._run_pooled(
+                    slot=slot,
+                    files=files,
+                    language=language,
+                    time_limit=time_limit,
+                    env=env,
+                    stream=stream,
+                    command=command,
+                    acquire_time=time.perf_counter() - acquire_start
+                )
+        
+        # Crear directorio temporal para el código (en memoria si se puede)
+        with tempfile.TemporaryDirectory(prefix='unpa-judge-', dir=self.code_dir) as tmpdir:
             try:
-                # Escribir código en archivo
-                filename = self._get_filename(language)
-                code_path = os.path.join(tmpdir, filename)
-                
-                with open(code_path, 'w', encoding='utf-8') as f:
-                    f.write(code)
+                # Escribir código en archivos
+                self._write_files(tmpdir, files)
+                written = time.monotonic()
                 
                 # Configurar límites de recursos
-                cpu_period = 100000  # 100ms
-                cpu_quota = int(cpu_period * 1)  # 1 CPU core
+                cpu_period = self.CPU_PERIOD
+                cpu_quota = self.CPU_QUOTA
                 mem_limit = f"{memory_limit}m"
                 
                 # Ejecutar en Docker
@@ -96,8 +322,14 @@ class DockerExecutor:
                     time_limit=time_limit,
                     cpu_quota=cpu_quota,
                     cpu_period=cpu_period,
-                    mem_limit=mem_limit
+                    mem_limit=mem_limit,
+                    env=env,
+                    stream=stream,
+                    command=command,
+                    submission_id=submission_id,
+                    data_dir=data_dir
                 )
+                result.setdefault('marcas', {})[MARCA_CODIGO] = written
                 
                 return result
                 
@@ -112,16 +344,38 @@ class DockerExecutor:
                     'veredicto': 'SE'
                 }
     
-    def _get_filename(self, language: str) -> str:
-        """Retorna el nombre de archivo según el lenguaje"""
-        if language == 'java':
-            # Java requiere que el archivo se llame como la clase pública
-            return 'Solution.java'
-        elif language == 'python':
-            return 'solution.py'
-        elif language == 'javascript':
-            return 'solution.js'
-        return f'solution{self.EXTENSIONS[language]}'
+    def _build_command(
+        self,
+        language: str,
+        time_limit: float,
+        command: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Comando a ejecutar en el sandbox: el comando del lenguaje (o
+        `command`) con `timeout -s KILL`, envuelto para registrar los
+        contadores del cgroup antes y después de la ejecución
+        """
+        script = f'{CGROUP_STATS}; timeout -s KILL {time_limit + 1} "$@"; code=$?; {CGROUP_STATS}; exit $code'
+        return ['sh', '-c', script, 'judge'] + (command or self.COMMANDS[language])
+    
+    def _build_zygote_command(
+        self,
+        language: str,
+        time_limit: float,
+        env: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """
+        Comando que pide la ejecución al zygote del contenedor
+        El zygote aplica el timeout al hijo; el comando del lenguaje queda
+        como respaldo si el zygote no responde
+        """
+        request_id = uuid.uuid4().hex
+        request = json.dumps({'id': request_id, 'env': env or {}, 'timeout': time_limit + 1})
+        return [
+            'sh', '-c', ZYGOTE_CLIENT, 'judge',
+            ZYGOTE_RUN_DIR, request_id, request, str(time_limit + 1),
+            str(time_limit + 1 + ZYGOTE_DRAIN_MARGIN)
+        ] + self.COMMANDS[language]
     
     def _run_container(
         self,
@@ -130,22 +384,42 @@ class DockerExecutor:
         time_limit: float,
         cpu_quota: int,
         cpu_period: int,
-        mem_limit: str
+        mem_limit: str,
+        env: Optional[Dict[str, str]] = None,
+        stream: Optional[OutputStream] = None,
+        command: Optional[List[str]] = None,
+        submission_id: Optional[int] = None,
+        data_dir: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Ejecuta el contenedor Docker con las restricciones especificadas
+        stdout y stderr se leen mientras el contenedor corre en una única
+        lectura demultiplexada, que acumula a lo sumo JUDGE_MAX_LOG_BYTES por
+        stream y mata el contenedor si se excede el límite de salida. El
+        timeout lo aplica `timeout` dentro del contenedor y, como respaldo,
+        un timer que mata el contenedor. El contenedor se elimina en segundo
+        plano (reaper) después de leer los resultados
         """
         image = self.IMAGES[language]
-        command = self.COMMANDS[language]
+        command = self._build_command(language, time_limit, command)
+        stream = stream or OutputStream()
+        volumes = {
+            tmpdir: {'bind': '/code', 'mode': 'ro'},  # Solo lectura
+            **(self.java_cache.volumes() if language == 'java' else {})
+        }
+        env = dict(env or {})
+        if data_dir is not None:
+            # Archivo de datos del reto desde el caché del nodo
+            volumes[data_dir] = {'bind': DATA_MOUNT, 'mode': 'ro'}
+            env['JUDGE_DATA_DIR'] = DATA_MOUNT
         
         # Preparar configuración del contenedor
         container_config = {
             'image': image,
             'command': command,
-            'volumes': {
-                tmpdir: {'bind': '/code', 'mode': 'ro'}  # Solo lectura
-            },
+            'volumes': volumes,
             'working_dir': '/code',
+            'environment': env,
             'network_disabled': True,  # Sin acceso a red
             'mem_limit': mem_limit,
             'memswap_limit': mem_limit,  # Sin swap
@@ -155,40 +429,47 @@ class DockerExecutor:
             'detach': True,
             'stdout': True,
             'stderr': True,
+            'labels': container_labels('run', submission_id),
             'remove': False  # No remover automáticamente para inspeccionar
         }
         
         container = None
         try:
             # Crear y ejecutar contenedor
+            startup_start = time.perf_counter()
             container = self.client.containers.run(**container_config)
+            etapas = {ETAPA_ARRANQUE: time.perf_counter() - startup_start}
+            marcas = {MARCA_SANDBOX: time.monotonic()}
             
             # Esperar con timeout
             start_time = time.time()
+            killer = threading.Timer(time_limit + 2, self._kill_container, args=(container,))
+            killer.daemon = True
+            killer.start()
             try:
-                exit_code = container.wait(timeout=time_limit + 1)['StatusCode']
+                # Leer stdout y stderr en streaming hasta que el contenedor termine
+                output = container.attach(
+                    stdout=True, stderr=True, stream=True, logs=True, demux=True
+                )
+                for stdout_chunk, stderr_chunk in output:
+                    if stream.feed(stdout_chunk, stderr_chunk):
+                        self._kill_container(container)
+                        break
+                exit_code = container.wait(timeout=time_limit + 2)['StatusCode']
                 execution_time = time.time() - start_time
+                marcas[MARCA_EJECUTADA] = time.monotonic()
+                stream.close()
                 
-                # Obtener salidas
-                stdout = container.logs(stdout=True, stderr=False).decode('utf-8', errors='replace')
-                stderr = container.logs(stdout=False, stderr=True).decode('utf-8', errors='replace')
-                
-                # Determinar veredicto
-                veredicto = self._determine_verdict(
-                    exit_code=exit_code,
-                    execution_time=execution_time,
-                    time_limit=time_limit,
-                    stderr=stderr
-                )
+                usage = stream.resource_usage()
+                container.reload()
+                if container.attrs.get('State', {}).get('OOMKilled'):
+                    usage['oom_killed'] = True
                 
-                return {
-                    'success': exit_code == 0,
-                    'stdout': stdout,
-                    'stderr': stderr,
-                    'exit_code': exit_code,
-                    'tiempo_ejecucion': execution_time,
-                    'veredicto': veredicto
-                }
+                result = self._build_result(stream, exit_code, execution_time, time_limit, usage)
+                marcas[MARCA_LOGS] = time.monotonic()
+                result['etapas'] = etapas
+                result['marcas'] = marcas
+                return result
                 
             except docker.errors.ContainerError as e:
                 # Error durante la ejecución
@@ -199,7 +480,8 @@ class DockerExecutor:
                     'exit_code': e.exit_status,
                     'tiempo_ejecucion': time.time() - start_time,
                     'error': str(e),
-                    'veredicto': 'RE'
+                    'veredicto': 'RE',
+                    'tests': stream.tests
                 }
                 
             except Exception as e:
@@ -217,44 +499,129 @@ class DockerExecutor:
                     'exit_code': -1,
                     'tiempo_ejecucion': execution_time,
                     'error': str(e),
-                    'veredicto': veredicto
+                    'veredicto': veredicto,
+                    'tests': stream.tests
                 }
+            
+            finally:
+                killer.cancel()
         
         finally:
-            # Limpiar contenedor
+            # Matar y eliminar el contenedor sin demorar el veredicto
             if container:
-                try:
-                    container.kill()
-                except:
-                    pass
-                try:
-                    container.remove(force=True)
-                except:
-                    pass
+                self.reaper.reap(container)
+    
+    def _kill_container(self, container):
+        try:
+            container.kill()
+        except:
+            pass
     
-    def _determine_verdict(
+    def _run_pooled(
         self,
-        exit_code: int,
-        execution_time: float,
+        slot: PooledContainer,
+        files: Dict[str, Union[str, bytes]],
+        language: str,
         time_limit: float,
-        stderr: str
-    ) -> str:
+        env: Optional[Dict[str, str]] = None,
+        stream: Optional[OutputStream] = None,
+        command: Optional[List[str]] = None,
+        acquire_time: float = 0.0
+    ) -> Dict[str, Any]:
         """
-        Determina el veredicto basado en el resultado de la ejecución
+        Ejecuta el código mediante `exec` en un contenedor del pool
+        El timeout se aplica dentro del contenedor con `timeout -s KILL`, que
+        solo alcanza al grupo de procesos del comando: un nieto que se separó
+        con setsid puede mantener abierta la salida del `exec`. Por eso un
+        watchdog del host mata el contenedor a los `time_limit` +
+        JUDGE_TIMEOUT_MARGIN segundos (y se descarta). El pico de memoria del
+        cgroup acumula ejecuciones previas, por lo que se toma el que reporta
+        el harness.
+        Si la ejecución se detiene antes de terminar, el proceso lo mata el
+        reseteo del pool al liberar el contenedor. En los contenedores con
+        zygote la ejecución la atiende el zygote (un fork o un proceso ya
+        iniciado) en lugar de un intérprete nuevo.
+        El arranque del sandbox es `acquire_time` (tomar el contenedor del
+        pool) más la escritura de los archivos y la creación del `exec`.
         """
-        if execution_time >= time_limit:
-            return 'TLE'  # Time Limit Exceeded
+        stream = stream or OutputStream()
+        dirty = False
+        start_time = time.time()
+        startup_start = time.perf_counter()
+        marcas = {MARCA_SANDBOX: time.monotonic()}
+        expired = threading.Event()
         
-        if exit_code != 0:
-            if 'OutOfMemoryError' in stderr or 'MemoryError' in stderr:
-                return 'MLE'  # Memory Limit Exceeded
-            elif 'Compilation error' in stderr or 'SyntaxError' in stderr:
-                return 'CE'  # Compilation Error
+        def expire():
+            expired.set()
+            self._kill_container(slot.container)
+        
+        watchdog = threading.Timer(
+            time_limit + getattr(settings, 'JUDGE_TIMEOUT_MARGIN', 2.0), expire
+        )
+        watchdog.daemon = True
+        try:
+            self._write_files(slot.workdir, files)
+            marcas[MARCA_CODIGO] = time.monotonic()
+            
+            if slot.zygote:
+                command = self._build_zygote_command(language, time_limit, env)
+            else:
+                command = self._build_command(language, time_limit, command)
+            api = self.client.api
+            exec_id = api.exec_create(
+                slot.container.id, command, workdir='/code', environment=env
+            )['Id']
+            etapas = {ETAPA_ARRANQUE: acquire_time + time.perf_counter() - startup_start}
+            
+            start_time = time.time()
+            watchdog.start()
+            output = api.exec_start(exec_id, stream=True, demux=True)
+            try:
+                for stdout_chunk, stderr_chunk in output:
+                    if stream.feed(stdout_chunk, stderr_chunk):
+                        break
+            except Exception:
+                # Al matar el contenedor la conexión del exec puede cortarse
+                if not expired.is_set():
+                    raise
+            watchdog.cancel()
+            execution_time = time.time() - start_time
+            stream.close()
+            
+            if expired.is_set():
+                exit_code = 137  # SIGKILL del watchdog
+            elif stream.should_stop:
+                exit_code = -1
             else:
-                return 'RE'  # Runtime Error
+                exit_code = api.exec_inspect(exec_id)['ExitCode']
+            marcas[MARCA_EJECUTADA] = time.monotonic()
+            
+            # Un proceso matado (timeout u OOM) puede dejar el contenedor inconsistente
+            dirty = exit_code in (124, 137)
+            
+            usage = stream.resource_usage(include_peak=False)
+            result = self._build_result(stream, exit_code, execution_time, time_limit, usage)
+            marcas[MARCA_LOGS] = time.monotonic()
+            result['etapas'] = etapas
+            result['marcas'] = marcas
+            return result
         
-        # El veredicto AC/WA se determina después comparando outputs
-        return 'OK'  # OK indica que se ejecutó correctamente
+        except Exception as e:
+            dirty = True
+            return {
+                'success': False,
+                'stdout': '',
+                'stderr': str(e),
+                'exit_code': -1,
+                'tiempo_ejecucion': time.time() - start_time,
+                'error': str(e),
+                'veredicto': 'SE',
+                'tests': stream.tests
+            }
+        
+        finally:
+            watchdog.cancel()
+            self.pool.release(slot, dirty=dirty)
     
     def pull_images(self):
         """
@@ -269,16 +636,10 @@ class DockerExecutor:
             except Exception as e:
                 print(f"✗ Error descargando {image}: {e}")
     
-    def cleanup_old_containers(self):
+    def cleanup_old_containers(self) -> int:
         """
-        Limpia contenedores antiguos que puedan haber quedado
+        Elimina los contenedores del juez que quedaron huérfanos (filtrados
+        por etiqueta, ver container_reaper.py)
+        Retorna la cantidad eliminada
         """
-        try:
-            filters = {'status': 'exited'}
-            containers = self.client.containers.list(all=True, filters=filters)
-            
-            for container in containers:
-                if any(image in str(container.image) for image in self.IMAGES.values()):
-                    container.remove(force=True)
-        except Exception as e:
-            print(f"Error limpiando contenedores: {e}")
+        return self.reaper.sweep()
@@ -0,0 +1,433 @@
+"""
+Backends de ejecución del juez
+Define la interfaz común de los ejecutores (Docker, proceso local con
+rlimits y simulado) y la selección del backend mediante JUDGE_EXECUTOR.
+Todos retornan el mismo dict de resultado que consume JudgeRunner.
+"""
+import json
+import os
+import threading
+from typing import Callable, Dict, Any, List, Optional, Union
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_EXECUTOR = 'judge.docker_executor.DockerExecutor'
+
+# Prefijo de las líneas con el resultado de un test que emite el harness
+RECORD_PREFIX = '__JUDGE__ '
+
+# Prefijo de las líneas (en stderr) con los contadores del cgroup
+STATS_PREFIX = '__JUDGE_STATS__ '
+
+# Bytes de stdout y de stderr que se conservan por sandbox por defecto
+DEFAULT_MAX_LOG_BYTES = 64 * 1024
+
+# Tamaño de los fragmentos leídos de las tuberías del proceso
+READ_CHUNK_SIZE = 64 * 1024
+
+# Directorio en memoria (tmpfs del host) para los archivos de cada ejecución
+DEFAULT_CODE_DIR = '/dev/shm'
+
+
+class BoundedLog:
+    """
+    Líneas de salida conservadas hasta un máximo de bytes
+    Las líneas que no entran se descartan (solo se cuentan) y el texto lleva
+    una marca de truncado; la última línea se conserva siempre porque el
+    harness imprime ahí su resumen.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.omitted = 0
+        self._lines: List[str] = []
+        self._size = 0
+        self._last: Optional[str] = None
+    
+    def append(self, line: str):
+        if self._last is not None:
+            self.omitted += len(self._last.encode('utf-8')) + 1
+        size = len(line.encode('utf-8')) + 1
+        if self.omitted == 0 and self._size + size <= self.max_bytes:
+            self._lines.append(line)
+            self._size += size
+            self._last = None
+        else:
+            self._last = line
+    
+    @property
+    def text(self) -> str:
+        lines = list(self._lines)
+        omitted = self.omitted
+        last = None
+        if self._last is not None:
+            encoded = self._last.encode('utf-8')
+            omitted += max(0, len(encoded) - self.max_bytes)
+            last = encoded[-self.max_bytes:].decode('utf-8', errors='replace')
+        if omitted:
+            lines.append(f'... [salida truncada: {omitted} bytes omitidos]')
+        if last is not None:
+            lines.append(last)
+        return '\n'.join(lines)
+
+
+class OutputStream:
+    """
+    Acumula la salida de un sandbox mientras se ejecuta
+    Separa los registros por test que emite el harness (una línea con
+    RECORD_PREFIX por test) del resto del stdout y los notifica a `on_test`
+    apenas llegan. Si `on_test` retorna True la ejecución debe detenerse.
+    
+    La memoria usada está acotada: de stdout y stderr se conservan a lo sumo
+    `max_log_bytes` cada uno (con una marca de truncado) y, si la salida total
+    del sandbox supera `output_limit` bytes, se marca `output_exceeded` y la
+    ejecución debe detenerse (veredicto OLE).
+    """
+    
+    def __init__(
+        self,
+        on_test: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        output_limit: Optional[int] = None,
+        max_log_bytes: Optional[int] = None
+    ):
+        if max_log_bytes is None:
+            max_log_bytes = getattr(settings, 'JUDGE_MAX_LOG_BYTES', DEFAULT_MAX_LOG_BYTES)
+        self.on_test = on_test
+        self.output_limit = output_limit
+        self.tests: List[Dict[str, Any]] = []
+        self.stopped = False
+        self.output_exceeded = False
+        self.output_bytes = 0
+        self.stats: List[Dict[str, int]] = []
+        self._stdout = BoundedLog(max_log_bytes)
+        self._stderr = BoundedLog(max_log_bytes)
+        self._pending = b''
+        self._stderr_pending = b''
+        self._stderr_blank = False  # Línea vacía retenida (ver _handle_stderr_line)
+        self._lock = threading.Lock()
+    
+    @property
+    def should_stop(self) -> bool:
+        return self.stopped or self.output_exceeded
+    
+    def feed(self, stdout_chunk: Optional[bytes], stderr_chunk: Optional[bytes]) -> bool:
+        """
+        Procesa un fragmento de una lectura demultiplexada (stdout, stderr);
+        retorna True si hay que detener
+        """
+        if stderr_chunk:
+            self.feed_stderr(stderr_chunk)
+        if stdout_chunk:
+            self.feed_stdout(stdout_chunk)
+        return self.should_stop
+    
+    def feed_stdout(self, chunk: bytes) -> bool:
+        """Procesa un fragmento de stdout; retorna True si hay que detener"""
+        if self._count(chunk):
+            return True
+        self._pending += chunk
+        *lines, self._pending = self._pending.split(b'\n')
+        for line in lines:
+            self._handle_line(line.decode('utf-8', errors='replace'))
+        return self.should_stop
+    
+    def feed_stderr(self, chunk: bytes) -> bool:
+        """Procesa un fragmento de stderr; retorna True si hay que detener"""
+        if self._count(chunk):
+            return True
+        self._stderr_pending += chunk
+        *lines, self._stderr_pending = self._stderr_pending.split(b'\n')
+        for line in lines:
+            self._handle_stderr_line(line.decode('utf-8', errors='replace'))
+        return self.should_stop
+    
+    def close(self):
+        """Procesa las últimas líneas si no terminaron en salto de línea"""
+        if self._pending:
+            self._handle_line(self._pending.decode('utf-8', errors='replace'))
+            self._pending = b''
+        if self._stderr_pending:
+            self._handle_stderr_line(self._stderr_pending.decode('utf-8', errors='replace'))
+            self._stderr_pending = b''
+        if self._stderr_blank:
+            self._stderr.append('')
+            self._stderr_blank = False
+    
+    @property
+    def stdout(self) -> str:
+        return self._stdout.text
+    
+    @property
+    def stderr(self) -> str:
+        return self._stderr.text
+    
+    def _count(self, chunk: bytes) -> bool:
+        """
+        Suma el fragmento a la salida total; retorna True si supera el
+        límite (el fragmento se descarta)
+        """
+        with self._lock:
+            self.output_bytes += len(chunk)
+            if self.output_limit is not None and self.output_bytes > self.output_limit:
+                self.output_exceeded = True
+            return self.output_exceeded
+    
+    def resource_usage(self, include_peak: bool = True) -> Dict[str, Any]:
+        """
+        Consumo del cgroup entre la primera y la última muestra
+        El pico de memoria solo es válido si el contenedor es exclusivo de
+        esta ejecución (en un contenedor del pool acumula ejecuciones previas)
+        """
+        if len(self.stats) < 2:
+            return {}
+        before, after = self.stats[0], self.stats[-1]
+        usage = {}
+        if 'usage_usec' in before and 'usage_usec' in after:
+            usage['tiempo_cpu'] = (after['usage_usec'] - before['usage_usec']) / 1_000_000
+        if 'oom_kill' in before and 'oom_kill' in after:
+            usage['oom_killed'] = after['oom_kill'] > before['oom_kill']
+        if include_peak and after.get('peak'):
+            usage['memoria_usada'] = -(-after['peak'] // (1024 * 1024))  # MB, redondeo hacia arriba
+        return usage
+    
+    @staticmethod
+    def _parse_stats(text: str) -> Dict[str, int]:
+        """Convierte 'clave valor clave valor ...' en un dict"""
+        tokens = text.split()
+        stats = {}
+        for key, value in zip(tokens[::2], tokens[1::2]):
+            if value.isdigit():
+                stats[key] = int(value)
+        return stats
+    
+    def _handle_line(self, line: str):
+        if not line.startswith(RECORD_PREFIX):
+            self._stdout.append(line)
+            return
+        try:
+            record = json.loads(line[len(RECORD_PREFIX):])
+        except ValueError:
+            self._stdout.append(line)
+            return
+        self.tests.append(record)
+        if self.on_test is not None and self.on_test(record):
+            self.stopped = True
+    
+    def _handle_stderr_line(self, line: str):
+        # Las muestras de contadores del cgroup no son salida del programa;
+        # la línea vacía que las precede la agrega la propia muestra
+        if line.startswith(STATS_PREFIX):
+            self._stderr_blank = False
+            self.stats.append(self._parse_stats(line[len(STATS_PREFIX):]))
+            return
+        if self._stderr_blank:
+            self._stderr.append('')
+        self._stderr_blank = line == ''
+        if not self._stderr_blank:
+            self._stderr.append(line)
+
+
+class BaseExecutor:
+    """
+    Interfaz de los backends de ejecución
+    
+    `execute` recibe la solución, el harness y los tests (en `files`) y
+    retorna un dict con success, stdout, stderr, exit_code,
+    tiempo_ejecucion, veredicto ('OK' si el proceso terminó bien, 'OLE' si
+    excedió el límite de salida), tests (resultados por test recibidos) y
+    detenido; opcionalmente tiempo_cpu y memoria_usada. stdout y stderr
+    llegan acotados (ver OutputStream).
+    """
+    
+    # Lenguajes soportados por el backend
+    LANGUAGES = ['python', 'java', 'javascript']
+    
+    # Los backends que no ejecutan el código fuera del proceso del juez
+    # (simulados) reciben además las salidas esperadas en expected.jsonl
+    IN_PROCESS = False
+    
+    # Extensiones de archivo
+    EXTENSIONS = {
+        'python': '.py',
+        'java': '.java',
+        'javascript': '.js'
+    }
+    
+    def execute(
+        self,
+        code: str,
+        language: str,
+        time_limit: float = 5.0,
+        memory_limit: int = 256,
+        files: Optional[Dict[str, str]] = None,
+        env: Optional[Dict[str, str]] = None,
+        on_test: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        output_limit: Optional[int] = None,
+        submission_id: Optional[int] = None,
+        data_dir: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta la solución junto al harness
+        
+        Args:
+            code: Código fuente de la solución
+            language: Lenguaje de programación ('python', 'java', 'javascript')
+            time_limit: Límite de tiempo de la ejecución completa en segundos
+            memory_limit: Límite de memoria en MB
+            files: Archivos adicionales a copiar junto al código (harness,
+                tests) {nombre: contenido}
+            env: Variables de entorno del proceso evaluado
+            on_test: Callback invocado con cada resultado de test a medida
+                que el harness lo emite; si retorna True se detiene la ejecución
+            output_limit: Límite de salida (stdout + stderr) en MB; si se
+                excede se detiene la ejecución con veredicto OLE
+            submission_id: Submission evaluada, para identificar los
+                recursos de la ejecución (p. ej. etiquetas de contenedores)
+            data_dir: Directorio del host con el archivo de datos del reto
+                (ver data_cache.py); el código lo lee de solo lectura en la
+                ruta de la variable JUDGE_DATA_DIR
+        """
+        raise NotImplementedError
+
+    def warm_up(self):
+        """Prepara recursos antes de recibir trabajo (por defecto nada)"""
+
+    def check_health(self) -> bool:
+        """
+        Verifica que el backend puede ejecutar código
+        Los backends con conexiones externas se reconectan aquí si la
+        perdieron; retorna False si el backend no está disponible
+        """
+        return True
+    
+    def _open_stream(
+        self,
+        on_test: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        output_limit: Optional[int] = None
+    ) -> OutputStream:
+        """Crea el acumulador de salida con el límite de salida en bytes"""
+        if output_limit is None:
+            return OutputStream(on_test)
+        return OutputStream(on_test, output_limit=output_limit * 1024 * 1024)
+    
+    def _unsupported_language(self, language: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': f'Lenguaje no soportado: {language}',
+            'veredicto': 'SE'
+        }
+    
+    def _get_filename(self, language: str) -> str:
+        """Retorna el nombre de archivo según el lenguaje"""
+        if language == 'java':
+            # Java requiere que el archivo se llame como la clase pública
+            return 'Solution.java'
+        elif language == 'python':
+            return 'solution.py'
+        elif language == 'javascript':
+            return 'solution.js'
+        return f'solution{self.EXTENSIONS[language]}'
+    
+    def _write_files(self, directory: str, files: Dict[str, Union[str, bytes]]):
+        """Escribe los archivos del sandbox (admite subdirectorios)"""
+        for name, content in files.items():
+            path = os.path.join(directory, name)
+            os.makedirs(os.path.dirname(path), mode=0o755, exist_ok=True)
+            if isinstance(content, bytes):
+                with open(path, 'wb') as f:
+                    f.write(content)
+            else:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+    
+    def _build_result(
+        self,
+        stream: OutputStream,
+        exit_code: int,
+        execution_time: float,
+        time_limit: float,
+        usage: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Arma el resultado de una ejecución a partir de la salida acumulada
+        y del consumo de recursos medido (cgroup, rusage, etc.)
+        """
+        usage = usage or {}
+        if stream.output_exceeded:
+            veredicto = 'OLE'
+        elif stream.stopped:
+            # Detenida a pedido (fail-fast): los resultados ya están en `tests`
+            veredicto = 'OK'
+        else:
+            veredicto = self._determine_verdict(
+                exit_code=exit_code,
+                execution_time=execution_time,
+                time_limit=time_limit,
+                stderr=stream.stderr,
+                oom_killed=usage.get('oom_killed', False)
+            )
+        
+        result = {
+            'success': exit_code == 0,
+            'stdout': stream.stdout,
+            'stderr': stream.stderr,
+            'exit_code': exit_code,
+            'tiempo_ejecucion': execution_time,
+            'veredicto': veredicto,
+            'tests': stream.tests,
+            'detenido': stream.stopped
+        }
+        if stream.output_exceeded:
+            result['error'] = f'Límite de salida excedido ({stream.output_limit} bytes)'
+        if 'tiempo_cpu' in usage:
+            result['tiempo_cpu'] = usage['tiempo_cpu']
+        if 'memoria_usada' in usage:
+            result['memoria_usada'] = usage['memoria_usada']
+        return result
+    
+    def _determine_verdict(
+        self,
+        exit_code: int,
+        execution_time: float,
+        time_limit: float,
+        stderr: str,
+        oom_killed: bool = False
+    ) -> str:
+        """
+        Determina el veredicto basado en el resultado de la ejecución
+        El MLE se detecta por el OOM killer (oom_kill u OOMKilled en Docker)
+        """
+        if oom_killed:
+            return 'MLE'  # Memory Limit Exceeded
+        
+        if execution_time >= time_limit:
+            return 'TLE'  # Time Limit Exceeded
+        
+        if exit_code != 0:
+            if 'Compilation error' in stderr or 'SyntaxError' in stderr:
+                return 'CE'  # Compilation Error
+            else:
+                return 'RE'  # Runtime Error
+        
+        # El veredicto AC/WA se determina después comparando outputs
+        return 'OK'  # OK indica que se ejecutó correctamente
+
+
+def get_executor() -> BaseExecutor:
+    """
+    Crea el ejecutor configurado en JUDGE_EXECUTOR (ruta a la clase)
+    """
+    executor_class = import_string(getattr(settings, 'JUDGE_EXECUTOR', DEFAULT_EXECUTOR))
+    return executor_class()
+
+
+def get_code_dir() -> Optional[str]:
+    """
+    Directorio donde se crean los directorios de código de las ejecuciones:
+    JUDGE_CODE_DIR (por defecto /dev/shm, en memoria) si existe y se puede
+    escribir; si no, None (el directorio temporal del sistema)
+    """
+    path = getattr(settings, 'JUDGE_CODE_DIR', DEFAULT_CODE_DIR)
+    if path and os.path.isdir(path) and os.access(path, os.W_OK | os.X_OK):
+        return path
+    return None
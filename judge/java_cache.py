@@ -0,0 +1,625 @@
+"""
+Caché de artefactos de compilación Java
+- El harness (__JudgeRunner) se compila una sola vez por imagen/versión
+- Las clases de Solution se guardan por hash del código fuente: un acierto
+  evita compilar
+- Los errores de compilación también se guardan, así un reenvío idéntico
+  retorna CE de inmediato
+- Las soluciones cacheadas se desalojan por tamaño total (la usada hace más
+  tiempo primero)
+- Las compilaciones las atiende un servicio de larga duración que compila en
+  memoria (JavaCompileService); si no está disponible se usa un contenedor
+  efímero con javac
+- Del harness se genera un archivo de class-data sharing (AppCDS) que las
+  ejecuciones mapean en memoria en lugar de cargar y verificar las clases
+"""
+import atexit
+import errno
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from .container_pool import TEMPLATES_DIR
+from .container_reaper import container_labels
+
+# Punto de montaje (solo lectura) de los archivos CDS en los sandboxes
+CDS_MOUNT = '/cds'
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Las soluciones usadas hace menos de estos segundos no se desalojan: otro
+# hilo o proceso puede estar leyendo sus clases
+EVICT_GRACE = 60.0
+
+# Solución y tests con los que se entrena el archivo CDS: recorren el harness
+# (llamada a función y main con stdin) para registrar las clases que carga
+TRAINING_SOLUTION = """import java.util.*;
+
+public class Solution {
+    public static int suma(int a, int b) {
+        return a + b;
+    }
+
+    public static void main(String[] args) {
+        Scanner scanner = new Scanner(System.in);
+        List<Integer> values = new ArrayList<>();
+        while (scanner.hasNextInt()) {
+            values.add(scanner.nextInt());
+        }
+        System.out.println(values.stream().mapToInt(Integer::intValue).sum());
+    }
+}
+"""
+
+TRAINING_TESTS = (
+    '{"name": "Test 1", "function_call": {"name": "suma", "args": [2, 3]}}\n'
+    '{"name": "Test 2", "input": "1 2 3"}\n'
+)
+
+# Genera el JAR del harness y su archivo CDS en el directorio $1 (la ruta
+# debe ser la misma con la que se monta en los sandboxes: el classpath del
+# archivo se valida al ejecutar)
+CDS_SCRIPT = (
+    'set -e; '
+    'javac -encoding UTF-8 -d /tmp/solution /train/Solution.java; '
+    'jar cf "$1/harness.jar" -C /classes .; '
+    'java -XX:DumpLoadedClassList=/tmp/classes.lst -cp "$1/harness.jar:/tmp/solution" '
+    '__JudgeRunner > /dev/null; '
+    'java -Xshare:dump -XX:SharedClassListFile=/tmp/classes.lst '
+    '-XX:SharedArchiveFile="$1/harness.jsa" -cp "$1/harness.jar"'
+)
+
+
+class JavaCompileService:
+    """
+    Compilador Java de larga duración (templates/JavaCompileServer.java)
+
+    Corre en un contenedor sin red de la imagen de Java y compila en memoria
+    con javax.tools, sin pagar el arranque de la JVM por compilación. Los
+    pedidos viajan por el FIFO `ctl` de un directorio del host montado en
+    /work (ver el protocolo en la plantilla); varios procesos del juez con el
+    mismo directorio comparten el servicio.
+
+    Si el servicio no está escuchando, `compile` retorna None (y lo inicia):
+    el llamador debe compilar por otro medio.
+    """
+
+    POLL_INTERVAL = 0.005
+
+    def __init__(self, client, image: str, workdir: Path, memory: int = 512, timeout: float = 30.0):
+        self.client = client
+        self.image = image
+        self.workdir = Path(workdir)
+        self.jobs = self.workdir / 'jobs'
+        self.control = self.workdir / 'ctl'
+        self.memory = memory
+        self.timeout = timeout
+        self.container = None
+        self._lock = threading.Lock()
+        self._atexit = False
+
+        self.jobs.mkdir(parents=True, exist_ok=True)
+
+    def is_listening(self) -> bool:
+        """True si algún servicio tiene abierto el FIFO de pedidos"""
+        try:
+            fd = os.open(self.control, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError:
+            return False
+        os.close(fd)
+        return True
+
+    def start(self) -> bool:
+        """
+        Inicia el contenedor del servicio si nadie está escuchando
+        No espera a que esté listo; retorna True si ya lo está
+        """
+        with self._lock:
+            if self.is_listening():
+                return True
+            if self.container is not None:
+                try:
+                    self.container.reload()
+                    if self.container.status in ('created', 'running'):
+                        return False  # Todavía arrancando
+                except Exception:
+                    pass
+                self._remove_container()
+
+            self._ensure_fifo()
+            self.container = self.client.containers.run(
+                image=self.image,
+                command=['java', '-XX:+UseSerialGC', '/judge/JavaCompileServer.java', '/work'],
+                volumes={
+                    str(TEMPLATES_DIR): {'bind': '/judge', 'mode': 'ro'},
+                    str(self.workdir): {'bind': '/work', 'mode': 'rw'}
+                },
+                working_dir='/tmp',
+                network_disabled=True,
+                mem_limit=f'{self.memory}m',
+                memswap_limit=f'{self.memory}m',
+                pids_limit=50,
+                labels=container_labels('service'),
+                detach=True
+            )
+            if not self._atexit:
+                atexit.register(self.stop)
+                self._atexit = True
+            return False
+
+    def wait_ready(self, timeout: float = 60.0) -> bool:
+        """Inicia el servicio y espera a que atienda pedidos"""
+        deadline = time.monotonic() + timeout
+        while not self.start():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def stop(self):
+        with self._lock:
+            self._remove_container()
+
+    def compile(self, target: Path, filename: str, source: str) -> Optional[Dict[str, Any]]:
+        """
+        Compila `source` y mueve las clases a `target`
+        Retorna el resultado (veredicto 'OK', 'CE' o 'SE' y stderr) o None si
+        el servicio no está escuchando
+        """
+        job_id = uuid.uuid4().hex
+        job = self.jobs / job_id
+        try:
+            # El servicio corre como root en su contenedor: escribe en
+            # directorios del juez, que luego puede moverlos y borrarlos
+            (job / 'classes').mkdir(parents=True)
+            os.chmod(job, 0o777)
+            os.chmod(job / 'classes', 0o777)
+            (job / filename).write_text(source, encoding='utf-8')
+
+            if not self._send(f'{job_id} {filename}\n'):
+                try:
+                    self.start()
+                except Exception:
+                    pass
+                return None
+
+            status = self._wait_status(job)
+            if status is None:
+                # Compilación colgada: se descarta el servicio
+                self.stop()
+                error = 'La compilación excedió el tiempo límite'
+                return {'veredicto': 'SE', 'stderr': error, 'error': error}
+
+            stderr = (job / 'stderr.txt').read_text(encoding='utf-8', errors='replace')
+            if status == '1':
+                return {'veredicto': 'CE', 'stderr': stderr}
+            if status != '0':
+                return {'veredicto': 'SE', 'stderr': stderr, 'error': stderr}
+
+            try:
+                os.rename(job / 'classes', target)
+            except OSError:
+                # Otro proceso compiló el mismo código en paralelo
+                if not target.is_dir():
+                    raise
+            return {'veredicto': 'OK', 'stderr': stderr}
+
+        finally:
+            shutil.rmtree(job, ignore_errors=True)
+
+    def _send(self, line: str) -> bool:
+        """Escribe un pedido en el FIFO (False si nadie lo está leyendo)"""
+        try:
+            fd = os.open(self.control, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as e:
+            if e.errno in (errno.ENXIO, errno.ENOENT):
+                return False
+            raise
+        try:
+            # Menos de PIPE_BUF bytes: la escritura es atómica
+            os.write(fd, line.encode('utf-8'))
+            return True
+        except BlockingIOError:
+            return False
+        finally:
+            os.close(fd)
+
+    def _wait_status(self, job: Path) -> Optional[str]:
+        deadline = time.monotonic() + self.timeout
+        status_file = job / 'status'
+        while time.monotonic() < deadline:
+            try:
+                return status_file.read_text().strip()
+            except FileNotFoundError:
+                time.sleep(self.POLL_INTERVAL)
+        return None
+
+    def _ensure_fifo(self):
+        try:
+            if self.control.is_fifo():
+                return
+            self.control.unlink()
+        except FileNotFoundError:
+            pass
+        os.mkfifo(self.control, 0o600)
+
+    def _remove_container(self):
+        if self.container is not None:
+            try:
+                self.container.remove(force=True)
+            except Exception:
+                pass
+            self.container = None
+
+
+class JavaCompileCache:
+    """
+    Compila y cachea clases Java en el host
+
+    Estructura del directorio de caché:
+        java/harness/<hash>/        __JudgeRunner*.class
+        java/solutions/<hash>/      Solution*.class
+        java/solutions/<hash>.ce    salida de javac si no compiló
+        java/cds/<hash>/            harness.jar y harness.jsa (archivo CDS)
+        java/cds/<hash>.error       salida de la generación si falló
+        java/service/               FIFO y trabajos del servicio de compilación
+
+    Las entradas de java/solutions se desalojan cuando superan `max_bytes`,
+    empezando por la usada hace más tiempo (cada acierto actualiza su mtime).
+
+    El caché no se monta en los sandboxes (expondría las soluciones de otros
+    tributos): las clases de cada ejecución se copian junto al resto de los
+    archivos, en /code/solution (y el harness en /code/harness si no hay
+    archivo CDS). Solo java/cds se monta, de solo lectura, en /cds.
+    """
+
+    # Classpath dentro del sandbox
+    CLASSPATH = '/code/harness:/code/solution'
+
+    def __init__(
+        self,
+        client,
+        image: str,
+        cache_dir: str,
+        compile_memory: int = 512,
+        compile_timeout: float = 30.0,
+        service: bool = True,
+        cds: bool = True,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        self.client = client
+        self.image = image
+        self.cache_dir = Path(cache_dir)
+        self.root = self.cache_dir / 'java'
+        self.compile_memory = compile_memory
+        self.compile_timeout = compile_timeout
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self.cds = cds
+        self.max_bytes = max_bytes
+
+        for subdir in ('harness', 'solutions', 'cds'):
+            (self.root / subdir).mkdir(parents=True, exist_ok=True)
+
+        self.service = None
+        if service:
+            self.service = JavaCompileService(
+                client,
+                image,
+                self.root / 'service',
+                memory=compile_memory,
+                timeout=compile_timeout
+            )
+
+    def reconnect(self, client):
+        """Usa un nuevo cliente de Docker (tras reconectarse al daemon)"""
+        self.client = client
+        if self.service is not None:
+            self.service.client = client
+
+    def warm_up(self, harness_source: str):
+        """
+        Inicia el servicio de compilación y prepara el harness y su archivo
+        CDS, para que la primera submission no pague esos costos
+        """
+        if self.service is not None:
+            self.service.wait_ready()
+        harness_key = self._key(harness_source)
+        harness = self._ensure_compiled(
+            self.root / 'harness' / harness_key,
+            '__JudgeRunner.java',
+            harness_source
+        )
+        if harness['veredicto'] == 'OK' and self.cds:
+            self._ensure_archive(harness_key)
+
+    def volumes(self) -> Dict[str, Dict[str, str]]:
+        """Montajes de los sandboxes de Java (los archivos CDS)"""
+        return {str(self.root / 'cds'): {'bind': CDS_MOUNT, 'mode': 'ro'}}
+
+    def prepare(self, solution_source: str, harness_source: str) -> Dict[str, Any]:
+        """
+        Asegura que el harness y la solución estén compilados
+
+        Returns:
+            Dict con veredicto ('OK', 'CE' o 'SE'), archivos .class a copiar
+            al sandbox, comando de ejecución, stderr de javac y si fue un
+            acierto de caché
+        """
+        harness_key = self._key(harness_source)
+        solution_key = self._key(solution_source)
+
+        harness = self._ensure_compiled(
+            self.root / 'harness' / harness_key,
+            '__JudgeRunner.java',
+            harness_source
+        )
+        if harness['veredicto'] != 'OK':
+            # El harness es nuestro: si no compila es un error del sistema
+            harness['veredicto'] = 'SE'
+            return harness
+
+        solution = self._ensure_compiled(
+            self.root / 'solutions' / solution_key,
+            'Solution.java',
+            solution_source
+        )
+        if solution['veredicto'] != 'OK':
+            return solution
+
+        files = self._read_classes(self.root / 'solutions' / solution_key, 'solution')
+        archive = self._ensure_archive(harness_key) if self.cds else None
+        if archive is None:
+            files.update(self._read_classes(self.root / 'harness' / harness_key, 'harness'))
+            classpath = self.CLASSPATH
+            options = []
+        else:
+            # El classpath del archivo CDS debe ser prefijo del de ejecución
+            classpath = f'{archive}/harness.jar:/code/solution'
+            options = [
+                f'-XX:SharedArchiveFile={archive}/harness.jsa',
+                '-Xshare:auto',
+                # Avisos de CDS a stderr: stdout es del protocolo del harness
+                '-Xlog:disable',
+                '-Xlog:all=warning:stderr'
+            ]
+
+        solution['files'] = files
+        solution['classpath'] = classpath
+        solution['command'] = self.run_command(classpath, options)
+        return solution
+
+    @staticmethod
+    def run_command(classpath: str, options: Optional[List[str]] = None) -> List[str]:
+        """Comando que ejecuta el harness dentro del sandbox"""
+        return ['java'] + (options or []) + ['-cp', classpath, '__JudgeRunner']
+
+    def _read_classes(self, directory: Path, prefix: str) -> Dict[str, bytes]:
+        """Lee los .class compilados (incluye clases internas como Solution$1)"""
+        return {
+            f'{prefix}/{path.relative_to(directory)}': path.read_bytes()
+            for path in directory.rglob('*.class')
+        }
+
+    def _key(self, source: str) -> str:
+        """Hash del código fuente y la imagen (cambia si se actualiza el JDK)"""
+        digest = hashlib.sha256()
+        digest.update(self.image.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _lock_for(self, path: Path) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(str(path), threading.Lock())
+
+    def _ensure_compiled(self, target: Path, filename: str, source: str) -> Dict[str, Any]:
+        """
+        Retorna el resultado cacheado o compila en un contenedor efímero
+        """
+        error_file = target.with_suffix('.ce')
+
+        with self._lock_for(target):
+            try:
+                if target.is_dir():
+                    os.utime(target)  # Uso reciente (orden del desalojo)
+                    return {'veredicto': 'OK', 'stderr': '', 'cache_hit': True}
+                if error_file.exists():
+                    os.utime(error_file)
+                    return {
+                        'veredicto': 'CE',
+                        'stderr': error_file.read_text(encoding='utf-8'),
+                        'cache_hit': True
+                    }
+            except FileNotFoundError:
+                pass  # Desalojada por otro proceso: se compila de nuevo
+
+            result = self._compile(target, filename, source)
+            if result['veredicto'] == 'CE':
+                error_file.write_text(result['stderr'], encoding='utf-8')
+            result['cache_hit'] = False
+
+        if target.parent == self.root / 'solutions':
+            self.evict()
+        return result
+
+    def evict(self) -> int:
+        """
+        Elimina soluciones cacheadas (clases y errores de compilación) hasta
+        quedar dentro de max_bytes, la usada hace más tiempo primero; nunca
+        las usadas en los últimos EVICT_GRACE segundos
+        Retorna la cantidad eliminada
+        """
+        entries = []
+        for path in (self.root / 'solutions').iterdir():
+            if path.name.startswith('.staging-'):
+                continue
+            try:
+                if path.is_dir():
+                    size = sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+                else:
+                    size = path.stat().st_size
+                entries.append((path.stat().st_mtime, size, path))
+            except FileNotFoundError:
+                continue  # Desalojada por otro proceso
+
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        removed = 0
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes or now - mtime < EVICT_GRACE:
+                break
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def _compile(self, target: Path, filename: str, source: str) -> Dict[str, Any]:
+        """
+        Compila con el servicio de larga duración o, si no está disponible,
+        con un contenedor efímero
+        """
+        if self.service is not None:
+            try:
+                result = self.service.compile(target, filename, source)
+            except Exception as e:
+                result = {'veredicto': 'SE', 'stderr': str(e), 'error': str(e)}
+            if result is not None:
+                return result
+        return self._compile_in_container(target, filename, source)
+
+    def _compile_in_container(self, target: Path, filename: str, source: str) -> Dict[str, Any]:
+        """
+        Ejecuta javac en un contenedor sin red y mueve las clases al caché
+        """
+        staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=target.parent))
+        src_dir = tempfile.mkdtemp(prefix='unpa-javac-')
+        container = None
+        try:
+            os.chmod(staging, 0o777)
+            os.chmod(src_dir, 0o755)
+            with open(os.path.join(src_dir, filename), 'w', encoding='utf-8') as f:
+                f.write(source)
+
+            container = self.client.containers.run(
+                image=self.image,
+                command=['javac', '-encoding', 'UTF-8', '-d', '/out', f'/src/{filename}'],
+                volumes={
+                    src_dir: {'bind': '/src', 'mode': 'ro'},
+                    str(staging): {'bind': '/out', 'mode': 'rw'}
+                },
+                network_disabled=True,
+                mem_limit=f'{self.compile_memory}m',
+                memswap_limit=f'{self.compile_memory}m',
+                pids_limit=50,
+                labels=container_labels('compile'),
+                detach=True
+            )
+            exit_code = container.wait(timeout=self.compile_timeout)['StatusCode']
+            stderr = container.logs(stdout=False, stderr=True).decode('utf-8', errors='replace')
+
+            if exit_code != 0:
+                return {'veredicto': 'CE', 'stderr': stderr}
+
+            try:
+                os.rename(staging, target)
+            except OSError:
+                # Otro proceso compiló el mismo código en paralelo
+                if not target.is_dir():
+                    raise
+            return {'veredicto': 'OK', 'stderr': stderr}
+
+        except Exception as e:
+            return {'veredicto': 'SE', 'stderr': str(e), 'error': str(e)}
+
+        finally:
+            if container is not None:
+                try:
+                    container.remove(force=True)
+                except Exception:
+                    pass
+            shutil.rmtree(src_dir, ignore_errors=True)
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _ensure_archive(self, harness_key: str) -> Optional[str]:
+        """
+        Retorna el directorio (dentro del sandbox) del archivo CDS del
+        harness, generándolo si falta; None si no se pudo generar
+        """
+        target = self.root / 'cds' / harness_key
+        error_file = target.with_suffix('.error')
+
+        with self._lock_for(target):
+            if not target.is_dir() and not error_file.exists():
+                self._build_archive(target, harness_key)
+            if target.is_dir():
+                return f'{CDS_MOUNT}/{harness_key}'
+            return None
+
+    def _build_archive(self, target: Path, harness_key: str):
+        """
+        Empaqueta el harness en un JAR, registra las clases que carga una
+        ejecución de entrenamiento y genera con ellas el archivo CDS
+        """
+        staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=target.parent))
+        train_dir = tempfile.mkdtemp(prefix='unpa-cds-')
+        archive_dir = f'{CDS_MOUNT}/{harness_key}'
+        container = None
+        try:
+            os.chmod(staging, 0o777)
+            os.chmod(train_dir, 0o755)
+            with open(os.path.join(train_dir, 'Solution.java'), 'w', encoding='utf-8') as f:
+                f.write(TRAINING_SOLUTION)
+            with open(os.path.join(train_dir, 'tests.jsonl'), 'w', encoding='utf-8') as f:
+                f.write(TRAINING_TESTS)
+
+            container = self.client.containers.run(
+                image=self.image,
+                command=['sh', '-c', CDS_SCRIPT, 'cds', archive_dir],
+                volumes={
+                    str(self.root / 'harness' / harness_key): {'bind': '/classes', 'mode': 'ro'},
+                    train_dir: {'bind': '/train', 'mode': 'ro'},
+                    str(staging): {'bind': archive_dir, 'mode': 'rw'}
+                },
+                working_dir='/train',
+                network_disabled=True,
+                mem_limit=f'{self.compile_memory}m',
+                memswap_limit=f'{self.compile_memory}m',
+                pids_limit=50,
+                labels=container_labels('compile'),
+                detach=True
+            )
+            exit_code = container.wait(timeout=self.compile_timeout * 2)['StatusCode']
+            if exit_code != 0:
+                # Sin archivo CDS se ejecuta igual, solo que sin la mejora
+                output = container.logs().decode('utf-8', errors='replace')
+                target.with_suffix('.error').write_text(output, encoding='utf-8')
+                return
+
+            try:
+                os.rename(staging, target)
+            except OSError:
+                if not target.is_dir():
+                    raise
+
+        except Exception:
+            # Docker no disponible o timeout: se reintenta en la próxima
+            pass
+
+        finally:
+            if container is not None:
+                try:
+                    container.remove(force=True)
+                except Exception:
+                    pass
+            shutil.rmtree(train_dir, ignore_errors=True)
+            shutil.rmtree(staging, ignore_errors=True)
@@ -0,0 +1,292 @@
+"""
+Ejecutor de código como proceso local, sin Docker
+Aplica límites con `resource.prlimit` al proceso recién creado (no en un
+preexec_fn, que no es seguro en los hilos del worker), vigila su memoria
+residente y ejecuta en un directorio temporal nuevo, pero NO aísla red ni
+sistema de archivos: solo para modo práctica con código de confianza. Evita el
+costo de arranque de un contenedor.
+"""
+import os
+import resource
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+from django.conf import settings
+
+from .executors import BaseExecutor, OutputStream, READ_CHUNK_SIZE, get_code_dir
+from .timing import (
+    ETAPA_ARRANQUE, ETAPA_COMPILACION, MARCA_CODIGO, MARCA_COMPILADA, MARCA_EJECUTADA,
+    MARCA_LOGS, MARCA_SANDBOX
+)
+
+# Tamaño máximo de archivos que puede escribir la solución (bytes)
+MAX_FILE_SIZE = 64 * 1024 * 1024
+
+# Memoria escribible (RLIMIT_DATA) que la JVM y V8 tienen además del límite
+# (MB): sus flags acotan solo el heap, no los Buffers ni la memoria nativa
+NATIVE_HEADROOM_MB = 256
+
+# Intervalo del sondeo de la memoria residente del proceso (segundos)
+MEMORY_POLL_INTERVAL = 0.05
+
+
+class LocalExecutor(BaseExecutor):
+    """
+    Ejecutor que corre el harness como subproceso del servidor
+    """
+
+    def __init__(self):
+        self.python = getattr(settings, 'JUDGE_LOCAL_PYTHON', None) or sys.executable
+        self.node = getattr(settings, 'JUDGE_LOCAL_NODE', 'node')
+        self.java = getattr(settings, 'JUDGE_LOCAL_JAVA', 'java')
+        self.javac = getattr(settings, 'JUDGE_LOCAL_JAVAC', 'javac')
+
+    def execute(
+        self,
+        code: str,
+        language: str,
+        time_limit: float = 5.0,
+        memory_limit: int = 256,
+        files: Optional[Dict[str, str]] = None,
+        env: Optional[Dict[str, str]] = None,
+        on_test: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        output_limit: Optional[int] = None,
+        submission_id: Optional[int] = None,
+        data_dir: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta la solución en un proceso local con límites de rlimit
+        (el archivo de datos se lee directamente del caché del nodo)
+        """
+        if language not in self.LANGUAGES:
+            return self._unsupported_language(language)
+
+        files = dict(files or {})
+        files[self._get_filename(language)] = code
+        if data_dir is not None:
+            env = {**(env or {}), 'JUDGE_DATA_DIR': data_dir}
+
+        with tempfile.TemporaryDirectory(prefix='unpa-judge-local-', dir=get_code_dir()) as tmpdir:
+            try:
+                self._write_files(tmpdir, files)
+
+                etapas = {}
+                marcas = {MARCA_CODIGO: time.monotonic()}
+                if language == 'java':
+                    compile_start = time.perf_counter()
+                    compile_error = self._compile_java(tmpdir)
+                    etapas[ETAPA_COMPILACION] = time.perf_counter() - compile_start
+                    marcas[MARCA_COMPILADA] = time.monotonic()
+                    if compile_error is not None:
+                        return {**compile_error, 'etapas': etapas, 'marcas': marcas}
+
+                result = self._run_process(
+                    command=self._build_command(language, memory_limit),
+                    workdir=tmpdir,
+                    language=language,
+                    time_limit=time_limit,
+                    memory_limit=memory_limit,
+                    env=env,
+                    stream=self._open_stream(on_test, output_limit)
+                )
+                result['etapas'] = {**etapas, **result['etapas']}
+                result['marcas'] = {**marcas, **result['marcas']}
+                return result
+
+            except Exception as e:
+                return {
+                    'success': False,
+                    'stdout': '',
+                    'stderr': str(e),
+                    'exit_code': -1,
+                    'tiempo_ejecucion': 0,
+                    'error': str(e),
+                    'veredicto': 'SE'
+                }
+
+    def _build_command(self, language: str, memory_limit: int) -> List[str]:
+        """Comando del lenguaje (JVM y V8 limitan su heap con sus flags)"""
+        if language == 'python':
+            return [self.python, '__judge__.py']
+        if language == 'javascript':
+            return [self.node, f'--max-old-space-size={memory_limit}', '__judge__.js']
+        return [self.java, f'-Xmx{memory_limit}m', '-cp', 'classes', '__JudgeRunner']
+
+    def _compile_java(self, workdir: str) -> Optional[Dict[str, Any]]:
+        """Compila solución y harness; retorna el resultado CE si falla"""
+        result = subprocess.run(
+            [self.javac, '-encoding', 'UTF-8', '-d', 'classes', 'Solution.java', '__JudgeRunner.java'],
+            cwd=workdir,
+            capture_output=True,
+            timeout=getattr(settings, 'JUDGE_JAVA_COMPILE_TIMEOUT', 30)
+        )
+        if result.returncode == 0:
+            return None
+        stderr = result.stderr.decode('utf-8', errors='replace')
+        return {
+            'success': False,
+            'stdout': '',
+            'stderr': stderr,
+            'exit_code': result.returncode,
+            'tiempo_ejecucion': 0,
+            'error': 'Error de compilación',
+            'veredicto': 'CE'
+        }
+
+    def _run_process(
+        self,
+        command: List[str],
+        workdir: str,
+        language: str,
+        time_limit: float,
+        memory_limit: int,
+        env: Optional[Dict[str, str]],
+        stream: OutputStream
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta el proceso leyendo su salida en streaming
+        El consumo se toma del rusage del proceso (wait4)
+        """
+        process_env = {
+            'PATH': os.environ.get('PATH', '/usr/bin:/bin'),
+            'HOME': workdir,
+            'LANG': 'C.UTF-8',
+            **(env or {})
+        }
+
+        start_time = time.time()
+        startup_start = time.perf_counter()
+        process = subprocess.Popen(
+            command,
+            cwd=workdir,
+            env=process_env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True  # Grupo propio para matar también a los hijos
+        )
+        try:
+            self._apply_limits(process.pid, language, time_limit, memory_limit)
+        except ProcessLookupError:
+            pass  # Ya terminó
+        except OSError:
+            self._kill_process(process)
+            process.wait()
+            raise
+        startup_time = time.perf_counter() - startup_start
+        marcas = {MARCA_SANDBOX: time.monotonic()}
+        killer = threading.Timer(time_limit + 1, self._kill_process, args=(process,))
+        killer.daemon = True
+        killer.start()
+        finished = threading.Event()
+        memory_exceeded = threading.Event()
+        watcher = threading.Thread(
+            target=self._watch_memory,
+            args=(process, memory_limit, finished, memory_exceeded),
+            daemon=True
+        )
+        watcher.start()
+        stderr_reader = threading.Thread(
+            target=self._read_stderr,
+            args=(process, stream),
+            daemon=True
+        )
+        stderr_reader.start()
+
+        try:
+            for chunk in iter(lambda: process.stdout.read1(READ_CHUNK_SIZE), b''):
+                if stream.feed_stdout(chunk):
+                    self._kill_process(process)
+                    break
+            _, status, rusage = os.wait4(process.pid, 0)
+        finally:
+            killer.cancel()
+            finished.set()
+        marcas[MARCA_EJECUTADA] = time.monotonic()
+
+        execution_time = time.time() - start_time
+        process.returncode = os.waitstatus_to_exitcode(status)
+        stderr_reader.join(timeout=1)
+        process.stdout.close()
+        process.stderr.close()
+        stream.close()
+
+        # Señales como en Docker (128 + número de señal)
+        exit_code = process.returncode
+        if exit_code < 0:
+            exit_code = 128 - exit_code
+
+        usage = {
+            'tiempo_cpu': rusage.ru_utime + rusage.ru_stime,
+            'memoria_usada': -(-rusage.ru_maxrss // 1024),  # KB → MB, redondeo hacia arriba
+            'oom_killed': memory_exceeded.is_set()
+        }
+        result = self._build_result(stream, exit_code, execution_time, time_limit, usage)
+        marcas[MARCA_LOGS] = time.monotonic()
+        result['etapas'] = {ETAPA_ARRANQUE: startup_time}
+        result['marcas'] = marcas
+        return result
+
+    def _read_stderr(self, process: subprocess.Popen, stream: OutputStream):
+        """Lee stderr de a fragmentos (la salida acumulada está acotada)"""
+        for chunk in iter(lambda: process.stderr.read1(READ_CHUNK_SIZE), b''):
+            if stream.feed_stderr(chunk):
+                self._kill_process(process)
+                break
+
+    @staticmethod
+    def _apply_limits(pid: int, language: str, time_limit: float, memory_limit: int):
+        """Límites del proceso hijo (se aplican desde el padre con prlimit)"""
+        cpu_seconds = int(time_limit) + 1
+        resource.prlimit(pid, resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+        resource.prlimit(pid, resource.RLIMIT_FSIZE, (MAX_FILE_SIZE, MAX_FILE_SIZE))
+        resource.prlimit(pid, resource.RLIMIT_CORE, (0, 0))
+        if language == 'python':
+            memory = memory_limit * 1024 * 1024
+            resource.prlimit(pid, resource.RLIMIT_AS, (memory, memory))
+        else:
+            # La JVM y V8 reservan mucho espacio virtual sin usarlo: se acota
+            # la memoria escribible, con margen para la memoria nativa
+            memory = (memory_limit + NATIVE_HEADROOM_MB) * 1024 * 1024
+            resource.prlimit(pid, resource.RLIMIT_DATA, (memory, memory))
+
+    def _watch_memory(
+        self,
+        process: subprocess.Popen,
+        memory_limit: int,
+        finished: threading.Event,
+        exceeded: threading.Event
+    ):
+        """
+        Sondea la memoria residente del proceso y lo mata si supera el
+        límite (como el OOM killer del cgroup en Docker: veredicto MLE)
+        """
+        limit_kb = memory_limit * 1024
+        while not finished.wait(MEMORY_POLL_INTERVAL):
+            if self._rss_kb(process.pid) > limit_kb:
+                exceeded.set()
+                self._kill_process(process)
+                return
+
+    @staticmethod
+    def _rss_kb(pid: int) -> int:
+        """Memoria residente actual del proceso (KB; 0 si ya terminó)"""
+        try:
+            with open(f'/proc/{pid}/status', 'rb') as f:
+                for line in f:
+                    if line.startswith(b'VmRSS:'):
+                        return int(line.split()[1])
+        except (OSError, ValueError):
+            pass
+        return 0
+
+    @staticmethod
+    def _kill_process(process: subprocess.Popen):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
@@ -0,0 +1,96 @@
+"""
+Management command que ejecuta el benchmark de carga del juez
+Ejecutar: python manage.py judge_benchmark --submissions 60 --rate 10 --output bench.json
+Sin Docker (o con --executor simulated) usa el ejecutor simulado
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from judge.benchmark import (
+    KINDS, LANGUAGES, BenchmarkExecutor, format_report, generate_submissions,
+    run_benchmark, write_report
+)
+from judge.executors import get_executor
+from judge.runner import JudgeRunner
+
+EXECUTORS = {
+    'docker': 'judge.docker_executor.DockerExecutor',
+    'local': 'judge.local_executor.LocalExecutor',
+}
+
+
+class Command(BaseCommand):
+    help = 'Mide throughput y latencias del juez con una mezcla de submissions sintéticas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--executor',
+            default='auto',
+            help='auto (el configurado; el simulado si Docker no está disponible), '
+                 'docker, local, simulated o la ruta a una clase'
+        )
+        parser.add_argument('--submissions', type=int, default=60, help='Cantidad de submissions')
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=0.0,
+            help='Submissions por segundo (0 = todas de entrada)'
+        )
+        parser.add_argument('--concurrency', type=int, default=4, help='Evaluaciones simultáneas')
+        parser.add_argument('--languages', nargs='+', choices=LANGUAGES, default=list(LANGUAGES))
+        parser.add_argument('--kinds', nargs='+', choices=KINDS, default=list(KINDS))
+        parser.add_argument('--time-limit', type=float, default=1.0, help='Límite de tiempo por test')
+        parser.add_argument('--memory-limit', type=int, default=128, help='Límite de memoria (MB)')
+        parser.add_argument(
+            '--test-time',
+            type=float,
+            default=None,
+            help='Ejecutor simulado: segundos que "tarda" cada test (se duermen)'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Semilla del orden de las submissions')
+        parser.add_argument('--output', default=None, help='Archivo JSON del reporte (por defecto stdout)')
+
+    def handle(self, *args, **options):
+        executor = self._get_executor(options)
+        submissions = generate_submissions(
+            options['submissions'], options['languages'], options['kinds'], options['seed']
+        )
+        report = run_benchmark(
+            JudgeRunner(executor=executor),
+            submissions,
+            rate=options['rate'],
+            concurrency=options['concurrency'],
+            time_limit=options['time_limit'],
+            memory_limit=options['memory_limit']
+        )
+        report['config']['seed'] = options['seed']
+
+        if options['output']:
+            write_report(report, options['output'])
+            self.stdout.write(format_report(report))
+            self.stdout.write(self.style.SUCCESS(f"Reporte guardado en {options['output']}"))
+        else:
+            self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+
+    def _get_executor(self, options):
+        name = options['executor']
+        if name == 'simulated':
+            return self._simulated(options)
+        if name == 'auto':
+            try:
+                return get_executor()
+            except RuntimeError as e:
+                self.stderr.write(f'{e}; se usa el ejecutor simulado')
+                return self._simulated(options)
+        try:
+            return import_string(EXECUTORS.get(name, name))()
+        except (ImportError, RuntimeError) as e:
+            raise CommandError(f'No se pudo crear el ejecutor {name}: {e}')
+
+    @staticmethod
+    def _simulated(options):
+        if options['test_time'] is None:
+            return BenchmarkExecutor()
+        return BenchmarkExecutor(test_time=options['test_time'], sleep=True)
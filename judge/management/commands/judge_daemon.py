@@ -0,0 +1,56 @@
+"""
+Management command que inicia el daemon del juez automático
+Ejecutar: python manage.py judge_daemon
+Probe de salud: python manage.py judge_daemon --health (sale con 1 si falla)
+"""
+import json
+import logging
+import sys
+
+from django.core.management.base import BaseCommand
+
+from judge.daemon import JudgeDaemon, get_socket_path, send_command
+
+
+class Command(BaseCommand):
+    help = 'Inicia el servicio de evaluación de larga duración del juez automático'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket',
+            default=None,
+            help='Ruta del socket Unix (por defecto JUDGE_DAEMON_SOCKET)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Submissions evaluadas en paralelo (por defecto JUDGE_WORKERS)'
+        )
+        parser.add_argument(
+            '--health',
+            action='store_true',
+            help='Consulta el estado de un daemon en ejecución y termina'
+        )
+
+    def handle(self, *args, **options):
+        socket_path = options['socket'] or get_socket_path()
+
+        if options['health']:
+            try:
+                status = send_command({'cmd': 'health'}, socket_path)
+            except (OSError, ValueError) as e:
+                self.stderr.write(self.style.ERROR(f'Daemon no disponible: {e}'))
+                sys.exit(1)
+            self.stdout.write(json.dumps(status, indent=2))
+            if status.get('status') != 'ok':
+                sys.exit(1)
+            return
+
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+        )
+        daemon = JudgeDaemon(socket_path=socket_path, workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(f'Daemon del juez escuchando en {socket_path}'))
+        daemon.serve_forever()
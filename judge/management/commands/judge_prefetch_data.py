@@ -0,0 +1,43 @@
+"""
+Management command que descarga al caché del nodo los archivos de datos de
+los retos (ver judge/data_cache.py)
+Ejecutar: python manage.py judge_prefetch_data [--torneo 3] [--verify]
+Sin --torneo se descargan los de todos los torneos en curso
+"""
+from django.core.management.base import BaseCommand
+
+from judge.data_cache import get_data_cache, prefetch_torneo, running_torneos
+
+
+class Command(BaseCommand):
+    help = 'Descarga al caché local los archivos de datos de los retos de un torneo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--torneo',
+            type=int,
+            action='append',
+            default=None,
+            help='Torneo a preparar (se puede repetir; por defecto los torneos en curso)'
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Recalcular la huella de los archivos ya descargados'
+        )
+
+    def handle(self, *args, **options):
+        torneos = options['torneo'] or running_torneos()
+        if not torneos:
+            self.stdout.write('No hay torneos en curso')
+            return
+
+        for torneo_id in torneos:
+            ready = prefetch_torneo(torneo_id, verify=options['verify'])
+            self.stdout.write(f'Torneo #{torneo_id}: {ready} archivos de datos listos')
+
+        cache = get_data_cache()
+        total = sum(size for _, size, _ in cache.entries())
+        self.stdout.write(self.style.SUCCESS(
+            f'Caché {cache.root}: {total / (1024 * 1024):.1f} MB de {cache.max_bytes / (1024 * 1024):.0f} MB'
+        ))
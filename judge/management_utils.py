@@ -5,6 +5,68 @@ Ejecutar con: python manage.py shell < judge/utils.py
 O importar funciones individualmente
 """
 
+# Tests ocultos del reto de ejemplo (suma de dos números)
+SAMPLE_TESTS = {
+    "python": [
+        {
+            "name": "Test Básico 1",
+            "function_call": {
+                "name": "suma",
+                "args": [2, 3]
+            },
+            "expected": "5"
+        },
+        {
+            "name": "Test Básico 2",
+            "function_call": {
+                "name": "suma",
+                "args": [10, 20]
+            },
+            "expected": "30"
+        },
+        {
+            "name": "Test con Negativos",
+            "function_call": {
+                "name": "suma",
+                "args": [-5, 5]
+            },
+            "expected": "0"
+        },
+        {
+            "name": "Test con Grandes Números",
+            "function_call": {
+                "name": "suma",
+                "args": [1000000, 2000000]
+            },
+            "expected": "3000000"
+        }
+    ],
+    "javascript": [
+        {
+            "name": "Test Básico 1",
+            "function_call": {
+                "name": "suma",
+                "args": [2, 3]
+            },
+            "expected": "5"
+        },
+        {
+            "name": "Test Básico 2",
+            "function_call": {
+                "name": "suma",
+                "args": [10, 20]
+            },
+            "expected": "30"
+        }
+    ]
+}
+
+SAMPLE_SOLUTIONS = {
+    "python": "def suma(a, b):\n    return a + b\n",
+    "javascript": "function suma(a, b) {\n    return a + b;\n}\n",
+}
+
+
 def setup_docker_images():
     """
     Descarga todas las imágenes Docker necesarias para el juez
@@ -19,6 +81,97 @@ def setup_docker_images():
     print("\n✓ Configuración completada")
 
 
+def warm_up_pool():
+    """
+    Pre-inicia los contenedores del pool del juez, el servicio de
+    compilación Java y el archivo CDS del harness
+    Conviene ejecutarlo antes del inicio de un torneo
+    """
+    from judge.docker_executor import DockerExecutor
+    
+    print("=== Precalentando Pool de Contenedores ===\n")
+    
+    executor = DockerExecutor()
+    if executor.pool is None:
+        print("El pool está deshabilitado (JUDGE_POOL_ENABLED=False)")
+        return
+    
+    executor.warm_up()
+    for lang in executor.IMAGES:
+        print(f"  ✓ {lang}: {executor.pool.size} contenedores listos")
+    print("  ✓ java: servicio de compilación y archivo CDS listos")
+    
+    print("\n✓ Pool listo")
+
+
+def benchmark_startup(runs=20, languages=('python', 'javascript')):
+    """
+    Compara la latencia de evaluación del reto de ejemplo (suma) con
+    contenedores en frío, con contenedores precalentados del pool y con el
+    zygote del lenguaje en el pool
+    """
+    import statistics
+    import time
+    from judge.container_pool import ContainerPool
+    from judge.docker_executor import DockerExecutor
+    from judge.runner import JudgeRunner
+    
+    print("=== Benchmark de Arranque ===")
+    
+    executor = DockerExecutor()
+    runner = JudgeRunner(executor=executor)
+    shared_pool = executor.pool
+    
+    try:
+        for language in languages:
+            print(f"\n{language}:")
+            modos = [
+                ("Frío (sin pool)", None),
+                ("Contenedor precalentado", ()),
+                ("Zygote", (language,)),
+            ]
+            for nombre, zygote in modos:
+                pool = None
+                if zygote is not None:
+                    pool = ContainerPool(
+                        executor.client,
+                        {language: executor.IMAGES[language]},
+                        size=1,
+                        cpu_quota=executor.CPU_QUOTA,
+                        cpu_period=executor.CPU_PERIOD,
+                        zygote=zygote
+                    )
+                    pool.warm_up()
+                executor.pool = pool
+                
+                tiempos = []
+                veredictos = set()
+                try:
+                    for _ in range(runs):
+                        inicio = time.perf_counter()
+                        resultado = runner.evaluate_submission(
+                            user_code=SAMPLE_SOLUTIONS[language],
+                            language=language,
+                            tests=SAMPLE_TESTS[language],
+                            time_limit=5.0,
+                            memory_limit=256
+                        )
+                        tiempos.append((time.perf_counter() - inicio) * 1000)
+                        veredictos.add(resultado['veredicto'])
+                finally:
+                    if pool is not None:
+                        pool.shutdown()
+                
+                tiempos.sort()
+                p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+                print(f"  {nombre}:")
+                print(f"    Mediana: {statistics.median(tiempos):.1f} ms")
+                print(f"    p95: {p95:.1f} ms")
+                print(f"    Veredictos: {', '.join(sorted(veredictos))}")
+    finally:
+        executor.pool = shared_pool
+
+
 def create_sample_challenge():
     """
     Crea un reto de ejemplo con tests configurados
@@ -43,60 +196,7 @@ def create_sample_challenge():
         print("Warning: No hay Jefe del Capitolio. Crear reto sin creador.")
     
     # Tests ocultos de ejemplo
-    tests_ocultos = {
-        "python": [
-            {
-                "name": "Test Básico 1",
-                "function_call": {
-                    "name": "suma",
-                    "args": [2, 3]
-                },
-                "expected": "5"
-            },
-            {
-                "name": "Test Básico 2",
-                "function_call": {
-                    "name": "suma",
-                    "args": [10, 20]
-                },
-                "expected": "30"
-            },
-            {
-                "name": "Test con Negativos",
-                "function_call": {
-                    "name": "suma",
-                    "args": [-5, 5]
-                },
-                "expected": "0"
-            },
-            {
-                "name": "Test con Grandes Números",
-                "function_call": {
-                    "name": "suma",
-                    "args": [1000000, 2000000]
-                },
-                "expected": "3000000"
-            }
-        ],
-        "javascript": [
-            {
-                "name": "Test Básico 1",
-                "function_call": {
-                    "name": "suma",
-                    "args": [2, 3]
-                },
-                "expected": "5"
-            },
-            {
-                "name": "Test Básico 2",
-                "function_call": {
-                    "name": "suma",
-                    "args": [10, 20]
-                },
-                "expected": "30"
-            }
-        ]
-    }
+    tests_ocultos = SAMPLE_TESTS
     
     # Crear reto
     reto = Reto.objects.create(
@@ -355,6 +455,8 @@ def menu():
         print("4. Ver estadísticas")
         print("5. Verificar estado de Docker")
         print("6. Limpiar submissions")
+        print("7. Precalentar pool de contenedores")
+        print("8. Benchmark de arranque (Python y JavaScript)")
         print("0. Salir")
         
         opcion = input("\nSelecciona una opción: ")
@@ -371,6 +473,10 @@ def menu():
             check_docker_status()
         elif opcion == '6':
             cleanup_submissions()
+        elif opcion == '7':
+            warm_up_pool()
+        elif opcion == '8':
+            benchmark_startup()
         elif opcion == '0':
             print("\n¡Hasta luego!")
             break
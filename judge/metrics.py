@@ -0,0 +1,280 @@
+"""
+Métricas del juez en formato de exposición de Prometheus
+Registro en memoria del proceso: contadores, gauges e histogramas con
+etiquetas, actualizados al terminar cada evaluación (sin consultas a la BD).
+La vista `judge:metrics` arma la exposición: las métricas de evaluación del
+proceso que evalúa (este proceso, o el daemon con JUDGE_DISPATCH='daemon',
+que las envía por su socket), las del proceso web (caché de veredictos) y
+la profundidad de la cola (un COUNT indexado). Pensado para un scrape cada
+pocos segundos durante un torneo.
+"""
+import threading
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from django.conf import settings
+
+from .timing import ETAPA_ARRANQUE
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Límites superiores de los buckets de los histogramas de latencia (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Cachés con contador de aciertos
+CACHE_VEREDICTOS = 'veredictos'
+CACHE_COMPILACION_JAVA = 'compilacion_java'
+CACHE_PAQUETES_TESTS = 'paquetes_tests'
+CACHE_DATOS = 'archivos_datos'
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class Metric:
+    """Métrica con etiquetas; cada combinación de valores es una serie"""
+
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} requiere las etiquetas {self.labelnames}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+    def collect(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'type': self.type,
+            'help': self.documentation,
+            'samples': self.samples()
+        }
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Histogram(Metric):
+    """Distribución en buckets acumulativos, más la suma y la cantidad"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in series:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append((f'{self.name}_bucket', {**labels, 'le': _format_value(bound)}, cumulative))
+            samples.append((f'{self.name}_sum', labels, total))
+            samples.append((f'{self.name}_count', labels, cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def collect(self) -> List[Dict[str, Any]]:
+        return [metric.collect() for metric in self._metrics]
+
+
+REGISTRY = Registry()
+
+evaluations = REGISTRY.register(Histogram(
+    'judge_evaluation_seconds',
+    'Duración de la evaluación completa de una submission',
+    ['language']
+))
+stages = REGISTRY.register(Histogram(
+    'judge_stage_seconds',
+    'Duración de cada etapa de la evaluación (ver timing.py)',
+    ['language', 'stage']
+))
+sandbox_starts = REGISTRY.register(Histogram(
+    'judge_sandbox_start_seconds',
+    'Arranque del sandbox: crear e iniciar el contenedor o tomarlo del pool',
+    ['language']
+))
+verdicts = REGISTRY.register(Counter(
+    'judge_verdicts_total',
+    'Veredictos de las submissions evaluadas',
+    ['language', 'reto', 'veredicto']
+))
+cache_lookups = REGISTRY.register(Counter(
+    'judge_cache_lookups_total',
+    'Consultas a los cachés del juez por resultado (hit o miss)',
+    ['cache', 'result']
+))
+
+
+def observe_evaluation(language: str, reto_id: Any, resultado: Dict[str, Any], seconds: float):
+    """Registra una evaluación terminada: veredicto, etapas y caché de Java"""
+    verdicts.inc(language=language, reto=reto_id, veredicto=resultado.get('veredicto', 'SE'))
+    evaluations.observe(seconds, language=language)
+    for stage, stage_seconds in (resultado.get('etapas') or {}).items():
+        stages.observe(stage_seconds, language=language, stage=stage)
+        if stage == ETAPA_ARRANQUE:
+            sandbox_starts.observe(stage_seconds, language=language)
+    cached = (resultado.get('detalles') or {}).get('compilacion_cacheada')
+    if cached is not None:
+        observe_cache(CACHE_COMPILACION_JAVA, cached)
+
+
+def observe_cache(cache: str, hit: bool):
+    cache_lookups.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def process_families() -> List[Dict[str, Any]]:
+    """Estado del proceso evaluador: slots de sandbox en uso y en espera"""
+    from .admission import get_sandbox_slots
+    stats = get_sandbox_slots().stats()
+    return [
+        _gauge('judge_sandboxes_in_flight', 'Sandboxes ejecutándose', stats['en_uso']),
+        _gauge('judge_sandboxes_waiting', 'Ejecuciones esperando un slot de sandbox', stats['en_espera']),
+        _gauge('judge_sandboxes_capacity', 'Slots de sandbox (JUDGE_MAX_SANDBOXES)', stats['capacidad']),
+    ]
+
+
+def evaluator_families() -> List[Dict[str, Any]]:
+    """Métricas del proceso evaluador (lo que el daemon envía por su socket)"""
+    return REGISTRY.collect() + process_families()
+
+
+def exposition() -> str:
+    """
+    Texto de la exposición completa
+    Con JUDGE_DISPATCH='daemon' las métricas de evaluación se piden al
+    daemon; si no responde se indica con judge_daemon_up 0
+    """
+    from .models import Submission
+    families = [_gauge(
+        'judge_queue_depth',
+        'Submissions pendientes de evaluación',
+        Submission.objects.filter(veredicto='PE').count()
+    )]
+
+    if getattr(settings, 'JUDGE_DISPATCH', 'thread') == 'daemon':
+        from .daemon import send_command
+        try:
+            remote = send_command({'cmd': 'metrics'}).get('metrics') or []
+        except (OSError, ValueError):
+            remote = []
+        families.append(_gauge('judge_daemon_up', 'El daemon del juez respondió', 1 if remote else 0))
+        families += merge(REGISTRY.collect(), remote)
+    else:
+        families += evaluator_families()
+
+    families.append(_cache_hit_ratio(families))
+    return render(families)
+
+
+def merge(*collections: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Combina las métricas de varios procesos: las series con el mismo nombre
+    y etiquetas se suman
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for families in collections:
+        for family in families:
+            target = merged.setdefault(family['name'], {**family, 'samples': []})
+            index = {
+                (name, tuple(sorted(labels.items()))): i
+                for i, (name, labels, _) in enumerate(target['samples'])
+            }
+            for name, labels, value in family['samples']:
+                i = index.get((name, tuple(sorted(labels.items()))))
+                if i is None:
+                    target['samples'].append((name, labels, value))
+                else:
+                    target['samples'][i] = (name, labels, target['samples'][i][2] + value)
+    return list(merged.values())
+
+
+def render(families: Iterable[Dict[str, Any]]) -> str:
+    lines = []
+    for family in families:
+        lines.append(f"# HELP {family['name']} {_escape(family['help'], quotes=False)}")
+        lines.append(f"# TYPE {family['name']} {family['type']}")
+        for name, labels, value in family['samples']:
+            if labels:
+                rendered = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                name = f'{name}{{{rendered}}}'
+            lines.append(f'{name} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def _cache_hit_ratio(families: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Proporción de aciertos de cada caché a partir de sus contadores"""
+    totals: Dict[str, Dict[str, float]] = {}
+    for family in families:
+        if family['name'] == cache_lookups.name:
+            for _, labels, value in family['samples']:
+                cache = totals.setdefault(labels['cache'], {'hit': 0.0, 'miss': 0.0})
+                cache[labels['result']] = cache.get(labels['result'], 0.0) + value
+    return {
+        'name': 'judge_cache_hit_ratio',
+        'type': 'gauge',
+        'help': 'Proporción de aciertos de cada caché desde que inició el proceso',
+        'samples': [
+            ('judge_cache_hit_ratio', {'cache': cache}, counts['hit'] / (counts['hit'] + counts['miss']))
+            for cache, counts in sorted(totals.items())
+            if counts['hit'] + counts['miss'] > 0
+        ]
+    }
+
+
+def _gauge(name: str, documentation: str, value: float) -> Dict[str, Any]:
+    return {'name': name, 'type': 'gauge', 'help': documentation, 'samples': [(name, {}, value)]}
+
+
+def _escape(value: str, quotes: bool = True) -> str:
+    value = value.replace('\\', '\\\\').replace('\n', '\\n')
+    return value.replace('"', '\\"') if quotes else value
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0002_testcaseresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='huella',
+            field=models.CharField(blank=True, db_index=True, help_text='Submissions con la misma huella comparten veredicto', max_length=64, verbose_name='Huella de Evaluación'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:06
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0003_submission_huella'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='casos_evaluados',
+            field=models.IntegerField(default=0, help_text='Progreso de la evaluación en curso', validators=[django.core.validators.MinValueValidator(0)], verbose_name='Casos de Prueba Evaluados'),
+        ),
+    ]
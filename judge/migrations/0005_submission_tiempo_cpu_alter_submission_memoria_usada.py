@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:09
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0004_submission_casos_evaluados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='tiempo_cpu',
+            field=models.FloatField(blank=True, help_text='Tiempo de CPU consumido por la ejecución (cgroup del sandbox)', null=True, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Tiempo de CPU (segundos)'),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='memoria_usada',
+            field=models.IntegerField(blank=True, help_text='Pico de memoria de la ejecución', null=True, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Memoria Usada (MB)'),
+        ),
+    ]
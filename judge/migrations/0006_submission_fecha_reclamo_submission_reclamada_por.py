@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0005_submission_tiempo_cpu_alter_submission_memoria_usada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='fecha_reclamo',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Reclamo'),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='reclamada_por',
+            field=models.CharField(blank=True, help_text='Worker del juez que está evaluando la submission', max_length=100, verbose_name='Reclamada por'),
+        ),
+    ]
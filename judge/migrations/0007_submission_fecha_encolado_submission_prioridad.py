@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0006_submission_fecha_reclamo_submission_reclamada_por'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='fecha_encolado',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Ingreso a la cola (se renueva al re-evaluar)', verbose_name='Fecha de Encolado'),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='prioridad',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Concurso en vivo'), (1, 'Ejemplos'), (2, 'Re-evaluación'), (3, 'Prueba de administración')], default=0, help_text='Clase de prioridad en la cola de evaluación', verbose_name='Prioridad'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0007_submission_fecha_encolado_submission_prioridad'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='submission',
+            name='veredicto',
+            field=models.CharField(choices=[('AC', 'Accepted'), ('WA', 'Wrong Answer'), ('TLE', 'Time Limit Exceeded'), ('MLE', 'Memory Limit Exceeded'), ('OLE', 'Output Limit Exceeded'), ('RE', 'Runtime Error'), ('CE', 'Compilation Error'), ('SE', 'System Error'), ('PE', 'Pending')], default='PE', max_length=3, verbose_name='Veredicto'),
+        ),
+    ]
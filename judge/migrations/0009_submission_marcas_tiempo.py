@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0008_alter_submission_veredicto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='marcas_tiempo',
+            field=models.JSONField(blank=True, default=dict, help_text='Milisegundos desde el encolado hasta cada etapa de la evaluación (ver judge/timing.py)', verbose_name='Cronología'),
+        ),
+    ]
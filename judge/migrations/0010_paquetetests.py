@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0009_submission_marcas_tiempo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaqueteTests',
+            fields=[
+                ('huella', models.CharField(help_text='SHA-256 del JSON canónico de los tests', max_length=64, primary_key=True, serialize=False, verbose_name='Huella')),
+                ('contenido', models.BinaryField(help_text='Tests por lenguaje en JSON canónico comprimido con zlib', verbose_name='Contenido')),
+                ('tamano', models.PositiveIntegerField(default=0, help_text='Tamaño del JSON sin comprimir', verbose_name='Tamaño (bytes)')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+            ],
+            options={
+                'verbose_name': 'Paquete de Tests',
+                'verbose_name_plural': 'Paquetes de Tests',
+            },
+        ),
+    ]
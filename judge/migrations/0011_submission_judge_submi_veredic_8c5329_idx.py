@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arena', '0009_reto_archivo_datos_huella'),
+        ('capitol', '0002_personaje_distrito_asignado_and_more'),
+        ('judge', '0010_paquetetests'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['veredicto', 'prioridad', 'tributo', 'fecha_encolado'], name='judge_submi_veredic_8c5329_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from capitol.models import TributoInfo
 from arena.models import Reto
 
@@ -14,12 +15,34 @@ class Submission(models.Model):
         ('WA', 'Wrong Answer'),  # Output incorrecto
         ('TLE', 'Time Limit Exceeded'),  # Excedió el tiempo límite
         ('MLE', 'Memory Limit Exceeded'),  # Excedió el límite de memoria
+        ('OLE', 'Output Limit Exceeded'),  # Excedió el límite de salida
         ('RE', 'Runtime Error'),  # Error durante la ejecución
         ('CE', 'Compilation Error'),  # Error de compilación (Java)
         ('SE', 'System Error'),  # Error del sistema de evaluación
         ('PE', 'Pending'),  # Aún no evaluado
     ]
     
+    # Clases de prioridad de la cola (menor valor = se evalúa antes)
+    PRIORIDAD_CONCURSO = 0
+    PRIORIDAD_EJEMPLO = 1
+    PRIORIDAD_REJUICIO = 2
+    PRIORIDAD_ADMIN = 3
+    
+    PRIORIDAD_CHOICES = [
+        (PRIORIDAD_CONCURSO, 'Concurso en vivo'),  # Envíos de tributos durante el torneo
+        (PRIORIDAD_EJEMPLO, 'Ejemplos'),  # Ejecuciones contra casos de ejemplo
+        (PRIORIDAD_REJUICIO, 'Re-evaluación'),  # Re-evaluación de submissions existentes
+        (PRIORIDAD_ADMIN, 'Prueba de administración'),  # Lotes de prueba de mentores/administradores
+    ]
+    
+    # Nombres cortos para los logs del planificador
+    PRIORIDAD_NOMBRES = {
+        PRIORIDAD_CONCURSO: 'concurso',
+        PRIORIDAD_EJEMPLO: 'ejemplo',
+        PRIORIDAD_REJUICIO: 'rejuicio',
+        PRIORIDAD_ADMIN: 'admin',
+    }
+    
     LENGUAJE_CHOICES = [
         ('python', 'Python'),
         ('java', 'Java'),
@@ -73,6 +96,12 @@ class Submission(models.Model):
         validators=[MinValueValidator(0)],
         verbose_name='Casos de Prueba Totales'
     )
+    casos_evaluados = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)],
+        verbose_name='Casos de Prueba Evaluados',
+        help_text='Progreso de la evaluación en curso'
+    )
     
     # Métricas de ejecución
     tiempo_ejecucion = models.FloatField(
@@ -82,11 +111,19 @@ class Submission(models.Model):
         verbose_name='Tiempo de Ejecución (segundos)',
         help_text='Tiempo total de ejecución de todos los tests'
     )
+    tiempo_cpu = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0)],
+        verbose_name='Tiempo de CPU (segundos)',
+        help_text='Tiempo de CPU consumido por la ejecución (cgroup del sandbox)'
+    )
     memoria_usada = models.IntegerField(
         null=True,
         blank=True,
         validators=[MinValueValidator(0)],
-        verbose_name='Memoria Usada (MB)'
+        verbose_name='Memoria Usada (MB)',
+        help_text='Pico de memoria de la ejecución'
     )
     
     # Salidas de ejecución
@@ -109,6 +146,45 @@ class Submission(models.Model):
         help_text='Resultados detallados de cada caso de prueba (no visible para tributos)'
     )
     
+    # Caché de veredictos (hash de código, lenguaje, tests, límites y harness)
+    huella = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        verbose_name='Huella de Evaluación',
+        help_text='Submissions con la misma huella comparten veredicto'
+    )
+    
+    # Cola de evaluación (clase de prioridad y worker que tomó la submission)
+    prioridad = models.PositiveSmallIntegerField(
+        choices=PRIORIDAD_CHOICES,
+        default=PRIORIDAD_CONCURSO,
+        verbose_name='Prioridad',
+        help_text='Clase de prioridad en la cola de evaluación'
+    )
+    fecha_encolado = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Fecha de Encolado',
+        help_text='Ingreso a la cola (se renueva al re-evaluar)'
+    )
+    reclamada_por = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Reclamada por',
+        help_text='Worker del juez que está evaluando la submission'
+    )
+    fecha_reclamo = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de Reclamo'
+    )
+    marcas_tiempo = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Cronología',
+        help_text='Milisegundos desde el encolado hasta cada etapa de la evaluación (ver judge/timing.py)'
+    )
+    
     # Fechas
     fecha_envio = models.DateTimeField(
         auto_now_add=True,
@@ -128,6 +204,7 @@ class Submission(models.Model):
             models.Index(fields=['tributo', 'reto']),
             models.Index(fields=['veredicto']),
             models.Index(fields=['fecha_envio']),
+            models.Index(fields=['veredicto', 'prioridad', 'tributo', 'fecha_encolado']),
         ]
     
     def __str__(self):
@@ -226,3 +303,38 @@ class TestCaseResult(models.Model):
     
     def __str__(self):
         return f"Test Result - Submission #{self.submission.id} - Test #{self.test_case.id} ({self.status})"
+
+
+class PaqueteTests(models.Model):
+    """
+    Paquete inmutable de tests ocultos, direccionado por contenido.
+    Guarda los tests de un reto por lenguaje como JSON canónico comprimido;
+    la clave es el SHA-256 de ese JSON, por lo que un paquete nunca cambia y
+    retos con los mismos tests comparten el paquete (ver judge/bundle_store.py).
+    """
+    huella = models.CharField(
+        max_length=64,
+        primary_key=True,
+        verbose_name='Huella',
+        help_text='SHA-256 del JSON canónico de los tests'
+    )
+    contenido = models.BinaryField(
+        verbose_name='Contenido',
+        help_text='Tests por lenguaje en JSON canónico comprimido con zlib'
+    )
+    tamano = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Tamaño (bytes)',
+        help_text='Tamaño del JSON sin comprimir'
+    )
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de Creación'
+    )
+    
+    class Meta:
+        verbose_name = 'Paquete de Tests'
+        verbose_name_plural = 'Paquetes de Tests'
+    
+    def __str__(self):
+        return f"Paquete {self.huella[:12]} ({self.tamano} bytes)"
@@ -1,18 +1,82 @@
 """
 Runner del juez automático
 Orquesta el proceso de evaluación de código:
-1. Combina código del usuario con tests ocultos
-2. Ejecuta en Docker
+1. Prepara la solución, el harness estático y los tests ocultos
+2. Ejecuta en el backend configurado (Docker por defecto)
 3. Analiza resultados
 4. Retorna veredicto y puntuación
 """
+import hashlib
 import json
-import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional
 from django.conf import settings
 
-from .docker_executor import DockerExecutor
+from .admission import get_sandbox_slots
+from .checkers import ERROR_CHECKER, CheckerError, check_record, expected_source
+from .executors import BaseExecutor, get_executor
+from .timing import (
+    ETAPA_ANALISIS, ETAPA_EJECUCION, ETAPA_ESPERA, ETAPA_PREPARACION, MARCA_ANALIZADA, StageTimer
+)
+
+
+# Veredictos ordenados de menor a mayor gravedad (para combinar shards)
+SEVERIDAD_VEREDICTOS = ['AC', 'WA', 'RE', 'TLE', 'OLE', 'MLE', 'CE', 'SE']
+
+TEMPLATES_DIR = Path(__file__).parent / 'templates'
+
+# Nombre del harness dentro del sandbox
+HARNESS_FILENAMES = {
+    'python': '__judge__.py',
+    'java': '__JudgeRunner.java',
+    'javascript': '__judge__.js'
+}
+
+# Archivo con los tests ocultos (un JSON por línea)
+TESTS_FILENAME = 'tests.jsonl'
+
+# Salidas esperadas (un JSON por línea); solo las reciben los ejecutores que
+# corren en el proceso del juez (ver BaseExecutor.IN_PROCESS)
+EXPECTED_FILENAME = 'expected.jsonl'
+
+# Excepciones que el harness reporta cuando la solución agota la memoria
+ERRORES_MEMORIA = ['MemoryError', 'OutOfMemoryError']
+
+# Tipo de error que el harness reporta cuando un test excede su límite de tiempo
+ERROR_TIEMPO = 'TimeLimitExceeded'
+
+# Campos de los tests que solo usa el host (no viajan al sandbox: la solución
+# no debe poder leer las salidas esperadas)
+CAMPOS_SOLO_HOST = ['expected', 'expected_file', 'checker']
+
+
+@lru_cache(maxsize=None)
+def get_harness_version() -> str:
+    """
+    Versión del harness: hash de las plantillas de ejecución
+    Cambia automáticamente si se modifica cualquier plantilla
+    """
+    digest = hashlib.sha256()
+    for template in sorted(p for p in TEMPLATES_DIR.iterdir() if p.is_file()):
+        digest.update(template.name.encode('utf-8'))
+        digest.update(template.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+@lru_cache(maxsize=None)
+def load_template(filename: str) -> str:
+    """
+    Contenido de una plantilla de ejecución
+    Se lee del disco una sola vez por proceso y queda en memoria
+    """
+    template_file = TEMPLATES_DIR / filename
+    if not template_file.exists():
+        raise FileNotFoundError(f'Plantilla no encontrada: {template_file}')
+    return template_file.read_text(encoding='utf-8')
 
 
 class JudgeRunner:
@@ -20,9 +84,9 @@ class JudgeRunner:
     Orquestador principal del sistema de juez automático
     """
     
-    def __init__(self):
-        self.executor = DockerExecutor()
-        self.templates_dir = Path(__file__).parent / 'templates'
+    def __init__(self, executor: Optional[BaseExecutor] = None):
+        self.executor = executor or get_executor()
+        self.templates_dir = TEMPLATES_DIR
     
     def evaluate_submission(
         self,
@@ -30,7 +94,14 @@ class JudgeRunner:
         language: str,
         tests: List[Dict[str, Any]],
         time_limit: float = 5.0,
-        memory_limit: int = 256
+        memory_limit: int = 256,
+        shards: Optional[int] = None,
+        fail_fast: bool = False,
+        on_progress: Optional[Callable[[int], None]] = None,
+        checker: Optional[Dict[str, Any]] = None,
+        output_limit: Optional[int] = None,
+        submission_id: Optional[int] = None,
+        data_dir: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Evalúa una solución enviada por un tributo
@@ -39,11 +110,25 @@ class JudgeRunner:
             user_code: Código fuente del tributo
             language: Lenguaje de programación
             tests: Lista de tests ocultos a ejecutar
-            time_limit: Límite de tiempo por ejecución
+            time_limit: Límite de tiempo (CPU) por test
             memory_limit: Límite de memoria en MB
+            shards: Cantidad de sandboxes en paralelo entre los que se reparten
+                los tests (por defecto JUDGE_TEST_SHARDS)
+            fail_fast: Detener la evaluación en el primer test que falla
+            on_progress: Callback invocado con la cantidad de tests evaluados
+                cada vez que termina uno
+            checker: Checker por defecto con el que se comparan las salidas
+                en el host (ver checkers.py); cada test puede indicar el suyo
+            output_limit: Límite de salida en MB de cada sandbox; si se
+                excede se detiene con veredicto OLE
+            submission_id: Submission evaluada (se pasa al ejecutor)
+            data_dir: Directorio con el archivo de datos del reto (del
+                caché del nodo, ver data_cache.py), montado en cada sandbox
         
         Returns:
             Dict con veredicto, puntos, resultados detallados, stdout, stderr
+            y la duración de cada etapa (etapas) y el instante de cada marca
+            de la cronología (marcas, time.monotonic), ver timing.py
         """
         # Validar lenguaje
         if language not in ['python', 'java', 'javascript']:
@@ -65,28 +150,48 @@ class JudgeRunner:
                 'casos_totales': 0
             }
         
+        if shards is None:
+            shards = getattr(settings, 'JUDGE_TEST_SHARDS', 1)
+        shards = max(1, min(shards, len(tests)))
+        
+        env = {'JUDGE_FAIL_FAST': '1'} if fail_fast else {}
+        on_test = self._make_test_listener(fail_fast, on_progress)
+        timer = StageTimer()
+        
         try:
-            # 1. Combinar código del usuario con plantilla de tests
-            combined_code = self._combine_code_with_tests(
-                user_code=user_code,
-                language=language,
-                tests=tests
-            )
-            
-            # 2. Ejecutar en Docker
-            execution_result = self.executor.execute(
-                code=combined_code,
-                language=language,
-                time_limit=time_limit,
-                memory_limit=memory_limit
-            )
+            # 1 y 2. Preparar los archivos de cada shard y ejecutar
+            if shards == 1:
+                execution_results = [
+                    self._execute_shard(
+                        user_code, language, tests, time_limit, memory_limit, env, on_test,
+                        checker, output_limit, submission_id, timer, data_dir
+                    )
+                ]
+            else:
+                with ThreadPoolExecutor(max_workers=shards) as pool:
+                    futures = [
+                        pool.submit(
+                            self._execute_shard,
+                            user_code, language, shard_tests, time_limit, memory_limit,
+                            env, on_test, checker, output_limit, submission_id, timer,
+                            data_dir
+                        )
+                        for shard_tests in self._split_tests(tests, shards)
+                    ]
+                    execution_results = [future.result() for future in futures]
             
             # 3. Analizar resultados
-            evaluation = self._analyze_results(
-                execution_result=execution_result,
-                total_tests=len(tests)
-            )
+            with timer.stage(ETAPA_ANALISIS):
+                evaluation = self._analyze_results(
+                    execution_results=execution_results,
+                    total_tests=len(tests)
+                )
+            timer.mark(MARCA_ANALIZADA)
+            if fail_fast:
+                evaluation['detalles']['fail_fast'] = True
             
+            evaluation['etapas'] = timer.as_dict()
+            evaluation['marcas'] = timer.marks()
             return evaluation
             
         except Exception as e:
@@ -97,48 +202,200 @@ class JudgeRunner:
                 'casos_pasados': 0,
                 'casos_totales': len(tests),
                 'stdout': '',
-                'stderr': str(e)
+                'stderr': str(e),
+                'etapas': timer.as_dict(),
+                'marcas': timer.marks()
             }
     
-    def _combine_code_with_tests(
+    def _split_tests(
+        self,
+        tests: List[Dict[str, Any]],
+        shards: int
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Divide los tests en `shards` bloques contiguos de tamaño similar
+        Se mantiene el orden original para que los resultados combinados
+        queden en el mismo orden que los tests
+        """
+        base, extra = divmod(len(tests), shards)
+        chunks = []
+        start = 0
+        for i in range(shards):
+            end = start + base + (1 if i < extra else 0)
+            chunks.append(tests[start:end])
+            start = end
+        return chunks
+    
+    def _make_test_listener(
+        self,
+        fail_fast: bool,
+        on_progress: Optional[Callable[[int], None]]
+    ) -> Callable[[Dict[str, Any]], bool]:
+        """
+        Crea el callback que recibe cada resultado de test en streaming
+        Cuenta los tests evaluados entre todos los shards y, en modo
+        fail-fast, indica detener todos los shards ante el primer fallo
+        """
+        lock = threading.Lock()
+        stop = threading.Event()
+        evaluados = 0
+        
+        def on_test(record: Dict[str, Any]) -> bool:
+            nonlocal evaluados
+            with lock:
+                evaluados += 1
+                count = evaluados
+            if on_progress is not None:
+                on_progress(count)
+            if fail_fast and not record.get('passed'):
+                stop.set()
+            return stop.is_set()
+        
+        return on_test
+    
+    def _execute_shard(
         self,
         user_code: str,
         language: str,
-        tests: List[Dict[str, Any]]
-    ) -> str:
+        tests: List[Dict[str, Any]],
+        time_limit: float,
+        memory_limit: int,
+        env: Optional[Dict[str, str]] = None,
+        on_test: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        checker: Optional[Dict[str, Any]] = None,
+        output_limit: Optional[int] = None,
+        submission_id: Optional[int] = None,
+        timer: Optional[StageTimer] = None,
+        data_dir: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Combina el código del usuario con la plantilla de tests
+        Ejecuta un bloque de tests en su propio sandbox
+        
+        Cada resultado que llega del harness se compara en el host con el
+        checker antes de notificarlo (así fail-fast reacciona al veredicto
+        del checker).
+        
+        El harness aplica `time_limit` a cada test (CPU, y tiempo real con
+        JUDGE_WALL_TIME_FACTOR); el sandbox completo tiene N × límite más un
+        margen para el arranque del intérprete. Como mucho corren
+        JUDGE_MAX_SANDBOXES sandboxes a la vez entre todos los procesos.
+        
+        Las etapas (preparación, espera del slot, ejecución y las que
+        reporte el ejecutor) se suman en `timer`, junto con las marcas de la
+        cronología que reporte el ejecutor.
         """
-        # Cargar plantilla del lenguaje
-        template_file = self.templates_dir / self._get_template_filename(language)
+        timer = timer or StageTimer()
+        wall_factor = getattr(settings, 'JUDGE_WALL_TIME_FACTOR', 2.0)
+        margin = getattr(settings, 'JUDGE_TIMEOUT_MARGIN', 2.0)
+        env = {
+            **(env or {}),
+            'JUDGE_TIME_LIMIT': str(time_limit),
+            'JUDGE_WALL_TIME_LIMIT': str(time_limit * wall_factor)
+        }
         
-        if not template_file.exists():
-            raise FileNotFoundError(f'Plantilla no encontrada: {template_file}')
+        with timer.stage(ETAPA_PREPARACION):
+            code = self._prepare_user_code(user_code, language)
+            files = self._get_harness_files(language, tests)
+            if getattr(type(self.executor), 'IN_PROCESS', False):
+                files[EXPECTED_FILENAME] = self._serialize_expected(tests)
         
-        with open(template_file, 'r', encoding='utf-8') as f:
-            template = f.read()
+        # Esperar un slot libre: el límite de tiempo corre desde que arranca
+        wait_start = time.perf_counter()
+        with get_sandbox_slots().slot(), timer.stage(ETAPA_EJECUCION):
+            timer.add(ETAPA_ESPERA, time.perf_counter() - wait_start)
+            execution_result = self.executor.execute(
+                code=code,
+                language=language,
+                time_limit=len(tests) * time_limit + margin,
+                memory_limit=memory_limit,
+                files=files,
+                env=env,
+                on_test=self._make_checker_listener(tests, checker, on_test),
+                output_limit=output_limit,
+                submission_id=submission_id,
+                data_dir=data_dir
+            )
+        timer.merge(execution_result.get('etapas'))
+        timer.merge_marks(execution_result.get('marcas'))
+        execution_result['total_tests'] = len(tests)
+        return execution_result
+    
+    def _make_checker_listener(
+        self,
+        tests: List[Dict[str, Any]],
+        checker: Optional[Dict[str, Any]],
+        on_test: Optional[Callable[[Dict[str, Any]], bool]]
+    ) -> Callable[[Dict[str, Any]], bool]:
+        """
+        Envuelve el callback de un shard para decidir cada test con su
+        checker (el harness emite los resultados en el orden de los tests)
+        """
+        index = 0
         
-        # Preparar tests en formato JSON
-        tests_json = json.dumps(tests, ensure_ascii=False)
+        def on_record(record: Dict[str, Any]) -> bool:
+            nonlocal index
+            if index < len(tests):
+                check_record(record, tests[index], checker)
+            else:
+                # Más registros que tests: no corresponden a ningún test
+                record['passed'] = False
+            index += 1
+            return on_test(record) if on_test is not None else False
         
-        # Para Java, necesitamos procesar diferente
+        return on_record
+    
+    def _prepare_user_code(self, user_code: str, language: str) -> str:
+        """
+        Prepara el archivo de la solución del usuario
+        """
         if language == 'java':
             # Asegurarse de que el código del usuario tiene la clase Solution
             if 'class Solution' not in user_code and 'public class Solution' not in user_code:
                 user_code = f"class Solution {{\n{user_code}\n}}"
-            
-            # Reemplazar marcadores en la plantilla
-            combined = template.replace('{user_code}', user_code)
-            combined = combined.replace('{tests_json}', tests_json)
-            
-            # Dividir en dos archivos: Solution.java y __JudgeRunner.java
-            # Retornamos solo __JudgeRunner.java que importa Solution
-            return combined
-        else:
-            # Para Python y JavaScript, simplemente reemplazar marcadores
-            combined = template.replace('{user_code}', user_code)
-            combined = combined.replace('{tests_json}', tests_json)
-            return combined
+        return user_code
+    
+    def _get_harness_files(
+        self,
+        language: str,
+        tests: List[Dict[str, Any]]
+    ) -> Dict[str, str]:
+        """
+        Archivos que acompañan a la solución en el sandbox
+        
+        El harness es estático (no se modifica por submission, por lo que
+        puede precompilarse) y los tests viajan aparte en tests.jsonl, un
+        JSON por línea, para que el harness los lea de a uno. Las salidas
+        esperadas no se incluyen: se comparan en el host.
+        """
+        harness = load_template(self._get_template_filename(language))
+        
+        return {
+            HARNESS_FILENAMES[language]: harness,
+            TESTS_FILENAME: self._serialize_tests(tests)
+        }
+    
+    def _serialize_tests(self, tests: List[Dict[str, Any]]) -> str:
+        """Serializa los tests en formato JSON Lines, sin los campos del host"""
+        return ''.join(
+            json.dumps(
+                {key: value for key, value in test.items() if key not in CAMPOS_SOLO_HOST},
+                ensure_ascii=False
+            ) + '\n'
+            for test in tests
+        )
+    
+    def _serialize_expected(self, tests: List[Dict[str, Any]]) -> str:
+        """Serializa las salidas esperadas de los tests, una por línea"""
+        lines = []
+        for test in tests:
+            try:
+                expected = expected_source(test)
+            except CheckerError:
+                expected = ''
+            if isinstance(expected, Path):
+                expected = expected.read_text(encoding='utf-8')
+            lines.append(json.dumps(expected.strip(), ensure_ascii=False) + '\n')
+        return ''.join(lines)
     
     def _get_template_filename(self, language: str) -> str:
         """Retorna el nombre del archivo de plantilla"""
@@ -151,85 +408,187 @@ class JudgeRunner:
     
     def _analyze_results(
         self,
-        execution_result: Dict[str, Any],
+        execution_results: List[Dict[str, Any]],
         total_tests: int
     ) -> Dict[str, Any]:
         """
         Analiza los resultados de la ejecución y determina el veredicto final
+        
+        Recibe un resultado por shard; los tests pasados y los tiempos se
+        suman, la memoria es el pico entre shards y el veredicto final es el
+        más grave entre los shards.
         """
-        # Si hubo un error del sistema antes de ejecutar tests
+        veredictos = []
+        casos_pasados = 0
+        tiempo_total = 0
+        tiempos_cpu = []
+        memorias = []
+        tests_results = []
+        errores = []
+        stdouts = []
+        stderrs = []
+        
+        for execution_result in execution_results:
+            shard = self._analyze_shard(execution_result)
+            veredictos.append(shard['veredicto'])
+            casos_pasados += shard['casos_pasados']
+            tiempo_total += shard['tiempo_ejecucion']
+            if shard.get('tiempo_cpu') is not None:
+                tiempos_cpu.append(shard['tiempo_cpu'])
+            if shard.get('memoria_usada') is not None:
+                memorias.append(shard['memoria_usada'])
+            tests_results.extend(shard['tests'])
+            if shard.get('error'):
+                errores.append(shard['error'])
+            if shard['stdout']:
+                stdouts.append(shard['stdout'])
+            if shard['stderr']:
+                stderrs.append(shard['stderr'])
+        
+        veredicto = max(veredictos, key=SEVERIDAD_VEREDICTOS.index)
+        
+        # Si todos los shards pasaron pero faltan tests, hubo un error al reportar
+        if veredicto == 'AC' and casos_pasados < total_tests:
+            veredicto = 'WA'
+        
+        # Calcular puntos (proporcional a tests pasados)
+        puntos = int((casos_pasados / total_tests) * 100) if total_tests > 0 else 0
+        
+        detalles = {}
+        if tests_results:
+            detalles['tests'] = tests_results
+        if len(execution_results) > 1:
+            detalles['shards'] = len(execution_results)
+        if any('compilacion_cacheada' in r for r in execution_results):
+            detalles['compilacion_cacheada'] = all(
+                r.get('compilacion_cacheada') for r in execution_results
+            )
+        
+        evaluation = {
+            'veredicto': veredicto,
+            'puntos': puntos,
+            'casos_pasados': casos_pasados,
+            'casos_totales': total_tests,
+            'tiempo_ejecucion': tiempo_total,
+            'tiempo_cpu': sum(tiempos_cpu) if tiempos_cpu else None,
+            'memoria_usada': max(memorias) if memorias else None,
+            'stdout': '\n'.join(stdouts),
+            'stderr': '\n'.join(stderrs),
+            'detalles': detalles
+        }
+        if errores:
+            evaluation['error'] = '\n'.join(errores)
+        
+        return evaluation
+    
+    def _analyze_shard(self, execution_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analiza el resultado de un único sandbox
+        
+        Los resultados por test llegan en streaming (`tests`), por lo que los
+        tests que terminaron antes de un TLE, un error o una detención por
+        fail-fast se cuentan igual.
+        """
+        tests_results = execution_result.get('tests', [])
+        casos_pasados = sum(1 for test in tests_results if test.get('passed'))
+        tiempo_tests = sum(test.get('time', 0) for test in tests_results)
+        stdout = execution_result.get('stdout', '').strip()
+        stderr = execution_result.get('stderr', '').strip()
+        recursos = self._shard_resources(execution_result, tests_results)
+        
+        # Si hubo un error del sistema o el proceso no terminó bien
         if not execution_result.get('success') and execution_result.get('veredicto') != 'OK':
             return {
                 'veredicto': execution_result.get('veredicto', 'SE'),
                 'error': execution_result.get('error', 'Error desconocido'),
-                'puntos': 0,
-                'casos_pasados': 0,
-                'casos_totales': total_tests,
+                'casos_pasados': casos_pasados,
                 'tiempo_ejecucion': execution_result.get('tiempo_ejecucion', 0),
                 'stdout': execution_result.get('stdout', ''),
                 'stderr': execution_result.get('stderr', ''),
-                'detalles': {}
+                'tests': tests_results,
+                **recursos
             }
         
-        # Parsear salida JSON de los tests
-        stdout = execution_result.get('stdout', '').strip()
-        stderr = execution_result.get('stderr', '').strip()
+        casos_totales = execution_result.get('total_tests', len(tests_results))
+        
+        # Determinar veredicto del shard
+        if casos_pasados == casos_totales:
+            veredicto = 'AC'  # Accepted
+        elif any(test.get('error_type') == ERROR_CHECKER for test in tests_results):
+            veredicto = 'SE'  # El checker no pudo decidir
+        elif any(test.get('error_type') in ERRORES_MEMORIA for test in tests_results):
+            veredicto = 'MLE'  # Memory Limit Exceeded
+        elif any(test.get('error_type') == ERROR_TIEMPO for test in tests_results):
+            veredicto = 'TLE'  # Time Limit Exceeded
+        elif any('error' in test for test in tests_results):
+            veredicto = 'RE'  # Runtime Error
+        else:
+            veredicto = 'WA'  # Wrong Answer
+        
+        # Detenido por fail-fast: el harness no llega a imprimir el resumen
+        if execution_result.get('detenido'):
+            return {
+                'veredicto': veredicto,
+                'casos_pasados': casos_pasados,
+                'tiempo_ejecucion': tiempo_tests,
+                'stdout': stdout,
+                'stderr': stderr,
+                'tests': tests_results,
+                **recursos
+            }
         
         try:
-            # La última línea del stdout debe ser el JSON con resultados
+            # La última línea del stdout debe ser el JSON con el resumen
             lines = stdout.strip().split('\n')
             json_output = lines[-1] if lines else '{}'
             
             results = json.loads(json_output)
             
-            casos_pasados = results.get('passed', 0)
-            casos_totales = results.get('total', total_tests)
-            tests_results = results.get('tests', [])
-            total_time = results.get('total_time', 0)
-            
-            # Determinar veredicto final
-            if casos_pasados == casos_totales:
-                veredicto = 'AC'  # Accepted
-            else:
-                # Verificar si algún test tuvo error específico
-                has_runtime_error = any(
-                    'error' in test for test in tests_results
-                )
-                if has_runtime_error:
-                    veredicto = 'RE'  # Runtime Error
-                else:
-                    veredicto = 'WA'  # Wrong Answer
-            
-            # Calcular puntos (proporcional a tests pasados)
-            puntos = int((casos_pasados / casos_totales) * 100) if casos_totales > 0 else 0
-            
             return {
                 'veredicto': veredicto,
-                'puntos': puntos,
                 'casos_pasados': casos_pasados,
-                'casos_totales': casos_totales,
-                'tiempo_ejecucion': total_time,
+                'tiempo_ejecucion': results.get('total_time', tiempo_tests),
                 'stdout': stdout,
                 'stderr': stderr,
-                'detalles': {
-                    'tests': tests_results
-                }
+                'tests': tests_results,
+                **recursos
             }
             
-        except (json.JSONDecodeError, IndexError, KeyError) as e:
+        except (json.JSONDecodeError, IndexError, KeyError, AttributeError) as e:
             # Si no se puede parsear el JSON, probablemente hubo un error
             return {
                 'veredicto': 'RE',
                 'error': f'No se pudo parsear resultados: {str(e)}',
-                'puntos': 0,
-                'casos_pasados': 0,
-                'casos_totales': total_tests,
+                'casos_pasados': casos_pasados,
                 'tiempo_ejecucion': execution_result.get('tiempo_ejecucion', 0),
                 'stdout': stdout,
                 'stderr': stderr,
-                'detalles': {}
+                'tests': tests_results,
+                **recursos
             }
     
+    def _shard_resources(
+        self,
+        execution_result: Dict[str, Any],
+        tests_results: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Tiempo de CPU y memoria pico de un shard
+        Se prefieren los contadores del cgroup; si no están disponibles se
+        usan los que reporta el harness por test
+        """
+        tiempo_cpu = execution_result.get('tiempo_cpu')
+        if tiempo_cpu is None and tests_results:
+            tiempo_cpu = sum(test.get('cpu_time', 0) for test in tests_results)
+        
+        memoria_usada = execution_result.get('memoria_usada')
+        if memoria_usada is None:
+            memoria_kb = max((test.get('memory_kb', 0) for test in tests_results), default=0)
+            if memoria_kb:
+                memoria_usada = -(-memoria_kb // 1024)  # MB, redondeo hacia arriba
+        
+        return {'tiempo_cpu': tiempo_cpu, 'memoria_usada': memoria_usada}
+    
     def validate_code_syntax(self, code: str, language: str) -> Dict[str, Any]:
         """
         Valida la sintaxis del código sin ejecutarlo
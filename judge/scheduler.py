@@ -0,0 +1,93 @@
+"""
+Planificación de la cola de evaluación
+Decide en qué orden se reclaman las submissions pendientes:
+1. Por clase de prioridad (concurso en vivo, ejemplos, re-evaluaciones,
+   pruebas de administración)
+2. Dentro de cada clase, reparto equitativo (fair-share): primero las del
+   tributo que menos evaluaciones consumió en la ventana reciente y, a
+   igualdad, las del distrito que menos consumió
+3. A igualdad, la más antigua en la cola
+Cada asignación se registra en el logger `judge.scheduler` con la espera en
+cola y el consumo del tributo y su distrito, para auditar el reparto.
+"""
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Submission
+
+logger = logging.getLogger(__name__)
+
+# Candidatas que se traen por reclamo (la primera de cada tributo de la clase)
+MAX_CANDIDATES = 20
+
+
+def pending_in_order(limit: int = MAX_CANDIDATES) -> List[Dict[str, Any]]:
+    """
+    Candidatas a evaluarse, en el orden en que deben reclamarse
+    Solo se consideran las pendientes sin reclamar de la clase de prioridad
+    más alta que tiene alguna, y de cada tributo solo la más antigua (las
+    siguientes no pueden adelantarla). El consumo reciente, el orden y el
+    límite se resuelven en la base: el costo no crece con el largo de la
+    cola. Cada elemento incluye el consumo de su tributo y distrito
+    """
+    en_cola = Submission.objects.filter(veredicto='PE', reclamada_por='')
+    clase = en_cola.order_by('prioridad').values_list('prioridad', flat=True).first()
+    if clase is None:
+        return []
+    en_cola = en_cola.filter(prioridad=clase)
+
+    # Consumo reciente de la clase: evaluaciones reclamadas en la ventana
+    # (las que siguen en curso incluidas)
+    window = getattr(settings, 'JUDGE_FAIR_SHARE_WINDOW', 300)
+    reclamadas = Submission.objects.filter(
+        prioridad=clase, fecha_reclamo__gte=timezone.now() - timedelta(seconds=window)
+    )
+
+    def consumo(**filtro):
+        return Coalesce(
+            Subquery(
+                reclamadas.filter(**filtro).order_by().values('prioridad').annotate(
+                    total=Count('id')
+                ).values('total')[:1],
+                output_field=IntegerField()
+            ),
+            Value(0)
+        )
+
+    primera_del_tributo = en_cola.filter(tributo_id=OuterRef('tributo_id')).order_by(
+        'fecha_encolado', 'id'
+    ).values('id')[:1]
+    return list(
+        en_cola.filter(id=Subquery(primera_del_tributo)).annotate(
+            distrito=F('tributo__distrito'),
+            uso_tributo=consumo(tributo_id=OuterRef('tributo_id')),
+            uso_distrito=consumo(tributo__distrito=OuterRef('tributo__distrito'))
+        ).order_by('uso_tributo', 'uso_distrito', 'fecha_encolado', 'id').values(
+            'id', 'prioridad', 'tributo_id', 'fecha_encolado', 'distrito',
+            'uso_tributo', 'uso_distrito'
+        )[:limit]
+    )
+
+
+def log_assignment(candidate: Dict[str, Any], worker_id: str, candidatas: int):
+    """Registra la decisión de planificación de una submission reclamada"""
+    espera = (timezone.now() - candidate['fecha_encolado']).total_seconds()
+    logger.info(
+        'asignada submission=%s worker=%s clase=%s tributo=%s distrito=%s '
+        'espera=%.3fs uso_tributo=%s uso_distrito=%s candidatas=%s',
+        candidate['id'],
+        worker_id,
+        Submission.PRIORIDAD_NOMBRES[candidate['prioridad']],
+        candidate['tributo_id'],
+        candidate['distrito'],
+        espera,
+        candidate['uso_tributo'],
+        candidate['uso_distrito'],
+        candidatas
+    )
@@ -0,0 +1,126 @@
+"""
+Ejecutor simulado y determinista
+No ejecuta el código: recorre tests.jsonl y emite un resultado por test como
+lo haría el harness. Sirve para benchmarks del juez (sin el costo del
+sandbox) y para tests.
+"""
+import json
+import time
+from typing import Callable, Dict, Any, Optional
+from django.conf import settings
+
+from .executors import BaseExecutor, RECORD_PREFIX
+from .runner import EXPECTED_FILENAME, TESTS_FILENAME
+from .timing import MARCA_EJECUTADA, MARCA_LOGS, MARCA_SANDBOX
+
+
+class SimulatedExecutor(BaseExecutor):
+    """
+    Ejecutor que simula la ejecución de cada test
+
+    Como el harness, cada test reporta su salida en `actual` y el checker
+    del host decide si pasó. Por defecto la salida es la esperada (que el
+    runner entrega en expected.jsonl a los ejecutores en proceso), así que
+    todos los tests pasan, y cada uno "tarda" `test_time` segundos (se
+    duerme ese tiempo solo si `sleep` es True). `outcome` permite decidir el
+    resultado: recibe (código, test) y retorna campos que reemplazan los del
+    registro, p. ej. {'actual': 'otra salida'} o un error con `error_type`.
+    """
+    
+    IN_PROCESS = True
+
+    def __init__(
+        self,
+        test_time: Optional[float] = None,
+        sleep: Optional[bool] = None,
+        outcome: Optional[Callable[[str, Dict[str, Any]], Dict[str, Any]]] = None
+    ):
+        if test_time is None:
+            test_time = getattr(settings, 'JUDGE_SIMULATED_TEST_TIME', 0.001)
+        if sleep is None:
+            sleep = getattr(settings, 'JUDGE_SIMULATED_SLEEP', False)
+        self.test_time = test_time
+        self.sleep = sleep
+        self.outcome = outcome
+
+    def execute(
+        self,
+        code: str,
+        language: str,
+        time_limit: float = 5.0,
+        memory_limit: int = 256,
+        files: Optional[Dict[str, str]] = None,
+        env: Optional[Dict[str, str]] = None,
+        on_test: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        output_limit: Optional[int] = None,
+        submission_id: Optional[int] = None,
+        data_dir: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Simula la ejecución emitiendo los registros por test del harness
+        """
+        if language not in self.LANGUAGES:
+            return self._unsupported_language(language)
+
+        env = env or {}
+        fail_fast = env.get('JUDGE_FAIL_FAST') == '1'
+        stream = self._open_stream(on_test, output_limit)
+        tests_jsonl = (files or {}).get(TESTS_FILENAME, '')
+        expected = [
+            json.loads(line)
+            for line in (files or {}).get(EXPECTED_FILENAME, '').splitlines()
+        ]
+
+        start_time = time.time()
+        marcas = {MARCA_SANDBOX: time.monotonic()}
+        total_time = 0
+        passed = 0
+        total = 0
+
+        for i, line in enumerate(tests_jsonl.splitlines()):
+            if not line.strip():
+                continue
+            test = json.loads(line)
+            total += 1
+            # El host decide `passed` comparando `actual` con su checker
+            record = {
+                'name': test.get('name', f'Test {i + 1}'),
+                'passed': True,
+                'time': self.test_time,
+                'actual': expected[total - 1] if total <= len(expected) else '',
+                'cpu_time': self.test_time,
+                'memory_kb': 0
+            }
+            if self.outcome is not None:
+                record.update(self.outcome(code, test))
+
+            if self.sleep:
+                time.sleep(record['time'])
+            total_time += record['time']
+
+            line_out = RECORD_PREFIX + json.dumps(record) + '\n'
+            if stream.feed_stdout(line_out.encode('utf-8')):
+                break
+            if record.get('passed'):
+                passed += 1
+            elif fail_fast:
+                break
+
+        # Detenida a pedido: el harness no llega a imprimir el resumen
+        if not stream.should_stop:
+            summary = {'total_time': total_time, 'passed': passed, 'total': total}
+            stream.feed_stdout((json.dumps(summary) + '\n').encode('utf-8'))
+
+        stream.close()
+        marcas[MARCA_EJECUTADA] = time.monotonic()
+        usage = {'tiempo_cpu': total_time}
+        result = self._build_result(
+            stream,
+            exit_code=0,
+            execution_time=time.time() - start_time,
+            time_limit=time_limit,
+            usage=usage
+        )
+        marcas[MARCA_LOGS] = time.monotonic()
+        result['marcas'] = marcas
+        return result
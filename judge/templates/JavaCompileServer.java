@@ -0,0 +1,136 @@
+/*
+ * Servicio de compilación Java del juez
+ * Proceso de larga duración dentro de un contenedor de la imagen de Java:
+ * compila en memoria con la API javax.tools, por lo que cada submission no
+ * paga el arranque de una JVM ni de javac (el compilador queda cargado y
+ * optimizado por el JIT entre compilaciones).
+ *
+ * Protocolo (directorio de trabajo montado desde el host, por defecto /work):
+ * el juez crea jobs/<id>/ con el fuente y escribe "<id> <archivo>\n" en el
+ * FIFO ctl. El servicio deja las clases en jobs/<id>/classes/, los
+ * diagnósticos en jobs/<id>/stderr.txt y, por último, el resultado en
+ * jobs/<id>/status: 0 compiló, 1 error de compilación, 2 error del servicio.
+ *
+ * Los procesadores de anotaciones están deshabilitados (-proc:none): el
+ * código de la submission nunca se ejecuta al compilar.
+ */
+import javax.tools.*;
+import java.io.*;
+import java.net.URI;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.*;
+import java.util.*;
+import java.util.concurrent.*;
+
+public class JavaCompileServer {
+    static final List<String> OPTIONS = List.of("-proc:none", "-implicit:none");
+    static final JavaCompiler COMPILER = ToolProvider.getSystemJavaCompiler();
+    // El file manager estándar cachea el índice del JDK; no es thread-safe
+    static final ThreadLocal<StandardJavaFileManager> FILE_MANAGERS = ThreadLocal.withInitial(
+        () -> COMPILER.getStandardFileManager(null, Locale.ROOT, StandardCharsets.UTF_8)
+    );
+
+    public static void main(String[] args) throws Exception {
+        Path work = Paths.get(args.length > 0 ? args[0] : "/work");
+        Path jobs = work.resolve("jobs");
+        int threads = Math.max(1, Runtime.getRuntime().availableProcessors());
+        ExecutorService pool = Executors.newFixedThreadPool(threads);
+
+        // Precalentar el compilador antes de atender pedidos
+        compile("Solution.java", "public class Solution {}", new StringWriter());
+
+        // Abierto también para escritura: el FIFO nunca llega a EOF. El juez
+        // solo puede escribir en ctl cuando el servicio ya lo abrió
+        try (RandomAccessFile control = new RandomAccessFile(work.resolve("ctl").toFile(), "rw")) {
+            String line;
+            while ((line = control.readLine()) != null) {
+                String[] request = line.trim().split(" ");
+                if (request.length != 2 || !isPlainName(request[0]) || !isPlainName(request[1])) {
+                    continue;
+                }
+                pool.submit(() -> handle(jobs.resolve(request[0]), request[1]));
+            }
+        }
+    }
+
+    static boolean isPlainName(String name) {
+        return !name.isEmpty() && !name.startsWith(".") && Paths.get(name).getFileName().toString().equals(name);
+    }
+
+    static void handle(Path job, String filename) {
+        StringWriter diagnostics = new StringWriter();
+        int status;
+        try {
+            String source = new String(Files.readAllBytes(job.resolve(filename)), StandardCharsets.UTF_8);
+            Map<String, byte[]> classes = compile(filename, source, diagnostics);
+            if (classes == null) {
+                status = 1;
+            } else {
+                Path out = job.resolve("classes");
+                for (Map.Entry<String, byte[]> entry : classes.entrySet()) {
+                    Path target = out.resolve(entry.getKey().replace('.', '/') + ".class");
+                    Files.createDirectories(target.getParent());
+                    Files.write(target, entry.getValue());
+                }
+                status = 0;
+            }
+        } catch (Throwable e) {
+            diagnostics.write("Error del servicio de compilación: " + e + "\n");
+            status = 2;
+        }
+
+        try {
+            Files.write(job.resolve("stderr.txt"), diagnostics.toString().getBytes(StandardCharsets.UTF_8));
+            // El juez espera status: se publica completo con un rename
+            Path tmp = job.resolve("status.tmp");
+            Files.write(tmp, String.valueOf(status).getBytes(StandardCharsets.UTF_8));
+            Files.move(tmp, job.resolve("status"), StandardCopyOption.ATOMIC_MOVE);
+        } catch (IOException e) {
+            // El juez dejó de esperar (timeout) y borró el directorio
+        }
+    }
+
+    /**
+     * Compila un fuente en memoria
+     * Retorna los bytecodes por nombre binario de clase o null si no compiló
+     */
+    static Map<String, byte[]> compile(String filename, String source, Writer diagnostics) {
+        JavaFileObject unit = new SimpleJavaFileObject(URI.create("string:///" + filename), JavaFileObject.Kind.SOURCE) {
+            @Override
+            public String getName() {
+                return filename;
+            }
+
+            @Override
+            public CharSequence getCharContent(boolean ignoreEncodingErrors) {
+                return source;
+            }
+        };
+
+        Map<String, ByteArrayOutputStream> outputs = new LinkedHashMap<>();
+        JavaFileManager manager = new ForwardingJavaFileManager<JavaFileManager>(FILE_MANAGERS.get()) {
+            @Override
+            public JavaFileObject getJavaFileForOutput(
+                Location location, String className, JavaFileObject.Kind kind, FileObject sibling
+            ) {
+                URI uri = URI.create("mem:///" + className.replace('.', '/') + kind.extension);
+                return new SimpleJavaFileObject(uri, kind) {
+                    @Override
+                    public OutputStream openOutputStream() {
+                        ByteArrayOutputStream out = new ByteArrayOutputStream();
+                        outputs.put(className, out);
+                        return out;
+                    }
+                };
+            }
+        };
+
+        Boolean ok = COMPILER.getTask(diagnostics, manager, null, OPTIONS, null, List.of(unit)).call();
+        if (!Boolean.TRUE.equals(ok)) {
+            return null;
+        }
+        Map<String, byte[]> classes = new LinkedHashMap<>();
+        outputs.forEach((name, out) -> classes.put(name, out.toByteArray()));
+        return classes;
+    }
+}
@@ -1,125 +1,395 @@
-"""
-Plantilla de ejecución para Java
-Combina el código del usuario con los tests ocultos
-"""
-import com.google.gson.Gson;
+/*
+ * Plantilla de ejecución para Java
+ * Harness estático: se compila una sola vez por versión y ejecuta la clase
+ * Solution (compilada por separado) mediante reflection. Los tests ocultos
+ * se leen de a uno desde tests.jsonl (un JSON por línea, en el directorio
+ * de trabajo)
+ * Emite una línea `__JUDGE__ {...}` por test a medida que se ejecutan (con
+ * la salida obtenida, tiempo de CPU y pico de memoria RSS del proceso) y un
+ * resumen JSON al final. Las salidas esperadas no llegan al sandbox: el juez
+ * las compara en el host. Con JUDGE_FAIL_FAST=1 se detiene en el primer error
+ * Cada test corre en su propio hilo con límite de tiempo real
+ * (JUDGE_WALL_TIME_LIMIT) y de CPU (JUDGE_TIME_LIMIT): un test que los excede
+ * se registra como TimeLimitExceeded y se continúa con el siguiente
+ */
 import java.util.*;
 import java.io.*;
-
-// CÓDIGO DEL USUARIO
-{user_code}
+import java.lang.management.*;
+import java.lang.reflect.*;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.*;
 
 // CLASE DE TESTING
 class __JudgeRunner {
-    static class TestCase {
-        String name;
-        String input;
-        String expected;
-        Map<String, Object> function_call;
-        
-        public TestCase() {}
+    static final String TESTS_PATH = "tests.jsonl";
+    static final String RECORD_PREFIX = "__JUDGE__ ";
+    static final boolean FAIL_FAST = "1".equals(System.getenv("JUDGE_FAIL_FAST"));
+    static final double TIME_LIMIT = envSeconds("JUDGE_TIME_LIMIT");
+    static final double WALL_TIME_LIMIT = envSeconds("JUDGE_WALL_TIME_LIMIT");
+    static final String TIME_LIMIT_MESSAGE = "Tiempo límite excedido";
+    // Pila amplia para soluciones recursivas (el hilo main tenía la del sistema)
+    static final long TEST_STACK_SIZE = 256L * 1024 * 1024;
+
+    @SuppressWarnings("unchecked")
+    public static void main(String[] args) {
+        PrintStream realOut = System.out;
+        InputStream realIn = System.in;
+
+        try (BufferedReader reader = Files.newBufferedReader(Paths.get(TESTS_PATH), StandardCharsets.UTF_8)) {
+            Class<?> solution = Class.forName("Solution");
+
+            double totalTime = 0;
+            int passed = 0;
+            int total = 0;
+            String line;
+
+            // Leer los tests de a uno, sin cargar el archivo completo
+            while ((line = reader.readLine()) != null) {
+                if (line.trim().isEmpty()) {
+                    continue;
+                }
+                int i = total++;
+                Map<String, Object> test = (Map<String, Object>) new Json(line).parse();
+                String name = test.get("name") != null ? String.valueOf(test.get("name")) : "Test " + (i + 1);
+                String input = test.get("input") != null ? String.valueOf(test.get("input")) : "";
+                // La salida se compara en el host (checkers del juez), salvo
+                // que el test traiga la salida esperada
+                String expected = test.get("expected") != null ? String.valueOf(test.get("expected")).trim() : null;
+
+                ByteArrayOutputStream baos = new ByteArrayOutputStream();
+                TestRun run;
+
+                try {
+                    // Preparar entrada y capturar salida
+                    System.setIn(new ByteArrayInputStream(input.getBytes(StandardCharsets.UTF_8)));
+                    System.setOut(new PrintStream(baos, true, "UTF-8"));
+
+                    run = new TestRun(solution, test, input, baos);
+                    run.execute();
+                } finally {
+                    System.setOut(realOut);
+                    System.setIn(realIn);
+                }
+
+                totalTime += run.elapsedTime;
+                boolean timeLimitExceeded = run.timedOut
+                    || (TIME_LIMIT > 0 && run.cpuTime > TIME_LIMIT);
+                boolean ok = false;
+                String record = "{\"name\":" + quote(name);
+
+                if (timeLimitExceeded) {
+                    record += ",\"passed\":false"
+                        + ",\"time\":" + run.elapsedTime
+                        + ",\"error\":" + quote(TIME_LIMIT_MESSAGE)
+                        + ",\"error_type\":\"TimeLimitExceeded\"";
+                } else if (run.error != null) {
+                    Throwable cause = run.error instanceof InvocationTargetException && run.error.getCause() != null
+                        ? run.error.getCause()
+                        : run.error;
+                    record += ",\"passed\":false"
+                        + ",\"time\":" + run.elapsedTime
+                        + ",\"error\":" + quote(String.valueOf(cause.getMessage()))
+                        + ",\"error_type\":" + quote(cause.getClass().getSimpleName());
+                } else {
+                    ok = expected == null || run.output.equals(expected);
+                    record += ",\"passed\":" + ok
+                        + ",\"time\":" + run.elapsedTime;
+                    if (expected != null) {
+                        record += ",\"expected\":" + quote(expected);
+                    }
+                    record += ",\"actual\":" + quote(run.output);
+                }
+
+                record += ",\"cpu_time\":" + run.cpuTime
+                    + ",\"memory_kb\":" + peakRssKb() + "}";
+
+                // Reportar el test apenas termina
+                realOut.println(RECORD_PREFIX + record);
+                realOut.flush();
+                if (ok) {
+                    passed++;
+                } else if (run.timedOut && run.worker.isAlive()) {
+                    // El hilo del test no pudo detenerse: no es seguro seguir
+                    break;
+                } else if (FAIL_FAST) {
+                    break;
+                }
+            }
+
+            // Imprimir resumen en JSON
+            realOut.println("{\"total_time\":" + totalTime
+                + ",\"passed\":" + passed
+                + ",\"total\":" + total + "}");
+            realOut.flush();
+            // Hilos de tests abandonados no deben mantener viva la JVM
+            System.exit(0);
+
+        } catch (Throwable e) {
+            System.setOut(realOut);
+            System.err.println("Error en el runner: " + e.getMessage());
+            e.printStackTrace();
+            System.exit(1);
+        }
     }
-    
-    static class TestResult {
-        String name;
-        boolean passed;
-        double time;
-        String expected;
-        String actual;
-        String error;
-        String error_type;
-        
-        public TestResult() {}
+
+    /**
+     * Ejecución de un test en un hilo propio, vigilada por el límite de
+     * tiempo real. Si el hilo no termina a tiempo se intenta detenerlo.
+     */
+    static class TestRun implements Runnable {
+        final Class<?> solution;
+        final Map<String, Object> test;
+        final String input;
+        final ByteArrayOutputStream baos;
+        Thread worker;
+        volatile String output;
+        volatile Throwable error;
+        volatile double cpuTime;
+        double elapsedTime;
+        boolean timedOut;
+
+        TestRun(Class<?> solution, Map<String, Object> test, String input, ByteArrayOutputStream baos) {
+            this.solution = solution;
+            this.test = test;
+            this.input = input;
+            this.baos = baos;
+        }
+
+        @SuppressWarnings({"deprecation", "removal"})
+        void execute() throws InterruptedException {
+            worker = new Thread(null, this, "judge-test", TEST_STACK_SIZE);
+            worker.setDaemon(true);
+            long startTime = System.nanoTime();
+            worker.start();
+            if (WALL_TIME_LIMIT > 0) {
+                worker.join(Math.max(1, (long) Math.ceil(WALL_TIME_LIMIT * 1000)));
+            } else {
+                worker.join();
+            }
+            elapsedTime = (System.nanoTime() - startTime) / 1_000_000_000.0;
+
+            if (worker.isAlive()) {
+                timedOut = true;
+                try {
+                    worker.stop();
+                } catch (Throwable e) {
+                    // JVMs sin Thread.stop: el hilo queda abandonado
+                }
+                worker.join(100);
+            }
+        }
+
+        @Override
+        @SuppressWarnings("unchecked")
+        public void run() {
+            ThreadMXBean threads = ManagementFactory.getThreadMXBean();
+            long startCpu = threads.getCurrentThreadCpuTime();
+            try {
+                Object call = test.get("function_call");
+                if (call != null) {
+                    // Llamar a la función indicada por el test
+                    Map<String, Object> functionCall = (Map<String, Object>) call;
+                    Object result = invoke(solution, functionCall, input);
+                    output = String.valueOf(result).trim();
+                } else {
+                    // Ejecutar main del usuario
+                    Method main = solution.getMethod("main", String[].class);
+                    main.invoke(null, (Object) new String[]{});
+                    System.out.flush();
+                    output = baos.toString("UTF-8").trim();
+                }
+            } catch (Throwable e) {
+                error = e;
+            } finally {
+                cpuTime = (threads.getCurrentThreadCpuTime() - startCpu) / 1_000_000_000.0;
+            }
+        }
     }
-    
-    static class FinalResult {
-        List<TestResult> tests;
-        double total_time;
-        int passed;
-        int total;
-        
-        public FinalResult() {
-            tests = new ArrayList<>();
+
+    /** Lee un límite en segundos desde una variable de entorno (0 = sin límite) */
+    static double envSeconds(String name) {
+        try {
+            String value = System.getenv(name);
+            return value == null || value.isEmpty() ? 0 : Double.parseDouble(value);
+        } catch (NumberFormatException e) {
+            return 0;
         }
     }
-    
-    public static void main(String[] args) {
+
+    /**
+     * Invoca el método estático indicado en function_call, convirtiendo los
+     * argumentos JSON a los tipos de sus parámetros. Sin nombre, llama a
+     * solve(input) por compatibilidad.
+     */
+    @SuppressWarnings("unchecked")
+    static Object invoke(Class<?> solution, Map<String, Object> functionCall, String input) throws Exception {
+        Object name = functionCall.get("name");
+        if (name == null) {
+            return solution.getMethod("solve", String.class).invoke(null, input);
+        }
+        List<Object> callArgs = functionCall.get("args") != null
+            ? (List<Object>) functionCall.get("args")
+            : new ArrayList<>();
+
+        for (Method method : solution.getDeclaredMethods()) {
+            if (!method.getName().equals(name) || method.getParameterCount() != callArgs.size()) {
+                continue;
+            }
+            Class<?>[] types = method.getParameterTypes();
+            Object[] converted = new Object[types.length];
+            for (int i = 0; i < types.length; i++) {
+                converted[i] = convert(callArgs.get(i), types[i]);
+            }
+            method.setAccessible(true);
+            Object target = Modifier.isStatic(method.getModifiers())
+                ? null
+                : solution.getDeclaredConstructor().newInstance();
+            return method.invoke(target, converted);
+        }
+        throw new NoSuchMethodException(name + " con " + callArgs.size() + " argumentos");
+    }
+
+    /** Convierte un valor JSON al tipo del parámetro */
+    @SuppressWarnings("unchecked")
+    static Object convert(Object value, Class<?> type) {
+        if (value == null) {
+            return null;
+        }
+        if (type == int.class || type == Integer.class) return ((Number) value).intValue();
+        if (type == long.class || type == Long.class) return ((Number) value).longValue();
+        if (type == double.class || type == Double.class) return ((Number) value).doubleValue();
+        if (type == float.class || type == Float.class) return ((Number) value).floatValue();
+        if (type == boolean.class || type == Boolean.class) return value;
+        if (type == String.class) return String.valueOf(value);
+        if (type == char.class || type == Character.class) return String.valueOf(value).charAt(0);
+        if (type.isArray()) {
+            List<Object> list = (List<Object>) value;
+            Object array = Array.newInstance(type.getComponentType(), list.size());
+            for (int i = 0; i < list.size(); i++) {
+                Array.set(array, i, convert(list.get(i), type.getComponentType()));
+            }
+            return array;
+        }
+        return value;
+    }
+
+    /** Pico de memoria residente del proceso (KB), leído de /proc/self/status */
+    static long peakRssKb() {
         try {
-            String testsJson = "{tests_json}";
-            Gson gson = new Gson();
-            TestCase[] tests = gson.fromJson(testsJson, TestCase[].class);
-            
-            FinalResult finalResult = new FinalResult();
-            double totalTime = 0;
-            
-            for (int i = 0; i < tests.length; i++) {
-                TestCase test = tests[i];
-                TestResult result = new TestResult();
-                result.name = test.name != null ? test.name : "Test " + (i + 1);
-                
-                try {
-                    // Preparar entrada si existe
-                    if (test.input != null && !test.input.isEmpty()) {
-                        System.setIn(new ByteArrayInputStream(test.input.getBytes()));
-                    }
-                    
-                    // Capturar salida
-                    ByteArrayOutputStream baos = new ByteArrayOutputStream();
-                    PrintStream ps = new PrintStream(baos);
-                    PrintStream old = System.out;
-                    System.setOut(ps);
-                    
-                    // Medir tiempo
-                    long startTime = System.nanoTime();
-                    
-                    // Ejecutar función del usuario o código principal
-                    String actualOutput = "";
-                    if (test.function_call != null) {
-                        // Aquí habría que usar reflection para llamar a la función
-                        // Por simplicidad, asumimos que hay un método solve() público
-                        actualOutput = Solution.solve(test.input);
+            for (String line : Files.readAllLines(Paths.get("/proc/self/status"))) {
+                if (line.startsWith("VmHWM:")) {
+                    return Long.parseLong(line.replaceAll("[^0-9]", ""));
+                }
+            }
+        } catch (Exception e) {
+            // Sin /proc (fuera de Linux): no se reporta memoria
+        }
+        return 0;
+    }
+
+    /** Serializa un String como literal JSON */
+    static String quote(String s) {
+        StringBuilder sb = new StringBuilder("\"");
+        for (int i = 0; i < s.length(); i++) {
+            char c = s.charAt(i);
+            switch (c) {
+                case '"': sb.append("\\\""); break;
+                case '\\': sb.append("\\\\"); break;
+                case '\n': sb.append("\\n"); break;
+                case '\r': sb.append("\\r"); break;
+                case '\t': sb.append("\\t"); break;
+                default:
+                    if (c < 0x20) {
+                        sb.append(String.format("\\u%04x", (int) c));
                     } else {
-                        // Ejecutar main del usuario
-                        Solution.main(new String[]{});
-                        actualOutput = baos.toString().trim();
+                        sb.append(c);
                     }
-                    
-                    double elapsedTime = (System.nanoTime() - startTime) / 1_000_000_000.0;
-                    totalTime += elapsedTime;
-                    
-                    // Restaurar stdout
-                    System.out.flush();
-                    System.setOut(old);
-                    
-                    // Comparar salidas
-                    String expected = test.expected != null ? test.expected.trim() : "";
-                    result.passed = actualOutput.equals(expected);
-                    result.time = elapsedTime;
-                    result.expected = expected;
-                    result.actual = actualOutput;
-                    
-                } catch (Exception e) {
-                    long elapsedTime = (System.nanoTime() - System.currentTimeMillis() * 1_000_000) / 1_000_000_000;
-                    result.passed = false;
-                    result.time = elapsedTime;
-                    result.error = e.getMessage();
-                    result.error_type = e.getClass().getSimpleName();
-                    System.setOut(System.out);
+            }
+        }
+        return sb.append('"').toString();
+    }
+
+    /** Parser JSON mínimo (la imagen del juez no incluye librerías externas) */
+    static class Json {
+        private final String s;
+        private int pos = 0;
+
+        Json(String s) {
+            this.s = s;
+        }
+
+        Object parse() {
+            skipWhitespace();
+            char c = s.charAt(pos);
+            if (c == '{') return parseObject();
+            if (c == '[') return parseArray();
+            if (c == '"') return parseString();
+            if (s.startsWith("true", pos)) { pos += 4; return Boolean.TRUE; }
+            if (s.startsWith("false", pos)) { pos += 5; return Boolean.FALSE; }
+            if (s.startsWith("null", pos)) { pos += 4; return null; }
+            return parseNumber();
+        }
+
+        private Map<String, Object> parseObject() {
+            Map<String, Object> map = new LinkedHashMap<>();
+            pos++;
+            skipWhitespace();
+            if (s.charAt(pos) == '}') { pos++; return map; }
+            while (true) {
+                skipWhitespace();
+                String key = parseString();
+                skipWhitespace();
+                pos++; // ':'
+                map.put(key, parse());
+                skipWhitespace();
+                if (s.charAt(pos++) == '}') return map;
+            }
+        }
+
+        private List<Object> parseArray() {
+            List<Object> list = new ArrayList<>();
+            pos++;
+            skipWhitespace();
+            if (s.charAt(pos) == ']') { pos++; return list; }
+            while (true) {
+                list.add(parse());
+                skipWhitespace();
+                if (s.charAt(pos++) == ']') return list;
+            }
+        }
+
+        private String parseString() {
+            StringBuilder sb = new StringBuilder();
+            pos++; // '"'
+            while (true) {
+                char c = s.charAt(pos++);
+                if (c == '"') return sb.toString();
+                if (c != '\\') { sb.append(c); continue; }
+                char e = s.charAt(pos++);
+                switch (e) {
+                    case 'n': sb.append('\n'); break;
+                    case 'r': sb.append('\r'); break;
+                    case 't': sb.append('\t'); break;
+                    case 'b': sb.append('\b'); break;
+                    case 'f': sb.append('\f'); break;
+                    case 'u': sb.append((char) Integer.parseInt(s.substring(pos, pos + 4), 16)); pos += 4; break;
+                    default: sb.append(e);
                 }
-                
-                finalResult.tests.add(result);
             }
-            
-            finalResult.total_time = totalTime;
-            finalResult.passed = (int) finalResult.tests.stream().filter(r -> r.passed).count();
-            finalResult.total = tests.length;
-            
-            // Imprimir resultados en JSON
-            System.out.println(gson.toJson(finalResult));
-            
-        } catch (Exception e) {
-            System.err.println("Error en el runner: " + e.getMessage());
-            e.printStackTrace();
+        }
+
+        private Number parseNumber() {
+            int start = pos;
+            while (pos < s.length() && "+-0123456789.eE".indexOf(s.charAt(pos)) >= 0) pos++;
+            String number = s.substring(start, pos);
+            if (number.contains(".") || number.contains("e") || number.contains("E")) {
+                return Double.parseDouble(number);
+            }
+            return Long.parseLong(number);
+        }
+
+        private void skipWhitespace() {
+            while (pos < s.length() && Character.isWhitespace(s.charAt(pos))) pos++;
         }
     }
 }
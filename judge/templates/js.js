@@ -1,87 +1,242 @@
-"""
-Plantilla de ejecución para JavaScript (Node.js)
-Combina el código del usuario con los tests ocultos
-"""
-
-// CÓDIGO DEL USUARIO
-{user_code}
-
-// FUNCIÓN PRINCIPAL DE TESTING
-function __runTests() {
-    const tests = {tests_json};
-    const results = [];
+/*
+ * Plantilla de ejecución para JavaScript (Node.js)
+ * Harness estático: carga la solución desde solution.js en un contexto de vm
+ * nuevo (globals limpios) y lee los tests ocultos de a uno desde tests.jsonl
+ * (un JSON por línea)
+ * Emite una línea `__JUDGE__ {...}` por test a medida que se ejecutan (con
+ * la salida obtenida, tiempo de CPU y pico de memoria RSS del proceso) y un
+ * resumen JSON al final. Las salidas esperadas no llegan al sandbox: el juez
+ * las compara en el host. Con JUDGE_FAIL_FAST=1 se detiene en el primer error
+ * Cada test tiene su propio límite de tiempo real (JUDGE_WALL_TIME_LIMIT,
+ * aplicado con el timeout de vm) y de CPU (JUDGE_TIME_LIMIT, verificado al
+ * terminar): un test que los excede se registra como TimeLimitExceeded y se
+ * continúa con el siguiente
+ * Se ejecuta como script (`node __judge__.js`) o desde un proceso
+ * precalentado del zygote de JavaScript (js_zygote.js), que llama a run()
+ * con la caché de código de V8 de la solución
+ */
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+const { Console } = require('console');
+const { Writable } = require('stream');
+const { StringDecoder } = require('string_decoder');
+
+const RECORD_PREFIX = '__JUDGE__ ';
+const TIME_LIMIT_MESSAGE = 'Tiempo límite excedido';
+
+// Globals de Node que se exponen a la solución (los del lenguaje, como Math
+// o JSON, son propios de cada contexto)
+const NODE_GLOBALS = [
+    'process', 'Buffer', 'URL', 'URLSearchParams', 'TextEncoder', 'TextDecoder',
+    'setTimeout', 'clearTimeout', 'setInterval', 'clearInterval',
+    'setImmediate', 'clearImmediate', 'queueMicrotask', 'structuredClone'
+];
+
+// Escritura síncrona en un descriptor: nada se pierde si el proceso termina
+function __syncStream(fd) {
+    return new Writable({
+        write(chunk, encoding, callback) {
+            fs.writeSync(fd, chunk);
+            callback();
+        }
+    });
+}
+
+// Contexto nuevo para la solución, con la consola en los descriptores dados
+function __createContext(out, err) {
+    const sandbox = {
+        require,
+        console: new Console({ stdout: __syncStream(out), stderr: __syncStream(err) })
+    };
+    for (const name of NODE_GLOBALS) {
+        if (name in global) sandbox[name] = global[name];
+    }
+    const context = vm.createContext(sandbox);
+    context.global = vm.runInContext('globalThis', context);
+    return context;
+}
+
+// Lee los tests de a uno, sin cargar el archivo completo
+function* __iterTests(testsPath) {
+    const fd = fs.openSync(testsPath, 'r');
+    const buffer = Buffer.alloc(64 * 1024);
+    const decoder = new StringDecoder('utf8');
+    let pending = '';
+    let bytesRead;
+
+    try {
+        while ((bytesRead = fs.readSync(fd, buffer, 0, buffer.length, null)) > 0) {
+            pending += decoder.write(buffer.subarray(0, bytesRead));
+            let newline;
+            while ((newline = pending.indexOf('\n')) >= 0) {
+                const line = pending.slice(0, newline);
+                pending = pending.slice(newline + 1);
+                if (line.trim()) yield JSON.parse(line);
+            }
+        }
+        pending += decoder.end();
+        if (pending.trim()) yield JSON.parse(pending);
+    } finally {
+        fs.closeSync(fd);
+    }
+}
+
+// Busca la función del usuario (declaraciones o const/let globales)
+function __resolveFunction(context, name) {
+    if (typeof context[name] === 'function') return context[name];
+    return vm.runInContext(name, context);
+}
+
+// Ejecuta código en el contexto con el límite de tiempo real del test
+const __callScript = new vm.Script('__judgeCall()');
+function __runWithTimeout(context, fn, wallTimeLimit) {
+    const options = wallTimeLimit > 0 ? { timeout: Math.ceil(wallTimeLimit * 1000) } : {};
+    context.__judgeCall = fn;
+    try {
+        return __callScript.runInContext(context, options);
+    } catch (error) {
+        if (error && error.code === 'ERR_SCRIPT_EXECUTION_TIMEOUT') {
+            throw __timeLimitError();
+        }
+        throw error;
+    } finally {
+        delete context.__judgeCall;
+    }
+}
+
+function __timeLimitError() {
+    const error = new Error(TIME_LIMIT_MESSAGE);
+    error.name = 'TimeLimitExceeded';
+    return error;
+}
+
+/**
+ * FUNCIÓN PRINCIPAL DE TESTING
+ * Opciones: judgeDir (directorio con solution.js y tests.jsonl), out/err
+ * (descriptores de salida), cachedData (caché de código de la solución) y
+ * onCachedData (recibe la caché generada si no había una válida)
+ * Retorna el código de salida
+ */
+function run(options = {}) {
+    const judgeDir = options.judgeDir || __dirname;
+    const out = options.out ?? 1;
+    const err = options.err ?? 2;
+    const failFast = process.env.JUDGE_FAIL_FAST === '1';
+    const timeLimit = Number(process.env.JUDGE_TIME_LIMIT) || 0;
+    const wallTimeLimit = Number(process.env.JUDGE_WALL_TIME_LIMIT) || 0;
+
+    // CÓDIGO DEL USUARIO (en el contexto global nuevo, como un script)
+    const solution = new vm.Script(fs.readFileSync(path.join(judgeDir, 'solution.js'), 'utf8'), {
+        filename: 'solution.js',
+        cachedData: options.cachedData
+    });
+    const context = __createContext(out, err);
+    solution.runInContext(context);
+
+    // Los argumentos se crean en el contexto de la solución (instanceof Array)
+    const parseInContext = vm.runInContext('JSON.parse', context);
+
     let totalTime = 0;
-    
-    for (let i = 0; i < tests.length; i++) {
-        const test = tests[i];
-        const testInput = test.input || '';
-        const expectedOutput = test.expected || '';
-        const testName = test.name || `Test ${i + 1}`;
-        
+    let passedCount = 0;
+    let i = 0;
+
+    for (const test of __iterTests(path.join(judgeDir, 'tests.jsonl'))) {
+        i++;
+        const testName = test.name || `Test ${i}`;
+        const startTime = process.hrtime.bigint();
+        const startCpu = process.cpuUsage();
+        let record;
+
         try {
-            // Medir tiempo
-            const startTime = process.hrtime.bigint();
-            
             let actualOutput = '';
-            
+
             if (test.function_call) {
                 // Si el test especifica una función a llamar
                 const funcName = test.function_call.name;
-                const funcArgs = test.function_call.args || [];
-                
+                const funcArgs = parseInContext(JSON.stringify(test.function_call.args || []));
+
                 // Llamar a la función del usuario
-                const result = global[funcName](...funcArgs);
+                const func = __resolveFunction(context, funcName);
+                const result = __runWithTimeout(context, () => func(...funcArgs), wallTimeLimit);
                 actualOutput = String(result).trim();
-                
+
             } else if (test.code) {
                 // Si hay código específico para ejecutar
-                actualOutput = String(eval(test.code)).trim();
+                const result = __runWithTimeout(context, () => vm.runInContext(test.code, context), wallTimeLimit);
+                actualOutput = String(result).trim();
             } else {
-                // Ejecutar con input simulado
-                actualOutput = expectedOutput; // Placeholder
+                throw new Error('El test no define function_call ni code');
             }
-            
-            const endTime = process.hrtime.bigint();
-            const elapsedTime = Number(endTime - startTime) / 1_000_000_000;
+
+            const elapsedTime = Number(process.hrtime.bigint() - startTime) / 1_000_000_000;
             totalTime += elapsedTime;
-            
-            // Comparar salidas
-            const expectedClean = String(expectedOutput).trim();
-            const passed = actualOutput === expectedClean;
-            
-            results.push({
+
+            // La salida se compara en el host (checkers del juez), salvo
+            // que el test traiga la salida esperada
+            record = {
                 name: testName,
-                passed: passed,
+                passed: true,
                 time: elapsedTime,
-                expected: expectedClean,
                 actual: actualOutput
-            });
-            
+            };
+            if (test.expected != null) {
+                record.expected = String(test.expected).trim();
+                record.passed = actualOutput === record.expected;
+            }
+
         } catch (error) {
-            const endTime = process.hrtime.bigint();
-            const elapsedTime = Number(endTime - (startTime || 0n)) / 1_000_000_000;
+            const elapsedTime = Number(process.hrtime.bigint() - startTime) / 1_000_000_000;
             totalTime += elapsedTime;
-            
-            results.push({
+
+            record = {
                 name: testName,
                 passed: false,
                 time: elapsedTime,
-                error: error.message,
-                error_type: error.name
-            });
+                error: error && error.message,
+                error_type: error && error.name
+            };
+        }
+
+        const cpu = process.cpuUsage(startCpu);
+        record.cpu_time = (cpu.user + cpu.system) / 1_000_000;
+        record.memory_kb = process.resourceUsage().maxRSS;
+
+        // Límite de CPU: el test terminó, pero consumió más de lo permitido
+        if (timeLimit > 0 && record.cpu_time > timeLimit && record.error_type !== 'TimeLimitExceeded') {
+            record.passed = false;
+            record.error = TIME_LIMIT_MESSAGE;
+            record.error_type = 'TimeLimitExceeded';
+        }
+
+        // Reportar el test apenas termina (escritura síncrona)
+        fs.writeSync(out, RECORD_PREFIX + JSON.stringify(record) + '\n');
+        if (record.passed) {
+            passedCount++;
+        } else if (failFast) {
+            break;
         }
     }
-    
-    // Imprimir resultados en JSON
+
+    // Imprimir resumen en JSON
     const finalResult = {
-        tests: results,
         total_time: totalTime,
-        passed: results.filter(r => r.passed).length,
-        total: results.length
+        passed: passedCount,
+        total: i
     };
-    
-    console.log(JSON.stringify(finalResult));
+    fs.writeSync(out, JSON.stringify(finalResult) + '\n');
+
+    // Caché de código para la próxima ejecución de la misma solución
+    // (después de correr los tests incluye las funciones ya compiladas)
+    if (options.onCachedData && (!options.cachedData || solution.cachedDataRejected)) {
+        options.onCachedData(solution.createCachedData());
+    }
+    return 0;
 }
 
-// Ejecutar tests
-__runTests();
+module.exports = { run };
+
+// Ejecutar tests (los timers de la solución no mantienen vivo el proceso)
+if (require.main === module) {
+    process.exit(run());
+}
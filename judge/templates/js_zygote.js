@@ -0,0 +1,305 @@
+/*
+ * Zygote de JavaScript para los contenedores del pool
+ * Proceso principal (PID 1) de los contenedores de JavaScript. Node no puede
+ * hacer fork, así que mantiene un proceso de ejecución precalentado: ya
+ * arrancó el runtime y cargó el harness (js.js, montado en /judge) y espera
+ * un pedido. Cada ejecución toma ese proceso, que corre la solución en un
+ * contexto de vm nuevo y termina; el siguiente se lanza recién entonces,
+ * para no competir por la CPU con la ejecución medida. Ninguna submission
+ * comparte proceso con otra.
+ *
+ * Caché de código: el zygote guarda la caché de V8 de cada solución por hash
+ * del fuente; una solución ya vista (reenvío, re-evaluación) no se vuelve a
+ * compilar.
+ *
+ * Protocolo (el mismo que el zygote de Python, ver python_zygote.py): el
+ * cliente crea los FIFOs <RUN_DIR>/<id>.out y <id>.err, los lee y escribe
+ * una línea JSON en <RUN_DIR>/ctl:
+ *     {"id": "...", "env": {...}, "timeout": 7.0}
+ * El proceso de ejecución escribe su salida en los FIFOs; al terminar el
+ * zygote deja el código de salida en <RUN_DIR>/<id>.code (128 + señal si
+ * murió por una señal).
+ *
+ * Aislamiento del proceso de ejecución: sesión propia, límites de tamaño de
+ * archivos y sin core dumps; abre los FIFOs como root y luego pasa al
+ * usuario sin privilegios. El reseteo del pool (`kill -9 -1`) no alcanza al
+ * PID 1; si mata al proceso precalentado se lanza otro. Al terminar cada
+ * ejecución se matan todos los procesos del usuario sin privilegios, no solo
+ * el grupo de la ejecución: uno que abrió otra sesión con setsid retendría
+ * los FIFOs del cliente.
+ */
+'use strict';
+const childProcess = require('child_process');
+const crypto = require('crypto');
+const fs = require('fs');
+const net = require('net');
+const os = require('os');
+const path = require('path');
+const readline = require('readline');
+
+const RUN_DIR = process.env.JUDGE_ZYGOTE_RUN_DIR || '/run/judge';
+const CONTROL_PATH = path.join(RUN_DIR, 'ctl');
+const CODE_DIR = process.env.JUDGE_ZYGOTE_CODE_DIR || '/code';
+const HARNESS_PATH = path.join(CODE_DIR, '__judge__.js');
+const SOLUTION_PATH = path.join(CODE_DIR, 'solution.js');
+const TEMPLATE_PATH = path.join(__dirname, 'js.js');
+
+// Usuario sin privilegios con el que corre la solución (nobody)
+const UNPRIVILEGED_ID = 65534;
+
+// Límites del proceso de ejecución: archivos de hasta 64 MB (en bloques de
+// 512 bytes) y sin core dumps
+const LIMITS = 'ulimit -f 131072 -c 0 2>/dev/null; exec "$0" "$@"';
+
+// Soluciones con caché de código guardada (las más recientes)
+const MAX_CACHED = 128;
+
+// Espera mínima entre lanzamientos seguidos del proceso precalentado (ms)
+const RESPAWN_DELAY = 50;
+
+// Pasadas sobre /proc al matar los procesos sin privilegios (los que se
+// crearon mientras se recorría)
+const KILL_ROUNDS = 5;
+
+// PROCESO DE EJECUCIÓN
+
+function worker() {
+    // Runtime y harness cargados antes de recibir el pedido
+    const harness = require(TEMPLATE_PATH);
+    const templateSource = fs.readFileSync(TEMPLATE_PATH);
+
+    process.once('message', (request) => {
+        let code = 1;
+        let err = 2;
+        let cachedData = null;
+        try {
+            const base = path.join(RUN_DIR, request.id);
+            const out = fs.openSync(base + '.out', 'w');
+            err = fs.openSync(base + '.err', 'w');
+            if (process.getuid() === 0) {
+                process.setgroups([]);
+                process.setgid(UNPRIVILEGED_ID);
+                process.setuid(UNPRIVILEGED_ID);
+            }
+            Object.assign(process.env, request.env || {});
+
+            // Si el harness de /code no es la plantilla precargada, se usa ese
+            const run = fs.readFileSync(HARNESS_PATH).equals(templateSource)
+                ? harness.run
+                : require(HARNESS_PATH).run;
+            code = run({
+                judgeDir: CODE_DIR,
+                out,
+                err,
+                cachedData: request.cachedData || undefined,
+                onCachedData: (data) => { cachedData = data; }
+            });
+        } catch (error) {
+            try {
+                fs.writeSync(err, `${error && error.stack || error}\n`);
+            } catch (writeError) {
+                // Sin FIFO de errores: solo queda el código de salida
+            }
+            code = 1;
+        }
+
+        if (cachedData && request.hash) {
+            process.send({ hash: request.hash, cachedData }, () => process.exit(code));
+        } else {
+            process.exit(code);
+        }
+    });
+}
+
+// ZYGOTE
+
+let spare = null;
+let lastSpawn = 0;
+let respawnTimer = null;
+const codeCache = new Map();
+
+function spawnWorker() {
+    lastSpawn = Date.now();
+    return childProcess.spawn('sh', ['-c', LIMITS, process.execPath, __filename, 'worker'], {
+        cwd: CODE_DIR,
+        env: process.env,
+        detached: true,  // Sesión propia: se mata el grupo completo
+        stdio: ['ignore', 'inherit', 'inherit', 'ipc'],
+        serialization: 'advanced'
+    });
+}
+
+function ensureSpare() {
+    if (spare !== null || respawnTimer !== null) return;
+    const delay = Math.max(0, lastSpawn + RESPAWN_DELAY - Date.now());
+    respawnTimer = setTimeout(() => {
+        respawnTimer = null;
+        const child = spawnWorker();
+        spare = child;
+        child.on('error', () => {});
+        child.on('exit', () => {
+            // Muerto antes de recibir un pedido (p. ej. el reseteo del pool)
+            if (spare === child) {
+                spare = null;
+                ensureSpare();
+            }
+        });
+    }, delay);
+}
+
+function takeWorker() {
+    const child = spare || spawnWorker();
+    spare = null;
+    child.removeAllListeners('exit');
+    child.removeAllListeners('error');
+    return child;
+}
+
+function killGroup(child) {
+    try {
+        process.kill(-child.pid, 'SIGKILL');
+    } catch (error) {
+        // El grupo ya no existe
+    }
+}
+
+// Procesos vivos (no zombies) del usuario sin privilegios
+function unprivilegedPids() {
+    const pids = [];
+    for (const name of fs.readdirSync('/proc')) {
+        if (!/^\d+$/.test(name)) continue;
+        let status;
+        try {
+            status = fs.readFileSync(`/proc/${name}/status`, 'utf8');
+        } catch (error) {
+            continue;
+        }
+        const state = /^State:\s+(\S)/m.exec(status);
+        const uid = /^Uid:\s+(\d+)/m.exec(status);
+        if (uid && Number(uid[1]) === UNPRIVILEGED_ID && !(state && state[1] === 'Z')) {
+            pids.push(Number(name));
+        }
+    }
+    return pids;
+}
+
+// Mata los procesos del usuario sin privilegios que queden en el contenedor.
+// Fuera de un contenedor (el zygote no es PID 1) no toca el resto del sistema
+function killUnprivileged() {
+    if (process.getuid() !== 0 || process.pid !== 1) return;
+    for (let round = 0; round < KILL_ROUNDS; round++) {
+        const pids = unprivilegedPids();
+        if (pids.length === 0) return;
+        for (const pid of pids) {
+            try {
+                process.kill(pid, 'SIGKILL');
+            } catch (error) {
+                // Ya terminó
+            }
+        }
+    }
+}
+
+function writeExitCode(id, code) {
+    // rename: el cliente nunca lee el archivo a medias
+    const file = path.join(RUN_DIR, id + '.code');
+    fs.writeFileSync(file + '.tmp', String(code));
+    fs.renameSync(file + '.tmp', file);
+}
+
+// Desbloquea los FIFOs del cliente cuando no se pudo ejecutar
+function releaseClient(id, message) {
+    for (const [suffix, data] of [['.out', ''], ['.err', message]]) {
+        try {
+            const fd = fs.openSync(path.join(RUN_DIR, id + suffix), fs.constants.O_WRONLY | fs.constants.O_NONBLOCK);
+            fs.writeSync(fd, data);
+            fs.closeSync(fd);
+        } catch (error) {
+            // El cliente ya no espera
+        }
+    }
+}
+
+function solutionHash() {
+    try {
+        return crypto.createHash('sha256').update(fs.readFileSync(SOLUTION_PATH)).digest('hex');
+    } catch (error) {
+        return null;
+    }
+}
+
+function rememberCache(hash, data) {
+    codeCache.delete(hash);
+    codeCache.set(hash, data);
+    if (codeCache.size > MAX_CACHED) {
+        codeCache.delete(codeCache.keys().next().value);
+    }
+}
+
+function handle(line) {
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (error) {
+        return;
+    }
+    const id = path.basename(String(request.id || ''));
+    if (!id || id.startsWith('.')) return;
+
+    const hash = solutionHash();
+    const cachedData = hash && codeCache.get(hash);
+    if (cachedData) rememberCache(hash, cachedData);
+
+    const child = takeWorker();
+    const timeout = Number(request.timeout) || 10;
+    let finished = false;
+    const finish = (code) => {
+        if (finished) return;
+        finished = true;
+        clearTimeout(timer);
+        // Procesos que la ejecución haya dejado en su sesión o fuera de ella
+        killGroup(child);
+        killUnprivileged();
+        writeExitCode(id, code);
+        ensureSpare();
+    };
+    const timer = setTimeout(() => {
+        killGroup(child);
+        killUnprivileged();
+    }, timeout * 1000);
+
+    child.on('message', (message) => {
+        if (message && message.hash === hash && message.cachedData) {
+            rememberCache(hash, Buffer.from(message.cachedData));
+        }
+    });
+    child.on('error', (error) => {
+        releaseClient(id, `Error del zygote: ${error.message}\n`);
+        finish(125);
+    });
+    child.on('exit', (code, signal) => {
+        finish(signal ? 128 + os.constants.signals[signal] : code);
+    });
+    child.send({ id, env: request.env || {}, hash, cachedData: cachedData || null });
+}
+
+function serve() {
+    fs.mkdirSync(RUN_DIR, { recursive: true, mode: 0o700 });
+    if (!fs.existsSync(CONTROL_PATH)) {
+        childProcess.execFileSync('mkfifo', ['-m', '600', CONTROL_PATH]);
+    }
+    // Abierto también para escritura: el FIFO nunca llega a EOF
+    const control = new net.Socket({ fd: fs.openSync(CONTROL_PATH, fs.constants.O_RDWR), readable: true });
+    readline.createInterface({ input: control }).on('line', (line) => {
+        if (line.trim()) handle(line);
+    });
+    // PID 1 no tiene handlers por defecto: terminar limpio con docker stop
+    process.on('SIGTERM', () => process.exit(0));
+    ensureSpare();
+}
+
+if (process.argv[2] === 'worker') {
+    worker();
+} else {
+    serve();
+}
@@ -1,90 +1,200 @@
 """
 Plantilla de ejecución para Python
-Combina el código del usuario con los tests ocultos
+Harness estático: carga la solución desde solution.py y lee los tests ocultos
+de a uno desde tests.jsonl (un JSON por línea)
+Emite una línea `__JUDGE__ {...}` por test a medida que se ejecutan (con la
+salida obtenida, tiempo de CPU y pico de memoria RSS del proceso) y un resumen
+JSON al final. Las salidas esperadas no llegan al sandbox: el juez las compara
+en el host. Con JUDGE_FAIL_FAST=1 se detiene en el primer error
 """
 import sys
+import io
+import os
 import json
+import resource
+import signal
 import time
 
-# CÓDIGO DEL USUARIO
-{user_code}
+JUDGE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOLUTION_PATH = os.path.join(JUDGE_DIR, 'solution.py')
+TESTS_PATH = os.path.join(JUDGE_DIR, 'tests.jsonl')
+RECORD_PREFIX = '__JUDGE__ '
+FAIL_FAST = os.environ.get('JUDGE_FAIL_FAST') == '1'
+TIME_LIMIT = float(os.environ.get('JUDGE_TIME_LIMIT') or 0)
+WALL_TIME_LIMIT = float(os.environ.get('JUDGE_WALL_TIME_LIMIT') or 0)
+
+# Mientras el código del usuario no suelte el control, el timer se repite
+WATCHDOG_INTERVAL = 0.05
+
+
+class TimeLimitExceeded(BaseException):
+    """
+    Se lanza dentro del código del usuario al vencer el límite del test
+    (hereda de BaseException para que `except Exception` no la atrape)
+    """
+
+
+__watchdog_armed = False
+
+
+def __on_time_limit(signum, frame):
+    if __watchdog_armed:
+        raise TimeLimitExceeded('Tiempo límite excedido')
+
+
+def __arm_watchdog():
+    """Inicia los timers de CPU y tiempo real del test"""
+    global __watchdog_armed
+    __watchdog_armed = True
+    if TIME_LIMIT > 0:
+        signal.setitimer(signal.ITIMER_PROF, TIME_LIMIT, WATCHDOG_INTERVAL)
+    if WALL_TIME_LIMIT > 0:
+        signal.setitimer(signal.ITIMER_REAL, WALL_TIME_LIMIT, WATCHDOG_INTERVAL)
+
+
+def __disarm_watchdog():
+    global __watchdog_armed
+    __watchdog_armed = False
+    signal.setitimer(signal.ITIMER_PROF, 0)
+    signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def __load_solution():
+    """
+    Ejecuta el código del usuario y retorna su espacio de nombres (lo que
+    imprima al cargarse va a stderr: stdout es el canal de los registros)
+    """
+    with open(SOLUTION_PATH, 'r', encoding='utf-8') as f:
+        source = f.read()
+    namespace = {'__name__': '__main__', '__file__': SOLUTION_PATH}
+    sys.stdout = sys.stderr
+    try:
+        exec(compile(source, 'solution.py', 'exec'), namespace)
+    finally:
+        sys.stdout = sys.__stdout__
+    return namespace
+
+
+def __peak_rss_kb():
+    """Pico de memoria residente del proceso (KB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def __iter_tests():
+    """Lee los tests de a uno, sin cargar el archivo completo"""
+    with open(TESTS_PATH, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
 
 # FUNCIÓN PRINCIPAL DE TESTING
 def __run_tests():
     """Ejecuta los tests ocultos y retorna resultados"""
-    tests = {tests_json}
-    results = []
+    solution = __load_solution()
+    signal.signal(signal.SIGPROF, __on_time_limit)
+    signal.signal(signal.SIGALRM, __on_time_limit)
     total_time = 0
-    
-    for i, test in enumerate(tests):
+    passed_count = 0
+    total = 0
+
+    for i, test in enumerate(__iter_tests()):
+        total += 1
         test_input = test.get('input', '')
-        expected_output = test.get('expected', '')
         test_name = test.get('name', f'Test {i+1}')
-        
+        start_time = time.time()
+        start_cpu = time.process_time()
+
         try:
             # Preparar entrada
             if test_input:
-                sys.stdin = __import__('io').StringIO(test_input)
-            
+                sys.stdin = io.StringIO(test_input)
+
             # Capturar salida
-            import io
             captured_output = io.StringIO()
             sys.stdout = captured_output
-            
+
             # Medir tiempo
             start_time = time.time()
-            
-            # Ejecutar función del usuario
-            if 'function_call' in test:
-                # Si el test especifica una función a llamar
-                func_name = test['function_call']['name']
-                func_args = test['function_call'].get('args', [])
-                func_kwargs = test['function_call'].get('kwargs', {})
-                
-                result = globals()[func_name](*func_args, **func_kwargs)
-                actual_output = str(result).strip()
-            else:
-                # Si se espera que el código imprima directamente
-                exec(test.get('code', ''), globals())
-                actual_output = captured_output.getvalue().strip()
-            
+            start_cpu = time.process_time()
+
+            # Ejecutar función del usuario (bajo el watchdog del test)
+            __arm_watchdog()
+            try:
+                if 'function_call' in test:
+                    # Si el test especifica una función a llamar
+                    func_name = test['function_call']['name']
+                    func_args = test['function_call'].get('args', [])
+                    func_kwargs = test['function_call'].get('kwargs', {})
+
+                    result = solution[func_name](*func_args, **func_kwargs)
+                    actual_output = str(result).strip()
+                else:
+                    # Si se espera que el código imprima directamente
+                    exec(test.get('code', ''), solution)
+                    actual_output = captured_output.getvalue().strip()
+            finally:
+                __disarm_watchdog()
+
             elapsed_time = time.time() - start_time
             total_time += elapsed_time
-            
-            # Restaurar stdout
-            sys.stdout = sys.__stdout__
-            
-            # Comparar salidas
-            expected_clean = str(expected_output).strip()
-            passed = actual_output == expected_clean
-            
-            results.append({
+
+            # La salida se compara en el host (checkers del juez), salvo
+            # que el test traiga la salida esperada
+            record = {
                 'name': test_name,
-                'passed': passed,
+                'passed': True,
                 'time': elapsed_time,
-                'expected': expected_clean,
                 'actual': actual_output
-            })
-            
+            }
+            if test.get('expected') is not None:
+                record['expected'] = str(test['expected']).strip()
+                record['passed'] = actual_output == record['expected']
+
+        except TimeLimitExceeded as e:
+            elapsed_time = time.time() - start_time
+            total_time += elapsed_time
+
+            record = {
+                'name': test_name,
+                'passed': False,
+                'time': elapsed_time,
+                'error': str(e),
+                'error_type': 'TimeLimitExceeded'
+            }
+
         except Exception as e:
             elapsed_time = time.time() - start_time
             total_time += elapsed_time
-            sys.stdout = sys.__stdout__
-            
-            results.append({
+
+            record = {
                 'name': test_name,
                 'passed': False,
                 'time': elapsed_time,
                 'error': str(e),
                 'error_type': type(e).__name__
-            })
-    
-    # Imprimir resultados en JSON
+            }
+
+        finally:
+            # Restaurar stdin/stdout
+            sys.stdout = sys.__stdout__
+            sys.stdin = sys.__stdin__
+
+        record['cpu_time'] = time.process_time() - start_cpu
+        record['memory_kb'] = __peak_rss_kb()
+
+        # Reportar el test apenas termina
+        print(RECORD_PREFIX + json.dumps(record), flush=True)
+        if record['passed']:
+            passed_count += 1
+        elif FAIL_FAST:
+            break
+
+    # Imprimir resumen en JSON
     print(json.dumps({
-        'tests': results,
         'total_time': total_time,
-        'passed': sum(1 for r in results if r['passed']),
-        'total': len(results)
+        'passed': passed_count,
+        'total': total
     }))
 
 if __name__ == '__main__':
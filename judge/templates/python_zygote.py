@@ -0,0 +1,302 @@
+"""
+Zygote de Python para los contenedores del pool
+Proceso principal (PID 1) de los contenedores de Python: importa una sola vez
+los módulos que usa el harness y precompila el harness (python.py, montado en
+/judge). Por cada ejecución hace fork de un hijo que corre el harness de
+/code con globals nuevos, por lo que una submission no paga el arranque del
+intérprete ni las importaciones.
+
+Protocolo: el cliente (un `sh` lanzado con `docker exec`) crea los FIFOs
+<RUN_DIR>/<id>.out y <id>.err, los lee y escribe una línea JSON en
+<RUN_DIR>/ctl:
+    {"id": "...", "env": {...}, "timeout": 7.0}
+El hijo escribe su stdout/stderr en los FIFOs; al terminar el zygote deja el
+código de salida en <RUN_DIR>/<id>.code (128 + señal si murió por una señal).
+
+Aislamiento del hijo: sesión propia, rlimits (CPU, tamaño de archivos, sin
+core dumps) y, si el zygote corre como root, usuario sin privilegios (no
+puede escribir en RUN_DIR, ni modificar ni depurar al zygote). PID 1 no
+recibe el SIGKILL del reseteo del pool (`kill -9 -1`), que sí mata al hijo.
+Al terminar cada ejecución se matan todos los procesos del usuario sin
+privilegios, no solo el grupo del hijo: un nieto que abrió otra sesión con
+setsid retendría los FIFOs del cliente.
+"""
+import builtins
+import io
+import json
+import os
+import random
+import resource
+import runpy
+import select
+import signal
+import sys
+import time
+import traceback
+
+# Módulos frecuentes en las soluciones: quedan importados en cada hijo
+import bisect
+import collections
+import functools
+import heapq
+import itertools
+import math
+import re
+import string
+
+RUN_DIR = os.environ.get('JUDGE_ZYGOTE_RUN_DIR', '/run/judge')
+CONTROL_PATH = os.path.join(RUN_DIR, 'ctl')
+CODE_DIR = os.environ.get('JUDGE_ZYGOTE_CODE_DIR', '/code')
+HARNESS_PATH = os.path.join(CODE_DIR, '__judge__.py')
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python.py')
+
+# Usuario sin privilegios con el que corre el hijo (nobody)
+UNPRIVILEGED_ID = 65534
+
+# Tamaño máximo de archivos que puede escribir la solución (bytes)
+MAX_FILE_SIZE = 64 * 1024 * 1024
+
+# Pasadas sobre /proc al matar los procesos sin privilegios (los que se
+# crearon mientras se recorría)
+KILL_ROUNDS = 5
+
+# Entorno de la imagen: base del entorno de cada hijo
+BASE_ENV = dict(os.environ)
+
+
+def load_template():
+    """Fuente y código precompilado del harness estático"""
+    try:
+        with open(TEMPLATE_PATH, 'rb') as f:
+            source = f.read()
+    except OSError:
+        return None, None
+    return source, compile(source, HARNESS_PATH, 'exec')
+
+
+TEMPLATE_SOURCE, TEMPLATE_CODE = load_template()
+
+
+def run_child(request):
+    """Prepara el proceso hijo y ejecuta el harness (no retorna)"""
+    code = 1
+    try:
+        os.setsid()
+        base = os.path.join(RUN_DIR, request['id'])
+        stdin = os.open(os.devnull, os.O_RDONLY)
+        stdout = os.open(base + '.out', os.O_WRONLY)
+        stderr = os.open(base + '.err', os.O_WRONLY)
+        for fd, target in ((stdin, 0), (stdout, 1), (stderr, 2)):
+            os.dup2(fd, target)
+            os.close(fd)
+
+        cpu_seconds = int(request.get('timeout', 10)) + 1
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (MAX_FILE_SIZE, MAX_FILE_SIZE))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        if os.getuid() == 0:
+            os.setgroups([])
+            os.setgid(UNPRIVILEGED_ID)
+            os.setuid(UNPRIVILEGED_ID)
+
+        os.chdir(CODE_DIR)
+        os.environ.clear()
+        os.environ.update(BASE_ENV)
+        os.environ.update(request.get('env', {}))
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        random.seed()
+        sys.argv = [HARNESS_PATH]
+        sys.path[0] = CODE_DIR
+
+        code = run_harness()
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def run_harness():
+    """Ejecuta el harness con globals nuevos (precompilado si no cambió)"""
+    with open(HARNESS_PATH, 'rb') as f:
+        source = f.read()
+    if source != TEMPLATE_SOURCE:
+        runpy.run_path(HARNESS_PATH, run_name='__main__')
+        return 0
+    namespace = {
+        '__name__': '__main__',
+        '__file__': HARNESS_PATH,
+        '__builtins__': builtins,
+    }
+    exec(TEMPLATE_CODE, namespace)
+    return 0
+
+
+def wait_child(pid, timeout):
+    """Espera al hijo hasta `timeout` segundos; retorna su código de salida"""
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        pidfd = None
+
+    if pidfd is not None:
+        ready, _, _ = select.select([pidfd], [], [], timeout)
+        os.close(pidfd)
+        if not ready:
+            kill_group(pid)
+        _, status = os.waitpid(pid, 0)
+    else:
+        deadline = time.monotonic() + timeout
+        while True:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            if time.monotonic() >= deadline:
+                kill_group(pid)
+                _, status = os.waitpid(pid, 0)
+                break
+            time.sleep(0.005)
+
+    # Procesos que el hijo haya dejado en su sesión o fuera de ella
+    kill_group(pid)
+    kill_unprivileged()
+    code = os.waitstatus_to_exitcode(status)
+    return 128 - code if code < 0 else code
+
+
+def kill_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def kill_unprivileged():
+    """
+    Mata los procesos del usuario sin privilegios que queden en el
+    contenedor y recoge los huérfanos (PID 1 los hereda). Fuera de un
+    contenedor (el zygote no es PID 1) no toca el resto del sistema
+    """
+    if os.getuid() != 0 or os.getpid() != 1:
+        return
+    for _ in range(KILL_ROUNDS):
+        pids = unprivileged_pids()
+        if not pids:
+            break
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        reap_orphans()
+    reap_orphans()
+
+
+def unprivileged_pids():
+    """Procesos vivos (no zombies) del usuario sin privilegios"""
+    pids = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        state = uid = None
+        try:
+            with open(f'/proc/{name}/status', 'rb') as f:
+                for line in f:
+                    if line.startswith(b'State:'):
+                        state = line.split()[1]
+                    elif line.startswith(b'Uid:'):
+                        uid = int(line.split()[1])
+                        break
+        except (OSError, ValueError, IndexError):
+            continue
+        if uid == UNPRIVILEGED_ID and state != b'Z':
+            pids.append(int(name))
+    return pids
+
+
+def reap_orphans():
+    """Recoge los hijos que ya terminaron sin bloquear"""
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+
+
+def write_exit_code(request_id, code):
+    """Publica el código de salida (rename: el cliente nunca lo lee a medias)"""
+    path = os.path.join(RUN_DIR, request_id + '.code')
+    with open(path + '.tmp', 'w') as f:
+        f.write(str(code))
+    os.rename(path + '.tmp', path)
+
+
+def release_client(request_id, message):
+    """Desbloquea los FIFOs del cliente cuando no se pudo crear el hijo"""
+    base = os.path.join(RUN_DIR, request_id)
+    for suffix, data in (('.out', b''), ('.err', message.encode('utf-8'))):
+        try:
+            fd = os.open(base + suffix, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError:
+            continue
+        try:
+            os.write(fd, data)
+        except OSError:
+            pass
+        os.close(fd)
+
+
+def handle(line):
+    try:
+        request = json.loads(line)
+        request_id = os.path.basename(str(request['id']))
+    except (ValueError, KeyError, TypeError):
+        return
+    request['id'] = request_id
+
+    try:
+        pid = os.fork()
+    except OSError as e:
+        release_client(request_id, f'Error del zygote: {e}\n')
+        write_exit_code(request_id, 125)
+        return
+
+    if pid == 0:
+        run_child(request)
+
+    code = wait_child(pid, float(request.get('timeout', 10)))
+    write_exit_code(request_id, code)
+
+
+def serve():
+    os.makedirs(RUN_DIR, mode=0o700, exist_ok=True)
+    if not os.path.exists(CONTROL_PATH):
+        os.mkfifo(CONTROL_PATH, 0o600)
+    # Abierto también para escritura: el FIFO nunca llega a EOF
+    control = io.open(os.open(CONTROL_PATH, os.O_RDWR), 'rb', buffering=0)
+    # PID 1 no tiene handlers por defecto: terminar limpio con docker stop
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+
+    buffer = b''
+    while True:
+        chunk = control.read(4096)
+        if not chunk:
+            continue
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if line.strip():
+                handle(line)
+
+
+if __name__ == '__main__':
+    serve()
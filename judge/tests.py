@@ -1,3 +1,1983 @@
-from django.test import TestCase
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from capitol.models import Personaje, TributoInfo
+from arena.models import CasoDePrueba, Torneo, Reto
+from challenges.models import Challenge, TestCase as ChallengeTestCase
+from .models import PaqueteTests, Submission
+from .container_pool import TEMPLATES_DIR, ContainerPool, PooledContainer
+from .container_reaper import (
+    LABEL, PID_LABEL, ContainerReaper, container_labels, is_orphan
+)
+from .docker_executor import DockerExecutor
+from .executors import OutputStream, RECORD_PREFIX, STATS_PREFIX, get_code_dir
+from .java_cache import CDS_MOUNT, JavaCompileCache
+from .local_executor import LocalExecutor
+from .simulated_executor import SimulatedExecutor
+from .benchmark import KINDS, BenchmarkExecutor, generate_submissions, run_benchmark
+from .timing import StageTimer, percentile, segments, summarize, summarize_timelines, timeline
+from .runner import JudgeRunner
+from .admission import SandboxSlots, check_rate_limit
+from .checkers import (
+    ERROR_CHECKER, ERROR_SIN_SALIDA, CheckerError, check_record, checker_spec, expected_source,
+    get_checker
+)
+from .daemon import JudgeDaemon, send_command
+from .worker import (
+    claim_next, claim_submission, judge_submission, rejudge_submissions, release_stale_claims
+)
+from . import bundle_store, data_cache, metrics, scheduler, verdict_cache
+
+
+TESTS_SUMA = [
+    {"name": "Test 1", "function_call": {"name": "suma", "args": [2, 3]}, "expected": "5"},
+    {"name": "Test 2", "function_call": {"name": "suma", "args": [10, 20]}, "expected": "30"},
+]
+
+
+class JudgeTestMixin:
+    """Crea un torneo, un reto con tests ocultos y un tributo"""
+
+    def setUp(self):
+        cache.clear()  # Buckets de envíos y contadores de admisión
+        now = timezone.now()
+        self.usuario = Personaje.objects.create_user(
+            username='tributo_test',
+            password='pass123',
+            rol='tributo'
+        )
+        self.tributo = TributoInfo.objects.create(
+            personaje=self.usuario,
+            credencial_generada=True
+        )
+        self.torneo = Torneo.objects.create(
+            nombre='Torneo Test',
+            edicion=1,
+            fecha_inicio=now - timedelta(hours=1),
+            fecha_fin=now + timedelta(hours=5)
+        )
+        self.reto = Reto.objects.create(
+            torneo=self.torneo,
+            titulo='Suma',
+            descripcion='Suma dos números',
+            enunciado='Suma dos números',
+            fecha_publicacion=now - timedelta(hours=1),
+            tiene_validacion_automatica=True,
+            lenguajes_permitidos='python,javascript',
+            tests_ocultos={'python': TESTS_SUMA},
+            limite_tiempo=2.0,
+            limite_memoria=128
+        )
+
+
+class SubmitSolutionViewTest(JudgeTestMixin, TestCase):
+    """Tests para el envío asíncrono de soluciones"""
+
+    def test_submit_retorna_202_y_queda_pendiente(self):
+        self.client.force_login(self.usuario)
+        with mock.patch('judge.worker.get_worker_pool') as get_pool:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('judge:submit_solution', args=[self.reto.id]),
+                    {'codigo': 'def suma(a, b):\n    return a + b', 'lenguaje': 'python'}
+                )
+
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        submission = Submission.objects.get(id=data['submission_id'])
+        self.assertEqual(submission.veredicto, 'PE')
+        get_pool.return_value.enqueue.assert_called_once_with(submission.id)
+
+    def test_status_retorna_veredicto(self):
+        submission = Submission.objects.create(
+            tributo=self.tributo, reto=self.reto, lenguaje='python',
+            codigo='x', veredicto='AC', casos_pasados=2, casos_totales=2
+        )
+        self.client.force_login(self.usuario)
+        response = self.client.get(reverse('judge:submission_status', args=[submission.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()['pendiente'])
+        self.assertEqual(response.json()['veredicto_code'], 'AC')
+        self.assertNotIn('Retry-After', response)
+
+    def test_status_pendiente_indica_cuando_reintentar(self):
+        submission = Submission.objects.create(
+            tributo=self.tributo, reto=self.reto, lenguaje='python', codigo='x', veredicto='PE'
+        )
+        self.client.force_login(self.usuario)
+        with self.settings(JUDGE_STATUS_POLL_INTERVAL=3):
+            response = self.client.get(reverse('judge:submission_status', args=[submission.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['pendiente'])
+        self.assertEqual(response.json()['reintentar_en'], 3)
+        self.assertEqual(response['Retry-After'], '3')
+
+
+class VerdictCacheTest(JudgeTestMixin, TestCase):
+    """Tests para el caché de veredictos"""
+
+    CODIGO = 'def suma(a, b):\n    return a + b'
+
+    def _evaluada(self, **kwargs):
+        huella = verdict_cache.compute_fingerprint(
+            self.CODIGO, 'python', TESTS_SUMA, self.reto.limite_tiempo, self.reto.limite_memoria,
+            checker=checker_spec(self.reto.checker, self.reto.checker_config),
+            limite_salida=self.reto.limite_salida
+        )
+        return Submission.objects.create(
+            tributo=self.tributo, reto=self.reto, lenguaje='python', codigo=self.CODIGO,
+            veredicto='AC', puntos_obtenidos=100, casos_pasados=2, casos_totales=2,
+            huella=huella, fecha_evaluacion=timezone.now(), **kwargs
+        )
+
+    def test_reenvio_identico_usa_cache(self):
+        original = self._evaluada()
+        self.client.force_login(self.usuario)
+        with mock.patch('judge.worker.get_worker_pool') as get_pool:
+            response = self.client.post(
+                reverse('judge:submit_solution', args=[self.reto.id]),
+                {'codigo': self.CODIGO + '   \r\n', 'lenguaje': 'python'}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['veredicto_code'], 'AC')
+        get_pool.return_value.enqueue.assert_not_called()
+        submission = Submission.objects.get(id=response.json()['submission_id'])
+        self.assertEqual(
+            submission.detalles_ejecucion['cache'],
+            {'hit': True, 'submission_origen': original.id}
+        )
+
+    def test_cambiar_checker_invalida_cache(self):
+        original = self._evaluada()
+        huella = verdict_cache.compute_fingerprint(
+            self.CODIGO, 'python', TESTS_SUMA, self.reto.limite_tiempo, self.reto.limite_memoria,
+            checker=checker_spec('tokens')
+        )
+        self.assertNotEqual(huella, original.huella)
+
+    def test_cambiar_limites_invalida_cache(self):
+        original = self._evaluada()
+        huella = verdict_cache.compute_fingerprint(
+            self.CODIGO, 'python', TESTS_SUMA, self.reto.limite_tiempo + 1, self.reto.limite_memoria
+        )
+        self.assertNotEqual(huella, original.huella)
+        self.assertIsNone(verdict_cache.find_cached(huella))
+
+
+class JudgeSubmissionTest(JudgeTestMixin, TestCase):
+    """Tests para la evaluación en segundo plano"""
+
+    def test_judge_submission_guarda_resultado(self):
+        submission = Submission.objects.create(
+            tributo=self.tributo, reto=self.reto, lenguaje='python',
+            codigo='def suma(a, b):\n    return a + b', casos_totales=2
+        )
+        resultado = {
+            'veredicto': 'AC', 'puntos': 100, 'casos_pasados': 2,
+            'casos_totales': 2, 'tiempo_ejecucion': 0.01, 'detalles': {'tests': []}
+        }
+        with mock.patch('judge.worker.get_runner') as get_runner:
+            get_runner.return_value.evaluate_submission.return_value = resultado
+            judge_submission(submission.id)
+
+        submission.refresh_from_db()
+        self.assertEqual(submission.veredicto, 'AC')
+        self.assertEqual(submission.puntos_obtenidos, 100)
+        self.assertIsNotNone(submission.fecha_evaluacion)
+
+
+class JudgeRunnerShardsTest(TestCase):
+    """Tests para la ejecución de tests repartidos en varios sandboxes"""
+
+    def setUp(self):
+        self.runner = JudgeRunner(executor=mock.Mock())
+
+    def _shard_result(self, tests, total_time):
+        return {
+            'success': True,
+            'veredicto': 'OK',
+            'stdout': json.dumps({
+                'total_time': total_time,
+                'passed': sum(1 for t in tests if t['passed']),
+                'total': len(tests)
+            }),
+            'stderr': '',
+            'tests': tests,
+            'total_tests': len(tests)
+        }
+
+    def test_split_tests_mantiene_orden(self):
+        tests = [{'name': str(i)} for i in range(5)]
+        chunks = self.runner._split_tests(tests, 3)
+        self.assertEqual([len(c) for c in chunks], [2, 2, 1])
+        self.assertEqual([t for c in chunks for t in c], tests)
+
+    def test_merge_suma_casos_y_tiempo(self):
+        resultados = [
+            self._shard_result([{'name': 'a', 'passed': True}, {'name': 'b', 'passed': True}], 0.5),
+            self._shard_result([{'name': 'c', 'passed': False}], 0.25),
+        ]
+        evaluation = self.runner._analyze_results(resultados, total_tests=3)
+
+        self.assertEqual(evaluation['veredicto'], 'WA')
+        self.assertEqual(evaluation['casos_pasados'], 2)
+        self.assertEqual(evaluation['tiempo_ejecucion'], 0.75)
+        self.assertEqual([t['name'] for t in evaluation['detalles']['tests']], ['a', 'b', 'c'])
+
+    def test_merge_toma_el_veredicto_mas_grave(self):
+        resultados = [
+            self._shard_result([{'name': 'a', 'passed': False}], 0.1),
+            {'success': False, 'veredicto': 'TLE', 'tiempo_ejecucion': 3.0, 'error': 'timeout'},
+        ]
+        evaluation = self.runner._analyze_results(resultados, total_tests=2)
+
+        self.assertEqual(evaluation['veredicto'], 'TLE')
+        self.assertEqual(evaluation['casos_pasados'], 0)
+
+
+class StreamingResultsTest(TestCase):
+    """Tests para los resultados por test en streaming y el modo fail-fast"""
+
+    def setUp(self):
+        self.runner = JudgeRunner(executor=mock.Mock())
+
+    def test_output_stream_separa_registros_entre_fragmentos(self):
+        recibidos = []
+        stream = OutputStream(lambda record: recibidos.append(record['name']) or False)
+        stream.feed_stdout(b'hola\n' + RECORD_PREFIX.encode() + b'{"name": "a", "pa')
+        stream.feed_stdout(b'ssed": true}\n{"total": 1}')
+        stream.close()
+
+        self.assertEqual(recibidos, ['a'])
+        self.assertEqual(stream.stdout, 'hola\n{"total": 1}')
+
+    def test_fail_fast_detiene_en_el_primer_fallo(self):
+        progreso = []
+        on_test = self.runner._make_test_listener(True, progreso.append)
+
+        self.assertFalse(on_test({'name': 'a', 'passed': True}))
+        self.assertTrue(on_test({'name': 'b', 'passed': False}))
+        self.assertEqual(progreso, [1, 2])
+
+    def test_shard_detenido_cuenta_tests_recibidos(self):
+        resultado = {
+            'success': False, 'veredicto': 'OK', 'detenido': True,
+            'stdout': '', 'stderr': '', 'total_tests': 3,
+            'tests': [{'name': 'a', 'passed': True, 'time': 0.1},
+                      {'name': 'b', 'passed': False, 'time': 0.2}],
+        }
+        evaluation = self.runner._analyze_results([resultado], total_tests=3)
+
+        self.assertEqual(evaluation['veredicto'], 'WA')
+        self.assertEqual(evaluation['casos_pasados'], 1)
+        self.assertEqual(evaluation['puntos'], 33)
+
+    def test_harness_python_emite_registros_y_corta_con_fail_fast(self):
+        tests = [
+            {'name': 'a', 'function_call': {'name': 'suma', 'args': [1, 2]}, 'expected': '3'},
+            {'name': 'b', 'function_call': {'name': 'resta', 'args': [1, 1]}, 'expected': '0'},
+            {'name': 'c', 'function_call': {'name': 'suma', 'args': [2, 2]}, 'expected': '4'},
+        ]
+        stream = run_python_harness(
+            self.runner, tests, 'def suma(a, b):\n    return a + b\n', JUDGE_FAIL_FAST='1'
+        )
+
+        self.assertEqual([t['name'] for t in stream.tests], ['a', 'b'])
+        self.assertEqual(json.loads(stream.stdout)['total'], 2)
+        self.assertIn('cpu_time', stream.tests[0])
+        self.assertGreater(stream.tests[0]['memory_kb'], 0)
+
+
+def run_python_harness(runner, tests, solution, **env):
+    """Ejecuta el harness de Python localmente y retorna su salida procesada"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = runner._get_harness_files('python', tests)
+        files['solution.py'] = solution
+        for name, content in files.items():
+            with open(os.path.join(tmpdir, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+        proc = subprocess.run(
+            [sys.executable, os.path.join(tmpdir, '__judge__.py')],
+            capture_output=True, timeout=30, env={**os.environ, **env}
+        )
+
+    # Las salidas se comparan en el host, como en JudgeRunner
+    stream = OutputStream(runner._make_checker_listener(tests, None, None))
+    stream.feed_stdout(proc.stdout)
+    stream.close()
+    return stream
+
+
+class ZygoteTestMixin:
+    """
+    Tests de los zygotes de los contenedores del pool: el zygote corre
+    localmente con directorios temporales en lugar de /run/judge y /code
+    """
+
+    LANGUAGE = None
+    ZYGOTE = None  # Plantilla del zygote
+    INTERPRETER = None
+    SOLUTION = None
+    INFINITE_LOOP = None
+    DETACHED_GRANDCHILD = None  # Deja un nieto en otra sesión con los FIFOs abiertos
+
+    def setUp(self):
+        self.run_dir = tempfile.mkdtemp()
+        self.code_dir = tempfile.mkdtemp()
+        os.chmod(self.code_dir, 0o755)
+        self.addCleanup(shutil.rmtree, self.run_dir, True)
+        self.addCleanup(shutil.rmtree, self.code_dir, True)
+        self.runner = JudgeRunner(executor=mock.Mock())
+        self.executor = DockerExecutor.__new__(DockerExecutor)
+
+    def _write_solution(self, solution):
+        files = self.runner._get_harness_files(self.LANGUAGE, TESTS_SUMA)
+        files[self.executor._get_filename(self.LANGUAGE)] = solution
+        self.executor._write_files(self.code_dir, files)
+
+    def _start_zygote(self):
+        zygote = subprocess.Popen(
+            [self.INTERPRETER, str(TEMPLATES_DIR / self.ZYGOTE)],
+            env={
+                **os.environ,
+                'JUDGE_ZYGOTE_RUN_DIR': self.run_dir,
+                'JUDGE_ZYGOTE_CODE_DIR': self.code_dir
+            }
+        )
+        self.addCleanup(zygote.wait)
+        self.addCleanup(zygote.kill)
+        deadline = time.monotonic() + 10
+        while not os.path.exists(os.path.join(self.run_dir, 'ctl')):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        return zygote
+
+    def _run(self, time_limit=5.0):
+        """Ejecuta el cliente del zygote como lo haría `docker exec`"""
+        with mock.patch('judge.docker_executor.ZYGOTE_RUN_DIR', self.run_dir):
+            command = self.executor._build_zygote_command(self.LANGUAGE, time_limit)
+        # Respaldo sin zygote: el intérprete local en lugar del de la imagen
+        command[-2:] = [self.INTERPRETER, os.path.join(self.code_dir, command[-1].rsplit('/', 1)[-1])]
+        proc = subprocess.run(command, capture_output=True, timeout=30, cwd=self.code_dir)
+        stream = OutputStream(self.runner._make_checker_listener(TESTS_SUMA, None, None))
+        stream.feed(proc.stdout, proc.stderr)
+        stream.close()
+        return proc.returncode, stream
+
+    def test_zygote_evalua_cada_ejecucion_en_un_proceso_nuevo(self):
+        zygote = self._start_zygote()
+        self._write_solution(self.SOLUTION)
+
+        for _ in range(2):
+            exit_code, stream = self._run()
+            self.assertEqual(exit_code, 0)
+            self.assertEqual([t['passed'] for t in stream.tests], [True, True])
+            self.assertEqual(len(stream.stats), 2)
+
+        self.assertIsNone(zygote.poll())
+        self.assertEqual(os.listdir(self.run_dir), ['ctl'])
+
+    def test_zygote_mata_la_ejecucion_que_excede_el_tiempo(self):
+        zygote = self._start_zygote()
+        self._write_solution(self.INFINITE_LOOP)
+
+        exit_code, stream = self._run(time_limit=0.5)
+
+        self.assertEqual(exit_code, 137)
+        self.assertEqual(stream.tests, [])
+        self.assertIsNone(zygote.poll())
+
+    def test_nieto_separado_no_retiene_la_ejecucion(self):
+        zygote = self._start_zygote()
+        self._write_solution(self.DETACHED_GRANDCHILD)
+
+        inicio = time.monotonic()
+        exit_code, stream = self._run(time_limit=0.5)
+
+        # El nieto (otra sesión) mantiene abiertos los FIFOs durante 15 s
+        self.assertLess(time.monotonic() - inicio, 10)
+        self.assertEqual(exit_code, 0)
+        self.assertEqual([t['passed'] for t in stream.tests], [True, True])
+        self.assertIsNone(zygote.poll())
+
+    def test_sin_zygote_ejecuta_el_interprete(self):
+        self._write_solution(self.SOLUTION)
+
+        exit_code, stream = self._run()
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(len(stream.tests), 2)
+
+
+class PythonZygoteTest(ZygoteTestMixin, TestCase):
+    """Tests para el zygote de Python (fork por ejecución)"""
+
+    LANGUAGE = 'python'
+    ZYGOTE = 'python_zygote.py'
+    INTERPRETER = sys.executable
+    SOLUTION = 'def suma(a, b):\n    return a + b\n'
+    INFINITE_LOOP = 'while True:\n    pass\n'
+    DETACHED_GRANDCHILD = (
+        'import os, time\n'
+        'if os.fork() == 0:\n'
+        '    os.setsid()\n'
+        '    if os.fork() == 0:\n'
+        '        time.sleep(15)\n'
+        '    os._exit(0)\n'
+        'def suma(a, b):\n'
+        '    return a + b\n'
+    )
+
+
+@skipUnless(shutil.which('node'), 'Node.js no está instalado')
+class JavaScriptZygoteTest(ZygoteTestMixin, TestCase):
+    """Tests para el zygote de JavaScript (proceso de Node precalentado)"""
+
+    LANGUAGE = 'javascript'
+    ZYGOTE = 'js_zygote.js'
+    INTERPRETER = shutil.which('node')
+    SOLUTION = 'const suma = (a, b) => a + b;\n'
+    INFINITE_LOOP = 'while (true) {}\n'
+    DETACHED_GRANDCHILD = (
+        'const fs = require("fs");\n'
+        'const fifos = [];\n'
+        'for (let fd = 3; fd < 64; fd++) {\n'
+        '    try { if (fs.fstatSync(fd).isFIFO()) fifos.push(fd); } catch (error) {}\n'
+        '}\n'
+        'require("child_process").spawn("sleep", ["15"], {\n'
+        '    detached: true, stdio: ["ignore", ...fifos]\n'
+        '}).unref();\n'
+        'const suma = (a, b) => a + b;\n'
+    )
+
+    def test_solucion_en_contexto_nuevo(self):
+        self._write_solution(
+            'function suma(a, b) {\n'
+            '    // Los argumentos son del contexto de la solución\n'
+            '    return Array.isArray([a]) && [a] instanceof Array ? a + b : NaN;\n'
+            '}\n'
+            'setInterval(() => {}, 1000);\n'
+        )
+
+        exit_code, stream = self._run()
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual([t['passed'] for t in stream.tests], [True, True])
+
+
+class JavaCompileCacheTest(TestCase):
+    """Tests para la compilación Java con el servicio de larga duración"""
+
+    HARNESS = 'class __JudgeRunner {}'
+    SOLUTION = 'public class Solution {}'
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        self.cache = JavaCompileCache(mock.Mock(), 'openjdk:17-slim', self.cache_dir, cds=False)
+        self.fallback = mock.patch.object(
+            JavaCompileCache, '_compile_in_container',
+            return_value={'veredicto': 'SE', 'stderr': 'sin servicio'}
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _serve(self, requests):
+        """Atiende pedidos como JavaCompileServer (las clases son ficticias)"""
+        service = self.cache.service
+        service._ensure_fifo()
+        control = os.fdopen(os.open(service.control, os.O_RDWR), 'rb', buffering=0)
+
+        def serve():
+            with control:
+                for _ in range(requests):
+                    job_id, filename = control.readline().decode().split()
+                    job = service.jobs / job_id
+                    source = (job / filename).read_text(encoding='utf-8')
+                    if 'error' in source:
+                        status, stderr = '1', f'{filename}:1: error: ; expected'
+                    else:
+                        (job / 'classes' / filename.replace('.java', '.class')).write_bytes(b'\xca\xfe')
+                        status, stderr = '0', ''
+                    (job / 'stderr.txt').write_text(stderr)
+                    (job / 'status').write_text(status)
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        return thread
+
+    def test_compila_con_el_servicio(self):
+        thread = self._serve(2)
+
+        build = self.cache.prepare(self.SOLUTION, self.HARNESS)
+        thread.join(5)
+
+        self.assertEqual(build['veredicto'], 'OK')
+        self.assertEqual(
+            sorted(build['files']),
+            ['harness/__JudgeRunner.class', 'solution/Solution.class']
+        )
+        self.assertEqual(build['command'][-3:], ['-cp', JavaCompileCache.CLASSPATH, '__JudgeRunner'])
+        self.fallback.assert_not_called()
+        self.assertEqual(os.listdir(self.cache.service.jobs), [])
+
+        # Un reenvío idéntico no vuelve a compilar
+        self.assertTrue(self.cache.prepare(self.SOLUTION, self.HARNESS)['cache_hit'])
+
+    def test_error_de_compilacion_se_cachea(self):
+        thread = self._serve(2)
+
+        build = self.cache.prepare('public class Solution { error }', self.HARNESS)
+        thread.join(5)
+
+        self.assertEqual(build['veredicto'], 'CE')
+        self.assertIn('error', build['stderr'])
+        again = self.cache.prepare('public class Solution { error }', self.HARNESS)
+        self.assertEqual(again['veredicto'], 'CE')
+        self.assertTrue(again['cache_hit'])
+
+    def test_fallo_compila_y_acierto_no(self):
+        thread = self._serve(2)
+        with mock.patch.object(
+            self.cache.service, 'compile', wraps=self.cache.service.compile
+        ) as compile_:
+            build = self.cache.prepare(self.SOLUTION, self.HARNESS)
+            thread.join(5)
+            self.assertFalse(build['cache_hit'])
+            self.assertEqual(compile_.call_count, 2)  # Harness y solución
+
+            again = self.cache.prepare(self.SOLUTION, self.HARNESS)
+            self.assertTrue(again['cache_hit'])
+            self.assertEqual(again['files'], build['files'])
+            self.assertEqual(compile_.call_count, 2)
+
+    def test_servicio_colgado_es_error_del_sistema(self):
+        service = self.cache.service
+        service.timeout = 0.05
+        service._ensure_fifo()
+        control = os.fdopen(os.open(service.control, os.O_RDWR), 'rb', buffering=0)
+        self.addCleanup(control.close)
+        with mock.patch.object(service, 'stop') as stop:
+            build = self.cache.prepare(self.SOLUTION, self.HARNESS)
+
+        # El pedido llegó pero nadie respondió: se descarta el servicio y no
+        # se cachea el resultado
+        self.assertEqual(build['veredicto'], 'SE')
+        self.assertIn('tiempo límite', build['stderr'])
+        stop.assert_called_once()
+        self.fallback.assert_not_called()
+        self.assertEqual(os.listdir(self.cache.root / 'harness'), [])
+
+    def test_desaloja_las_soluciones_menos_usadas(self):
+        solutions = self.cache.root / 'solutions'
+        old = time.time() - 3600
+        for name, age in (('a', 30), ('b', 20), ('c', 10)):
+            (solutions / name).mkdir()
+            (solutions / name / 'Solution.class').write_bytes(b'x' * 400)
+            os.utime(solutions / name, (old - age, old - age))
+        (solutions / 'd.ce').write_text('error' * 80)
+        os.utime(solutions / 'd.ce', (old, old))
+        (solutions / 'reciente').mkdir()
+        (solutions / 'reciente' / 'Solution.class').write_bytes(b'x' * 400)
+
+        self.cache.max_bytes = 1000
+        self.assertEqual(self.cache.evict(), 3)
+        self.assertEqual(sorted(os.listdir(solutions)), ['d.ce', 'reciente'])
+
+        # Las usadas en el último minuto no se desalojan aunque no entren
+        self.cache.max_bytes = 0
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertEqual(os.listdir(solutions), ['reciente'])
+
+    def test_sin_servicio_compila_en_un_contenedor(self):
+        build = self.cache.prepare(self.SOLUTION, self.HARNESS)
+
+        # El harness no compiló por el respaldo (simulado): error del sistema
+        self.assertEqual(build['veredicto'], 'SE')
+        self.fallback.assert_called_once()
+        self.cache.service.client.containers.run.assert_called_once()
+
+    def test_ejecuta_con_el_archivo_cds(self):
+        self.cache.cds = True
+        harness_key = self.cache._key(self.HARNESS)
+        (self.cache.root / 'cds' / harness_key).mkdir()
+        thread = self._serve(2)
+
+        build = self.cache.prepare(self.SOLUTION, self.HARNESS)
+        thread.join(5)
+
+        archive = f'{CDS_MOUNT}/{harness_key}'
+        self.assertEqual(list(build['files']), ['solution/Solution.class'])
+        self.assertIn(f'-XX:SharedArchiveFile={archive}/harness.jsa', build['command'])
+        self.assertEqual(build['classpath'], f'{archive}/harness.jar:/code/solution')
+
+
+class ContainerPoolTest(TestCase):
+    """Tests para el pool de contenedores pre-iniciados (cliente de Docker simulado)"""
+
+    def setUp(self):
+        self.code_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.code_dir, True)
+        self.client = mock.Mock()
+        self.client.containers.run.side_effect = lambda **kwargs: self._container()
+        self.pool = ContainerPool(
+            self.client, {'python': 'python:3.11-slim'}, size=1, code_dir=self.code_dir
+        )
+
+    def _container(self, exit_code=0, status='running'):
+        container = mock.Mock(status=status)
+        container.exec_run.return_value = mock.Mock(exit_code=exit_code)
+        return container
+
+    def test_acquire_y_release_reutilizan_el_contenedor(self):
+        slot = self.pool.acquire('python', 128)
+        self.assertIsNotNone(slot)
+        config = self.client.containers.run.call_args.kwargs
+        self.assertEqual(config['mem_limit'], '128m')
+        self.assertTrue(config['network_disabled'])
+        self.assertEqual(config['volumes'][slot.workdir], {'bind': '/code', 'mode': 'ro'})
+
+        with open(os.path.join(slot.workdir, 'solution.py'), 'w') as f:
+            f.write('print(1)')
+        self.pool.release(slot)
+
+        # Reseteo: se vacía el directorio de trabajo y se matan los procesos
+        self.assertEqual(os.listdir(slot.workdir), [])
+        slot.container.exec_run.assert_called_once()
+        self.assertIs(self.pool.acquire('python', 128), slot)
+        self.assertEqual(self.client.containers.run.call_count, 1)
+
+    def test_limite_de_memoria_distinto_actualiza_el_contenedor(self):
+        slot = self.pool.acquire('python', 128)
+        self.pool.release(slot)
+        self.assertIs(self.pool.acquire('python', 256), slot)
+        slot.container.update.assert_called_once_with(mem_limit='256m', memswap_limit='256m')
+
+    def test_ejecucion_anomala_descarta_el_contenedor(self):
+        slot = self.pool.acquire('python', 128)
+        self.pool.release(slot, dirty=True)
+
+        slot.container.exec_run.assert_not_called()
+        slot.container.remove.assert_called_once_with(force=True)
+        self.assertFalse(os.path.exists(slot.workdir))
+        nuevo = self.pool.acquire('python', 128)
+        self.assertIsNot(nuevo, slot)
+        self.assertEqual(self.client.containers.run.call_count, 2)
+
+    def test_reseteo_fallido_descarta_el_contenedor(self):
+        for container in (self._container(exit_code=1), self._container(status='exited')):
+            self.client.containers.run.side_effect = [container]
+            slot = self.pool.acquire('python', 128)
+            self.pool.release(slot)
+            container.remove.assert_called_once_with(force=True)
+            self.assertEqual(self.pool._total['python'], 0)
+            self.assertEqual(len(self.pool._idle['python']), 0)
+
+    def test_pool_agotado_retorna_none(self):
+        slot = self.pool.acquire('python', 128)
+        self.assertIsNone(self.pool.acquire('python', 128))
+        self.assertIsNone(self.pool.acquire('java', 128))
+        self.assertEqual(self.client.containers.run.call_count, 1)
+
+        self.pool.release(slot)
+        self.assertIs(self.pool.acquire('python', 128), slot)
+
+    def test_error_al_crear_libera_el_lugar(self):
+        self.client.containers.run.side_effect = RuntimeError('sin imagen')
+        self.assertIsNone(self.pool.acquire('python', 128))
+        self.assertEqual(self.pool._total['python'], 0)
+        self.assertEqual(os.listdir(self.code_dir), [])
+
+
+    def test_watchdog_mata_el_contenedor_si_un_nieto_retiene_la_salida(self):
+        slot = self.pool.acquire('python', 128)
+        container = slot.container
+        matado = threading.Event()
+        container.kill.side_effect = lambda: matado.set()
+
+        def salida_retenida(exec_id, stream, demux):
+            # El nieto separado con setsid mantiene abierta la salida del exec
+            yield RECORD_PREFIX.encode() + b'{"name": "Test 1", "actual": "5"}\n', None
+            matado.wait(5)
+
+        self.client.api.exec_create.return_value = {'Id': 'exec'}
+        self.client.api.exec_start.side_effect = salida_retenida
+        executor = DockerExecutor.__new__(DockerExecutor)
+        executor.client = self.client
+        executor.pool = self.pool
+        with self.settings(JUDGE_TIMEOUT_MARGIN=0.05):
+            resultado = executor._run_pooled(slot, {}, 'python', time_limit=0.05)
+
+        self.assertTrue(matado.is_set())
+        self.assertEqual(resultado['veredicto'], 'TLE')
+        self.assertEqual(len(resultado['tests']), 1)
+        self.client.api.exec_inspect.assert_not_called()
+        # Un contenedor matado no vuelve al pool
+        self.client.containers.run.reset_mock()
+        self.pool.acquire('python', 128)
+        self.client.containers.run.assert_called_once()
+
+
+class ContainerReaperTest(TestCase):
+    """Tests para la eliminación en segundo plano y el barrido de huérfanos"""
+
+    def _dead_pid(self):
+        proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+        proc.wait()
+        return proc.pid
+
+    def test_huerfanos_por_proceso_caido_o_antiguedad(self):
+        now = time.time()
+        propio = container_labels('run', submission_id=7)
+        self.assertEqual(propio['unpa.judge.submission'], '7')
+        self.assertFalse(is_orphan(propio, max_age=60, now=now))
+        self.assertTrue(is_orphan(propio, max_age=60, now=now + 120))
+
+        # Los contenedores del pool viven lo que vive su proceso
+        pool = container_labels('pool')
+        self.assertFalse(is_orphan(pool, max_age=60, now=now + 120))
+        caido = {**pool, 'unpa.judge.instance': 'otro', PID_LABEL: str(self._dead_pid())}
+        self.assertTrue(is_orphan(caido, max_age=60, now=now))
+
+    def test_reap_no_espera_la_eliminacion(self):
+        reaper = ContainerReaper(mock.Mock(), sweep_interval=0)
+        reaper.start()
+        liberar = threading.Event()
+        container = mock.Mock()
+        container.remove.side_effect = lambda **kwargs: liberar.wait(5)
+        cleanup = mock.Mock()
+
+        inicio = time.monotonic()
+        reaper.reap(container, cleanup=cleanup)
+        self.assertLess(time.monotonic() - inicio, 1)
+
+        liberar.set()
+        reaper.close()
+        container.remove.assert_called_once_with(force=True)
+        cleanup.assert_called_once_with()
+
+    def test_barrido_filtra_por_etiqueta(self):
+        huerfano = mock.Mock(labels={
+            **container_labels('run'), 'unpa.judge.instance': 'otro', PID_LABEL: str(self._dead_pid())
+        })
+        activo = mock.Mock(labels=container_labels('run'))
+        client = mock.Mock()
+        client.containers.list.return_value = [huerfano, activo]
+
+        removed = ContainerReaper(client, sweep_interval=0).sweep()
+
+        self.assertEqual(removed, 1)
+        client.containers.list.assert_called_once_with(all=True, filters={'label': LABEL})
+        huerfano.remove.assert_called_once_with(force=True)
+        activo.remove.assert_not_called()
+
+    def test_pool_descarta_contenedores_con_el_reaper(self):
+        reaper = mock.Mock()
+        pool = ContainerPool(mock.Mock(), {'python': 'python:3.11-slim'}, reaper=reaper)
+        pool._total['python'] = 1
+        workdir = tempfile.mkdtemp()
+        slot = PooledContainer(mock.Mock(), 'python', workdir, '256m')
+
+        pool.release(slot, dirty=True)
+
+        self.assertEqual(pool._total['python'], 0)
+        container, = reaper.reap.call_args.args
+        self.assertIs(container, slot.container)
+        slot.container.remove.assert_not_called()
+        reaper.reap.call_args.kwargs['cleanup']()
+        self.assertFalse(os.path.exists(workdir))
+
+
+class CodeDirTest(TestCase):
+    """Tests para los directorios de código en memoria (tmpfs del host)"""
+
+    def test_usa_el_directorio_configurado_si_se_puede_escribir(self):
+        with tempfile.TemporaryDirectory() as base:
+            with self.settings(JUDGE_CODE_DIR=base):
+                self.assertEqual(get_code_dir(), base)
+            with self.settings(JUDGE_CODE_DIR=os.path.join(base, 'no-existe')):
+                self.assertIsNone(get_code_dir())
+            with self.settings(JUDGE_CODE_DIR=''):
+                self.assertIsNone(get_code_dir())
+
+    def test_pool_crea_los_directorios_de_trabajo_en_code_dir(self):
+        with tempfile.TemporaryDirectory() as base:
+            client = mock.Mock()
+            pool = ContainerPool(client, {'python': 'python:3.11-slim'}, code_dir=base)
+
+            slot = pool._create('python', '256m')
+
+            self.assertEqual(os.path.dirname(slot.workdir), base)
+            volumes = client.containers.run.call_args.kwargs['volumes']
+            self.assertEqual(volumes[slot.workdir], {'bind': '/code', 'mode': 'ro'})
+
+    def test_local_ejecuta_desde_code_dir(self):
+        with tempfile.TemporaryDirectory() as base, self.settings(JUDGE_CODE_DIR=base):
+            with mock.patch(
+                'judge.local_executor.tempfile.TemporaryDirectory', wraps=tempfile.TemporaryDirectory
+            ) as temporary:
+                LocalExecutor().execute('x = 1', 'python', files={})
+
+        self.assertEqual(temporary.call_args.kwargs['dir'], base)
+
+
+class BenchmarkTest(TestCase):
+    """Tests para el benchmark de carga y la medición de etapas"""
+
+    def test_percentiles(self):
+        valores = [float(v) for v in range(1, 101)]
+        self.assertEqual(percentile(valores, 50), 50.0)
+        self.assertEqual(percentile(valores, 99), 99.0)
+        self.assertIsNone(percentile([], 50))
+        resumen = summarize([3.0, 1.0, 2.0])
+        self.assertEqual((resumen['n'], resumen['p50'], resumen['max']), (3, 2.0, 3.0))
+
+    def test_stage_timer_acumula_etapas(self):
+        timer = StageTimer()
+        with timer.stage('ejecucion'):
+            pass
+        timer.merge({'ejecucion': 1.0, 'compilacion': 0.5})
+        etapas = timer.as_dict()
+        self.assertGreaterEqual(etapas['ejecucion'], 1.0)
+        self.assertEqual(etapas['compilacion'], 0.5)
+
+    def test_mezcla_cubre_todas_las_combinaciones(self):
+        submissions = generate_submissions(36, seed=1)
+        combinaciones = {(s['language'], s['kind']) for s in submissions}
+        self.assertEqual(len(combinaciones), 18)
+        self.assertEqual(submissions, generate_submissions(36, seed=1))
+
+    def test_benchmark_simulado_reporta_veredictos_y_etapas(self):
+        submissions = generate_submissions(18)
+        report = run_benchmark(
+            JudgeRunner(executor=BenchmarkExecutor()), submissions, concurrency=3
+        )
+
+        self.assertEqual(report['veredictos_inesperados'], 0)
+        self.assertEqual(set(report['por_tipo']), set(KINDS))
+        self.assertEqual(report['latencia']['n'], 18)
+        self.assertEqual(report['por_lenguaje']['java']['n'], 6)
+        self.assertIn('ejecucion', report['etapas'])
+        self.assertIn('espera_sandbox', report['etapas'])
+        json.dumps(report)
+
+    def test_evaluacion_incluye_etapas(self):
+        resultado = JudgeRunner(executor=SimulatedExecutor()).evaluate_submission(
+            'def suma(a, b):\n    return a + b\n', 'python', TESTS_SUMA
+        )
+        self.assertEqual(
+            set(resultado['etapas']), {'preparacion', 'espera_sandbox', 'ejecucion', 'analisis'}
+        )
+
+
+class MetricsTest(JudgeTestMixin, TestCase):
+    """Tests para las métricas en formato de Prometheus"""
+
+    def test_histograma_con_buckets_acumulativos(self):
+        histograma = metrics.Histogram('prueba_seconds', 'Prueba', ['language'], buckets=(0.1, 1.0))
+        histograma.observe(0.05, language='python')
+        histograma.observe(0.5, language='python')
+        histograma.observe(5.0, language='python')
+        texto = metrics.render([histograma.collect()])
+
+        self.assertIn('# TYPE prueba_seconds histogram', texto)
+        self.assertIn('prueba_seconds_bucket{language="python",le="0.1"} 1', texto)
+        self.assertIn('prueba_seconds_bucket{language="python",le="1"} 2', texto)
+        self.assertIn('prueba_seconds_bucket{language="python",le="+Inf"} 3', texto)
+        self.assertIn('prueba_seconds_count{language="python"} 3', texto)
+        self.assertIn('prueba_seconds_sum{language="python"} 5.55', texto)
+
+    def test_contador_requiere_sus_etiquetas(self):
+        contador = metrics.Counter('prueba_total', 'Prueba', ['cache'])
+        contador.inc(cache='a')
+        contador.inc(2, cache='a')
+        self.assertEqual(contador.samples(), [('prueba_total', {'cache': 'a'}, 3.0)])
+        with self.assertRaises(ValueError):
+            contador.inc(otra='b')
+
+    def test_merge_suma_series_de_varios_procesos(self):
+        familia = {'name': 'x_total', 'type': 'counter', 'help': 'x', 'samples': [('x_total', {'a': '1'}, 2.0)]}
+        otra = {**familia, 'samples': [('x_total', {'a': '1'}, 3.0), ('x_total', {'a': '2'}, 1.0)]}
+        merged = metrics.merge([familia], [otra])
+        self.assertEqual(merged[0]['samples'], [('x_total', {'a': '1'}, 5.0), ('x_total', {'a': '2'}, 1.0)])
+
+    def test_evaluacion_registra_veredicto_y_etapas(self):
+        submission = Submission.objects.create(
+            tributo=self.tributo, reto=self.reto, lenguaje='python',
+            codigo='def suma(a, b):\n    return a + b', casos_totales=2
+        )
+        resultado = {
+            'veredicto': 'AC', 'puntos': 100, 'casos_pasados': 2, 'casos_totales': 2,
+            'tiempo_ejecucion': 0.01, 'detalles': {'tests': []},
+            'etapas': {'ejecucion': 0.2, 'arranque_sandbox': 0.1}
+        }
+        with mock.patch('judge.worker.get_runner') as get_runner:
+            get_runner.return_value.evaluate_submission.return_value = resultado
+            judge_submission(submission.id)
+
+        texto = metrics.exposition()
+        self.assertIn(f'judge_verdicts_total{{language="python",reto="{self.reto.id}",veredicto="AC"}}', texto)
+        self.assertIn('judge_stage_seconds_count{language="python",stage="ejecucion"}', texto)
+        self.assertIn('judge_sandbox_start_seconds_count{language="python"}', texto)
+        self.assertIn('judge_evaluation_seconds_count{language="python"}', texto)
+
+    def test_ratio_de_aciertos_del_cache(self):
+        familias = [{
+            'name': 'judge_cache_lookups_total', 'type': 'counter', 'help': '', 'samples': [
+                ('judge_cache_lookups_total', {'cache': 'veredictos', 'result': 'hit'}, 3.0),
+                ('judge_cache_lookups_total', {'cache': 'veredictos', 'result': 'miss'}, 1.0),
+            ]
+        }]
+        ratio = metrics._cache_hit_ratio(familias)
+        self.assertEqual(ratio['samples'], [('judge_cache_hit_ratio', {'cache': 'veredictos'}, 0.75)])
+
+    def test_vista_requiere_token_o_vigilante(self):
+        url = reverse('judge:metrics')
+        with self.settings(JUDGE_METRICS_TOKEN='secreto'):
+            self.assertEqual(self.client.get(url).status_code, 403)
+            self.assertEqual(
+                self.client.get(url, HTTP_AUTHORIZATION='Bearer otro').status_code, 403
+            )
+            response = self.client.get(url, HTTP_AUTHORIZATION='Bearer secreto')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        self.assertIn('judge_queue_depth 0', response.content.decode())
+
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_modo_daemon_combina_las_metricas_del_daemon(self):
+        remotas = [{
+            'name': 'judge_verdicts_total', 'type': 'counter', 'help': '', 'samples': [
+                ['judge_verdicts_total', {'language': 'java', 'reto': '99', 'veredicto': 'WA'}, 4.0]
+            ]
+        }]
+        with self.settings(JUDGE_DISPATCH='daemon'):
+            with mock.patch('judge.daemon.send_command', return_value={'ok': True, 'metrics': remotas}):
+                texto = metrics.exposition()
+            with mock.patch('judge.daemon.send_command', side_effect=OSError):
+                caido = metrics.exposition()
+
+        self.assertIn('judge_daemon_up 1', texto)
+        self.assertIn('judge_verdicts_total{language="java",reto="99",veredicto="WA"} 4', texto)
+        self.assertIn('judge_daemon_up 0', caido)
+
+
+class CronologiaTest(JudgeTestMixin, TestCase):
+    """Tests para la cronología de cada submission y su vista en el admin"""
+
+    def test_timeline_en_milisegundos_desde_el_encolado(self):
+        marcas = timeline({'sandbox': 10.5, 'analizada': 11.0}, origin=10.0, offset=2.0)
+        self.assertEqual(marcas, {'encolada': 0, 'tomada': 2000, 'sandbox': 2500, 'analizada': 3000})
+
+    def test_tramos_y_percentiles(self):
+        marcas = {'encolada': 0, 'tomada': 100, 'sandbox': 400, 'guardada': 450}
+        self.assertEqual(
+            segments(marcas),
+            [('tomada', 0, 100), ('sandbox', 100, 400), ('guardada', 400, 450)]
+        )
+        resumen = summarize_timelines([marcas, {**marcas, 'guardada': 600}])
+        self.assertEqual(list(resumen), ['tomada', 'sandbox', 'guardada', 'total'])
+        self.assertEqual(resumen['guardada']['max'], 200)
+        self.assertEqual(resumen['total']['p50'], 450)
+
+    def test_marcas_de_shards_conservan_la_ultima(self):
+        timer = StageTimer()
+        timer.merge_marks({'ejecutada': 5.0})
+        timer.merge_marks({'ejecutada': 3.0})
+        self.assertEqual(timer.marks(), {'ejecutada': 5.0})
+
+    def test_error_del_sistema_conserva_la_cronologia(self):
+        runner = JudgeRunner(executor=SimulatedExecutor())
+        with mock.patch.object(runner, '_analyze_results', side_effect=RuntimeError('fallo')):
+            resultado = runner.evaluate_submission(
+                'def suma(a, b):\n    return a + b', 'python', TESTS_SUMA
+            )
+
+        self.assertEqual(resultado['veredicto'], 'SE')
+        self.assertIn('ejecucion', resultado['etapas'])
+        self.assertIn('sandbox', resultado['marcas'])
+
+    def test_evaluacion_guarda_la_cronologia(self):
+        submission = Submission.objects.create(
+            tributo=self.tributo, reto=self.reto, lenguaje='python',
+            codigo='def suma(a, b):\n    return a + b', casos_totales=2
+        )
+        with mock.patch('judge.worker.get_runner', return_value=JudgeRunner(executor=SimulatedExecutor())):
+            judge_submission(submission.id)
+
+        submission.refresh_from_db()
+        marcas = submission.marcas_tiempo
+        self.assertEqual(
+            set(marcas),
+            {'encolada', 'tomada', 'sandbox', 'ejecutada', 'logs', 'analizada', 'guardada'}
+        )
+        self.assertEqual(marcas['encolada'], 0)
+        self.assertLessEqual(marcas['tomada'], marcas['sandbox'])
+        self.assertLessEqual(marcas['sandbox'], marcas['ejecutada'])
+        self.assertLessEqual(marcas['analizada'], marcas['guardada'])
+
+    def test_admin_muestra_cascada_y_percentiles(self):
+        admin_user = Personaje.objects.create_superuser(
+            username='admin_test', password='pass123', email='admin@example.com'
+        )
+        submission = Submission.objects.create(
+            tributo=self.tributo, reto=self.reto, lenguaje='python', codigo='x', veredicto='AC',
+            marcas_tiempo={'encolada': 0, 'tomada': 120, 'sandbox': 300, 'guardada': 340}
+        )
+        self.client.force_login(admin_user)
+
+        response = self.client.get(reverse('admin:judge_submission_change', args=[submission.id]))
+        self.assertContains(response, 'margin-left: 35.29%')
+        self.assertContains(response, '180 ms')
+
+        response = self.client.post(reverse('admin:judge_submission_changelist'), {
+            'action': 'percentiles_etapas',
+            '_selected_action': [submission.id],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Percentiles de las etapas')
+        self.assertEqual(response.context['resumen']['total']['p95'], 340)
+
+
+class BundleStoreTest(JudgeTestMixin, TestCase):
+    """Tests para los paquetes de tests direccionados por contenido"""
+
+    def test_reto_guarda_solo_la_huella(self):
+        huella, _, _ = bundle_store.encode({'python': TESTS_SUMA})
+        self.assertEqual(self.reto.paquete_tests_id, huella)
+        self.assertEqual(PaqueteTests.objects.count(), 1)
+
+        reto = Reto.objects.get(id=self.reto.id)
+        self.assertEqual(reto.tests_ocultos, {'python': TESTS_SUMA})
+
+    def test_mismos_tests_comparten_paquete(self):
+        otro = Reto.objects.create(
+            torneo=self.torneo, titulo='Otra suma', descripcion='x', enunciado='x',
+            fecha_publicacion=timezone.now(),
+            tests_ocultos={'python': [dict(reversed(list(t.items()))) for t in TESTS_SUMA]}
+        )
+        self.assertEqual(otro.paquete_tests_id, self.reto.paquete_tests_id)
+        self.assertEqual(PaqueteTests.objects.count(), 1)
+
+        otro.tests_ocultos = {'python': TESTS_SUMA[:1]}
+        otro.save()
+        self.assertNotEqual(otro.paquete_tests_id, self.reto.paquete_tests_id)
+        self.assertEqual(PaqueteTests.objects.count(), 2)
+
+    def test_juez_lee_el_paquete_desde_el_cache(self):
+        bundle_store.get_cache().clear()
+        reto = Reto.objects.get(id=self.reto.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(reto.get_tests('python'), TESTS_SUMA)
+        with self.assertNumQueries(0):
+            self.assertEqual(reto.get_tests('python'), TESTS_SUMA)
+            self.assertEqual(reto.get_tests('java'), [])
+
+    def test_cache_desaloja_el_menos_usado(self):
+        cache_lru = bundle_store.BundleCache(2)
+        cache_lru.put('a', {})
+        cache_lru.put('b', {})
+        cache_lru.get('a')
+        cache_lru.put('c', {})
+        self.assertIsNone(cache_lru.get('b'))
+        self.assertEqual(len(cache_lru), 2)
+
+    def test_casos_de_prueba_compilan_al_mismo_formato(self):
+        CasoDePrueba.objects.create(reto=self.reto, nombre='Uno', entrada='2 3', salida_esperada='5', orden=1)
+        caso = CasoDePrueba.objects.create(
+            reto=self.reto, nombre='Cero', entrada='0 0', salida_esperada='0', orden=0
+        )
+        tests = bundle_store.compile_casos_de_prueba(self.reto.casos_prueba.order_by('orden'))
+        self.assertEqual(tests[0], {'name': caso.nombre, 'input': '0 0', 'expected': '0'})
+
+        challenge = Challenge.objects.create(
+            title='Suma', slug='suma', description='x', statement='x',
+            allowed_languages=['python', 'cpp']
+        )
+        ChallengeTestCase.objects.create(
+            challenge=challenge, input_data='1 2', expected_output='3', order=0,
+            checker='flotante', checker_config={'epsilon_abs': 0.1}
+        )
+        huella = challenge.compile_test_bundle()
+        tests = bundle_store.load(huella)
+        self.assertEqual(list(tests), ['python'])
+        self.assertEqual(tests['python'][0]['checker'], {'epsilon_abs': 0.1, 'tipo': 'flotante'})
+        self.assertEqual(tests['python'][0]['input'], '1 2')
+
+    def test_formulario_crea_un_paquete_nuevo(self):
+        from arena.forms import RetoForm
+        form = RetoForm(instance=self.reto)
+        self.assertEqual(form.fields['tests_ocultos'].initial, {'python': TESTS_SUMA})
+
+        data = {
+            field.name: field.value() for field in form
+            if field.value() is not None and field.name not in ('archivo_datos', 'tests_ocultos')
+        }
+        data['tests_ocultos'] = json.dumps({'javascript': TESTS_SUMA})
+        form = RetoForm(data, instance=self.reto)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+
+        reto = Reto.objects.get(id=self.reto.id)
+        self.assertEqual(reto.tests_ocultos, {'javascript': TESTS_SUMA})
+
+
+class DataCacheTest(JudgeTestMixin, TestCase):
+    """Tests para el caché local de archivos de datos de los retos"""
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, True)
+        settings_media = override_settings(MEDIA_ROOT=media)
+        settings_media.enable()
+        self.addCleanup(settings_media.disable)
+
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.cache = data_cache.DataFileCache(self.root, max_bytes=1024)
+
+    def _reto_con_datos(self, contenido=b'1 2 3\n', nombre='datos.txt'):
+        reto = Reto.objects.create(
+            torneo=self.torneo, titulo=f'Datos {nombre}', descripcion='x', enunciado='x',
+            fecha_publicacion=timezone.now(), tiene_validacion_automatica=True,
+            tests_ocultos={'python': TESTS_SUMA},
+            archivo_datos=SimpleUploadedFile(nombre, contenido)
+        )
+        return Reto.objects.get(id=reto.id)
+
+    def test_huella_se_calcula_al_subir(self):
+        reto = self._reto_con_datos(b'abc')
+        self.assertEqual(reto.archivo_datos_huella, hashlib.sha256(b'abc').hexdigest())
+
+        reto.archivo_datos = None
+        reto.save()
+        self.assertEqual(Reto.objects.get(id=reto.id).archivo_datos_huella, '')
+
+    def test_descarga_una_vez_y_monta_de_solo_lectura(self):
+        reto = self._reto_con_datos(b'1 2 3\n')
+        with mock.patch.object(self.cache, '_fetch', wraps=self.cache._fetch) as fetch:
+            path = self.cache.ensure(reto)
+            self.assertEqual(self.cache.ensure(reto), path)
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(path, os.path.join(self.root, reto.archivo_datos_huella))
+
+        archivo = os.path.join(path, 'datos.txt')
+        with open(archivo, 'rb') as f:
+            self.assertEqual(f.read(), b'1 2 3\n')
+        self.assertFalse(os.stat(archivo).st_mode & 0o222)
+        self.assertIsNone(self.cache.ensure(self.reto))
+
+    def test_archivo_que_no_coincide_con_la_huella(self):
+        reto = self._reto_con_datos(b'original')
+        with reto.archivo_datos.open('wb') as f:
+            f.write(b'modificado')
+        with self.assertRaises(data_cache.DataFileError):
+            self.cache.ensure(reto)
+        self.assertEqual(self.cache.entries(), [])
+
+    def test_entrada_danada_se_descarga_otra_vez(self):
+        reto = self._reto_con_datos(b'original')
+        path = self.cache.ensure(reto)
+        archivo = os.path.join(path, 'datos.txt')
+        os.chmod(archivo, 0o644)
+        with open(archivo, 'wb') as f:
+            f.write(b'basura')
+
+        with self.assertLogs('judge.data_cache', 'WARNING'):
+            self.assertEqual(self.cache.ensure(reto, verify=True), path)
+        with open(archivo, 'rb') as f:
+            self.assertEqual(f.read(), b'original')
+
+    def test_desaloja_el_menos_usado_por_tamano(self):
+        primero = self._reto_con_datos(b'a' * 600, 'a.txt')
+        segundo = self._reto_con_datos(b'b' * 600, 'b.txt')
+        path_primero = self.cache.ensure(primero)
+        os.utime(path_primero, (time.time() - 60, time.time() - 60))
+
+        path_segundo = self.cache.ensure(segundo)
+        self.assertFalse(os.path.exists(path_primero))
+        self.assertFalse(os.path.exists(path_primero + data_cache.LOCK_SUFFIX))
+        self.assertTrue(os.path.isdir(path_segundo))
+
+    def test_entrada_en_uso_no_se_desaloja(self):
+        primero = self._reto_con_datos(b'a' * 600, 'a.txt')
+        segundo = self._reto_con_datos(b'b' * 600, 'b.txt')
+        with self.cache.lease(primero) as path_primero:
+            os.utime(path_primero, (time.time() - 60, time.time() - 60))
+            self.cache.ensure(segundo)
+            self.assertTrue(os.path.isdir(path_primero))
+        self.assertEqual(self.cache.evict(), 1)
+
+    def test_entrada_en_uso_en_otro_proceso_no_se_desaloja(self):
+        primero = self._reto_con_datos(b'a' * 600, 'a.txt')
+        segundo = self._reto_con_datos(b'b' * 600, 'b.txt')
+        # Otra instancia sobre el mismo directorio no comparte estado con esta
+        otro_proceso = data_cache.DataFileCache(self.root, max_bytes=1024)
+        with self.cache.lease(primero) as path_primero:
+            os.utime(path_primero, (time.time() - 60, time.time() - 60))
+            otro_proceso.ensure(segundo)
+            self.assertTrue(os.path.isdir(path_primero))
+        self.assertEqual(otro_proceso.evict(), 1)
+
+    def test_lease_protege_la_entrada_antes_de_retornarla(self):
+        primero = self._reto_con_datos(b'a' * 600, 'a.txt')
+        segundo = self._reto_con_datos(b'b' * 600, 'b.txt')
+        path_primero = self.cache.ensure(primero)
+        otro_proceso = data_cache.DataFileCache(self.root, max_bytes=2048)
+        otro_proceso.ensure(segundo)
+        os.utime(path_primero, (time.time() - 60, time.time() - 60))
+        otro_proceso.max_bytes = 600
+        lock_entry = self.cache._lock_entry
+
+        def desalojo_concurrente(path, exclusive=False):
+            lock = lock_entry(path, exclusive)
+            otro_proceso.evict()
+            return lock
+
+        with mock.patch.object(self.cache, '_lock_entry', side_effect=desalojo_concurrente):
+            with self.cache.lease(primero) as path:
+                self.assertTrue(os.path.isfile(os.path.join(path, 'a.txt')))
+
+    def test_sandbox_monta_los_datos_de_solo_lectura(self):
+        executor = DockerExecutor.__new__(DockerExecutor)
+        executor.client = mock.Mock()
+        executor.client.containers.run.side_effect = RuntimeError('sin docker')
+        with self.assertRaises(RuntimeError):
+            executor._run_container(
+                tmpdir='/tmp/codigo', language='python', time_limit=1.0, cpu_quota=50000,
+                cpu_period=100000, mem_limit='128m', data_dir='/cache/abc'
+            )
+        config = executor.client.containers.run.call_args.kwargs
+        self.assertEqual(config['volumes']['/cache/abc'], {'bind': data_cache.DATA_MOUNT, 'mode': 'ro'})
+        self.assertEqual(config['environment']['JUDGE_DATA_DIR'], data_cache.DATA_MOUNT)
+
+        # Los contenedores del pool no tienen el montaje: se usa uno nuevo
+        executor.pool = mock.Mock()
+        executor.code_dir = None
+        with mock.patch.object(executor, '_run_container', return_value={}) as run:
+            executor._execute_files({'solution.py': ''}, 'python', 1.0, 128, data_dir='/cache/abc')
+        executor.pool.acquire.assert_not_called()
+        self.assertEqual(run.call_args.kwargs['data_dir'], '/cache/abc')
+
+    def test_worker_pasa_el_directorio_de_datos(self):
+        reto = self._reto_con_datos(b'1 2 3\n')
+        submission = Submission.objects.create(
+            reto=reto, tributo=self.tributo, codigo='def suma(a, b):\n    return a + b\n',
+            lenguaje='python'
+        )
+        runner = mock.Mock()
+        runner.evaluate_submission.return_value = {
+            'veredicto': 'AC', 'puntos': 100, 'casos_pasados': 2, 'detalles': {'tests': []}
+        }
+        with mock.patch('judge.worker.get_runner', return_value=runner), \
+                mock.patch('judge.worker.get_data_cache', return_value=self.cache):
+            judge_submission(submission.id)
+
+        data_dir = runner.evaluate_submission.call_args.kwargs['data_dir']
+        self.assertEqual(data_dir, os.path.join(self.root, reto.archivo_datos_huella))
+        self.assertEqual(Submission.objects.get(id=submission.id).veredicto, 'AC')
+
+    def test_huella_de_los_datos_invalida_el_cache_de_veredictos(self):
+        args = ('def suma(a, b): return a + b', 'python', TESTS_SUMA, 2.0, 128)
+        sin_datos = verdict_cache.compute_fingerprint(*args)
+        self.assertEqual(sin_datos, verdict_cache.compute_fingerprint(*args, datos=''))
+        self.assertNotEqual(
+            verdict_cache.compute_fingerprint(*args, datos='a' * 64),
+            verdict_cache.compute_fingerprint(*args, datos='b' * 64)
+        )
+
+    def test_torneo_en_curso_descarga_los_datos(self):
+        with mock.patch('judge.data_cache.request_prefetch') as request_prefetch:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.torneo.save()
+            request_prefetch.assert_not_called()
+
+            self.torneo.estado = 'en_curso'
+            with self.captureOnCommitCallbacks(execute=True):
+                self.torneo.save()
+        request_prefetch.assert_called_once_with(self.torneo.id)
+
+        reto = self._reto_con_datos(b'1 2 3\n')
+        with mock.patch('judge.data_cache.get_data_cache', return_value=self.cache):
+            self.assertEqual(data_cache.prefetch_torneo(self.torneo.id), 1)
+        self.assertTrue(os.path.isdir(self.cache.entry_path(reto.archivo_datos_huella)))
+
+
+class PerTestTimeLimitTest(TestCase):
+    """Tests para el límite de tiempo por test del harness"""
+
+    def setUp(self):
+        self.runner = JudgeRunner(executor=mock.Mock())
+
+    def test_harness_corta_el_test_lento_y_sigue(self):
+        tests = [
+            {'name': 'lento', 'function_call': {'name': 'loop', 'args': []}, 'expected': '1'},
+            {'name': 'rapido', 'function_call': {'name': 'suma', 'args': [1, 2]}, 'expected': '3'},
+        ]
+        solution = (
+            'def loop():\n'
+            '    while True:\n'
+            '        try:\n'
+            '            pass\n'
+            '        except Exception:\n'
+            '            pass\n'
+            'def suma(a, b):\n'
+            '    return a + b\n'
+        )
+        stream = run_python_harness(
+            self.runner, tests, solution,
+            JUDGE_TIME_LIMIT='0.2', JUDGE_WALL_TIME_LIMIT='0.4'
+        )
+
+        self.assertEqual(stream.tests[0]['error_type'], 'TimeLimitExceeded')
+        self.assertTrue(stream.tests[1]['passed'])
+
+    def test_shard_con_test_fuera_de_tiempo_es_tle(self):
+        resultado = {
+            'success': True, 'veredicto': 'OK', 'stdout': '{"total_time": 1.0}',
+            'stderr': '', 'total_tests': 2,
+            'tests': [{'name': 'a', 'passed': False, 'error': 'Tiempo límite excedido',
+                       'error_type': 'TimeLimitExceeded'},
+                      {'name': 'b', 'passed': True}],
+        }
+        evaluation = self.runner._analyze_results([resultado], total_tests=2)
+
+        self.assertEqual(evaluation['veredicto'], 'TLE')
+        self.assertEqual(evaluation['casos_pasados'], 1)
+
+    def test_timeout_del_sandbox_escala_con_la_cantidad_de_tests(self):
+        self.runner.executor.execute.return_value = {'success': True, 'veredicto': 'OK'}
+        with self.settings(JUDGE_TIMEOUT_MARGIN=2.0, JUDGE_WALL_TIME_FACTOR=2.0):
+            self.runner._execute_shard('x = 1', 'python', [{}, {}, {}], 1.5, 256)
+
+        kwargs = self.runner.executor.execute.call_args.kwargs
+        self.assertEqual(kwargs['time_limit'], 6.5)
+        self.assertEqual(kwargs['env']['JUDGE_TIME_LIMIT'], '1.5')
+        self.assertEqual(kwargs['env']['JUDGE_WALL_TIME_LIMIT'], '3.0')
+
+
+class ResourceAccountingTest(TestCase):
+    """Tests para la medición de CPU/memoria y la detección de MLE"""
+
+    def test_resource_usage_desde_contadores_del_cgroup(self):
+        stream = OutputStream()
+        stream.feed_stderr(
+            STATS_PREFIX.encode() + b'usage_usec 1000 oom 0 oom_kill 0 peak 1000\n'
+            b'Traceback...\n'
+            + STATS_PREFIX.encode() + b'usage_usec 251000 oom 1 oom_kill 1 peak 3145729\n'
+        )
+        stream.close()
+
+        self.assertEqual(stream.stderr, 'Traceback...')
+        self.assertEqual(
+            stream.resource_usage(),
+            {'tiempo_cpu': 0.25, 'oom_killed': True, 'memoria_usada': 4}
+        )
+        self.assertNotIn('memoria_usada', stream.resource_usage(include_peak=False))
+
+    def test_muestra_despues_de_stderr_sin_salto_de_linea(self):
+        from .docker_executor import CGROUP_STATS
+        script = (
+            f'{CGROUP_STATS}; printf "Traceback\\n\\nError: sin salto" >&2; {CGROUP_STATS}'
+        )
+        result = subprocess.run(['sh', '-c', script], capture_output=True, timeout=10)
+        stream = OutputStream()
+        stream.feed_stderr(result.stderr)
+        stream.close()
+
+        self.assertEqual(stream.stderr, 'Traceback\n\nError: sin salto')
+        self.assertEqual(len(stream.stats), 2)
+        self.assertIn('peak', stream.stats[-1])
+
+    def test_oom_killed_es_mle(self):
+        executor = DockerExecutor.__new__(DockerExecutor)
+        veredicto = executor._determine_verdict(
+            exit_code=137, execution_time=0.5, time_limit=2.0, stderr='', oom_killed=True
+        )
+        self.assertEqual(veredicto, 'MLE')
+
+    def test_memoria_del_harness_si_no_hay_cgroup(self):
+        runner = JudgeRunner(executor=mock.Mock())
+        resultado = {
+            'success': True, 'veredicto': 'OK', 'stdout': '{"total_time": 0.1}',
+            'stderr': '', 'total_tests': 1,
+            'tests': [{'name': 'a', 'passed': True, 'cpu_time': 0.05, 'memory_kb': 10300}],
+        }
+        evaluation = runner._analyze_results([resultado], total_tests=1)
+
+        self.assertEqual(evaluation['memoria_usada'], 11)
+        self.assertEqual(evaluation['tiempo_cpu'], 0.05)
+
+
+class OutputLimitTest(TestCase):
+    """Tests para la captura acotada de la salida y el veredicto OLE"""
+
+    def test_salida_truncada_conserva_el_resumen(self):
+        stream = OutputStream(max_log_bytes=20)
+        stream.feed_stdout(b'linea\n' * 100 + b'{"total": 1}\n')
+        stream.close()
+
+        lineas = stream.stdout.split('\n')
+        self.assertEqual(lineas[:3], ['linea'] * 3)
+        self.assertIn('salida truncada', lineas[-2])
+        self.assertEqual(json.loads(lineas[-1]), {'total': 1})
+
+    def test_stderr_truncado_conserva_contadores(self):
+        stream = OutputStream(max_log_bytes=10)
+        stream.feed_stderr(b'error\n' * 50)
+        stream.feed_stderr(STATS_PREFIX.encode() + b'usage_usec 5\n')
+        stream.close()
+
+        self.assertIn('salida truncada', stream.stderr)
+        self.assertEqual(stream.stats, [{'usage_usec': 5}])
+
+    def test_lectura_demultiplexada_detiene_al_exceder_limite(self):
+        stream = OutputStream(output_limit=100)
+        self.assertFalse(stream.feed(b'a' * 60, None))
+        self.assertTrue(stream.feed(None, b'b' * 60))
+        self.assertTrue(stream.output_exceeded)
+
+    def test_local_reporta_ole(self):
+        runner = JudgeRunner(executor=LocalExecutor())
+        resultado = runner.evaluate_submission(
+            'while True:\n    print("x" * 1000)', 'python', TESTS_SUMA,
+            time_limit=5.0, memory_limit=256, output_limit=1
+        )
+
+        self.assertEqual(resultado['veredicto'], 'OLE')
+        self.assertIn('Límite de salida', resultado['error'])
+        self.assertLess(len(resultado['stdout']), 128 * 1024)
+
+
+class ExecutorBackendsTest(TestCase):
+    """Tests para los backends de ejecución intercambiables"""
+
+    def test_runner_usa_el_backend_configurado(self):
+        with self.settings(JUDGE_EXECUTOR='judge.simulated_executor.SimulatedExecutor'):
+            runner = JudgeRunner()
+        self.assertIsInstance(runner.executor, SimulatedExecutor)
+
+    def test_simulado_respeta_resultado_y_fail_fast(self):
+        executor = SimulatedExecutor(
+            outcome=lambda code, test: {'actual': 'mal'} if test['name'] == 'Test 1' else {}
+        )
+        runner = JudgeRunner(executor=executor)
+        resultado = runner.evaluate_submission(
+            'def suma(a, b):\n    return a + b', 'python', TESTS_SUMA, fail_fast=True
+        )
+
+        self.assertEqual(resultado['veredicto'], 'WA')
+        self.assertEqual(len(resultado['detalles']['tests']), 1)
+
+    def test_local_evalua_python_sin_docker(self):
+        runner = JudgeRunner(executor=LocalExecutor())
+        resultado = runner.evaluate_submission(
+            'def suma(a, b):\n    return a + b', 'python', TESTS_SUMA,
+            time_limit=2.0, memory_limit=256
+        )
+
+        self.assertEqual(resultado['veredicto'], 'AC')
+        self.assertEqual(resultado['casos_pasados'], 2)
+        self.assertGreater(resultado['memoria_usada'], 0)
+
+    def test_local_reporta_error_de_ejecucion(self):
+        runner = JudgeRunner(executor=LocalExecutor())
+        resultado = runner.evaluate_submission(
+            'def suma(a, b):\n    raise ValueError("x")', 'python', TESTS_SUMA,
+            time_limit=2.0, memory_limit=256
+        )
+
+        self.assertEqual(resultado['veredicto'], 'RE')
+
+    def test_local_aplica_limites_al_proceso_creado(self):
+        runner = JudgeRunner(executor=LocalExecutor())
+        tests = [{
+            'name': 'limite', 'function_call': {'name': 'limite', 'args': []}, 'expected': '128'
+        }]
+        codigo = (
+            'import resource\n'
+            'def limite():\n'
+            '    return resource.getrlimit(resource.RLIMIT_AS)[0] // (1024 * 1024)'
+        )
+        with mock.patch('subprocess.Popen', wraps=subprocess.Popen) as popen:
+            resultado = runner.evaluate_submission(
+                codigo, 'python', tests, time_limit=2.0, memory_limit=128
+            )
+
+        self.assertEqual(resultado['veredicto'], 'AC')
+        self.assertNotIn('preexec_fn', popen.call_args.kwargs)
+
+    @skipUnless(shutil.which('node'), 'Node.js no está instalado')
+    def test_local_mle_por_memoria_nativa_en_javascript(self):
+        runner = JudgeRunner(executor=LocalExecutor())
+        codigo = (
+            'function suma(a, b) {\n'
+            '    const data = [];\n'
+            '    while (true) data.push(Buffer.alloc(1 << 24, 1));\n'
+            '}\n'
+        )
+        resultado = runner.evaluate_submission(
+            codigo, 'javascript', TESTS_SUMA, time_limit=5.0, memory_limit=128
+        )
+
+        self.assertEqual(resultado['veredicto'], 'MLE')
+        self.assertLess(resultado['tiempo_ejecucion'], 5.0)
+
+
+class CheckersTest(TestCase):
+    """Tests para los checkers de salida en el host"""
+
+    def test_tokens_ignora_espacios(self):
+        checker = get_checker('tokens')
+        self.assertTrue(checker.check('1 2\n3', '1\n2   3\n')[0])
+        aceptado, mensaje = checker.check('1 2 3', '1 2 4')
+        self.assertFalse(aceptado)
+        self.assertIn('Token 3', mensaje)
+        self.assertFalse(checker.check('1 2 3', '1 2')[0])
+
+    def test_flotante_con_tolerancia(self):
+        checker = get_checker({'tipo': 'flotante', 'epsilon_abs': 1e-3, 'epsilon_rel': 0})
+        self.assertTrue(checker.check('3.1416 x', '3.14159 x')[0])
+        self.assertFalse(checker.check('3.1416', '3.15')[0])
+        self.assertFalse(checker.check('x', 'y')[0])
+
+    def test_lineas_en_cualquier_orden(self):
+        checker = get_checker('lineas_desordenadas')
+        self.assertTrue(checker.check('a\nb\nb\n', 'b\na \nb')[0])
+        self.assertFalse(checker.check('a\nb\nb', 'a\nb\na')[0])
+
+    def test_exacto_lee_salida_esperada_de_archivo(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, 'grande.out'), 'w') as f:
+                f.write('linea\n' * 1000)
+            test = {'name': 'g', 'expected_file': 'grande.out'}
+            with self.settings(JUDGE_EXPECTED_OUTPUTS_DIR=tmpdir):
+                self.assertTrue(get_checker('exacto').check(expected_source(test), 'linea\n' * 1000)[0])
+                self.assertFalse(get_checker('exacto').check(expected_source(test), 'linea\n' * 999)[0])
+                with self.assertRaises(CheckerError):
+                    expected_source({'expected_file': '../fuera.out'})
+
+    def test_programa_fuera_del_directorio_es_error_de_checker(self):
+        record = {'name': 'a', 'passed': True, 'actual': '5'}
+        check_record(record, {'expected': '5'}, {'tipo': 'programa', 'programa': '/bin/true'})
+
+        self.assertFalse(record['passed'])
+        self.assertEqual(record['error_type'], ERROR_CHECKER)
+
+    def test_check_record_decide_en_el_host(self):
+        record = {'name': 'a', 'passed': True, 'actual': '1  2'}
+        check_record(record, {'expected': '1 3'}, 'tokens')
+        self.assertFalse(record['passed'])
+        self.assertEqual(record['expected'], '1 3')
+        self.assertIn('checker', record)
+
+        record = {'name': 'a', 'passed': True, 'actual': '1  2'}
+        check_record(record, {'expected': '1 2', 'checker': 'tokens'}, 'exacto')
+        self.assertTrue(record['passed'])
+
+    def test_registro_sin_salida_no_pasa(self):
+        record = {'name': 'a', 'passed': True}
+        check_record(record, {'expected': '1'})
+        self.assertFalse(record['passed'])
+        self.assertEqual(record['error_type'], ERROR_SIN_SALIDA)
+
+        record = {'name': 'a', 'passed': True, 'error_type': 'ZeroDivisionError'}
+        check_record(record, {'expected': '1'})
+        self.assertFalse(record['passed'])
+
+    def test_registros_falsificados_no_dan_ac(self):
+        runner = JudgeRunner(executor=LocalExecutor())
+        codigo = (
+            'import json, os, sys\n'
+            'print("__JUDGE__ " + json.dumps({"name": "Test 1", "passed": True}))\n'
+            'def suma(a, b):\n'
+            '    for nombre in ("Test 1", "Test 2"):\n'
+            '        print("__JUDGE__ " + json.dumps({"name": nombre, "passed": True}),\n'
+            '              file=sys.__stdout__, flush=True)\n'
+            '    os._exit(0)\n'
+        )
+
+        resultado = runner.evaluate_submission(codigo, 'python', TESTS_SUMA, time_limit=2.0)
+        self.assertNotEqual(resultado['veredicto'], 'AC')
+        self.assertEqual(resultado['casos_pasados'], 0)
+        self.assertTrue(all(
+            test['error_type'] == ERROR_SIN_SALIDA for test in resultado['detalles']['tests']
+        ))
+
+    def test_salida_al_cargar_la_solucion_no_es_un_registro(self):
+        runner = JudgeRunner(executor=LocalExecutor())
+        codigo = 'print("__JUDGE__ {}")\ndef suma(a, b):\n    return a + b'
+
+        resultado = runner.evaluate_submission(codigo, 'python', TESTS_SUMA, time_limit=2.0)
+        self.assertEqual(resultado['veredicto'], 'AC')
+        self.assertEqual(len(resultado['detalles']['tests']), 2)
+
+    def test_salidas_esperadas_no_viajan_al_sandbox(self):
+        runner = JudgeRunner(executor=SimulatedExecutor())
+        files = runner._get_harness_files('python', TESTS_SUMA)
+
+        self.assertNotIn('expected', files['tests.jsonl'])
+
+    def test_runner_aplica_checker_del_reto(self):
+        runner = JudgeRunner(executor=LocalExecutor())
+        tests = [{'name': 'pi', 'function_call': {'name': 'pi', 'args': []}, 'expected': '3.1416'}]
+        codigo = 'def pi():\n    return 3.14159265'
+
+        resultado = runner.evaluate_submission(codigo, 'python', tests, time_limit=2.0)
+        self.assertEqual(resultado['veredicto'], 'WA')
+
+        resultado = runner.evaluate_submission(
+            codigo, 'python', tests, time_limit=2.0,
+            checker={'tipo': 'flotante', 'epsilon_abs': 1e-4}
+        )
+        self.assertEqual(resultado['veredicto'], 'AC')
+
+
+class JudgeDaemonTest(JudgeTestMixin, TestCase):
+    """Tests para la cola en la BD y el daemon del juez"""
+
+    def _pendiente(self, **kwargs):
+        return Submission.objects.create(
+            tributo=self.tributo, reto=self.reto, lenguaje='python',
+            codigo='def suma(a, b):\n    return a + b', casos_totales=2, **kwargs
+        )
+
+    def test_submission_se_reclama_una_sola_vez(self):
+        submission = self._pendiente()
+
+        self.assertTrue(claim_submission(submission.id, 'host:1'))
+        self.assertFalse(claim_submission(submission.id, 'host:2'))
+        self.assertIsNone(claim_next('host:2'))
+
+    def test_reclamo_abandonado_vuelve_a_la_cola(self):
+        submission = self._pendiente(
+            reclamada_por='host:1', fecha_reclamo=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(release_stale_claims(timeout=60), 1)
+        self.assertEqual(claim_next('host:2'), submission.id)
+
+    def test_modo_thread_recupera_reclamos_abandonados(self):
+        import judge.worker as worker
+        self.addCleanup(setattr, worker, '_last_recover', 0.0)
+        worker._last_recover = 0.0
+        abandonada = self._pendiente(
+            reclamada_por='host-caido:1', fecha_reclamo=timezone.now() - timedelta(hours=1)
+        )
+        self.client.force_login(self.usuario)
+
+        # Antes de admitir el envío se libera y se vuelve a evaluar
+        with self.settings(JUDGE_DISPATCH='thread', JUDGE_CLAIM_TIMEOUT=60), \
+                mock.patch('judge.worker.get_worker_pool') as get_pool, \
+                self.assertLogs('judge.worker', 'WARNING'):
+            response = self.client.post(
+                reverse('judge:submit_solution', args=[self.reto.id]),
+                {'codigo': 'def suma(a, b):\n    return a - b', 'lenguaje': 'python'}
+            )
+            get_pool.return_value.wake.assert_called_once_with(1)
+
+            # El siguiente barrido espera RECOVER_INTERVAL
+            self.assertEqual(worker.recover_stale_claims(), 0)
+
+        self.assertEqual(response.status_code, 202)
+        abandonada.refresh_from_db()
+        self.assertEqual(abandonada.reclamada_por, '')
+        self.assertEqual(claim_next('host:2'), abandonada.id)
+
+    def test_modo_daemon_no_recupera_en_el_proceso_web(self):
+        self._pendiente(reclamada_por='host-caido:1', fecha_reclamo=timezone.now() - timedelta(hours=1))
+        with self.settings(JUDGE_DISPATCH='daemon', JUDGE_CLAIM_TIMEOUT=60):
+            from .worker import recover_stale_claims
+            self.assertEqual(recover_stale_claims(), 0)
+
+    def test_daemon_despacha_hasta_su_capacidad(self):
+        primera = self._pendiente()
+        self._pendiente()
+        daemon = JudgeDaemon(socket_path='unused', workers=1)
+        daemon._executor = mock.Mock()
+
+        self.assertEqual(daemon.dispatch_pending(), 1)
+        daemon._executor.submit.assert_called_once_with(daemon._run, primera.id)
+        self.assertEqual(daemon.dispatch_pending(), 0)
+
+    def test_socket_responde_probe_de_salud(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            daemon = JudgeDaemon(socket_path=os.path.join(tmpdir, 'judge.sock'), workers=2)
+            daemon.backend_ok = True
+            daemon._start_server()
+            try:
+                estado = send_command({'cmd': 'health'}, daemon.socket_path)
+                aviso = send_command({'cmd': 'judge', 'submission_id': 1}, daemon.socket_path)
+                medidas = send_command({'cmd': 'metrics'}, daemon.socket_path)
+            finally:
+                daemon.shutdown()
+
+        self.assertEqual(estado['status'], 'ok')
+        self.assertEqual(estado['capacidad'], 2)
+        self.assertTrue(aviso['ok'])
+        self.assertIn('judge_verdicts_total', {f['name'] for f in medidas['metrics']})
+
+    def test_pedidos_mal_formados_reciben_un_error(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            daemon = JudgeDaemon(socket_path=os.path.join(tmpdir, 'judge.sock'), workers=1)
+            daemon._start_server()
+            try:
+                with mock.patch('judge.data_cache.start_prefetch') as start_prefetch:
+                    respuestas = [
+                        send_command(command, daemon.socket_path)
+                        for command in ([1, 2], {'cmd': 'prefetch'}, {'cmd': 'prefetch', 'torneo_id': None})
+                    ]
+                    valida = send_command({'cmd': 'prefetch', 'torneo_id': 3}, daemon.socket_path)
+            finally:
+                daemon.shutdown()
+
+        self.assertTrue(all(not respuesta['ok'] and respuesta['error'] for respuesta in respuestas))
+        self.assertTrue(valida['ok'])
+        start_prefetch.assert_called_once_with(3)
+
+    def test_submit_avisa_al_daemon(self):
+        self.client.force_login(self.usuario)
+        with self.settings(JUDGE_DISPATCH='daemon'):
+            with mock.patch('judge.daemon.notify_daemon') as notify:
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(
+                        reverse('judge:submit_solution', args=[self.reto.id]),
+                        {'codigo': 'def suma(a, b):\n    return a + b', 'lenguaje': 'python'}
+                    )
+
+        notify.assert_called_once_with(response.json()['submission_id'])
+
+
+class AdmissionControlTest(JudgeTestMixin, TestCase):
+    """Tests para el control de admisión del juez"""
+
+    def _enviar(self):
+        with mock.patch('judge.worker.get_worker_pool'):
+            return self.client.post(
+                reverse('judge:submit_solution', args=[self.reto.id]),
+                {'codigo': 'def suma(a, b):\n    return a + b', 'lenguaje': 'python'}
+            )
+
+    def test_slots_limitan_sandboxes_simultaneos(self):
+        slots = SandboxSlots(2)
+        liberar = threading.Event()
+        en_espera = threading.Event()
+
+        def ocupar():
+            with slots.slot():
+                liberar.wait(5)
+
+        hilos = [threading.Thread(target=ocupar) for _ in range(3)]
+        for hilo in hilos:
+            hilo.start()
+        for _ in range(100):
+            if slots.stats()['en_espera'] == 1:
+                en_espera.set()
+                break
+            time.sleep(0.01)
+        estado = slots.stats()
+        liberar.set()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertTrue(en_espera.is_set())
+        self.assertEqual(estado['en_uso'], 2)
+        self.assertEqual(estado['utilizacion'], 1.0)
+        self.assertEqual(slots.stats()['pico'], 2)
+
+    def test_slots_compartidos_entre_procesos(self):
+        # Dos instancias con el mismo caché equivalen a dos procesos
+        web, daemon = SandboxSlots(1), SandboxSlots(1)
+        web.POLL_INTERVAL = daemon.POLL_INTERVAL = 0.01
+        ocupado = threading.Event()
+        liberar = threading.Event()
+        orden = []
+
+        def ocupar():
+            with web.slot():
+                orden.append('web')
+                ocupado.set()
+                liberar.wait(5)
+
+        hilo = threading.Thread(target=ocupar)
+        hilo.start()
+        ocupado.wait(5)
+        self.assertEqual(daemon.stats()['en_uso'], 1)
+        threading.Timer(0.1, liberar.set).start()
+        with daemon.slot():
+            orden.append('daemon')
+        hilo.join()
+
+        self.assertEqual(orden, ['web', 'daemon'])
+        self.assertEqual(web.stats()['en_uso'], 0)
+
+    def test_slot_de_un_proceso_caido_vence(self):
+        slots = SandboxSlots(1, ttl=60)
+        cache.set(slots._keys()[0], 'proceso-caido', timeout=60)
+        self.assertIsNone(slots._try_acquire('otro'))
+        cache.delete(slots._keys()[0])  # Vencimiento
+        self.assertIsNotNone(slots._try_acquire('otro'))
+
+    def test_token_bucket_por_tributo(self):
+        with self.settings(JUDGE_RATE_LIMIT_BURST=2, JUDGE_RATE_LIMIT_PER_MINUTE=1):
+            self.assertIsNone(check_rate_limit(self.tributo.id))
+            self.assertIsNone(check_rate_limit(self.tributo.id))
+            rechazo = check_rate_limit(self.tributo.id)
+            self.assertIsNone(check_rate_limit(self.tributo.id + 1))
+
+        self.assertEqual(rechazo['motivo'], 'limite_tributo')
+        self.assertGreater(rechazo['retry_after'], 50)
+
+    def test_token_bucket_atomico_entre_procesos(self):
+        admitidos = []
+
+        def enviar():
+            if check_rate_limit(self.tributo.id) is None:
+                admitidos.append(1)
+
+        with self.settings(JUDGE_RATE_LIMIT_BURST=3, JUDGE_RATE_LIMIT_PER_MINUTE=1):
+            # Candado tomado por otro proceso: los envíos esperan a que lo suelte
+            cache.add(f'judge:admission:tokens:{self.tributo.id}:lock', 'otro', timeout=5)
+            hilos = [threading.Thread(target=enviar) for _ in range(10)]
+            for hilo in hilos:
+                hilo.start()
+            time.sleep(0.1)
+            self.assertEqual(admitidos, [])
+            cache.delete(f'judge:admission:tokens:{self.tributo.id}:lock')
+            for hilo in hilos:
+                hilo.join()
+
+        self.assertEqual(len(admitidos), 3)
+
+    def test_cola_llena_responde_429(self):
+        self.client.force_login(self.usuario)
+        with self.settings(JUDGE_QUEUE_MAX_PENDING=1, JUDGE_QUEUE_RETRY_AFTER=20):
+            self.assertEqual(self._enviar().status_code, 202)
+            response = self._enviar()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '20')
+        self.assertEqual(Submission.objects.count(), 1)
+
+    def test_estadisticas_para_vigilantes(self):
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get(reverse('judge:admission_stats')).status_code, 403)
+
+        vigilante = Personaje.objects.create_user(
+            username='vigilante_test', password='pass123', rol='vigilante'
+        )
+        self.client.force_login(vigilante)
+        data = self.client.get(reverse('judge:admission_stats')).json()
+
+        self.assertEqual(data['cola'], 0)
+        self.assertIn('capacidad', data['slots'])
+
+
+class SchedulerTest(JudgeTestMixin, TestCase):
+    """Tests para la planificación por prioridad y reparto equitativo"""
+
+    def _tributo(self, username, distrito):
+        personaje = Personaje.objects.create_user(username=username, password='pass123', rol='tributo')
+        return TributoInfo.objects.create(
+            personaje=personaje, distrito=distrito, codigo_tributo=f'T-{username}',
+            credencial_generada=True
+        )
+
+    def _pendiente(self, tributo, segundos_en_cola, **kwargs):
+        return Submission.objects.create(
+            tributo=tributo, reto=self.reto, lenguaje='python', codigo='x', casos_totales=2,
+            fecha_encolado=timezone.now() - timedelta(seconds=segundos_en_cola), **kwargs
+        )
+
+    def test_concurso_antes_que_rejuicio(self):
+        rejuicio = self._pendiente(self.tributo, 60, prioridad=Submission.PRIORIDAD_REJUICIO)
+        concurso = self._pendiente(self.tributo, 1)
+
+        self.assertEqual(claim_next('host:1'), concurso.id)
+        self.assertEqual(claim_next('host:1'), rejuicio.id)
+
+    def test_tributo_insistente_no_bloquea_a_su_distrito(self):
+        otro = self._tributo('tributo_par', distrito=self.tributo.distrito)
+        self._pendiente(self.tributo, 30, reclamada_por='host:1', fecha_reclamo=timezone.now())
+        for segundos in (20, 15, 10):
+            self._pendiente(self.tributo, segundos)
+        del_par = self._pendiente(otro, 1)
+
+        with self.assertLogs('judge.scheduler', level='INFO') as logs:
+            self.assertEqual(claim_next('host:2'), del_par.id)
+
+        self.assertIn(f'submission={del_par.id}', logs.output[0])
+        self.assertIn('clase=concurso', logs.output[0])
+
+    def test_a_igual_consumo_de_tributo_decide_el_distrito(self):
+        vecino = self._tributo('tributo_vecino', distrito=self.tributo.distrito)
+        lejano = self._tributo('tributo_lejano', distrito=3)
+        self._pendiente(vecino, 30, reclamada_por='host:1', fecha_reclamo=timezone.now())
+        propio = self._pendiente(self.tributo, 20)
+        del_lejano = self._pendiente(lejano, 10)
+
+        self.assertEqual(claim_next('host:2'), del_lejano.id)
+        self.assertEqual(claim_next('host:2'), propio.id)
+
+    def test_reclamo_no_depende_del_largo_de_la_cola(self):
+        otro = self._tributo('tributo_masivo', distrito=3)
+        for segundos in range(50):
+            self._pendiente(otro, segundos, prioridad=Submission.PRIORIDAD_REJUICIO)
+        concurso = self._pendiente(self.tributo, 5)
+        primera = self._pendiente(otro, 100, prioridad=Submission.PRIORIDAD_REJUICIO)
+
+        with self.assertNumQueries(2):
+            candidatas = scheduler.pending_in_order()
+        self.assertEqual([c['id'] for c in candidatas], [concurso.id])
+
+        self.assertEqual(claim_next('host:1'), concurso.id)
+        candidatas = scheduler.pending_in_order()
+        self.assertEqual([c['id'] for c in candidatas], [primera.id])
+
+    def test_reclamo_reintenta_si_otro_worker_se_lleva_las_candidatas(self):
+        primera = self._pendiente(self.tributo, 20)
+        segunda = self._pendiente(self.tributo, 10)
+        pending_in_order = scheduler.pending_in_order
+
+        def otro_worker_reclama_primero():
+            candidatas = pending_in_order()
+            if candidatas and candidatas[0]['id'] == primera.id:
+                claim_submission(primera.id, 'host:otro')
+            return candidatas
+
+        with mock.patch('judge.scheduler.pending_in_order', side_effect=otro_worker_reclama_primero):
+            self.assertEqual(claim_next('host:1'), segunda.id)
+
+    def test_rejudge_vuelve_a_encolar(self):
+        submission = self._pendiente(
+            self.tributo, 60, veredicto='WA', huella='abc', reclamada_por='host:1',
+            fecha_reclamo=timezone.now()
+        )
+        with mock.patch('judge.worker.dispatch_submission') as dispatch:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(rejudge_submissions([submission.id]), 1)
+
+        submission.refresh_from_db()
+        self.assertEqual(submission.veredicto, 'PE')
+        self.assertEqual(submission.prioridad, Submission.PRIORIDAD_REJUICIO)
+        self.assertEqual(submission.huella, '')
+        dispatch.assert_called_once_with(submission.id)
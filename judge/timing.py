@@ -0,0 +1,164 @@
+"""
+Medición de las etapas de una evaluación
+StageTimer acumula la duración de cada etapa (preparación, espera de un
+sandbox, ejecución, análisis) y los ejecutores reportan las suyas en la
+clave `etapas` del resultado (arranque del sandbox, compilación). Las
+funciones de percentiles resumen muchas mediciones (benchmarks, métricas).
+Además de las duraciones, el runner y los ejecutores registran el instante
+(time.monotonic) en que se alcanza cada marca de la cronología; el worker
+guarda la cronología de la submission en milisegundos desde el encolado
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Etapas del runner
+ETAPA_PREPARACION = 'preparacion'  # Harness, tests y código a escribir
+ETAPA_ESPERA = 'espera_sandbox'  # Espera de un slot de sandbox libre
+ETAPA_EJECUCION = 'ejecucion'  # Ejecución completa en el backend
+ETAPA_ANALISIS = 'analisis'  # Veredicto a partir de los resultados
+
+# Etapas que reportan los ejecutores (incluidas en la de ejecución)
+ETAPA_ARRANQUE = 'arranque_sandbox'  # Crear/iniciar el contenedor o proceso
+ETAPA_COMPILACION = 'compilacion'  # Compilación de Java
+
+# Marcas de la cronología de una submission, en el orden habitual (en Java
+# la compilación ocurre antes de tomar el sandbox)
+MARCA_ENCOLADA = 'encolada'  # Ingreso a la cola (fecha_encolado)
+MARCA_TOMADA = 'tomada'  # Un worker empieza a evaluarla
+MARCA_COMPILADA = 'compilada'  # Compilación de Java (o caché) terminada
+MARCA_SANDBOX = 'sandbox'  # Contenedor (o proceso) iniciado o tomado del pool
+MARCA_CODIGO = 'codigo'  # Archivos escritos en el directorio del sandbox
+MARCA_EJECUTADA = 'ejecutada'  # Fin de la ejecución de los tests
+MARCA_LOGS = 'logs'  # Salida leída y resultado del sandbox armado
+MARCA_ANALIZADA = 'analizada'  # Veredicto calculado
+MARCA_GUARDADA = 'guardada'  # Resultado guardado en la BD
+MARCAS = (
+    MARCA_ENCOLADA, MARCA_TOMADA, MARCA_COMPILADA, MARCA_SANDBOX, MARCA_CODIGO,
+    MARCA_EJECUTADA, MARCA_LOGS, MARCA_ANALIZADA, MARCA_GUARDADA,
+)
+
+PERCENTILES = (50, 95, 99)
+
+
+class StageTimer:
+    """
+    Duración acumulada (segundos) por etapa
+    Es thread-safe: los shards de una submission suman sus etapas en el
+    mismo timer, por lo que con varios shards las etapas reflejan el trabajo
+    total y no la latencia
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, float] = {}
+        self._marks: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self._stages[name] = self._stages.get(name, 0.0) + seconds
+
+    def merge(self, stages: Optional[Dict[str, float]]):
+        """Suma las etapas reportadas por un ejecutor"""
+        for name, seconds in (stages or {}).items():
+            self.add(name, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {name: round(seconds, 6) for name, seconds in self._stages.items()}
+
+    def mark(self, name: str, at: Optional[float] = None):
+        """
+        Registra el instante (time.monotonic) de una marca de la cronología
+        Con varios shards se conserva el último: la marca se alcanza cuando
+        la alcanzan todos
+        """
+        at = time.monotonic() if at is None else at
+        with self._lock:
+            self._marks[name] = max(at, self._marks.get(name, at))
+
+    def merge_marks(self, marks: Optional[Dict[str, float]]):
+        """Suma las marcas reportadas por un ejecutor"""
+        for name, at in (marks or {}).items():
+            self.mark(name, at)
+
+    def marks(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._marks)
+
+
+def timeline(marks: Dict[str, float], origin: float, offset: float = 0.0) -> Dict[str, int]:
+    """
+    Cronología compacta: milisegundos desde el encolado hasta cada marca
+    `marks` son instantes de time.monotonic; `origin` es el instante en que
+    el worker tomó la submission y `offset` los segundos que esperó en cola
+    """
+    result = {MARCA_ENCOLADA: 0, MARCA_TOMADA: max(0, round(offset * 1000))}
+    for name in MARCAS:
+        if name in marks:
+            result[name] = max(0, round((offset + marks[name] - origin) * 1000))
+    return result
+
+
+def segments(marcas: Dict[str, int]) -> List[Tuple[str, int, int]]:
+    """
+    Tramos de una cronología en orden de tiempo: (marca, inicio, fin) en
+    milisegundos, donde cada tramo termina en su marca y empieza en la anterior
+    """
+    order = {name: i for i, name in enumerate(MARCAS)}
+    ordered = sorted(marcas.items(), key=lambda item: (item[1], order.get(item[0], len(order))))
+    return [
+        (name, previous, end)
+        for (_, previous), (name, end) in zip(ordered, ordered[1:])
+    ]
+
+
+def summarize_timelines(timelines: Iterable[Dict[str, int]]) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Percentiles (milisegundos) de la duración de cada tramo y del total
+    (del encolado a la última marca) sobre muchas cronologías
+    """
+    durations: Dict[str, List[float]] = {}
+    for marcas in timelines:
+        tramos = segments(marcas)
+        for name, start, end in tramos:
+            durations.setdefault(name, []).append(end - start)
+        if tramos:
+            durations.setdefault('total', []).append(tramos[-1][2])
+    order = {name: i for i, name in enumerate(MARCAS + ('total',))}
+    return {
+        name: summarize(values)
+        for name, values in sorted(durations.items(), key=lambda item: order.get(item[0], len(order)))
+    }
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Percentil `p` (0-100) por el método del rango más cercano"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values: Iterable[float]) -> Dict[str, Optional[float]]:
+    """Cantidad, media, máximo y percentiles 50/95/99 de las mediciones"""
+    values = sorted(values)
+    summary = {
+        'n': len(values),
+        'media': sum(values) / len(values) if values else None,
+        'max': values[-1] if values else None,
+    }
+    for p in PERCENTILES:
+        summary[f'p{p}'] = percentile(values, p)
+    return summary
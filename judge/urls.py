@@ -7,9 +7,18 @@ urlpatterns = [
     # Enviar solución
     path('submit/<int:reto_id>/', views.submit_solution, name='submit_solution'),
     
+    # Estado/veredicto de una submission (indica cuándo reintentar si está pendiente)
+    path('submission/<int:submission_id>/status/', views.submission_status, name='submission_status'),
+    
     # Ver detalles de una submission
     path('submission/<int:submission_id>/', views.submission_detail, name='submission_detail'),
     
     # Historial de submissions para un reto
     path('history/<int:reto_id>/', views.submission_history, name='submission_history'),
+    
+    # Estado de la admisión (cola, rechazos, slots) para el panel de vigilantes
+    path('admission/', views.admission_stats, name='admission_stats'),
+    
+    # Métricas en formato de Prometheus (scrape con JUDGE_METRICS_TOKEN)
+    path('metrics/', views.judge_metrics, name='metrics'),
 ]
@@ -0,0 +1,106 @@
+"""
+Caché de veredictos por submission
+Un reenvío byte-idéntico (módulo espacios al final de línea) al mismo reto,
+con los mismos tests y límites, reutiliza el veredicto de la evaluación previa
+en lugar de volver a ejecutar el código
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Submission
+from .runner import get_harness_version
+
+# Veredictos que no se reutilizan: dependen de la carga del host o del sistema
+VEREDICTOS_NO_CACHEABLES = ['PE', 'SE', 'TLE']
+
+
+def is_enabled() -> bool:
+    return getattr(settings, 'JUDGE_VERDICT_CACHE_ENABLED', True)
+
+
+def normalize_code(codigo: str) -> str:
+    """
+    Normaliza el código para que diferencias irrelevantes no cambien la huella:
+    fines de línea, espacios al final de cada línea y líneas vacías finales
+    """
+    lines = codigo.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).rstrip('\n')
+
+
+def compute_fingerprint(
+    codigo: str,
+    lenguaje: str,
+    tests: List[Dict[str, Any]],
+    limite_tiempo: float,
+    limite_memoria: int,
+    fail_fast: bool = False,
+    checker: Optional[Dict[str, Any]] = None,
+    limite_salida: Optional[int] = None,
+    datos: str = ''
+) -> str:
+    """
+    Huella de una evaluación: cambiar el código, los tests, los límites
+    (tiempo, memoria y salida), el modo fail-fast, el checker, el archivo
+    de datos (su huella, `datos`) o el harness produce una huella distinta,
+    invalidando el caché automáticamente
+    """
+    tests_hash = hashlib.sha256(
+        json.dumps(tests, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+
+    digest = hashlib.sha256()
+    for part in (
+        normalize_code(codigo),
+        lenguaje,
+        tests_hash,
+        repr(float(limite_tiempo)),
+        str(int(limite_memoria)),
+        str(limite_salida),
+        'fail_fast' if fail_fast else '',
+        json.dumps(checker or {}, sort_keys=True),
+        get_harness_version(),
+        # Solo los retos con archivo de datos: las huellas previas siguen valiendo
+        *((f'datos:{datos}',) if datos else ()),
+    ):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def find_cached(huella: str, exclude_id: Optional[int] = None) -> Optional[Submission]:
+    """Retorna la última submission evaluada con la misma huella"""
+    if not huella:
+        return None
+    queryset = Submission.objects.filter(huella=huella).exclude(
+        veredicto__in=VEREDICTOS_NO_CACHEABLES
+    )
+    if exclude_id is not None:
+        queryset = queryset.exclude(id=exclude_id)
+    return queryset.order_by('-fecha_evaluacion').first()
+
+
+def apply_cached(submission: Submission, cached: Submission) -> Submission:
+    """
+    Completa la submission con el resultado de la evaluación cacheada
+    (no guarda; el llamador decide cuándo persistir)
+    """
+    submission.veredicto = cached.veredicto
+    submission.puntos_obtenidos = cached.puntos_obtenidos
+    submission.casos_pasados = cached.casos_pasados
+    submission.casos_totales = cached.casos_totales
+    submission.casos_evaluados = cached.casos_evaluados
+    submission.tiempo_ejecucion = cached.tiempo_ejecucion
+    submission.tiempo_cpu = cached.tiempo_cpu
+    submission.memoria_usada = cached.memoria_usada
+    submission.stdout = cached.stdout
+    submission.stderr = cached.stderr
+    submission.detalles_ejecucion = {
+        **cached.detalles_ejecucion,
+        'cache': {'hit': True, 'submission_origen': cached.id}
+    }
+    submission.fecha_evaluacion = timezone.now()
+    return submission
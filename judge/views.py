@@ -3,15 +3,20 @@ Vistas para el sistema de juez automático
 """
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.db import transaction
+from django.conf import settings
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
 
 from arena.models import Reto
 from capitol.models import TributoInfo
 from .models import Submission
-from .runner import JudgeRunner
+from .checkers import checker_spec
+from .worker import dispatch_submission, recover_stale_claims
+from . import admission, metrics, verdict_cache
 
 
 @login_required
@@ -23,17 +28,20 @@ def submit_solution(request, reto_id):
     Flujo:
     1. Recibe código y lenguaje desde el POST
     2. Valida que el tributo puede enviar solución
-    3. Crea registro de Submission
-    4. Ejecuta el código usando JudgeRunner
-    5. Actualiza Submission con resultados
-    6. Retorna veredicto al frontend (sin detalles de tests)
+    3. Si hay una evaluación idéntica cacheada, retorna su veredicto
+       (respetando el límite de envíos del tributo: si lo supera, o si la
+       cola del juez está llena, retorna 429 con Retry-After)
+    4. Si no, crea registro de Submission en estado PE y encola la
+       evaluación en el pool de workers
+    5. Retorna 202 con el submission_id (el veredicto se obtiene
+       consultando submission_status)
     """
     # Obtener el reto
     reto = get_object_or_404(Reto, id=reto_id)
     
     # Verificar que el usuario es un tributo
     try:
-        tributo = TributoInfo.objects.get(personaje__usuario=request.user)
+        tributo = TributoInfo.objects.get(personaje=request.user)
     except TributoInfo.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -80,80 +88,137 @@ def submit_solution(request, reto_id):
         }, status=400)
     
     # Obtener tests ocultos del reto
-    tests = reto.tests_ocultos.get(lenguaje, [])
+    tests = reto.get_tests(lenguaje)
     if not tests:
         return JsonResponse({
             'success': False,
             'error': f'No hay tests configurados para {lenguaje} en este reto'
         }, status=400)
     
-    # Crear submission en estado pendiente
+    # Buscar una evaluación previa idéntica (mismo código, tests y límites)
+    huella = ''
+    cached = None
+    if verdict_cache.is_enabled():
+        huella = verdict_cache.compute_fingerprint(
+            codigo, lenguaje, tests, reto.limite_tiempo, reto.limite_memoria,
+            fail_fast=reto.fail_fast,
+            checker=checker_spec(reto.checker, reto.checker_config),
+            limite_salida=reto.limite_salida,
+            datos=reto.archivo_datos_huella
+        )
+        cached = verdict_cache.find_cached(huella)
+        metrics.observe_cache(metrics.CACHE_VEREDICTOS, cached is not None)
+    
+    # Control de admisión: cola acotada (solo si hay que evaluar) y límite
+    # de envíos por tributo. Las submissions abandonadas por un proceso
+    # caído no deben ocupar la cola
+    rechazo = None
+    if cached is None:
+        recover_stale_claims()
+        rechazo = admission.check_queue()
+    if rechazo is None:
+        rechazo = admission.check_rate_limit(tributo.id)
+    if rechazo is not None:
+        response = JsonResponse({
+            'success': False,
+            'error': rechazo['error'],
+            'motivo': rechazo['motivo']
+        }, status=429)
+        response['Retry-After'] = str(rechazo['retry_after'])
+        return response
+    
     with transaction.atomic():
-        submission = Submission.objects.create(
+        submission = Submission(
             tributo=tributo,
             reto=reto,
             lenguaje=lenguaje,
             codigo=codigo,
             veredicto='PE',  # Pending
-            casos_totales=len(tests)
+            casos_totales=len(tests),
+            huella=huella
         )
         
-        try:
-            # Ejecutar el juez
-            runner = JudgeRunner()
-            resultado = runner.evaluate_submission(
-                user_code=codigo,
-                language=lenguaje,
-                tests=tests,
-                time_limit=reto.limite_tiempo,
-                memory_limit=reto.limite_memoria
-            )
-            
-            # Actualizar submission con resultados
-            submission.veredicto = resultado['veredicto']
-            submission.puntos_obtenidos = resultado['puntos']
-            submission.casos_pasados = resultado['casos_pasados']
-            submission.tiempo_ejecucion = resultado.get('tiempo_ejecucion', 0)
-            submission.stdout = resultado.get('stdout', '')
-            submission.stderr = resultado.get('stderr', '')
-            submission.detalles_ejecucion = resultado.get('detalles', {})
-            submission.fecha_evaluacion = timezone.now()
+        # Acierto de caché: la submission queda evaluada sin ejecutar el código
+        if cached is not None:
+            verdict_cache.apply_cached(submission, cached)
             submission.save()
-            
-            # Preparar respuesta para el frontend (SIN detalles de tests ocultos)
-            response_data = {
-                'success': True,
-                'submission_id': submission.id,
-                'veredicto': submission.get_veredicto_display(),
-                'veredicto_code': submission.veredicto,
-                'puntos_obtenidos': submission.puntos_obtenidos,
-                'casos_pasados': submission.casos_pasados,
-                'casos_totales': submission.casos_totales,
-                'porcentaje_exito': submission.porcentaje_exito,
-                'tiempo_ejecucion': submission.tiempo_ejecucion,
-                'es_aceptado': submission.es_aceptado
-            }
-            
-            # Solo incluir stderr si hubo error (sin revelar detalles internos)
-            if submission.veredicto in ['RE', 'CE', 'SE']:
-                # Filtrar información sensible del stderr
-                stderr_filtered = _filter_sensitive_info(submission.stderr)
-                response_data['error_message'] = stderr_filtered
-            
-            return JsonResponse(response_data)
-            
-        except Exception as e:
-            # Error durante la evaluación
-            submission.veredicto = 'SE'
-            submission.stderr = f'Error del sistema: {str(e)}'
-            submission.fecha_evaluacion = timezone.now()
-            submission.save()
-            
-            return JsonResponse({
-                'success': False,
-                'error': 'Error al evaluar la solución. Intenta nuevamente.',
-                'submission_id': submission.id
-            }, status=500)
+            return JsonResponse(_submission_result(submission))
+        
+        # Crear submission en estado pendiente y encolarla para evaluación
+        submission.save()
+        transaction.on_commit(lambda: dispatch_submission(submission.id))
+    
+    # El veredicto se consulta en submission_status
+    return JsonResponse({
+        'success': True,
+        'submission_id': submission.id,
+        'veredicto': submission.get_veredicto_display(),
+        'veredicto_code': submission.veredicto,
+        'casos_totales': submission.casos_totales,
+        'status_url': reverse('judge:submission_status', args=[submission.id])
+    }, status=202)
+
+
+@login_required
+def submission_status(request, submission_id):
+    """
+    Retorna el estado/veredicto de una submission
+    
+    Responde de inmediato (una consulta, sin ocupar el worker); mientras la
+    submission está pendiente indica en `reintentar_en` y en Retry-After
+    cuántos segundos esperar antes de volver a consultar.
+    """
+    submission = get_object_or_404(Submission, id=submission_id)
+    
+    # Verificar permisos
+    es_dueno = submission.tributo.personaje_id == request.user.id
+    es_staff = request.user.rol in ['jefe_capitolio', 'mentor', 'vigilante']
+    
+    if not (es_dueno or es_staff):
+        return JsonResponse({
+            'success': False,
+            'error': 'No tienes permiso para ver esta submission'
+        }, status=403)
+    
+    data = _submission_result(submission)
+    if submission.veredicto != 'PE':
+        return JsonResponse(data)
+    
+    retry_after = max(1, getattr(settings, 'JUDGE_STATUS_POLL_INTERVAL', 1))
+    data['reintentar_en'] = retry_after
+    response = JsonResponse(data)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def _submission_result(submission: Submission) -> dict:
+    """
+    Prepara el resultado para el frontend (SIN detalles de tests ocultos)
+    """
+    response_data = {
+        'success': True,
+        'submission_id': submission.id,
+        'pendiente': submission.veredicto == 'PE',
+        'veredicto': submission.get_veredicto_display(),
+        'veredicto_code': submission.veredicto,
+        'puntos_obtenidos': submission.puntos_obtenidos,
+        'casos_pasados': submission.casos_pasados,
+        'casos_totales': submission.casos_totales,
+        'casos_evaluados': submission.casos_evaluados,
+        'porcentaje_exito': submission.porcentaje_exito,
+        'tiempo_ejecucion': submission.tiempo_ejecucion,
+        'tiempo_cpu': submission.tiempo_cpu,
+        'memoria_usada': submission.memoria_usada,
+        'es_aceptado': submission.es_aceptado
+    }
+    
+    # Solo incluir stderr si hubo error (sin revelar detalles internos)
+    if submission.veredicto in ['RE', 'CE', 'SE']:
+        # Filtrar información sensible del stderr
+        stderr_filtered = _filter_sensitive_info(submission.stderr)
+        response_data['error_message'] = stderr_filtered
+    
+    return response_data
 
 
 @login_required
@@ -165,7 +230,7 @@ def submission_detail(request, submission_id):
     submission = get_object_or_404(Submission, id=submission_id)
     
     # Verificar permisos
-    user_personaje = request.user.personaje
+    user_personaje = request.user
     es_dueno = submission.tributo.personaje == user_personaje
     es_staff = user_personaje.rol in ['jefe_capitolio', 'mentor', 'vigilante']
     
@@ -186,6 +251,8 @@ def submission_detail(request, submission_id):
         'casos_pasados': submission.casos_pasados,
         'casos_totales': submission.casos_totales,
         'tiempo_ejecucion': submission.tiempo_ejecucion,
+        'tiempo_cpu': submission.tiempo_cpu,
+        'memoria_usada': submission.memoria_usada,
         'fecha_envio': submission.fecha_envio.isoformat(),
         'es_aceptado': submission.es_aceptado
     }
@@ -213,7 +280,7 @@ def submission_history(request, reto_id):
     reto = get_object_or_404(Reto, id=reto_id)
     
     try:
-        tributo = TributoInfo.objects.get(personaje__usuario=request.user)
+        tributo = TributoInfo.objects.get(personaje=request.user)
     except TributoInfo.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -245,6 +312,38 @@ def submission_history(request, reto_id):
     return JsonResponse(data)
 
 
+@login_required
+def admission_stats(request):
+    """
+    Estado de la admisión del juez para el panel de vigilantes: cola,
+    rechazos y uso de los slots de sandbox
+    """
+    if request.user.rol != 'vigilante':
+        return JsonResponse({'error': 'Acceso denegado'}, status=403)
+    
+    return JsonResponse({
+        'success': True,
+        **admission.get_stats(),
+        'timestamp': timezone.now().isoformat()
+    })
+
+
+def judge_metrics(request):
+    """
+    Métricas del juez en formato de Prometheus (ver metrics.py)
+    Acceso con el token de JUDGE_METRICS_TOKEN (`Authorization: Bearer
+    <token>`) o con la sesión de un vigilante
+    """
+    token = getattr(settings, 'JUDGE_METRICS_TOKEN', '')
+    authorized = bool(token) and constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    )
+    if not authorized and getattr(request.user, 'rol', None) != 'vigilante':
+        return HttpResponse('Acceso denegado\n', status=403, content_type='text/plain')
+    
+    return HttpResponse(metrics.exposition(), content_type=metrics.CONTENT_TYPE)
+
+
 def _filter_sensitive_info(stderr: str) -> str:
     """
     Filtra información sensible del stderr antes de mostrarla al tributo
@@ -0,0 +1,301 @@
+"""
+Pool de workers en segundo plano para evaluar submissions
+La vista guarda la submission como PE y la encola; un worker ejecuta el juez
+y actualiza la submission con el veredicto
+Las submissions pendientes funcionan además como cola en la BD: un worker
+(hilo del pool o daemon del juez) reclama cada una antes de evaluarla, en el
+orden que decide scheduler.py
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Submission
+from .runner import JudgeRunner
+from .checkers import checker_spec
+from .data_cache import get_data_cache
+from .timing import MARCA_GUARDADA, timeline
+from . import metrics, scheduler, verdict_cache
+
+logger = logging.getLogger(__name__)
+
+# Intervalo mínimo entre actualizaciones del progreso en la BD (segundos)
+PROGRESS_INTERVAL = 0.5
+
+# Intervalo mínimo entre barridos de reclamos abandonados por proceso con
+# JUDGE_DISPATCH='thread' (segundos)
+RECOVER_INTERVAL = 60.0
+
+
+class JudgeWorkerPool:
+    """
+    Pool de hilos que evalúa submissions pendientes
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._executor = ThreadPoolExecutor(
+            max_workers=size,
+            thread_name_prefix='judge-worker'
+        )
+
+    def enqueue(self, submission_id: int):
+        """
+        Avisa que hay una submission nueva en la cola
+        Cada aviso ocupa un worker que reclama la siguiente submission según
+        la planificación (ver scheduler.py), que no tiene por qué ser esta
+        """
+        self._executor.submit(self._run, submission_id)
+
+    def wake(self, count: int):
+        """Ocupa `count` workers en reclamar submissions de la cola"""
+        for _ in range(count):
+            self._executor.submit(self._run, None)
+
+    def _run(self, submission_id: Optional[int]):
+        close_old_connections()
+        try:
+            recover_stale_claims()
+            submission_id = claim_next(worker_identity())
+            if submission_id is None:
+                return
+            judge_submission(submission_id)
+        except Exception:
+            logger.exception('Error evaluando submission #%s', submission_id)
+        finally:
+            close_old_connections()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> JudgeWorkerPool:
+    """Retorna el pool de workers del proceso (se crea la primera vez)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = JudgeWorkerPool(getattr(settings, 'JUDGE_WORKERS', 4))
+        return _pool
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner() -> JudgeRunner:
+    """
+    Retorna el runner del proceso (se crea la primera vez)
+    Se comparte entre workers para no reconectar con el backend ni recrear
+    el pool de contenedores en cada submission
+    """
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JudgeRunner()
+        return _runner
+
+
+def worker_identity() -> str:
+    """Identificador del proceso evaluador (host:pid)"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_submission(submission_id: int, worker_id: str) -> bool:
+    """
+    Reclama una submission pendiente para evaluarla
+    Retorna False si ya fue evaluada o la reclamó otro worker
+    """
+    return Submission.objects.filter(
+        id=submission_id, veredicto='PE', reclamada_por=''
+    ).update(reclamada_por=worker_id, fecha_reclamo=timezone.now()) == 1
+
+
+def claim_next(worker_id: str) -> Optional[int]:
+    """
+    Reclama la siguiente submission pendiente según la planificación
+    (prioridad y reparto equitativo). Retorna su id, o None si la cola está
+    vacía
+    """
+    while True:
+        candidatas = scheduler.pending_in_order()
+        if not candidatas:
+            return None
+        for candidate in candidatas:
+            if claim_submission(candidate['id'], worker_id):
+                scheduler.log_assignment(candidate, worker_id, len(candidatas))
+                return candidate['id']
+        # Otros workers se llevaron todas las candidatas: la cola avanzó
+
+
+def dispatch_submission(submission_id: int):
+    """
+    Entrega la submission pendiente a quien la evalúa según JUDGE_DISPATCH:
+    el pool de hilos del proceso ('thread') o el daemon del juez ('daemon')
+    """
+    if getattr(settings, 'JUDGE_DISPATCH', 'thread') == 'daemon':
+        from .daemon import notify_daemon
+        notify_daemon(submission_id)
+    else:
+        get_worker_pool().enqueue(submission_id)
+
+
+def rejudge_submissions(submission_ids, prioridad: int = Submission.PRIORIDAD_REJUICIO) -> int:
+    """
+    Vuelve a encolar submissions para evaluarlas de nuevo con la clase de
+    prioridad indicada (por defecto re-evaluación, detrás del concurso)
+    No se usa el caché de veredictos: se ejecuta el código otra vez.
+    Retorna la cantidad de submissions encoladas
+    """
+    submission_ids = list(submission_ids)
+    count = Submission.objects.filter(id__in=submission_ids).update(
+        veredicto='PE',
+        prioridad=prioridad,
+        fecha_encolado=timezone.now(),
+        reclamada_por='',
+        fecha_reclamo=None,
+        fecha_evaluacion=None,
+        casos_evaluados=0,
+        huella='',
+        marcas_tiempo={}
+    )
+    for submission_id in submission_ids:
+        transaction.on_commit(lambda submission_id=submission_id: dispatch_submission(submission_id))
+    return count
+
+
+def release_stale_claims(timeout: Optional[float] = None) -> int:
+    """
+    Devuelve a la cola las submissions reclamadas hace más de `timeout`
+    segundos que siguen pendientes (su worker murió a mitad de la evaluación)
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'JUDGE_CLAIM_TIMEOUT', 600)
+    limite = timezone.now() - timedelta(seconds=timeout)
+    return Submission.objects.filter(
+        veredicto='PE', fecha_reclamo__lt=limite
+    ).exclude(reclamada_por='').update(reclamada_por='', fecha_reclamo=None)
+
+
+def judge_submission(submission_id: int) -> Submission:
+    """
+    Evalúa una submission pendiente y guarda el resultado
+    """
+    submission = Submission.objects.select_related('reto').get(id=submission_id)
+    if submission.veredicto != 'PE':
+        return submission
+
+    # Una submission idéntica pudo evaluarse mientras esta esperaba en cola
+    cached = verdict_cache.find_cached(submission.huella, exclude_id=submission.id)
+    if cached is not None:
+        verdict_cache.apply_cached(submission, cached)
+        submission.save()
+        return submission
+
+    reto = submission.reto
+    tests = reto.get_tests(submission.lenguaje)
+
+    start = time.monotonic()
+    queued = (timezone.now() - submission.fecha_encolado).total_seconds()
+    marcas = {}
+    try:
+        # El archivo de datos del reto (si tiene) se toma del caché del nodo
+        with get_data_cache().lease(reto) as data_dir:
+            resultado = get_runner().evaluate_submission(
+                user_code=submission.codigo,
+                language=submission.lenguaje,
+                tests=tests,
+                time_limit=reto.limite_tiempo,
+                memory_limit=reto.limite_memoria,
+                fail_fast=reto.fail_fast,
+                checker=checker_spec(reto.checker, reto.checker_config),
+                output_limit=reto.limite_salida,
+                on_progress=_progress_reporter(submission.id),
+                submission_id=submission.id,
+                data_dir=data_dir
+            )
+
+        marcas = resultado.get('marcas') or {}
+        submission.veredicto = resultado['veredicto']
+        submission.puntos_obtenidos = resultado['puntos']
+        submission.casos_pasados = resultado['casos_pasados']
+        submission.tiempo_ejecucion = resultado.get('tiempo_ejecucion', 0)
+        submission.tiempo_cpu = resultado.get('tiempo_cpu')
+        submission.memoria_usada = resultado.get('memoria_usada')
+        submission.stdout = resultado.get('stdout', '')
+        submission.stderr = resultado.get('stderr', '')
+        submission.detalles_ejecucion = resultado.get('detalles', {})
+        submission.casos_evaluados = len(submission.detalles_ejecucion.get('tests', []))
+        if submission.huella:
+            submission.detalles_ejecucion['cache'] = {'hit': False}
+        metrics.observe_evaluation(
+            submission.lenguaje, reto.id, resultado, time.monotonic() - start
+        )
+
+    except Exception as e:
+        # Error durante la evaluación
+        submission.veredicto = 'SE'
+        submission.stderr = f'Error del sistema: {str(e)}'
+
+    submission.fecha_evaluacion = timezone.now()
+    submission.save()
+
+    # Cronología: la marca de guardado solo se conoce después de guardar
+    submission.marcas_tiempo = timeline({**marcas, MARCA_GUARDADA: time.monotonic()}, start, queued)
+    Submission.objects.filter(id=submission.id).update(marcas_tiempo=submission.marcas_tiempo)
+    return submission
+
+
+_last_recover = 0.0
+_recover_lock = threading.Lock()
+
+
+def recover_stale_claims() -> int:
+    """
+    Con JUDGE_DISPATCH='thread' devuelve a la cola las submissions de
+    procesos web caídos y las evalúa en este proceso (con 'daemon' lo hace el
+    chequeo de salud del daemon). Como mucho una vez cada RECOVER_INTERVAL
+    segundos por proceso; retorna la cantidad devuelta a la cola
+    """
+    global _last_recover
+    if getattr(settings, 'JUDGE_DISPATCH', 'thread') == 'daemon':
+        return 0
+    with _recover_lock:
+        now = time.monotonic()
+        if _last_recover and now - _last_recover < RECOVER_INTERVAL:
+            return 0
+        _last_recover = now
+    released = release_stale_claims()
+    if released:
+        logger.warning('%s submissions abandonadas devueltas a la cola', released)
+        get_worker_pool().wake(released)
+    return released
+
+
+def _progress_reporter(submission_id: int):
+    """
+    Crea el callback que publica el progreso (tests evaluados) en la
+    submission, como mucho una vez cada PROGRESS_INTERVAL segundos
+    """
+    last_update = 0.0
+
+    def report(casos_evaluados: int):
+        nonlocal last_update
+        now = time.monotonic()
+        if now - last_update < PROGRESS_INTERVAL:
+            return
+        last_update = now
+        Submission.objects.filter(id=submission_id, veredicto='PE').update(
+            casos_evaluados=casos_evaluados
+        )
+
+    return report
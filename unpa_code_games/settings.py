@@ -153,3 +153,59 @@ MEDIA_ROOT = BASE_DIR / "media"
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+
+# Sistema de Juez Automático
+# Backend de ejecución: DockerExecutor, LocalExecutor (solo código de confianza) o SimulatedExecutor
+JUDGE_EXECUTOR = config('JUDGE_EXECUTOR', default='judge.docker_executor.DockerExecutor')
+# Pool de contenedores pre-iniciados (ver judge/container_pool.py)
+JUDGE_POOL_ENABLED = config('JUDGE_POOL_ENABLED', default=True, cast=bool)
+JUDGE_POOL_SIZE = config('JUDGE_POOL_SIZE', default=2, cast=int)  # Contenedores por lenguaje
+JUDGE_POOL_MAX_REUSE = config('JUDGE_POOL_MAX_REUSE', default=50, cast=int)  # Usos antes de reciclar
+JUDGE_POOL_IDLE_TTL = config('JUDGE_POOL_IDLE_TTL', default=300, cast=int)  # Segundos sin uso antes de descartar
+JUDGE_JS_ZYGOTE = config('JUDGE_JS_ZYGOTE', default=True, cast=bool)  # Proceso de Node precalentado en el pool
+JUDGE_PYTHON_ZYGOTE = config('JUDGE_PYTHON_ZYGOTE', default=True, cast=bool)  # Fork-server de Python en los contenedores del pool
+JUDGE_SWEEP_INTERVAL = config('JUDGE_SWEEP_INTERVAL', default=300, cast=int)  # Segundos entre barridos de contenedores huérfanos (0 = sin barrido)
+JUDGE_SWEEP_MAX_AGE = config('JUDGE_SWEEP_MAX_AGE', default=1800, cast=int)  # Segundos tras los que un contenedor de ejecución se considera huérfano
+# Evaluación asíncrona (ver judge/worker.py)
+JUDGE_WORKERS = config('JUDGE_WORKERS', default=4, cast=int)  # Submissions evaluadas en paralelo
+JUDGE_DISPATCH = config('JUDGE_DISPATCH', default='thread')  # 'thread' (pool del proceso web) o 'daemon' (judge_daemon)
+JUDGE_CLAIM_TIMEOUT = config('JUDGE_CLAIM_TIMEOUT', default=600, cast=int)  # Segundos antes de devolver a la cola una submission abandonada
+JUDGE_FAIR_SHARE_WINDOW = config('JUDGE_FAIR_SHARE_WINDOW', default=300, cast=int)  # Segundos de consumo reciente para el reparto equitativo
+# Control de admisión (ver judge/admission.py)
+JUDGE_MAX_SANDBOXES = config('JUDGE_MAX_SANDBOXES', default=4, cast=int)  # Sandboxes simultáneos entre todos los procesos (caché compartido)
+JUDGE_SANDBOX_SLOT_TTL = config('JUDGE_SANDBOX_SLOT_TTL', default=600, cast=int)  # Vencimiento del slot de un proceso caído
+JUDGE_QUEUE_MAX_PENDING = config('JUDGE_QUEUE_MAX_PENDING', default=200, cast=int)  # Submissions pendientes antes de responder 429 (0 = sin límite)
+JUDGE_QUEUE_RETRY_AFTER = config('JUDGE_QUEUE_RETRY_AFTER', default=15, cast=int)  # Retry-After (segundos) con la cola llena
+JUDGE_RATE_LIMIT_BURST = config('JUDGE_RATE_LIMIT_BURST', default=5, cast=int)  # Envíos seguidos por tributo (0 = sin límite)
+JUDGE_RATE_LIMIT_PER_MINUTE = config('JUDGE_RATE_LIMIT_PER_MINUTE', default=6, cast=float)  # Recarga de envíos por minuto
+# Daemon del juez (ver judge/daemon.py)
+JUDGE_DAEMON_SOCKET = config('JUDGE_DAEMON_SOCKET', default='/tmp/unpa-judge.sock')
+JUDGE_DAEMON_POLL_INTERVAL = config('JUDGE_DAEMON_POLL_INTERVAL', default=2.0, cast=float)  # Sondeo de la cola en la BD
+JUDGE_DAEMON_HEALTH_INTERVAL = config('JUDGE_DAEMON_HEALTH_INTERVAL', default=10.0, cast=float)  # Chequeo del backend (reconexión a Docker)
+JUDGE_STATUS_POLL_INTERVAL = config('JUDGE_STATUS_POLL_INTERVAL', default=1, cast=int)  # Segundos entre consultas de estado (Retry-After)
+JUDGE_TEST_SHARDS = config('JUDGE_TEST_SHARDS', default=1, cast=int)  # Sandboxes en paralelo por submission
+JUDGE_WALL_TIME_FACTOR = config('JUDGE_WALL_TIME_FACTOR', default=2.0, cast=float)  # Tiempo real por test = factor × límite
+JUDGE_TIMEOUT_MARGIN = config('JUDGE_TIMEOUT_MARGIN', default=2.0, cast=float)  # Segundos extra del timeout del sandbox
+JUDGE_MAX_LOG_BYTES = config('JUDGE_MAX_LOG_BYTES', default=65536, cast=int)  # Bytes de stdout y de stderr que se guardan por sandbox
+JUDGE_CODE_DIR = config('JUDGE_CODE_DIR', default='/dev/shm')  # Directorios de código de las ejecuciones (tmpfs; vacío = temporal del sistema)
+# Caché de compilación Java (ver judge/java_cache.py)
+JUDGE_CACHE_DIR = config('JUDGE_CACHE_DIR', default=str(BASE_DIR / 'judge_cache'))
+JUDGE_JAVA_COMPILE_MEMORY = config('JUDGE_JAVA_COMPILE_MEMORY', default=512, cast=int)  # MB para javac
+JUDGE_JAVA_COMPILE_TIMEOUT = config('JUDGE_JAVA_COMPILE_TIMEOUT', default=30, cast=int)  # Segundos para javac
+JUDGE_JAVA_COMPILE_SERVICE = config('JUDGE_JAVA_COMPILE_SERVICE', default=True, cast=bool)  # Compilador de larga duración
+JUDGE_JAVA_CDS = config('JUDGE_JAVA_CDS', default=True, cast=bool)  # Archivo AppCDS del harness
+JUDGE_JAVA_CACHE_MAX_BYTES = config('JUDGE_JAVA_CACHE_MAX_BYTES', default=512 * 1024 ** 2, cast=int)  # Soluciones cacheadas antes de desalojar (LRU)
+# Checkers de salida (ver judge/checkers.py)
+JUDGE_CHECKER_TIMEOUT = config('JUDGE_CHECKER_TIMEOUT', default=10, cast=int)  # Segundos para un checker externo
+JUDGE_CHECKERS_DIR = config('JUDGE_CHECKERS_DIR', default=str(BASE_DIR / 'judge_checkers'))  # Programas checker permitidos
+JUDGE_EXPECTED_OUTPUTS_DIR = config('JUDGE_EXPECTED_OUTPUTS_DIR', default=str(BASE_DIR / 'judge_expected'))  # Salidas esperadas grandes (expected_file)
+# Caché de veredictos (ver judge/verdict_cache.py)
+JUDGE_VERDICT_CACHE_ENABLED = config('JUDGE_VERDICT_CACHE_ENABLED', default=True, cast=bool)
+# Paquetes de tests ocultos (ver judge/bundle_store.py)
+JUDGE_TEST_BUNDLE_CACHE_SIZE = config('JUDGE_TEST_BUNDLE_CACHE_SIZE', default=64, cast=int)  # Paquetes decodificados en memoria por proceso (LRU)
+# Caché local de archivos de datos de los retos (ver judge/data_cache.py)
+JUDGE_DATA_CACHE_DIR = config('JUDGE_DATA_CACHE_DIR', default=str(BASE_DIR / 'judge_data'))
+JUDGE_DATA_CACHE_MAX_BYTES = config('JUDGE_DATA_CACHE_MAX_BYTES', default=2 * 1024 ** 3, cast=int)  # Tamaño total antes de desalojar (LRU)
+# Métricas en formato de Prometheus (ver judge/metrics.py)
+JUDGE_METRICS_TOKEN = config('JUDGE_METRICS_TOKEN', default='')  # Token del scrape (Authorization: Bearer); vacío = solo vigilantes